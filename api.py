@@ -1,18 +1,31 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse, Response
+from fastapi.responses import StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
-import asyncio
 import json
 import os
+import time
 import httpx
 import base64
 from chatbots import ChatBotManager
 from product_manager import ProductManager
-from chatbot_flow_v3 import dynamic_ai_system
+from catalog import CatalogWatcher
 from config import Config
+from shared_state import TTSCacheIndex
+from streaming import PacingMode, StreamPacer, sse_event
+from turn_graph import stream_turns
+from debate_flows import (
+    CONCLUSION_REQUEST,
+    graph_history,
+    improved_conclusion_graph,
+    improved_opening_graph,
+    improved_response_graph,
+)
+from chatbot_flow import ImprovedChatBotFlow
+from chatbot_flow_v2 import RealAIChatBotFlow
+from product_search import budget_context
 
 app = FastAPI(
     title="챗봇 대화 시스템",
@@ -36,6 +49,10 @@ if os.path.exists("static"):
 # 전역 매니저
 chatbot_manager = ChatBotManager()
 product_manager = ProductManager()
+catalog_watcher = CatalogWatcher()
+tts_cache = TTSCacheIndex()
+ai_flow = RealAIChatBotFlow()  # /product/debate/improved 첫 논쟁
+improved_flow = ImprovedChatBotFlow()  # /product/debate/improved/respond
 # dynamic_ai_system은 이미 chatbot_flow_v3에서 싱글톤으로 생성됨
 
 # 데이터 기반 논쟁 엔드포인트 임포트 및 등록
@@ -57,6 +74,7 @@ class ProductDebateRequest(BaseModel):
     max_turns: Optional[int] = 3
     user_info: Optional[str] = None
     use_improved_flow: Optional[bool] = True  # 새 플로우 사용 여부
+    pacing: Optional[PacingMode] = None  # 스트리밍 페이싱 모드
 
 class TTSRequest(BaseModel):
     text: str
@@ -89,6 +107,14 @@ async def startup_event():
     except ValueError as e:
         print(f"❌ 환경변수 설정 오류: {e}")
         raise
+    
+    # 카탈로그 파일 감시 (가격 변경 시 재시작 불필요)
+    if Config.CATALOG_WATCH:
+        catalog_watcher.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await catalog_watcher.stop()
 
 @app.get("/")
 async def root():
@@ -171,18 +197,18 @@ async def start_debate_stream(request: DebateRequest):
     async def generate_debate():
         try:
             if not request.topic.strip():
-                yield f"data: {json.dumps({'error': '논쟁 주제를 입력해주세요.'})}\n\n"
+                yield sse_event({'error': '논쟁 주제를 입력해주세요.'})
                 return
             
             if request.max_turns < 1 or request.max_turns > 6:
-                yield f"data: {json.dumps({'error': '논쟁 턴 수는 1-6 사이여야 합니다.'})}\n\n"
+                yield sse_event({'error': '논쟁 턴 수는 1-6 사이여야 합니다.'})
                 return
             
             # 논쟁 시작 메시지
-            yield f"data: {json.dumps({'type': 'start', 'topic': request.topic, 'message': f'논쟁 시작: {request.topic}'})}\n\n"
+            yield sse_event({'type': 'start', 'topic': request.topic, 'message': f'논쟁 시작: {request.topic}'})
             
             # 논쟁 시작 전 구매봇 타이핑 인디케이터 표시 (즉시 표시)
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구매봇'})}\n\n"
+            yield sse_event({'type': 'typing', 'speaker': '구매봇'})
             
             # 스트리밍 논쟁 실행
             async for stream_data in chatbot_manager.start_streaming_debate(
@@ -192,10 +218,10 @@ async def start_debate_stream(request: DebateRequest):
             ):
                 if isinstance(stream_data, dict) and 'type' in stream_data:
                     # 스트리밍 데이터 (typing, streaming, complete)
-                    yield f"data: {json.dumps(stream_data)}\n\n"
+                    yield sse_event(stream_data)
                 else:
                     # 기존 턴 데이터
-                    yield f"data: {json.dumps({'type': 'turn', 'data': stream_data})}\n\n"
+                    yield sse_event({'type': 'turn', 'data': stream_data})
             
             # 논쟁이 끝난 후 안내봇이 등장하도록 보장
             # 안내봇이 아직 등장하지 않았다면 강제로 등장시킴
@@ -209,12 +235,12 @@ async def start_debate_stream(request: DebateRequest):
                     "message": guide_message,
                     "timestamp": chatbot_manager.get_timestamp()
                 }
-                yield f"data: {json.dumps({'type': 'turn', 'data': guide_turn})}\n\n"
+                yield sse_event({'type': 'turn', 'data': guide_turn})
             
-            yield f"data: {json.dumps({'type': 'end', 'message': '논쟁이 종료되었습니다.'})}\n\n"
+            yield sse_event({'type': 'end', 'message': '논쟁이 종료되었습니다.'})
             
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': f'논쟁 중 오류 발생: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'논쟁 중 오류 발생: {str(e)}'})
     
     return StreamingResponse(
         generate_debate(),
@@ -321,16 +347,18 @@ async def save_user_qa(request: UserQARequest):
 @app.post("/product/debate/stream")
 async def start_product_debate_stream(request: ProductDebateRequest):
     """특정 제품에 대한 실시간 스트리밍 논쟁"""
+    pacer = StreamPacer.for_request(request.pacing, chunk_size=20)
+    
     async def generate_product_debate():
         try:
             if request.max_turns < 1 or request.max_turns > 6:
-                yield f"data: {json.dumps({'error': '논쟁 턴 수는 1-6 사이여야 합니다.'})}\n\n"
+                yield sse_event({'error': '논쟁 턴 수는 1-6 사이여야 합니다.'})
                 return
             
             # 제품 정보 확인
             product = product_manager.get_product_by_id(request.product_id)
             if not product:
-                yield f"data: {json.dumps({'error': f'제품 ID {request.product_id}를 찾을 수 없습니다.'})}\n\n"
+                yield sse_event({'error': f'제품 ID {request.product_id}를 찾을 수 없습니다.'})
                 return
             
             # 사용자 정보에서 지원하지 않는 주기 확인 (구독 관련 문맥에서만)
@@ -361,46 +389,41 @@ async def start_product_debate_stream(request: ProductDebateRequest):
                                     f"제품: {product['name']}\n사용자 요청 기간: {period}\n지원 기간: {', '.join(available_periods)}",
                                     debate_mode=False
                                 )
-                                yield f"data: {json.dumps({'type': 'guide', 'speaker': '안내봇', 'message': guide_message, 'timestamp': '00:00:00'})}\n\n"
+                                yield sse_event({'type': 'guide', 'speaker': '안내봇', 'message': guide_message, 'timestamp': '00:00:00'})
                             return
             
             # 논쟁 시작 메시지
             product_name = product["name"]
-            yield f"data: {json.dumps({'type': 'start', 'product': product, 'message': f'논쟁 시작: {product_name} - 구매 vs 구독'})}\n\n"
+            yield sse_event({'type': 'start', 'product': product, 'message': f'논쟁 시작: {product_name} - 구매 vs 구독'})
             
             # 논쟁 시작 전 구매봇 타이핑 인디케이터 표시 (즉시 표시)
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구매봇'})}\n\n"
+            yield sse_event({'type': 'typing', 'speaker': '구매봇'})
             
             # 제품 기반 논쟁 실행 (새로운 데이터 기반 방식)
+            started = time.perf_counter()
             debate_result = await chatbot_manager.start_debate_with_product(
                 product_id=request.product_id,
                 max_turns=4,  # 각자 최소 2번씩 = 총 4턴
                 user_info=request.user_info
             )
+            waited = time.perf_counter() - started
+            pacer.record_upstream(sum(len(turn.get('message', '')) for turn in debate_result), waited)
             
             # 논쟁 결과를 스트리밍 형태로 전송
             for idx, turn_data in enumerate(debate_result):
                 # 각 턴에 대해 타이핑 효과와 함께 전송
                 speaker = turn_data.get('speaker', '')
+                is_debater = speaker in ['구매봇', '구독봇']
                 
                 # 타이핑 인디케이터 전송 (안내봇 제외)
-                if speaker in ['구매봇', '구독봇']:
-                    yield f"data: {json.dumps({'type': 'typing', 'speaker': speaker})}\n\n"
-                    await asyncio.sleep(0.5)  # 타이핑 효과를 위한 짧은 지연
+                if is_debater:
+                    yield sse_event({'type': 'typing', 'speaker': speaker})
                 
                 # 메시지 전송 (스트리밍 효과)
                 message = turn_data.get('message', '')
-                # 메시지를 청크로 나누어 전송
-                chunk_size = 20  # 한 번에 전송할 문자 수
-                for i in range(0, len(message), chunk_size):
-                    chunk = message[i:i+chunk_size]
-                    stream_data = {
-                        'type': 'streaming',
-                        'speaker': speaker,
-                        'content': chunk
-                    }
-                    yield f"data: {json.dumps(stream_data)}\n\n"
-                    await asyncio.sleep(0.02)  # 스트리밍 효과를 위한 지연
+                async for event in pacer.stream_text(speaker, message, waited=waited, pause=is_debater):
+                    yield event
+                waited = 0.0
                 
                 # 턴 완료 신호
                 complete_data = {
@@ -409,7 +432,7 @@ async def start_product_debate_stream(request: ProductDebateRequest):
                     'turn': idx + 1,
                     'timestamp': turn_data.get('timestamp', '')
                 }
-                yield f"data: {json.dumps(complete_data)}\n\n"
+                yield sse_event(complete_data)
             
             # 논쟁이 끝난 후 안내봇이 등장하도록 보장
             # 안내봇이 마지막 발언자가 아니라면 확인
@@ -419,26 +442,18 @@ async def start_product_debate_stream(request: ProductDebateRequest):
                 guide_bot = chatbot_manager.chatbots.get('안내봇')
                 if guide_bot:
                     from datetime import datetime
-                    guide_message = await guide_bot.generate_response(
+                    guide_message = await pacer.timed(guide_bot.generate_response(
                         "논쟁을 정리하고 고객에게 도움이 되는 조언을 해주세요",
                         f"제품: {product_name}\n논쟁 요약 완료",
                         debate_mode=False
-                    )
+                    ))
                     
                     # 타이핑 효과
-                    yield f"data: {json.dumps({'type': 'typing', 'speaker': '안내봇'})}\n\n"
-                    await asyncio.sleep(0.5)
+                    yield sse_event({'type': 'typing', 'speaker': '안내봇'})
                     
                     # 스트리밍 전송
-                    for i in range(0, len(guide_message), 20):
-                        chunk = guide_message[i:i+20]
-                        stream_data = {
-                            'type': 'streaming',
-                            'speaker': '안내봇',
-                            'content': chunk
-                        }
-                        yield f"data: {json.dumps(stream_data)}\n\n"
-                        await asyncio.sleep(0.02)
+                    async for event in pacer.stream_text('안내봇', guide_message):
+                        yield event
                     
                     # 완료 신호
                     complete_data = {
@@ -447,12 +462,12 @@ async def start_product_debate_stream(request: ProductDebateRequest):
                         'turn': len(conversation_log) + 1,
                         'timestamp': datetime.now().isoformat()
                     }
-                    yield f"data: {json.dumps(complete_data)}\n\n"
+                    yield sse_event(complete_data)
             
-            yield f"data: {json.dumps({'type': 'end', 'message': '논쟁이 종료되었습니다.'})}\n\n"
+            yield sse_event({'type': 'end', 'message': '논쟁이 종료되었습니다.'})
             
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': f'논쟁 중 오류 발생: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'논쟁 중 오류 발생: {str(e)}'})
     
     return StreamingResponse(
         generate_product_debate(),
@@ -528,8 +543,17 @@ async def get_conversation_history():
 
 @app.post("/tts/generate")
 async def generate_speech(request: TTSRequest):
-    """텍스트를 음성으로 변환 (Azure OpenAI TTS 사용)"""
+    """텍스트를 음성으로 변환 (Azure OpenAI TTS 사용, 같은 텍스트/음성/속도는 워커 간 공유 캐시에서)"""
     try:
+        cached_audio = await tts_cache.lookup(request.text, request.voice, request.speed)
+        if cached_audio is not None:
+            return {
+                "success": True,
+                "audio_data": base64.b64encode(cached_audio).decode('utf-8'),
+                "format": "mp3",
+                "cached": True
+            }
+        
         # Azure OpenAI TTS API 호출
         headers = {
             "Authorization": f"Bearer {Config.AZURE_OPENAI_API_KEY}",
@@ -555,6 +579,7 @@ async def generate_speech(request: TTSRequest):
             )
             
             if response.status_code == 200:
+                await tts_cache.store(request.text, request.voice, request.speed, response.content)
                 # 오디오 데이터를 base64로 인코딩하여 반환
                 audio_data = base64.b64encode(response.content).decode('utf-8')
                 return {
@@ -646,87 +671,38 @@ async def continue_debate(request: dict):
 @app.post("/product/debate/improved")
 async def start_improved_debate_flow(request: ProductDebateRequest):
     """완전히 새로운 AI 대화 플로우"""
+    pacer = StreamPacer.for_request(request.pacing)
+    
     async def generate_improved_debate():
         try:
             # 제품 정보 확인
             product = product_manager.get_product_by_id(request.product_id)
             if not product:
-                yield f"data: {json.dumps({'error': f'제품 ID {request.product_id}를 찾을 수 없습니다.'})}\n\n"
+                yield sse_event({'error': f'제품 ID {request.product_id}를 찾을 수 없습니다.'})
                 return
             
             product_name = product["name"]
-            conversation_history = []
             
             # 시작 메시지
-            yield f"data: {json.dumps({'type': 'start', 'product': product, 'message': f'{product_name} - 구매 vs 구독 AI 분석'})}\n\n"
-            
-            # 1. 구매봇의 자유로운 의견
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구매봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            purchase_message = await ai_flow.generate_purchase_bot_argument(
-                request.product_id, 
-                {'history': conversation_history}
-            )
-            conversation_history.append({'speaker': '구매봇', 'message': purchase_message})
-            
-            for i in range(0, len(purchase_message), 30):
-                chunk = purchase_message[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '구매봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
+            yield sse_event({'type': 'start', 'product': product, 'message': f'{product_name} - 구매 vs 구독 AI 분석'})
             
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '구매봇', 'turn': 1})}\n\n"
+            # 구매봇 의견 → 구독봇 의견 → 안내봇 질문 (두 의견은 동시에 생성)
+            graph = improved_opening_graph(ai_flow, request.product_id)
+            turn_run = graph.start()
+            async for event in stream_turns(turn_run, pacer):
+                yield event
             
-            # 2. 구독봇의 자유로운 의견
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구독봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            subscription_message = await ai_flow.generate_subscription_bot_argument(
-                request.product_id,
-                {'history': conversation_history}
-            )
-            conversation_history.append({'speaker': '구독봇', 'message': subscription_message})
-            
-            for i in range(0, len(subscription_message), 30):
-                chunk = subscription_message[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '구독봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '구독봇', 'turn': 2})}\n\n"
-            
-            # 3. 안내봇의 자연스러운 질문
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '안내봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            guide_question = await ai_flow.generate_guide_bot_question(
-                request.product_id,
-                conversation_history
-            )
-            
-            guide_intro = random.choice([
-                "둘 다 좋은 점이 있긴해!",
-                "각자 장단점이 있긴해!",
-                "흥미로운 의견들이긴해!",
-                "고민이 되긴해!"
-            ])
-            
-            full_message = f"{guide_intro} {guide_question['question']}"
-            conversation_history.append({'speaker': '안내봇', 'message': full_message})
-            
-            for i in range(0, len(full_message), 30):
-                chunk = full_message[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '안내봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
+            conversation_history = graph_history(turn_run, key='message')
             
             # 질문 제안 전달
-            yield f"data: {json.dumps({'type': 'guide_question', 'question': guide_question['question'], 'suggestions': guide_question['suggestions'], 'history': conversation_history})}\n\n"
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '안내봇', 'turn': 3})}\n\n"
-            yield f"data: {json.dumps({'type': 'waiting_user', 'message': '사용자 응답 대기 중...'})}\n\n"
+            yield sse_event({'type': 'guide_question', 'question': turn_run.results['question'].text, 'suggestions': graph.extras['suggestions'], 'history': conversation_history})
+            yield sse_event({'type': 'complete', 'speaker': '안내봇', 'turn': 3})
+            yield sse_event({'type': 'waiting_user', 'message': '사용자 응답 대기 중...'})
             
         except Exception as e:
             import traceback
             traceback.print_exc()
-            yield f"data: {json.dumps({'type': 'error', 'message': f'오류 발생: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'오류 발생: {str(e)}'})
     
     return StreamingResponse(
         generate_improved_debate(),
@@ -744,122 +720,52 @@ class ImprovedFlowUserRequest(BaseModel):
     product_id: int
     user_input: str
     conversation_history: List[Dict[str, Any]]
+    pacing: Optional[PacingMode] = None
 
 @app.post("/product/debate/improved/respond")
 async def respond_to_user_improved(request: ImprovedFlowUserRequest):
     """개선된 플로우에서 사용자 응답 처리"""
+    pacer = StreamPacer.for_request(request.pacing)
+    
     async def generate_response():
         try:
             # 사용자가 "이제 결론을 내줘"를 선택한 경우
-            if request.user_input == "이제 결론을 내줘":
-                final_conclusion = await improved_flow.generate_final_conclusion(
-                    request.product_id, 
+            if request.user_input == CONCLUSION_REQUEST:
+                turn_run = improved_conclusion_graph(
+                    improved_flow,
+                    request.product_id,
                     request.conversation_history
-                )
-                
-                yield f"data: {json.dumps({'type': 'typing', 'speaker': '안내봇'})}\n\n"
-                await asyncio.sleep(0.5)
+                ).start()
+                async for event in stream_turns(turn_run, pacer):
+                    yield event
                 
-                for i in range(0, len(final_conclusion), 30):
-                    chunk = final_conclusion[i:i+30]
-                    yield f"data: {json.dumps({'type': 'streaming', 'speaker': '안내봇', 'content': chunk})}\n\n"
-                    await asyncio.sleep(0.02)
-                
-                yield f"data: {json.dumps({'type': 'complete', 'speaker': '안내봇'})}\n\n"
-                yield f"data: {json.dumps({'type': 'end', 'message': '상담이 완료되었습니다.'})}\n\n"
+                yield sse_event({'type': 'end', 'message': '상담이 완료되었습니다.'})
                 return
             
-            # 랜덤으로 응답할 봇 선택
-            import random
-            responding_bot = random.choice(['구매봇', '구독봇'])
-            
-            # 사용자 입력에 대한 봇 응답 생성
-            bot_response = await improved_flow.generate_response_to_user(
-                request.product_id,
-                request.user_input,
-                responding_bot,
-                request.conversation_history
+            # 예산 조건이 있으면 검색 결과 먼저 전송 (봇 응답 프롬프트에도 주입됨)
+            budget_query, budget_results, budget_line = budget_context(
+                request.user_input, request.product_id, improved_flow.product_manager.snapshot
             )
+            if budget_line:
+                yield sse_event({'type': 'search_results', 'condition': budget_query.describe(), 'results': budget_results})
             
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': responding_bot})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            for i in range(0, len(bot_response), 30):
-                chunk = bot_response[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': responding_bot, 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': responding_bot})}\n\n"
-            
-            # 상대 봇의 반박 또는 주제 전환
-            other_bot = '구독봇' if responding_bot == '구매봇' else '구매봇'
-            turn_count = len([msg for msg in request.conversation_history if msg.get('speaker') in ['구매봇', '구독봇']])
-            
-            rebuttal = await improved_flow.generate_rebuttal(
+            # 봇 응답 → 상대 봇 반박 → 재반박, 안내봇의 다음 질문은 동시에 생성
+            graph = improved_response_graph(
+                improved_flow,
                 request.product_id,
-                bot_response,
-                other_bot,
-                turn_count + 1
-            )
-            
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': other_bot})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            for i in range(0, len(rebuttal), 30):
-                chunk = rebuttal[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': other_bot, 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': other_bot})}\n\n"
-            
-            # 8번 단계: 첫 번째 봇이 다시 반박
-            final_rebuttal = await improved_flow.generate_rebuttal(
-                request.product_id,
-                rebuttal,
-                responding_bot,
-                turn_count + 2
-            )
-            
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': responding_bot})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            for i in range(0, len(final_rebuttal), 30):
-                chunk = final_rebuttal[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': responding_bot, 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': responding_bot})}\n\n"
-            
-            # 9번 단계: 안내봇이 정리하고 다음 질문 생성
-            next_question = await improved_flow.generate_guide_question(
-                request.product_id, 
-                turn_count + 3,
+                request.user_input,
                 request.conversation_history
             )
+            turn_run = graph.start()
+            async for event in stream_turns(turn_run, pacer):
+                yield event
             
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '안내봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            # 안내봇 메시지를 더 자연스럽게
-            guide_intros = [
-                "흥미로운 논쟁이긴해!",
-                "둘 다 일리가 있긴해!",
-                "각자 좋은 점이 있긴해!",
-                "재미있는 토론이긴해!",
-                "이런 관점도 있긴해!"
-            ]
-            guide_message = f"{random.choice(guide_intros)} {next_question['question']}"
-            for i in range(0, len(guide_message), 30):
-                chunk = guide_message[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '안내봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'guide_question', 'question': next_question['question'], 'suggestions': next_question['suggestions']})}\n\n"
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '안내봇'})}\n\n"
-            yield f"data: {json.dumps({'type': 'waiting_user', 'message': '사용자 응답을 기다리는 중...'})}\n\n"
+            yield sse_event({'type': 'guide_question', 'question': turn_run.results['question'].text, 'suggestions': graph.extras['suggestions']})
+            yield sse_event({'type': 'complete', 'speaker': '안내봇'})
+            yield sse_event({'type': 'waiting_user', 'message': '사용자 응답을 기다리는 중...'})
             
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': f'응답 처리 중 오류 발생: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'응답 처리 중 오류 발생: {str(e)}'})
     
     return StreamingResponse(
         generate_response(),
@@ -4,63 +4,61 @@
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
 from typing import Optional
-import json
-import asyncio
+import time
 from datetime import datetime
 from product_manager import ProductManager
 from chatbots import ChatBotManager
+from streaming import PacingMode, StreamPacer, sse_event
 
 async def data_driven_product_debate(
     app,
     product_id: int,
     max_turns: int = 4,
-    user_info: Optional[str] = None
+    user_info: Optional[str] = None,
+    pacing: Optional[str] = None
 ):
     """데이터 기반 제품 논쟁 엔드포인트"""
     chatbot_manager = ChatBotManager()
     product_manager = ProductManager()
+    pacer = StreamPacer.for_request(pacing, turn_delay=0.3)
     
     async def generate_debate():
         try:
             # 제품 정보 확인
             product = product_manager.get_product_by_id(product_id)
             if not product:
-                yield f"data: {json.dumps({'type': 'error', 'message': f'제품 ID {product_id}를 찾을 수 없습니다.'})}\n\n"
+                yield sse_event({'type': 'error', 'message': f'제품 ID {product_id}를 찾을 수 없습니다.'})
                 return
             
             product_name = product.get("name", "제품")
             
             # 논쟁 시작 메시지
-            yield f"data: {json.dumps({'type': 'start', 'product': product, 'message': f'데이터 기반 논쟁 시작: {product_name}'})}\n\n"
+            yield sse_event({'type': 'start', 'product': product, 'message': f'데이터 기반 논쟁 시작: {product_name}'})
             
             # 데이터 기반 논쟁 실행
+            started = time.perf_counter()
             debate_result = await chatbot_manager.start_debate_with_product(
                 product_id=product_id,
                 max_turns=max_turns,
                 user_info=user_info
             )
+            waited = time.perf_counter() - started
+            pacer.record_upstream(sum(len(turn.get('message', '')) for turn in debate_result), waited)
             
             # 결과를 스트리밍 형태로 전송
             for idx, turn_data in enumerate(debate_result):
                 speaker = turn_data.get('speaker', '')
                 message = turn_data.get('message', '')
                 
-                # 타이핑 효과
-                if speaker in ['구매봇', '구독봇']:
-                    yield f"data: {json.dumps({'type': 'typing', 'speaker': speaker})}\n\n"
-                    await asyncio.sleep(0.3)
+                # 타이핑 효과 (메시지 사이 간격 포함)
+                is_debater = speaker in ['구매봇', '구독봇']
+                if is_debater:
+                    yield sse_event({'type': 'typing', 'speaker': speaker})
                 
                 # 메시지 스트리밍
-                chunk_size = 30
-                for i in range(0, len(message), chunk_size):
-                    chunk = message[i:i+chunk_size]
-                    stream_data = {
-                        'type': 'streaming',
-                        'speaker': speaker,
-                        'content': chunk
-                    }
-                    yield f"data: {json.dumps(stream_data)}\n\n"
-                    await asyncio.sleep(0.02)
+                async for event in pacer.stream_text(speaker, message, waited=waited, pause=is_debater or idx > 0):
+                    yield event
+                waited = 0.0
                 
                 # 턴 완료
                 complete_data = {
@@ -69,15 +67,12 @@ async def data_driven_product_debate(
                     'turn': idx + 1,
                     'timestamp': turn_data.get('timestamp', datetime.now().isoformat())
                 }
-                yield f"data: {json.dumps(complete_data)}\n\n"
-                
-                # 메시지 사이 간격
-                await asyncio.sleep(0.5)
+                yield sse_event(complete_data)
             
-            yield f"data: {json.dumps({'type': 'end', 'message': '데이터 기반 논쟁이 종료되었습니다.'})}\n\n"
+            yield sse_event({'type': 'end', 'message': '데이터 기반 논쟁이 종료되었습니다.'})
             
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': f'논쟁 중 오류 발생: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'논쟁 중 오류 발생: {str(e)}'})
     
     return StreamingResponse(
         generate_debate(),
@@ -97,10 +92,11 @@ def register_data_debate_endpoints(app):
     async def start_data_driven_debate(
         product_id: int,
         max_turns: int = 4,
-        user_info: Optional[str] = None
+        user_info: Optional[str] = None,
+        pacing: Optional[PacingMode] = None
     ):
         """데이터 기반 제품 논쟁 시작"""
-        return await data_driven_product_debate(app, product_id, max_turns, user_info)
+        return await data_driven_product_debate(app, product_id, max_turns, user_info, pacing)
     
     @app.get("/data-debate/test/{product_id}")
     async def test_data_debate(product_id: int):
@@ -2,20 +2,49 @@
 완전히 새로운 동적 AI 챗봇 API 엔드포인트 - 모든 필수 엔드포인트 포함
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
-import asyncio
-import json
+import hmac
 import os
-import random
+import time
+import uuid
+from dataclasses import asdict
 from chatbot_flow_v3 import dynamic_ai_system
 from chatbots import ChatBotManager
 from product_manager import ProductManager
+from catalog import CatalogWatcher
+from pricing import pricing_for
+from cost_curves import cost_curves_for
+from penalty import penalty_for
+from benefit_facts import facts_for
+from product_search import BudgetQuery, budget_context, parse_budget, search_index_for
+from recommender import recommender_for
+from bundle import bundle_analysis, bundle_summary
+from opening_pool import get_opening_pool
 from config import Config
+from loop_monitor import monitor as loop_monitor
+from lifecycle import lifecycle
+import profiler
+from usage import ledger as usage_ledger, rollup_writer as usage_rollup_writer, session_stream
+from shared_state import session_store
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, record_cache, registry as metrics_registry
+from streaming import PacingMode, StreamPacer, sse_event
+from tracing import span as trace_span, trace_stream
+from debate_flows import (
+    CONCLUSION_REQUEST,
+    dynamic_compare_graph,
+    dynamic_conclusion_graph,
+    dynamic_opening_graph,
+    dynamic_response_graph,
+    graph_history,
+    question_suggestions,
+    stored_opening_graph,
+)
+from turn_graph import stream_turns
 
 app = FastAPI(
     title="동적 AI 챗봇 시스템",
@@ -32,66 +61,156 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 라우트별 요청 시간 / SSE 첫 이벤트·waiting_user 시간 메트릭
+app.add_middleware(MetricsMiddleware)
+
 # Static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # 전역 매니저
 chatbot_manager = ChatBotManager()
 product_manager = ProductManager()
+catalog_watcher = CatalogWatcher()
 
 @app.get("/")
 async def root():
     """홈페이지 제공"""
     return FileResponse('static/index.html')
 
+@app.on_event("startup")
+async def start_catalog_watcher():
+    """카탈로그 파일 감시 시작 (가격 변경 시 재시작 불필요)"""
+    if Config.CATALOG_WATCH:
+        catalog_watcher.start()
+    # 이벤트 루프 지연 / 막는 호출 감시 (GET /debug/event-loop)
+    if Config.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    # 토큰 / 비용 날짜별 롤업 파일 주기 저장
+    usage_rollup_writer.start()
+    # 워밍업 (카탈로그 / 프롬프트 데이터 / 미리 만든 LLM 응답 캐시 / LLM 연결 풀), 끝나야 연결을 받음
+    if Config.WARMUP_ENABLED:
+        report = await lifecycle.warmup(dynamic_ai_system)
+        print(f"✅ 워커 {os.getpid()} 준비 완료 (워밍업 {report['warmup_ms']:.0f}ms)")
+    else:
+        if Config.LLM_CACHE_ENABLED and Config.LLM_CACHE_FILE:
+            loaded = dynamic_ai_system.load_cache_file(Config.LLM_CACHE_FILE)
+            print(f"LLM 캐시 {loaded}건 로드: {Config.LLM_CACHE_FILE}")
+        lifecycle.mark_ready()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await catalog_watcher.stop()
+    await usage_rollup_writer.stop()
+    await dynamic_ai_system.aclose()
+    loop_monitor.stop()
+    lifecycle.stopped()
+
 @app.get("/products")
 async def get_products():
-    """제품 목록 반환"""
+    """제품 목록 반환 (공유 카탈로그 스냅샷)"""
     try:
-        with open('new_products.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            products = data.get('products', [])
-            return {"success": True, "products": products}
+        snapshot = product_manager.snapshot
+        return {"success": True, "products": snapshot.products, "catalog_version": snapshot.version}
     except Exception as e:
         print(f"Error loading products: {e}")
-        # Fallback to product_manager if available
-        try:
-            products = product_manager.get_all_products()
-            return {"success": True, "products": products}
-        except:
-            return {"success": False, "products": []}
+        return {"success": False, "products": []}
 
 @app.get("/products/{product_id}")
 async def get_product(product_id: int):
     """특정 제품 정보 반환"""
-    try:
-        with open('new_products.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            products = data.get('products', [])
-            for product in products:
-                if product['id'] == product_id:
-                    return product
-        raise HTTPException(status_code=404, detail="Product not found")
-    except Exception as e:
-        # Fallback to product_manager
-        product = product_manager.get_product(product_id)
-        if product:
-            return product
-        raise HTTPException(status_code=404, detail="Product not found")
+    product = product_manager.get_product_by_id(product_id)
+    if product:
+        return product
+    raise HTTPException(status_code=404, detail="Product not found")
+
+class ProductSearchRequest(BaseModel):
+    query: Optional[str] = None  # 예: "월 5만원 이하로 6년", 아래 필드가 있으면 필드 우선
+    monthly_min: Optional[int] = None
+    monthly_max: Optional[int] = None
+    purchase_min: Optional[int] = None
+    purchase_max: Optional[int] = None
+    total_min: Optional[int] = None
+    total_max: Optional[int] = None
+    period: Optional[str] = None  # 예: "6년"
+    scenario: str = "base"  # base, card, card_prepay, max, all
+    limit: int = 10
+
+@app.post("/products/search")
+async def search_products(request: ProductSearchRequest):
+    """예산/기간 조건 제품 검색 (정렬 가격 인덱스 + bisect 범위 조회)"""
+    index = search_index_for(product_manager.snapshot)
+    if request.scenario not in index.scenarios:
+        raise HTTPException(status_code=400, detail=f"Unknown scenario: {request.scenario}")
+    query = parse_budget(request.query) if request.query else BudgetQuery()
+    for field in ('monthly_min', 'monthly_max', 'purchase_min', 'purchase_max', 'total_min', 'total_max', 'period'):
+        value = getattr(request, field)
+        if value is not None:
+            setattr(query, field, value)
+    query = index.supported(query)
+    started = time.perf_counter()
+    results = index.search(query, request.scenario, request.limit)
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    return {
+        "success": True,
+        "catalog_version": index.version,
+        "query": asdict(query),
+        "condition": query.describe(),
+        "results": results,
+        "elapsed_us": round(elapsed_us, 1),
+    }
+
+class RecommendationRequest(BaseModel):
+    conversation_history: List[Dict[str, Any]] = []  # 사용자 발언(speaker='사용자')으로 선호 프로필 생성
+    product_ids: Optional[List[int]] = None  # 생략 시 전체 제품
+    scenario: str = "max"
+    limit: int = 5
+
+@app.post("/recommendations")
+async def get_recommendations(request: RecommendationRequest):
+    """LLM 없이 (제품, 플랜) 추천 순위 계산 (사용 기간 기준 총 비용 + 예산/케어/이사 선호)"""
+    recommender = recommender_for(product_manager.snapshot)
+    if request.scenario not in recommender.table.scenarios:
+        raise HTTPException(status_code=400, detail=f"Unknown scenario: {request.scenario}")
+    return {
+        "success": True,
+        **recommender.recommend(request.conversation_history, request.product_ids, request.scenario, request.limit)
+    }
 
 class ProductDebateRequest(BaseModel):
     product_id: int
+    pacing: Optional[PacingMode] = None
+    session_id: Optional[str] = None  # 생략 시 새로 발급 (X-Session-Id 헤더, guide_question 이벤트로 반환)
     
 class UserResponseRequest(BaseModel):
     product_id: int
     user_input: str
-    conversation_history: List[Dict[str, Any]]
+    conversation_history: Optional[List[Dict[str, Any]]] = None  # 생략 시 session_id로 저장된 기록 사용 (어느 워커든)
+    pacing: Optional[PacingMode] = None
+    session_id: Optional[str] = None  # 첫 요청에서 받은 값을 그대로 전달
 
 class ChatRequest(BaseModel):
     question: str
     product_name: Optional[str] = None
     history: Optional[List[Dict[str, str]]] = []
 
+class PricingMatrixRequest(BaseModel):
+    product_ids: Optional[List[int]] = None  # 생략 시 전체 제품
+    periods: Optional[List[str]] = None  # 예: ["4년", "6년"]
+    care_options: Optional[List[str]] = None  # 예: ["없음", "1회/6개월"]
+    scenarios: Optional[List[str]] = None  # base, card, card_prepay, max, all
+
+class CostCurveRequest(BaseModel):
+    product_ids: Optional[List[int]] = None  # 생략 시 전체 제품
+    scenario: str = "max"  # base, card, card_prepay, max, all
+
+class DiscountRequest(BaseModel):
+    product_ids: Optional[List[int]] = None  # 생략 시 전체 제품
+    scenario: str = "max"  # base, card, card_prepay, max, all
+
+class PenaltyRequest(BaseModel):
+    product_ids: Optional[List[int]] = None  # 생략 시 전체 제품
+    exit_month: Optional[int] = None  # 해지 시점(경과 개월), 생략 시 전체 시점
+
 class SingleChatResponse(BaseModel):
     response: str
     speaker: str = "안내봇"
@@ -120,134 +239,54 @@ async def single_chat(request: ChatRequest):
 @app.post("/product/debate/dynamic")
 async def start_dynamic_debate(request: ProductDebateRequest):
     """완전히 동적인 AI 대화 시작"""
+    pacer = StreamPacer.for_request(request.pacing)
+    session_id = request.session_id or uuid.uuid4().hex
     
     async def generate_dynamic_conversation():
         try:
-            conversation_history = []
-            
-            # 1. 구매봇의 첫 주장 - 완전히 동적
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구매봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            purchase_argument = await dynamic_ai_system.generate_purchase_argument(
-                request.product_id,
-                {'turn': 1, 'previous_statements': []}
-            )
-            conversation_history.append({'speaker': '구매봇', 'content': purchase_argument})
-            
-            # 스트리밍 출력
-            for i in range(0, len(purchase_argument), 30):
-                chunk = purchase_argument[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '구매봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '구매봇'})}\n\n"
-            
-            # 2. 구독봇의 반박 - 완전히 동적
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구독봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            subscription_argument = await dynamic_ai_system.generate_subscription_argument(
-                request.product_id,
-                {'turn': 1, 'previous_statements': [purchase_argument]}
-            )
-            conversation_history.append({'speaker': '구독봇', 'content': subscription_argument})
-            
-            for i in range(0, len(subscription_argument), 30):
-                chunk = subscription_argument[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '구독봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '구독봇'})}\n\n"
-            
-            # 3. 구매봇의 재반박
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구매봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            purchase_rebuttal = await dynamic_ai_system.generate_rebuttal(
-                request.product_id,
-                subscription_argument,
-                '구매봇',
-                2
-            )
-            conversation_history.append({'speaker': '구매봇', 'content': purchase_rebuttal})
-            
-            for i in range(0, len(purchase_rebuttal), 30):
-                chunk = purchase_rebuttal[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '구매봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '구매봇'})}\n\n"
-            
-            # 4. 구독봇의 재반박
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '구독봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            subscription_rebuttal = await dynamic_ai_system.generate_rebuttal(
-                request.product_id,
-                purchase_rebuttal,
-                '구독봇',
-                2
-            )
-            conversation_history.append({'speaker': '구독봇', 'content': subscription_rebuttal})
-            
-            for i in range(0, len(subscription_rebuttal), 30):
-                chunk = subscription_rebuttal[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '구독봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '구독봇'})}\n\n"
-            
-            # 5. 안내봇의 동적 질문
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '안내봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            # 완전히 동적인 질문 생성
-            dynamic_question = await dynamic_ai_system.generate_dynamic_question(
-                request.product_id,
-                conversation_history
-            )
-            
-            # 자연스러운 인트로
-            intro_phrases = [
-                "오호, 둘 다 좋은 포인트가 있긴해!",
-                "음... 각자 일리가 있긴해!",
-                "재밌는 논쟁이긴해!",
-                "고민이 되긴해!",
-                "둘 다 설득력이 있긴해!"
-            ]
-            intro = random.choice(intro_phrases)
-            full_message = f"{intro} {dynamic_question}"
-            
-            conversation_history.append({'speaker': '안내봇', 'content': full_message})
-            
-            for i in range(0, len(full_message), 30):
-                chunk = full_message[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '안내봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
+            # 구매 주장 → 구독 주장 → 재반박 2회 → 안내봇 질문 (독립적인 턴은 동시에 생성)
+            # 첫 논쟁 풀에 이 제품 항목이 있으면 생성 없이 재생
+            pool = get_opening_pool()
+            with trace_span("opening_pool", product_id=request.product_id) as lookup:
+                pooled = pool.pick(request.product_id, product_manager.snapshot.digest)
+                lookup.set('cache_hit', pooled is not None)
+            if len(pool):
+                record_cache("opening_pool", pooled is not None)
+            if pooled:
+                turn_run = stored_opening_graph(pooled['turns']).start()
+            else:
+                turn_run = dynamic_opening_graph(
+                    dynamic_ai_system, request.product_id, rng=dynamic_ai_system.flow_rng('opening', request.product_id)
+                ).start()
+            async for event in stream_turns(turn_run, pacer):
+                yield event
+            
+            dynamic_question = turn_run.results['question'].text
+            conversation_history = graph_history(turn_run)
             
             # 사용자 선택 옵션 제공
-            suggestions = [
-                dynamic_question.replace('?', '').strip(),
-                "이제 결론을 내줘"
-            ]
+            suggestions = question_suggestions(dynamic_question)
             
-            yield f"data: {json.dumps({'type': 'guide_question', 'question': dynamic_question, 'suggestions': suggestions, 'history': conversation_history})}\n\n"
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '안내봇'})}\n\n"
-            yield f"data: {json.dumps({'type': 'waiting_user', 'message': '사용자 응답 대기 중...'})}\n\n"
+            # 다른 워커가 /respond를 받아도 이어지도록 공유 상태에 저장
+            await session_store.save(session_id, request.product_id, conversation_history)
+            yield sse_event({'type': 'guide_question', 'question': dynamic_question, 'suggestions': suggestions, 'history': conversation_history, 'session_id': session_id})
+            yield sse_event({'type': 'complete', 'speaker': '안내봇'})
+            yield sse_event({'type': 'waiting_user', 'message': '사용자 응답 대기 중...'})
             
         except Exception as e:
             import traceback
             traceback.print_exc()
-            yield f"data: {json.dumps({'type': 'error', 'message': f'오류 발생: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'오류 발생: {str(e)}'})
     
     return StreamingResponse(
-        generate_dynamic_conversation(),
+        lifecycle.track(trace_stream(session_id, "POST /product/debate/dynamic", session_stream(session_id, generate_dynamic_conversation()),
+                                     product_id=request.product_id, pacing=pacer.mode)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*"
+            "Access-Control-Allow-Origin": "*",
+            "X-Session-Id": session_id
         }
     )
 
@@ -257,146 +296,164 @@ async def start_improved_debate_fallback(request: ProductDebateRequest):
     """이전 버전 호환을 위한 fallback"""
     return await start_dynamic_debate(request)
 
+class CompareDebateRequest(BaseModel):
+    product_ids: List[int]  # 비교할 제품 (2개 이상, 최대 COMPARE_MAX_PRODUCTS)
+    scenario: str = "max"  # 묶음 분석 할인 시나리오
+    pacing: Optional[PacingMode] = None
+    session_id: Optional[str] = None
+
+@app.post("/product/debate/compare")
+async def start_compare_debate(request: CompareDebateRequest):
+    """여러 제품 비교 논쟁 (제품별 구매/구독 주장 동시 생성 + 복수 구독 묶음 분석)"""
+    product_ids = list(dict.fromkeys(request.product_ids))
+    if not 2 <= len(product_ids) <= Config.COMPARE_MAX_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"비교할 제품은 2~{Config.COMPARE_MAX_PRODUCTS}개여야 합니다")
+    products = []
+    for product_id in product_ids:
+        product = product_manager.get_product_by_id(product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail=f"Product not found: {product_id}")
+        products.append(product)
+    curves = cost_curves_for(product_manager.snapshot)
+    if request.scenario not in curves.table.scenarios:
+        raise HTTPException(status_code=400, detail=f"Unknown scenario: {request.scenario}")
+    pacer = StreamPacer.for_request(request.pacing)
+    session_id = request.session_id or uuid.uuid4().hex
+    
+    async def generate_compare_conversation():
+        try:
+            started = time.perf_counter()
+            yield sse_event({'type': 'compare_start', 'products': [{'id': p['id'], 'name': p.get('name', '')} for p in products]})
+            
+            # 제품별 구매/구독 주장을 동시에 생성하고 먼저 끝난 턴부터 전송
+            turn_run = dynamic_compare_graph(dynamic_ai_system, products).start()
+            async for event in stream_turns(turn_run, pacer, completion_order=True):
+                yield event
+            
+            conversation_history = [
+                {'speaker': node.speaker, 'content': turn_run.results[node.key].display_text, **node.tags}
+                for node in turn_run.graph.nodes
+            ]
+            
+            # 복수 구독 묶음 분석 (가격 테이블 기반, LLM 호출 없음)
+            analysis = bundle_analysis(curves, product_ids, request.scenario)
+            yield sse_event({'type': 'bundle_analysis', 'analysis': analysis})
+            async for event in pacer.stream_text('안내봇', bundle_summary(analysis), waited=0.0):
+                yield event
+            yield sse_event({'type': 'complete', 'speaker': '안내봇'})
+            
+            yield sse_event({
+                'type': 'end',
+                'message': '제품 비교가 완료되었습니다.',
+                'history': conversation_history,
+                'elapsed': round(time.perf_counter() - started, 3)
+            })
+            
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield sse_event({'type': 'error', 'message': f'오류 발생: {str(e)}'})
+    
+    return StreamingResponse(
+        lifecycle.track(trace_stream(session_id, "POST /product/debate/compare", session_stream(session_id, generate_compare_conversation()),
+                                     product_ids=",".join(str(product_id) for product_id in product_ids), pacing=pacer.mode)),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "X-Session-Id": session_id
+        }
+    )
+
 @app.post("/product/debate/dynamic/respond")
 async def respond_to_user_dynamic(request: UserResponseRequest):
     """사용자 응답에 대한 완전히 동적인 처리"""
+    pacer = StreamPacer.for_request(request.pacing)
+    session_id = request.session_id or uuid.uuid4().hex
+    base_history = request.conversation_history
+    if base_history is None:
+        try:
+            session = await session_store.load(request.session_id) if request.session_id else None
+        except Exception as e:
+            print(f"세션 조회 실패 ({request.session_id}): {e}")
+            raise HTTPException(status_code=503, detail="세션 저장소에 연결할 수 없습니다")
+        if session is None:
+            raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다 (conversation_history를 함께 보내주세요)")
+        if session.get('product_id') is not None and session['product_id'] != request.product_id:
+            # 다른 제품 봇이 이 세션 기록으로 논쟁하지 않도록 거부
+            raise HTTPException(
+                status_code=400,
+                detail=f"세션 제품({session['product_id']})과 요청 product_id({request.product_id})가 다릅니다"
+            )
+        base_history = session['history']
     
     async def generate_dynamic_response():
         try:
             # 결론 요청 처리
-            if request.user_input == "이제 결론을 내줘":
-                yield f"data: {json.dumps({'type': 'typing', 'speaker': '안내봇'})}\n\n"
-                await asyncio.sleep(0.5)
-                
-                conclusion = await dynamic_ai_system.generate_conclusion(
+            if request.user_input == CONCLUSION_REQUEST:
+                turn_run = dynamic_conclusion_graph(
+                    dynamic_ai_system,
                     request.product_id,
-                    request.conversation_history
-                )
+                    base_history
+                ).start()
+                async for event in stream_turns(turn_run, pacer):
+                    yield event
                 
-                for i in range(0, len(conclusion), 30):
-                    chunk = conclusion[i:i+30]
-                    yield f"data: {json.dumps({'type': 'streaming', 'speaker': '안내봇', 'content': chunk})}\n\n"
-                    await asyncio.sleep(0.02)
-                
-                yield f"data: {json.dumps({'type': 'complete', 'speaker': '안내봇'})}\n\n"
-                yield f"data: {json.dumps({'type': 'end', 'message': '상담이 완료되었습니다.'})}\n\n"
+                yield sse_event({'type': 'end', 'message': '상담이 완료되었습니다.'})
                 return
             
             # 일반 사용자 입력 처리
-            conversation_history = request.conversation_history.copy()
+            conversation_history = base_history.copy()
             conversation_history.append({'speaker': '사용자', 'content': request.user_input})
             
-            # 랜덤하게 어느 봇이 먼저 응답할지 결정
-            first_bot = random.choice(['구매봇', '구독봇'])
-            second_bot = '구독봇' if first_bot == '구매봇' else '구매봇'
-            
-            # 1. 첫 번째 봇의 응답
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': first_bot})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            first_response = await dynamic_ai_system.respond_to_user_input(
+            # 예산 조건("월 5만원 이하")이 있으면 검색 결과를 먼저 보내고 다음 봇 턴에 주입
+            budget_query, budget_results, budget_line = budget_context(request.user_input, request.product_id, product_manager.snapshot)
+            if budget_line:
+                yield sse_event({
+                    'type': 'search_results',
+                    'condition': budget_query.describe(),
+                    'results': budget_results
+                })
+            
+            # 봇 응답 → 상대 반박 → 재반박 → 안내봇 질문 (응답할 봇은 랜덤)
+            turn_run = dynamic_response_graph(
+                dynamic_ai_system,
                 request.product_id,
                 request.user_input,
-                first_bot,
-                conversation_history
-            )
-            conversation_history.append({'speaker': first_bot, 'content': first_response})
+                conversation_history,
+                extra_context=budget_line,
+                rng=dynamic_ai_system.flow_rng('respond', request.product_id, conversation_history),
+            ).start()
+            async for event in stream_turns(turn_run, pacer):
+                yield event
             
-            for i in range(0, len(first_response), 30):
-                chunk = first_response[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': first_bot, 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': first_bot})}\n\n"
-            
-            # 2. 두 번째 봇의 반박
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': second_bot})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            second_response = await dynamic_ai_system.generate_rebuttal(
-                request.product_id,
-                first_response,
-                second_bot,
-                len(conversation_history)
-            )
-            conversation_history.append({'speaker': second_bot, 'content': second_response})
-            
-            for i in range(0, len(second_response), 30):
-                chunk = second_response[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': second_bot, 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': second_bot})}\n\n"
-            
-            # 3. 첫 번째 봇의 재반박
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': first_bot})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            final_rebuttal = await dynamic_ai_system.generate_rebuttal(
-                request.product_id,
-                second_response,
-                first_bot,
-                len(conversation_history)
-            )
-            conversation_history.append({'speaker': first_bot, 'content': final_rebuttal})
-            
-            for i in range(0, len(final_rebuttal), 30):
-                chunk = final_rebuttal[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': first_bot, 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
-            
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': first_bot})}\n\n"
-            
-            # 4. 안내봇의 새로운 질문
-            yield f"data: {json.dumps({'type': 'typing', 'speaker': '안내봇'})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            # 완전히 새로운 동적 질문 생성
-            next_question = await dynamic_ai_system.generate_dynamic_question(
-                request.product_id,
-                conversation_history
-            )
-            
-            # 자연스러운 전환 문구
-            transition_phrases = [
-                "흥미로운 의견들이긴해!",
-                "둘 다 일리가 있긴해!",
-                "좋은 포인트들이긴해!",
-                "각자 장점이 있긴해!",
-                "고민될만 하긴해!"
-            ]
-            transition = random.choice(transition_phrases)
-            full_message = f"{transition} {next_question}"
-            
-            conversation_history.append({'speaker': '안내봇', 'content': full_message})
-            
-            for i in range(0, len(full_message), 30):
-                chunk = full_message[i:i+30]
-                yield f"data: {json.dumps({'type': 'streaming', 'speaker': '안내봇', 'content': chunk})}\n\n"
-                await asyncio.sleep(0.02)
+            next_question = turn_run.results['question'].text
+            conversation_history = graph_history(turn_run, conversation_history)
             
             # 새로운 선택 옵션
-            suggestions = [
-                next_question.replace('?', '').strip(),
-                "이제 결론을 내줘"
-            ]
+            suggestions = question_suggestions(next_question)
             
-            yield f"data: {json.dumps({'type': 'guide_question', 'question': next_question, 'suggestions': suggestions, 'history': conversation_history})}\n\n"
-            yield f"data: {json.dumps({'type': 'complete', 'speaker': '안내봇'})}\n\n"
-            yield f"data: {json.dumps({'type': 'waiting_user', 'message': '사용자 응답 대기 중...'})}\n\n"
+            await session_store.save(session_id, request.product_id, conversation_history)
+            yield sse_event({'type': 'guide_question', 'question': next_question, 'suggestions': suggestions, 'history': conversation_history, 'session_id': session_id})
+            yield sse_event({'type': 'complete', 'speaker': '안내봇'})
+            yield sse_event({'type': 'waiting_user', 'message': '사용자 응답 대기 중...'})
             
         except Exception as e:
             import traceback
             traceback.print_exc()
-            yield f"data: {json.dumps({'type': 'error', 'message': f'오류 발생: {str(e)}'})}\n\n"
+            yield sse_event({'type': 'error', 'message': f'오류 발생: {str(e)}'})
     
     return StreamingResponse(
-        generate_dynamic_response(),
+        lifecycle.track(trace_stream(session_id, "POST /product/debate/dynamic/respond", session_stream(session_id, generate_dynamic_response()),
+                                     product_id=request.product_id, pacing=pacer.mode,
+                                     conclusion=request.user_input == CONCLUSION_REQUEST)),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*"
+            "Access-Control-Allow-Origin": "*",
+            "X-Session-Id": session_id
         }
     )
 
@@ -406,11 +463,128 @@ async def respond_to_user_improved_fallback(request: UserResponseRequest):
     """이전 버전 호환을 위한 fallback"""
     return await respond_to_user_dynamic(request)
 
+@app.post("/pricing/matrix")
+async def get_pricing_matrix(request: PricingMatrixRequest):
+    """제품 × 계약기간 × 케어옵션 × 할인 시나리오 가격 매트릭스 (월 요금/총액/포인트 차감 실부담)"""
+    table = pricing_for(product_manager.snapshot)
+    unknown = [pid for pid in (request.product_ids or []) if not table.has_product(pid)]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Product not found: {unknown}")
+    return {
+        "success": True,
+        **table.matrix(request.product_ids, request.periods, request.care_options, request.scenarios)
+    }
+
+@app.post("/pricing/curves")
+async def get_cost_curves(request: CostCurveRequest):
+    """구매 vs 구독 기간별 월별 누적 비용 곡선과 손익분기 월 (차트용, 카탈로그 버전별 캐시)"""
+    curves = cost_curves_for(product_manager.snapshot)
+    if request.scenario not in curves.table.scenarios:
+        raise HTTPException(status_code=400, detail=f"Unknown scenario: {request.scenario}")
+    unknown = [pid for pid in (request.product_ids or []) if not curves.table.has_product(pid)]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Product not found: {unknown}")
+    return {"success": True, **curves.response(request.product_ids, request.scenario)}
+
+@app.post("/pricing/discounts")
+async def get_discounts(request: DiscountRequest):
+    """할인 규칙 엔진 일괄 평가 (제품 × 계약기간별 규칙별 할인액, 카탈로그 버전별 메모이즈)"""
+    engine = pricing_for(product_manager.snapshot).discounts
+    if request.scenario not in engine.scenarios:
+        raise HTTPException(status_code=400, detail=f"Unknown scenario: {request.scenario}")
+    unknown = [pid for pid in (request.product_ids or []) if pid not in engine.product_ids]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Product not found: {unknown}")
+    return {
+        "success": True,
+        "catalog_version": product_manager.snapshot.version,
+        **engine.evaluate_batch(request.scenario, request.product_ids)
+    }
+
+@app.post("/pricing/penalties")
+async def get_penalties(request: PenaltyRequest):
+    """제품 × 계약기간 × 해지 시점(경과 개월)별 중도 해지 위약금 조회 테이블"""
+    penalties = penalty_for(product_manager.snapshot)
+    if request.exit_month is not None and request.exit_month < 0:
+        raise HTTPException(status_code=400, detail="exit_month must be >= 0")
+    unknown = [pid for pid in (request.product_ids or []) if not penalties.table.has_product(pid)]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Product not found: {unknown}")
+    # 최장 계약기간 이후는 위약금이 모두 0이므로 같은 시점으로 취급
+    exit_month = min(request.exit_month, penalties.max_months) if request.exit_month is not None else None
+    return {"success": True, **penalties.response(request.product_ids, exit_month)}
+
+@app.get("/catalog/facts")
+async def get_benefit_facts():
+    """혜택 문구에서 추출한 숫자 팩트와 검증 리포트 (카탈로그 버전별 1회 추출, '총 비용' 문구는 가격 엔진과 비교)"""
+    snapshot = product_manager.snapshot
+    return {"success": True, **facts_for(snapshot).report(pricing_for(snapshot))}
+
 # 헬스체크 엔드포인트
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "3.0.0", "system": "dynamic_ai"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """로드밸런서용 준비 상태 (워밍업 / 드레인 중이면 503)"""
+    if not lifecycle.ready:
+        raise HTTPException(status_code=503, detail=f"워커 준비 안 됨: {lifecycle.state}")
+    return {"status": "ready", "pid": os.getpid(), **lifecycle.report()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 텍스트 형식 메트릭"""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+def require_admin(token: Optional[str]):
+    """관리자 전용 엔드포인트 확인 (ADMIN_TOKEN 미설정이면 모두 거부)"""
+    if not Config.ADMIN_TOKEN or not token or not hmac.compare_digest(token, Config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 필요합니다")
+
+@app.get("/stats/usage")
+async def get_usage_stats(limit: int = 20, session_id: Optional[str] = None,
+                          x_admin_token: Optional[str] = Header(None)):
+    """LLM 토큰 / 비용 집계 (세션 / 봇 / 호출 지점 / provider / 제품별, 비용 → 토큰 순, 관리자 전용)"""
+    require_admin(x_admin_token)
+    if session_id:
+        session = usage_ledger.session(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+        return {"session_id": session_id, **session}
+    return usage_ledger.report(limit)
+
+@app.get("/debug/event-loop")
+async def get_event_loop_report(limit: int = 10, x_admin_token: Optional[str] = Header(None)):
+    """이벤트 루프 지연 / 임계값보다 오래 막은 위치 (누적 시간 순, 관리자 전용)"""
+    require_admin(x_admin_token)
+    return loop_monitor.report(limit)
+
+@app.get("/debug/profile")
+async def get_profile(seconds: float = 10.0, interval_ms: float = 5.0, kind: str = "threads",
+                      format: str = "collapsed", include_idle: bool = False,
+                      x_admin_token: Optional[str] = Header(None)):
+    """실행 중인 워커 샘플링 프로파일 (collapsed: flamegraph 입력 형식, json: 상위 함수 요약)"""
+    require_admin(x_admin_token)
+    if kind not in profiler.PROFILE_KINDS or format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail=f"kind는 {', '.join(profiler.PROFILE_KINDS)}, format은 collapsed, json 중 하나여야 합니다")
+    if not 0 < seconds <= Config.PROFILE_MAX_SECONDS or not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail=f"seconds는 0~{Config.PROFILE_MAX_SECONDS:g}, interval_ms는 1~1000이어야 합니다")
+    if profiler.busy():
+        raise HTTPException(status_code=409, detail="이미 프로파일 수집 중입니다")
+    
+    result = await profiler.profile(seconds, interval_ms / 1000, include_idle)
+    if format == "json":
+        return result.report()
+    return Response(
+        content=result.collapsed(kind),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{kind}-{int(time.time())}.collapsed"',
+            "X-Profile-Samples": str(result.samples)
+        }
+    )
+
 @app.get("/summary")
 async def get_summary():
     """대화 요약 반환"""
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+오프라인 배치 논쟁 생성기
+- 전 제품 × 사용자 프로필(페르소나) × N개 시드 논쟁을 동시에 생성 (동시 실행 수 / 초당 LLM 호출 수 제한)
+- 결과는 완료되는 대로 JSONL에 한 줄씩 기록 (.parquet 경로면 pyarrow로 저장)
+- --seed-cache: 생성 중 받은 LLM 응답을 서버 캐시 파일(LLM_CACHE_FILE)로 저장
+- --opening-pool: 첫 논쟁을 서버 첫 논쟁 풀 파일(OPENING_POOL_FILE)로 저장
+
+실행 예:
+    python batch_debates.py --seeds 3 --concurrency 4 --rate 5 --output debates.jsonl
+    python batch_debates.py --engine manager --products 0 1 --output debates.parquet
+    python batch_debates.py --seeds 1 --output /dev/null --seed-cache llm_cache.jsonl --opening-pool openings.jsonl
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from catalog import get_catalog
+from config import Config
+from debate_flows import dynamic_opening_graph, dynamic_response_graph
+from opening_pool import OPENING_TURN_KEYS
+
+# 기본 사용자 프로필 (user_info: 논쟁 시작 시 고객 정보, user_input: 첫 논쟁 후 사용자 응답)
+PERSONAS: List[Dict[str, str]] = [
+    {
+        'name': '1인 가구 사회초년생',
+        'user_info': '월 예산이 빠듯한 1인 가구, 3년 정도 사용 예정',
+        'user_input': '월 5만원 이하로 3년 정도만 쓸 것 같아요',
+    },
+    {
+        'name': '맞벌이 신혼부부',
+        'user_info': '관리할 시간이 없는 맞벌이 부부, 2년 뒤 이사 계획',
+        'user_input': '필터 관리가 귀찮고 2년 뒤에 이사 갈 수도 있어요',
+    },
+    {
+        'name': '장기 사용 가족',
+        'user_info': '가전을 10년 이상 오래 쓰는 4인 가족',
+        'user_input': '한 번 사면 10년 넘게 써요, 일시불 200만원까지 가능해요',
+    },
+]
+
+# 작업(논쟁)별 LLM 호출 수 집계 (작업 태스크 안에서 만든 턴 태스크도 같은 리스트를 공유)
+_job_calls: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar('job_calls', default=None)
+
+
+class RateLimiter:
+    """초당 호출 수 제한 (호출 시작 간격을 1/rate초 이상으로 유지, rate가 0이면 제한 없음)
+
+    clock/sleep은 테스트에서 가짜 시계로 바꿀 수 있습니다 (기본: 이벤트 루프 시계, asyncio.sleep).
+    """
+
+    def __init__(self, rate: float = 0.0, clock: Optional[Callable[[], float]] = None,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> Optional[float]:
+        """호출 시작 시각(시계 기준)까지 대기 후 반환 (제한 없으면 None)"""
+        if not self.interval:
+            return None
+        async with self._lock:
+            now = self._clock() if self._clock is not None else asyncio.get_running_loop().time()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            await self._sleep(start - now)
+        return start
+
+
+class CacheRecorder:
+    """생성 중 받은 LLM 응답을 캐시 키별로 기록 (같은 키는 처음 응답 유지)"""
+
+    def __init__(self):
+        self.entries: Dict[str, str] = {}
+
+    def record(self, key: str, content: str):
+        if content and key not in self.entries:
+            self.entries[key] = content
+
+    def save(self, path: str) -> int:
+        with open(path, 'w', encoding='utf-8') as f:
+            for key, content in self.entries.items():
+                f.write(json.dumps({'key': key, 'content': content}, ensure_ascii=False) + '\n')
+        return len(self.entries)
+
+
+def instrument_dynamic_system(system, limiter: RateLimiter, recorder: Optional[CacheRecorder] = None):
+    """DynamicAIChatBotSystem 인스턴스의 LLM 호출에 속도 제한 / 호출 수 집계 / 캐시 기록을 붙임"""
+    call_ai_api = system._call_ai_api
+
+    async def limited_call(messages, temperature=0.9, max_tokens=500, **labels):
+        await limiter.acquire()
+        calls = _job_calls.get()
+        if calls is not None:
+            calls.append(time.perf_counter())
+        content = await call_ai_api(messages, temperature=temperature, max_tokens=max_tokens, **labels)
+        if recorder is not None and content != system._get_fallback_response():
+            recorder.record(system.cache_key(system._build_payload(messages, temperature, max_tokens)), content)
+        return content
+
+    system._call_ai_api = limited_call
+    return system
+
+
+def instrument_manager(manager, limiter: RateLimiter):
+    """ChatBotManager 인스턴스의 챗봇 응답 생성에 속도 제한 / 호출 수 집계를 붙임"""
+    for bot in manager.chatbots.values():
+        generate_response = bot.generate_response
+
+        async def limited_response(message, context="", debate_mode=False, _generate=generate_response):
+            await limiter.acquire()
+            calls = _job_calls.get()
+            if calls is not None:
+                calls.append(time.perf_counter())
+            return await _generate(message, context, debate_mode=debate_mode)
+
+        bot.generate_response = limited_response
+    return manager
+
+
+def job_seed(product_id: Any, persona: Dict[str, str], seed: int) -> str:
+    return f"{product_id}:{persona['name']}:{seed}"
+
+
+async def run_dynamic_debate(system, product: Dict, persona: Dict[str, str], seed: int) -> Dict[str, Any]:
+    """DynamicAIChatBotSystem: 첫 논쟁 + 페르소나 응답 한 라운드"""
+    # 인트로 문구 / 먼저 응답할 봇 선택 고정 (동시에 도는 다른 작업과 섞이지 않도록 작업별 난수 생성기 사용)
+    rng = random.Random(job_seed(product['id'], persona, seed))
+    opening = dynamic_opening_graph(system, product['id'], rng=rng)
+    results = await opening.run()
+    opening_turns = {key: results[key].text for key in OPENING_TURN_KEYS}
+    turns = [{'key': node.key, 'speaker': node.speaker, 'content': results[node.key].display_text} for node in opening.nodes]
+
+    user_input = persona.get('user_input')
+    if user_input:
+        history = [{'speaker': turn['speaker'], 'content': turn['content']} for turn in turns]
+        history.append({'speaker': '사용자', 'content': user_input})
+        turns.append({'key': 'user', 'speaker': '사용자', 'content': user_input})
+        response = dynamic_response_graph(system, product['id'], user_input, history, rng=rng)
+        results = await response.run()
+        turns.extend(
+            {'key': f"response_{node.key}", 'speaker': node.speaker, 'content': results[node.key].display_text}
+            for node in response.nodes
+        )
+    return {'turns': turns, 'opening': opening_turns}
+
+
+async def run_manager_debate(product: Dict, persona: Dict[str, str], seed: int, limiter: RateLimiter,
+                             max_turns: int = 3) -> Dict[str, Any]:
+    """ChatBotManager.start_debate_with_product (챗봇 상태를 공유하지 않도록 작업마다 새 매니저)
+
+    매니저 논쟁은 난수를 쓰지 않으므로 seed는 기록용입니다.
+    """
+    from chatbots import ChatBotManager
+
+    manager = instrument_manager(ChatBotManager(), limiter)
+    conversation = await manager.start_debate_with_product(product['id'], max_turns=max_turns, user_info=persona.get('user_info'))
+    turns = [
+        {'key': f"turn_{n}", 'speaker': message.get('speaker'), 'content': message.get('message')}
+        for n, message in enumerate(conversation)
+    ]
+    return {'turns': turns}
+
+
+class ResultWriter:
+    """완료된 논쟁 기록 (JSONL은 한 줄씩 즉시 기록, Parquet은 종료 시 한 번에 저장)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.count = 0
+        self._rows: List[Dict[str, Any]] = []
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("Parquet 출력에는 pyarrow가 필요합니다 (pip install pyarrow) - .jsonl 경로를 사용하세요")
+            self._file = None
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        self.count += 1
+        if self._file is not None:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+        else:
+            # 중첩 필드는 JSON 문자열 컬럼으로 저장
+            self._rows.append({
+                key: json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                for key, value in record.items()
+            })
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        elif self._rows:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.Table.from_pylist(self._rows), self.path)
+
+
+async def run_batch(
+    products: Sequence[Dict],
+    personas: Sequence[Dict[str, str]],
+    seeds: int,
+    writer: ResultWriter,
+    engine: str = "dynamic",
+    concurrency: int = 4,
+    rate: float = 0.0,
+    system=None,
+    recorder: Optional[CacheRecorder] = None,
+    opening_pool_path: Optional[str] = None,
+    max_turns: int = 3,
+    limiter: Optional[RateLimiter] = None,
+    catalog_digest: Optional[str] = None,
+) -> Dict[str, Any]:
+    """전 제품 × 프로필 × 시드 논쟁 생성, 완료되는 대로 writer에 기록 후 요약 반환 (limiter를 주면 rate 대신 사용)
+
+    첫 논쟁 풀 항목에는 생성에 쓴 카탈로그 해시(기본: 현재 카탈로그)를 기록합니다.
+    """
+    limiter = limiter or RateLimiter(rate)
+    catalog_digest = catalog_digest or get_catalog().digest
+    if engine == "dynamic":
+        if system is None:
+            from chatbot_flow_v3 import DynamicAIChatBotSystem
+            system = DynamicAIChatBotSystem()
+        instrument_dynamic_system(system, limiter, recorder)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    pool_file = open(opening_pool_path, 'w', encoding='utf-8') if opening_pool_path else None
+
+    async def job(product: Dict, persona: Dict[str, str], seed: int) -> Dict[str, Any]:
+        async with semaphore:
+            calls: List[float] = []
+            _job_calls.set(calls)
+            started = time.perf_counter()
+            record: Dict[str, Any] = {
+                'engine': engine,
+                'product_id': product['id'],
+                'product_name': product.get('name', ''),
+                'persona': persona['name'],
+                'seed': seed,
+                'turns': [],
+                'error': None,
+            }
+            try:
+                if engine == "dynamic":
+                    result = await run_dynamic_debate(system, product, persona, seed)
+                else:
+                    result = await run_manager_debate(product, persona, seed, limiter, max_turns)
+                record['turns'] = result['turns']
+                if pool_file is not None and result.get('opening'):
+                    pool_file.write(json.dumps({
+                        'product_id': product['id'],
+                        'catalog_digest': catalog_digest,
+                        'persona': persona['name'],
+                        'seed': seed,
+                        'turns': result['opening'],
+                    }, ensure_ascii=False) + '\n')
+            except Exception as e:
+                record['error'] = f"{type(e).__name__}: {e}"
+            record['llm_calls'] = len(calls)
+            record['elapsed_s'] = round(time.perf_counter() - started, 3)
+            record['created_at'] = datetime.now().isoformat()
+            return record
+
+    started = time.perf_counter()
+    tasks = [
+        asyncio.ensure_future(job(product, persona, seed))
+        for product in products for persona in personas for seed in range(seeds)
+    ]
+    errors = 0
+    llm_calls = 0
+    try:
+        for future in asyncio.as_completed(tasks):
+            record = await future
+            writer.write(record)
+            errors += record['error'] is not None
+            llm_calls += record['llm_calls']
+    finally:
+        for task in tasks:
+            task.cancel()
+        writer.close()
+        if pool_file is not None:
+            pool_file.close()
+
+    summary = {
+        'debates': writer.count,
+        'errors': errors,
+        'llm_calls': llm_calls,
+        'elapsed_s': round(time.perf_counter() - started, 3),
+    }
+    if recorder is not None:
+        summary['cache_entries'] = len(recorder.entries)
+    return summary
+
+
+def load_personas(path: Optional[str]) -> List[Dict[str, str]]:
+    """프로필 JSON 파일 ([{"name", "user_info", "user_input"}, ...]), 없으면 기본 프로필"""
+    if not path:
+        return PERSONAS
+    with open(path, 'r', encoding='utf-8') as f:
+        personas = json.load(f)
+    for n, persona in enumerate(personas):
+        persona.setdefault('name', f"persona-{n}")
+    return personas
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="제품 × 사용자 프로필 × 시드 논쟁 일괄 생성")
+    parser.add_argument('--engine', choices=('dynamic', 'manager'), default='dynamic',
+                        help="dynamic: DynamicAIChatBotSystem, manager: ChatBotManager.start_debate_with_product")
+    parser.add_argument('--products', type=int, nargs='*', help="제품 id (생략 시 전체)")
+    parser.add_argument('--profiles', help="사용자 프로필 JSON 파일 (생략 시 기본 프로필)")
+    parser.add_argument('--seeds', type=int, default=1, help="제품 × 프로필마다 생성할 논쟁 수")
+    parser.add_argument('--concurrency', type=int, default=4, help="동시에 진행할 논쟁 수")
+    parser.add_argument('--rate', type=float, default=0.0, help="초당 최대 LLM 호출 수 (0이면 제한 없음)")
+    parser.add_argument('--max-turns', type=int, default=3, help="manager 엔진 논쟁 턴 수")
+    parser.add_argument('--output', default='debates.jsonl', help=".jsonl 또는 .parquet")
+    parser.add_argument('--seed-cache', help="LLM 응답 캐시 파일로 저장 (서버 LLM_CACHE_FILE)")
+    parser.add_argument('--opening-pool', help="첫 논쟁 풀 파일로 저장 (서버 OPENING_POOL_FILE)")
+    args = parser.parse_args(argv)
+
+    if args.engine != 'dynamic' and (args.seed_cache or args.opening_pool):
+        parser.error("--seed-cache / --opening-pool은 dynamic 엔진에서만 사용할 수 있습니다")
+
+    snapshot = get_catalog()
+    products = snapshot.products if not args.products else [p for p in snapshot.products if p.get('id') in args.products]
+    if not products:
+        parser.error("생성할 제품이 없습니다")
+    personas = load_personas(args.profiles)
+
+    writer = ResultWriter(args.output)
+    recorder = CacheRecorder() if args.seed_cache else None
+    total = len(products) * len(personas) * args.seeds
+    print(f"논쟁 {total}개 생성 시작 (엔진 {args.engine}, 동시 {args.concurrency}, 초당 호출 {args.rate or '제한 없음'})")
+
+    # 같은 요청도 시드마다 새로 생성하도록 배치 중에는 응답 캐시를 사용하지 않음 (끝나면 원래 설정 복원)
+    saved_cache_enabled = Config.LLM_CACHE_ENABLED
+    Config.LLM_CACHE_ENABLED = False
+    try:
+        summary = asyncio.run(run_batch(
+            products, personas, args.seeds, writer,
+            engine=args.engine,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            recorder=recorder,
+            opening_pool_path=args.opening_pool,
+            max_turns=args.max_turns,
+            catalog_digest=snapshot.digest,
+        ))
+    finally:
+        Config.LLM_CACHE_ENABLED = saved_cache_enabled
+    if recorder is not None:
+        recorder.save(args.seed_cache)
+    print(json.dumps(summary, ensure_ascii=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+카탈로그 조회 벤치마크 (50k SKU)
+- 파일 파싱 횟수: ProductManager를 여러 번 생성해도 1회
+- id / 이름 조회: 카탈로그 앞/뒤 상관없이 일정한 시간
+
+실행: python -m benchmarks.bench_catalog [SKU 수]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catalog
+from benchmarks.synthetic_catalog import write_catalog
+from product_manager import ProductManager
+
+
+def per_call_us(fn, repeat: int = 20000) -> float:
+    """호출당 평균 시간 (마이크로초)"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def run(size: int = 50000) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "products.json"), size)
+        catalog.reset(path)
+        parses_before = catalog.stats['parses']
+
+        started = time.perf_counter()
+        managers = [ProductManager(path) for _ in range(100)]
+        construct_s = time.perf_counter() - started
+
+        pm = managers[-1]
+        first, last = pm.products[0], pm.products[-1]
+        result = {
+            'skus': size,
+            'parses': catalog.stats['parses'] - parses_before,
+            'construct_100_managers_s': round(construct_s, 3),
+            'by_id_first_us': round(per_call_us(lambda: pm.get_product_by_id(first['id'])), 3),
+            'by_id_last_us': round(per_call_us(lambda: pm.get_product_by_id(last['id'])), 3),
+            'by_name_first_us': round(per_call_us(lambda: pm.get_product_by_name(first['name'])), 3),
+            'by_name_last_us': round(per_call_us(lambda: pm.get_product_by_name(last['name'])), 3),
+            'by_name_fuzzy_us': round(per_call_us(lambda: pm.get_product_by_name(last['name'].lower(), fuzzy=True)), 3),
+        }
+        catalog.reset(path)
+        return result
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for key, value in run(size).items():
+        print(f"{key:>26}: {value}")
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+턴마다 실행되는 순수 파이썬 경로 마이크로 벤치마크
+- 프롬프트 조립: ChatBot.build_data_driven_prompt, 동적 플로우 f-string 프롬프트 (LLM 호출 직전까지)
+- 가격 테이블 조회, 위약금 문장, validate_sentence_count, SSE 이벤트 인코딩, ProductManager 조회
+- 합성 카탈로그 10 / 1k / 100k개, 조회 대상은 고정 시드로 선택
+- 기준값은 benchmarks/baselines/hotpaths.json에 저장, --compare는 기준 대비 느려진 항목을 표시하고 종료 코드 1
+
+실행:
+    python -m benchmarks.bench_hotpaths                       # 측정만
+    python -m benchmarks.bench_hotpaths --save                # 기준값 갱신
+    python -m benchmarks.bench_hotpaths --compare --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import catalog
+from benchmarks.synthetic_catalog import build_catalog
+from catalog import DEFAULT_PRODUCTS_FILE
+from llm_standin import standin_credentials
+from product_manager import ProductManager
+from streaming import sse_event
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "hotpaths.json")
+DEFAULT_SIZES = (10, 1000, 100000)
+DEFAULT_THRESHOLD = 0.4  # 보정 후 기준 대비 40% 이상 느려지면 회귀 (공유 머신 측정 잡음 ±30% 정도)
+MIN_DELTA_US = 0.2  # 이보다 작은 차이는 측정 잡음으로 간주
+SEED = 1234
+
+SAMPLE_TURN = (
+    "6년 계약시 월 39,900원이야. 총 72개월 2,872,800원이긴해! 정기 케어서비스로 필터 교체까지 해주긴해. "
+    "일시불로 사면 목돈이 한 번에 나가긴해? 그래서 구독이 더 편하긴해."
+)
+
+
+def reference_workload():
+    """기준 작업 (가격 문장 포맷 + dict 조회) - 실행 중 CPU 속도 변화 보정용"""
+    prices = {'4년': 45900, '5년': 41900, '6년': 39900}
+    return ''.join(f"{period}: 월 {price:,}원 (총 {price * 72:,}원)\n" for period, price in prices.items())
+
+
+def _calibrate(fn: Callable[[], Any], target_s: float, reset: Callable[[], None] = lambda: None) -> int:
+    """한 라운드가 target_s 정도 걸리는 반복 횟수"""
+    number = 1
+    while True:
+        reset()
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= target_s / 5 or number >= 1 << 20:
+            break
+        number *= 4
+    return max(1, int(number * target_s / max(elapsed, 1e-9)))
+
+
+def measure(fn: Callable[[], Any], rounds: int = 7, target_s: float = 0.05,
+            reset: Callable[[], None] = lambda: None) -> Tuple[float, float]:
+    """(호출당 시간, 기준 작업 호출당 시간) 마이크로초
+
+    측정 라운드와 기준 작업 라운드를 번갈아 돌리고 각각 최솟값을 씁니다.
+    공유 머신에서 CPU 속도가 구간별로 달라져도 둘의 비율은 거의 일정합니다.
+    reset은 라운드마다 호출해 모든 라운드가 같은 입력 순서로 시작하게 합니다.
+    """
+    reset()
+    fn()
+    number, ref_number = _calibrate(fn, target_s, reset), _calibrate(reference_workload, target_s / 2)
+    samples, ref_samples = [], []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(ref_number):
+            reference_workload()
+        ref_samples.append((time.perf_counter() - started) / ref_number * 1e6)
+        reset()
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    return min(samples), min(ref_samples)
+
+
+class Cycle:
+    """호출마다 다음 값 (같은 항목만 반복 조회하지 않도록), 라운드마다 처음부터 다시 시작"""
+
+    def __init__(self, values: Sequence[Any]):
+        self.values = list(values)
+        self.i = 0
+
+    def __call__(self) -> Any:
+        value = self.values[self.i]
+        self.i = (self.i + 1) % len(self.values)
+        return value
+
+    def reset(self):
+        self.i = 0
+
+
+def run_sync(coro) -> Any:
+    """await할 것이 없는 코루틴을 이벤트 루프 없이 실행 (프롬프트 조립 시간만 측정)"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("코루틴이 대기 상태로 멈췄습니다")
+
+
+def core_benchmarks() -> Dict[str, Callable[[], Any]]:
+    """카탈로그 크기와 무관한 경로"""
+    from chatbots import ChatBot
+
+    bot = ChatBot("구독봇", "bench", "", "구독")
+    short_event = {'type': 'streaming', 'speaker': '구독봇', 'content': '월 39,900원이긴해', 'turn_id': 'subscription'}
+    history = [{'speaker': '구매봇', 'content': SAMPLE_TURN, 'turn': n} for n in range(8)]
+    long_event = {'type': 'guide_question', 'question': '몇 년 쓰실 건가요?', 'suggestions': ['6년', '결론'], 'history': history}
+    return {
+        'validate_sentence_count': lambda: bot.validate_sentence_count(SAMPLE_TURN),
+        'sse_event_short': lambda: sse_event(short_event),
+        'sse_event_history': lambda: sse_event(long_event),
+    }
+
+
+def catalog_benchmarks(size: int) -> Tuple[Dict[str, Callable[[], Any]], Callable[[], None]]:
+    """합성 카탈로그(size개)를 기본 카탈로그 자리에 올리고 (측정할 함수들, 라운드 시작 시 호출할 reset) 반환"""
+    from chatbot_flow_v3 import DynamicAIChatBotSystem
+    from chatbots import ChatBot
+
+    catalog.reset(DEFAULT_PRODUCTS_FILE)
+    catalog.warm(catalog.publish(DEFAULT_PRODUCTS_FILE, build_catalog(size)))
+    pm = ProductManager(DEFAULT_PRODUCTS_FILE)
+    rng = random.Random(SEED)
+    products = [pm.products[rng.randrange(size)] for _ in range(256)]
+    ids = Cycle([p['id'] for p in products])
+    names = Cycle([p['name'] for p in products])
+    fuzzy_names = Cycle([p['name'].lower().replace(' ', '') for p in products])
+    pricing, penalties = pm.pricing, pm.penalties
+
+    purchase_bot = ChatBot("구매봇", "bench", "", "구매")
+    subscription_bot = ChatBot("구독봇", "bench", "", "구독")
+
+    def data_driven_prompt(bot):
+        def run():
+            bot.set_current_product(ids())
+            return bot.build_data_driven_prompt("구매와 구독 중 뭐가 나아?")
+        return run
+
+    system = DynamicAIChatBotSystem()
+
+    async def capture(messages, temperature=0.9, max_tokens=500, **labels):
+        return messages[-1]['content']
+    system._call_ai_api = capture  # LLM 호출 대신 조립된 프롬프트 반환
+    history = [
+        {'speaker': speaker, 'content': SAMPLE_TURN if speaker != '안내봇' else '몇 년 쓰실 계획이신가요?'}
+        for speaker in ('구매봇', '구독봇', '구매봇', '구독봇', '안내봇', '사용자')
+    ]
+    context = {'previous_statements': [h['content'] for h in history[:4]], 'turn': 3}
+
+    def reset():
+        for values in (ids, names, fuzzy_names):
+            values.reset()
+
+    return {
+        'product_by_id': lambda: pm.get_product_by_id(ids()),
+        'product_by_name': lambda: pm.get_product_by_name(names()),
+        'product_by_name_fuzzy': lambda: pm.get_product_by_name(fuzzy_names(), fuzzy=True),
+        'pricing_quote': lambda: pricing.quote(ids(), '6년', scenario="max"),
+        'pricing_subscription_totals': lambda: pricing.subscription_totals(ids()),
+        'pricing_best_period': lambda: pricing.best_period(ids()),
+        'penalty_prompt_line': lambda: penalties.prompt_line(ids(), '6년'),
+        'data_driven_prompt_purchase': data_driven_prompt(purchase_bot),
+        'data_driven_prompt_subscription': data_driven_prompt(subscription_bot),
+        'dynamic_purchase_prompt': lambda: run_sync(system.generate_purchase_argument(ids(), context)),
+        'dynamic_subscription_prompt': lambda: run_sync(system.generate_subscription_argument(ids(), context)),
+        'dynamic_question_prompt': lambda: run_sync(system.generate_dynamic_question(ids(), history)),
+    }, reset
+
+
+def run(sizes: Sequence[int] = DEFAULT_SIZES, rounds: int = 7, target_s: float = 0.05,
+        only: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """전체 벤치마크 실행
+
+    results: {'이름[@크기]': 호출당 마이크로초}, reference: 같은 항목 측정 중 기준 작업 호출당 마이크로초
+    """
+    results: Dict[str, float] = {}
+    reference: Dict[str, float] = {}
+
+    def record(suffix: str, benchmarks: Dict[str, Callable[[], Any]], reset: Callable[[], None] = lambda: None):
+        for name, fn in benchmarks.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            gc.collect()
+            gc.disable()  # timeit과 같이 측정 중 GC 제외 (큰 카탈로그에서 GC 시점에 따라 값이 흔들림)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):  # 경고 print는 측정에 포함하되 출력은 버림
+                    value, ref = measure(fn, rounds, target_s, reset)
+                results[f"{name}{suffix}"] = round(value, 3)
+                reference[f"{name}{suffix}"] = round(ref, 3)
+            finally:
+                gc.enable()
+
+    random.seed(SEED)
+    record("", core_benchmarks())
+    try:
+        for size in sizes:
+            started = time.perf_counter()
+            benchmarks, reset = catalog_benchmarks(size)
+            results[f"catalog_setup_ms@{size}"] = round((time.perf_counter() - started) * 1000, 1)
+            record(f"@{size}", benchmarks, reset)
+    finally:
+        catalog.reset(DEFAULT_PRODUCTS_FILE)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': list(sizes),
+        'results': results,
+        'reference': reference,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+            min_delta_us: float = MIN_DELTA_US) -> List[Dict[str, Any]]:
+    """항목별 기준 대비 비율 (status: regression / improvement / ok / new)
+
+    두 리포트 모두 기준 작업 시간이 있으면 그 비율로 보정한 값이 ratio, 보정 전 값이 raw_ratio이며
+    둘 다 임계값을 넘어야 회귀/개선으로 판정합니다 (한쪽만 넘는 경우는 대부분 측정 잡음).
+    catalog_setup_ms 항목은 참고용이라 회귀 판정에서 제외합니다.
+    """
+    current_ref, baseline_ref = current.get('reference', {}), baseline.get('reference', {})
+    base_results = baseline['results']
+    rows = []
+    for name, value in current['results'].items():
+        base = base_results.get(name)
+        if base is None:
+            rows.append({'name': name, 'current': value, 'baseline': None, 'ratio': None, 'raw_ratio': None, 'status': 'new'})
+            continue
+        raw_ratio = value / base if base else float('inf')
+        ratio = raw_ratio
+        if current_ref.get(name) and baseline_ref.get(name):
+            ratio = raw_ratio / (current_ref[name] / baseline_ref[name])
+        status = 'ok'
+        if not name.startswith('catalog_setup_ms') and abs(value - base) >= min_delta_us:
+            if min(ratio, raw_ratio) > 1 + threshold:
+                status = 'regression'
+            elif max(ratio, raw_ratio) < 1 / (1 + threshold):
+                status = 'improvement'
+        rows.append({
+            'name': name, 'current': value, 'baseline': base,
+            'ratio': round(ratio, 3), 'raw_ratio': round(raw_ratio, 3), 'status': status,
+        })
+    return rows
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    marks = {'regression': '▲ 느려짐', 'improvement': '▼ 빨라짐', 'ok': '', 'new': '(신규)'}
+    lines = [f"{'항목':<44}{'기준(us)':>12}{'현재(us)':>12}{'비율':>8}{'보정':>8}"]
+    for row in rows:
+        base = '-' if row['baseline'] is None else f"{row['baseline']:.3f}"
+        raw_ratio = '-' if row['raw_ratio'] is None else f"{row['raw_ratio']:.2f}"
+        ratio = '-' if row['ratio'] is None else f"{row['ratio']:.2f}"
+        lines.append(f"{row['name']:<44}{base:>12}{row['current']:>12.3f}{raw_ratio:>8}{ratio:>8}  {marks[row['status']]}")
+    return '\n'.join(lines)
+
+
+def load_baseline(path: str = BASELINE_FILE) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(report: Dict[str, Any], path: str = BASELINE_FILE):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="핫 경로 마이크로 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="합성 카탈로그 크기")
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--target', type=float, default=0.05, help="라운드당 목표 측정 시간 (초)")
+    parser.add_argument('--only', nargs='+', help="이름에 포함된 문자열로 항목 선택")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save', action='store_true', help="결과를 기준값으로 저장")
+    parser.add_argument('--compare', action='store_true', help="기준값과 비교, 회귀가 있으면 종료 코드 1")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="회귀 판정 비율 (0.4 = 40%% 느려짐)")
+    parser.add_argument('--json', help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    with standin_credentials():  # ChatBot 클라이언트 생성용 (호출은 하지 않음)
+        report = run(args.sizes, args.rounds, args.target, args.only)
+    if args.json:
+        save_baseline(report, args.json)
+
+    if args.compare:
+        baseline = load_baseline(args.baseline)
+        rows = compare(report, baseline, args.threshold)
+        print(f"기준: {args.baseline} (python {baseline.get('python')}, {baseline.get('platform')})")
+        print(format_rows(rows))
+        regressions = [row['name'] for row in rows if row['status'] == 'regression']
+        if regressions:
+            print(f"\n❌ 회귀 {len(regressions)}건: {', '.join(regressions)}")
+            return 1
+        print("\n✅ 회귀 없음")
+    else:
+        for name, value in report['results'].items():
+            print(f"{name:>44}: {value}")
+
+    if args.save:
+        save_baseline(report, args.baseline)
+        print(f"기준값 저장: {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+논쟁 SSE 엔드포인트 부하 테스트 (쇼룸 사용자 시뮬레이션)
+- 세션: /product/debate/dynamic → waiting_user 대기 → 선택지 하나 골라 /respond N회 → 결론 요청
+- 측정: 요청별 TTFB, 이벤트 간 도착 간격, waiting_user까지 시간, 결론 시간, 세션 시간,
+  이벤트 루프 지연(부하 생성기 / --spawn 시 서버), 오류율(HTTP/SSE error/타임아웃/업스트림 기본 응답)
+- 결과는 JSON 리포트 (--report 경로, 없으면 표준 출력)
+
+실행:
+    python -m benchmarks.load_sse --url http://localhost:8000 --sessions 1000 --concurrency 200
+    python -m benchmarks.load_sse --spawn --standin-profile friendli --sessions 200 --concurrency 50 --report load.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from debate_flows import CONCLUSION_REQUEST
+
+FALLBACK_TEXT = "흠... 이 부분은 좀 더 생각해볼 필요가 있네요"  # DynamicAIChatBotSystem 업스트림 실패 응답
+
+
+def summarize(values: List[float], scale: float = 1000.0) -> Dict[str, Any]:
+    """분포 요약 (초 → 밀리초)"""
+    if not values:
+        return {'count': 0}
+    data = np.asarray(values, dtype=np.float64) * scale
+    p50, p90, p95, p99 = np.percentile(data, [50, 90, 95, 99])
+    return {
+        'count': int(data.size),
+        'mean': round(float(data.mean()), 2),
+        'p50': round(float(p50), 2),
+        'p90': round(float(p90), 2),
+        'p95': round(float(p95), 2),
+        'p99': round(float(p99), 2),
+        'max': round(float(data.max()), 2),
+    }
+
+
+class LoopLagProbe:
+    """이벤트 루프 지연 측정 (interval마다 깨어나 예정보다 늦은 시간을 기록)"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+
+class LoadStats:
+    """세션/요청 측정값 누적"""
+
+    def __init__(self):
+        self.ttfb: Dict[str, List[float]] = {'opening': [], 'respond': [], 'conclusion': []}
+        self.inter_event: List[float] = []
+        self.time_to_waiting_user: List[float] = []
+        self.conclusion: List[float] = []
+        self.session: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.requests = 0
+        self.events = 0
+        self.fallbacks = 0
+        self.completed = 0
+        self.failed = 0
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+async def read_sse(client: httpx.AsyncClient, path: str, body: Dict[str, Any], kind: str, stats: LoadStats,
+                   until: Optional[str] = None) -> Dict[str, Any]:
+    """SSE 요청 하나를 끝까지 읽으며 측정 (until 이벤트를 받은 시각 기록)"""
+    stats.requests += 1
+    started = time.perf_counter()
+    result: Dict[str, Any] = {'events': [], 'reached': None, 'error': None}
+    async with client.stream('POST', path, json=body) as response:
+        if response.status_code != 200:
+            await response.aread()
+            result['error'] = f"http_{response.status_code}"
+            return result
+        first = last = None
+        async for line in response.aiter_lines():
+            if not line.startswith('data: '):
+                continue
+            now = time.perf_counter()
+            if first is None:
+                first = now
+                stats.ttfb[kind].append(now - started)
+            else:
+                stats.inter_event.append(now - last)
+            last = now
+            event = json.loads(line[6:])
+            stats.events += 1
+            result['events'].append(event)
+            if event.get('type') == 'streaming' and FALLBACK_TEXT in (event.get('content') or ''):
+                stats.fallbacks += 1
+            if event.get('type') == 'error':
+                result['error'] = 'sse_error'
+            if until and event.get('type') == until and result['reached'] is None:
+                result['reached'] = now - started
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+async def run_session(client: httpx.AsyncClient, stats: LoadStats, product_ids: List[int], rounds: int,
+                      pacing: str, rng: random.Random):
+    """쇼룸 사용자 한 명: 첫 논쟁 → 선택지 응답 rounds회 → 결론"""
+    started = time.perf_counter()
+    product_id = rng.choice(product_ids)
+    try:
+        opening = await read_sse(client, '/product/debate/dynamic', {'product_id': product_id, 'pacing': pacing},
+                                 'opening', stats, until='waiting_user')
+        if opening['error'] or opening['reached'] is None:
+            raise RuntimeError(opening['error'] or 'no_waiting_user')
+        stats.time_to_waiting_user.append(opening['reached'])
+        question = next(e for e in opening['events'] if e.get('type') == 'guide_question')
+
+        for _ in range(rounds):
+            choices = [s for s in question['suggestions'] if s != CONCLUSION_REQUEST] or question['suggestions']
+            respond = await read_sse(client, '/product/debate/dynamic/respond', {
+                'product_id': product_id,
+                'user_input': rng.choice(choices),
+                'conversation_history': question['history'],
+                'pacing': pacing,
+                'session_id': question.get('session_id'),
+            }, 'respond', stats, until='waiting_user')
+            if respond['error'] or respond['reached'] is None:
+                raise RuntimeError(respond['error'] or 'no_waiting_user')
+            question = next(e for e in respond['events'] if e.get('type') == 'guide_question')
+
+        conclusion = await read_sse(client, '/product/debate/dynamic/respond', {
+            'product_id': product_id,
+            'user_input': CONCLUSION_REQUEST,
+            'conversation_history': question['history'],
+            'pacing': pacing,
+            'session_id': question.get('session_id'),
+        }, 'conclusion', stats, until='end')
+        if conclusion['error'] or conclusion['reached'] is None:
+            raise RuntimeError(conclusion['error'] or 'no_end')
+        stats.conclusion.append(conclusion['reached'])
+        stats.session.append(time.perf_counter() - started)
+        stats.completed += 1
+    except httpx.TimeoutException:
+        stats.failed += 1
+        stats.error('timeout')
+    except httpx.HTTPError as e:
+        stats.failed += 1
+        stats.error(type(e).__name__)
+    except Exception as e:
+        stats.failed += 1
+        stats.error(str(e) if str(e).startswith(('http_', 'sse_', 'no_')) else type(e).__name__)
+
+
+async def run_load(
+    url: str,
+    sessions: int = 100,
+    concurrency: int = 20,
+    rounds: int = 2,
+    ramp: float = 0.0,
+    pacing: str = "none",
+    product_ids: Optional[List[int]] = None,
+    timeout: float = 120.0,
+    seed: Optional[int] = None,
+    server_probe: Optional[LoopLagProbe] = None,
+) -> Dict[str, Any]:
+    """부하 실행 후 리포트 dict 반환"""
+    rng = random.Random(seed)
+    stats = LoadStats()
+    probe = LoopLagProbe()
+    probe.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        if product_ids is None:
+            product_ids = [p['id'] for p in (await client.get('/products')).json()['products']]
+
+        async def session(n: int):
+            if ramp and concurrency:
+                await asyncio.sleep(min(n, concurrency) / concurrency * ramp)  # 처음 concurrency명은 ramp초 동안 나눠서 입장
+            async with semaphore:
+                await run_session(client, stats, product_ids, rounds, pacing, rng)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(session(n) for n in range(sessions)))
+        elapsed = time.perf_counter() - started
+    probe.stop()
+
+    return {
+        'config': {
+            'url': url, 'sessions': sessions, 'concurrency': concurrency, 'rounds': rounds,
+            'ramp_s': ramp, 'pacing': pacing, 'product_ids': product_ids,
+        },
+        'elapsed_s': round(elapsed, 3),
+        'sessions': {'completed': stats.completed, 'failed': stats.failed},
+        'throughput_sessions_per_s': round(stats.completed / elapsed, 3) if elapsed else None,
+        'requests': stats.requests,
+        'events': stats.events,
+        'error_rate': round(stats.failed / sessions, 4) if sessions else 0.0,
+        'errors': stats.errors,
+        'upstream_fallback_turns': stats.fallbacks,
+        'ttfb_ms': {kind: summarize(values) for kind, values in stats.ttfb.items()},
+        'inter_event_ms': summarize(stats.inter_event),
+        'time_to_waiting_user_ms': summarize(stats.time_to_waiting_user),
+        'conclusion_ms': summarize(stats.conclusion),
+        'session_ms': summarize(stats.session),
+        'event_loop_lag_ms': {
+            'load_generator': summarize(probe.samples),
+            'server': summarize(server_probe.samples) if server_probe else None,
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _serve_in_thread(app, probe: Optional[LoopLagProbe] = None):
+    """uvicorn 서버를 별도 스레드/이벤트 루프에서 실행 (probe는 서버 루프에서 측정)"""
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='error'))
+
+    async def serve():
+        if probe is not None:
+            probe.start()
+        await server.serve()
+
+    thread = threading.Thread(target=lambda: asyncio.run(serve()), daemon=True)
+    thread.start()
+    deadline = time.time() + 15
+    while not server.started and time.time() < deadline:
+        time.sleep(0.02)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+@contextlib.contextmanager
+def spawn_backend(standin_profile: str = "friendli", seed: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """LLM 대역 서버 + api_v3_complete 앱을 이 프로세스에서 실행 (앱의 LLM 주소를 대역 서버로 지정)"""
+    from llm_standin import LATENCY_PROFILES, create_app, standin_credentials
+
+    standin, standin_thread, standin_url = _serve_in_thread(create_app(LATENCY_PROFILES[standin_profile], seed))
+    with standin_credentials(standin_url):
+        import api_v3_complete
+
+        system = api_v3_complete.dynamic_ai_system
+        original_url = system.base_url
+        system.base_url = f"{standin_url}/v1/chat/completions"
+        probe = LoopLagProbe()
+        server, thread, url = _serve_in_thread(api_v3_complete.app, probe)
+        try:
+            yield {'url': url, 'server_probe': probe, 'standin': standin.config.app}
+        finally:
+            server.should_exit = True
+            standin.should_exit = True
+            thread.join(timeout=10)
+            standin_thread.join(timeout=10)
+            system.base_url = original_url
+    # strict 모드: 실행 중 앱 이벤트 루프가 임계값보다 오래 막혔으면 실패
+    if Config.LOOP_MONITOR_STRICT:
+        api_v3_complete.loop_monitor.check()
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="논쟁 SSE 엔드포인트 부하 테스트")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help="대상 서버 주소 (예: http://localhost:8000)")
+    target.add_argument('--spawn', action='store_true', help="LLM 대역 서버 + 앱을 이 프로세스에서 실행")
+    parser.add_argument('--standin-profile', default='friendli', help="--spawn 시 LLM 대역 서버 지연 프로필")
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=2, help="세션당 /respond 횟수 (결론 요청 제외)")
+    parser.add_argument('--ramp', type=float, default=0.0, help="동시 사용자 입장 시간 (초)")
+    parser.add_argument('--pacing', default='none', choices=('none', 'fixed', 'adaptive'))
+    parser.add_argument('--products', type=int, nargs='*', help="사용할 제품 id (생략 시 /products 전체)")
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--report', help="JSON 리포트 경로")
+    args = parser.parse_args(argv)
+
+    options = dict(
+        sessions=args.sessions, concurrency=args.concurrency, rounds=args.rounds, ramp=args.ramp,
+        pacing=args.pacing, product_ids=args.products, timeout=args.timeout, seed=args.seed,
+    )
+    if args.spawn:
+        with spawn_backend(args.standin_profile, args.seed) as backend:
+            report = asyncio.run(run_load(backend['url'], server_probe=backend['server_probe'], **options))
+            report['config']['standin_profile'] = args.standin_profile
+    else:
+        report = asyncio.run(run_load(args.url, **options))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"리포트 저장: {args.report}")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
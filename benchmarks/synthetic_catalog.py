@@ -0,0 +1,41 @@
+"""
+벤치마크용 합성 카탈로그 생성
+- new_products.json의 실제 제품을 템플릿으로 N개 SKU 생성
+"""
+
+import copy
+import json
+import os
+from typing import Any, Dict
+
+BASE_CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "new_products.json")
+
+
+def build_catalog(size: int, base_file: str = BASE_CATALOG) -> Dict[str, Any]:
+    """size개 제품을 가진 카탈로그 dict 생성 (가격은 SKU마다 조금씩 다름)"""
+    with open(base_file, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+
+    templates = base.get('products', [])
+    products = []
+    for i in range(size):
+        product = copy.deepcopy(templates[i % len(templates)])
+        product['id'] = i
+        product['name'] = f"{product.get('name', '제품')} SKU-{i:06d}"
+        product['purchase_price'] = int(product.get('purchase_price', 0) * (0.8 + (i % 41) / 100))
+        product['subscription_price'] = {
+            period: int(price * (0.8 + (i % 37) / 100))
+            for period, price in product.get('subscription_price', {}).items()
+        }
+        products.append(product)
+
+    data = dict(base)
+    data['products'] = products
+    return data
+
+
+def write_catalog(path: str, size: int) -> str:
+    """합성 카탈로그를 파일로 저장"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(build_catalog(size), f, ensure_ascii=False)
+    return path
@@ -0,0 +1,271 @@
+"""
+혜택 문구 → 숫자 팩트 추출기
+- 카탈로그 로드 시 한 번만 혜택 문장을 타입이 있는 필드로 변환 (카탈로그 버전별 캐시)
+- 멤버십 포인트, 선결제 비율/월 할인액, 초기 반값 할인, 제휴카드 할인 한도, 에너지 환급률/한도
+- 어떤 문장에서 어떤 값을 뽑았는지, 숫자가 있는데 해석하지 못한 문장은 무엇인지 검증 리포트로 보관
+- 혜택 문구의 '총 비용'은 가격 테이블이 같은 기간 / 같은 혜택으로 계산한 실부담과 비교해 다르면 경고
+- 할인 계산(pricing)과 프롬프트는 문자열 대신 이 필드만 사용 (프롬프트 혜택 문구는 금액 문장을 뺀 prompt_benefits)
+"""
+
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import catalog
+from catalog import CatalogSnapshot, DEFAULT_PRODUCTS_FILE
+
+_AMOUNT = r'([\d,]+(?:\.\d+)?)'
+_POINTS_PATTERN = re.compile(r'멤버십\s*포인트\s*' + _AMOUNT + r'\s*P')
+_PREPAY_RATE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*%\s*선\s*결제')
+_PREPAY_AMOUNT_PATTERN = re.compile(r'월\s*' + _AMOUNT + r'\s*원\s*(?:추가\s*)?할인')
+_INTRO_PATTERN = re.compile(r'첫\s*(\d+)\s*개월[^,]*?(반값|(\d+)\s*%)\s*할인')
+_CARD_CAP_PATTERN = re.compile(r'제휴\s*카드[^,]*?최대\s*' + _AMOUNT + r'\s*원\s*할인')
+_REBATE_RATE_PATTERN = re.compile(r'환급[^(]*?최대\s*(\d+(?:\.\d+)?)\s*%')
+_REBATE_CAP_PATTERN = re.compile(r'최대\s*(\d+)\s*만\s*원')
+_STATED_TOTAL_PATTERN = re.compile(r'총\s*비용\s*' + _AMOUNT + r'\s*원')
+_STATED_PERIOD_PATTERN = re.compile(r'(\d+)\s*년을\s*사용|(\d+)\s*개월\s*할부')
+# '총 비용' 문장의 혜택 목록 단어 → 할인 규칙 이름 (discount_rules.RULES)
+_STATED_RULE_WORDS = (
+    ('선결제', 'prepay'), ('카드', 'card'), ('멤버십', 'points'), ('포인트', 'points'),
+    ('복수', 'bundle'), ('초기', 'intro'), ('환급', 'energy_rebate'),
+)
+STATED_TOTAL_TOLERANCE = 0.01  # 문구 금액과 계산 금액 차이 허용 비율
+_HAS_NUMBER = re.compile(r'\d')
+# 금액/비율/포인트가 적힌 혜택 문장 (프롬프트의 숫자는 팩트/가격 엔진에서 가져오므로 문구는 제외)
+_PRICE_SENTENCE_PATTERN = re.compile(r'\d[\d,.]*\s*(?:만\s*)?(?:원|P|%)')
+
+
+def _to_int(text: str) -> int:
+    return int(float(text.replace(',', '')))
+
+
+@dataclass(frozen=True)
+class ProductFacts:
+    """제품별 구독 혜택 팩트 (문구가 없으면 0)"""
+    product_id: Any
+    membership_points: int = 0
+    prepay_rate: float = 0.0            # 선결제 비율 (구독 요금의 30% → 0.3)
+    prepay_monthly_discount: int = 0    # 선결제 시 월 추가 할인액
+    intro_discount_months: int = 0      # 초기 할인 적용 개월 수 (첫 12개월)
+    intro_discount_rate: float = 0.0    # 초기 할인율 (반값 → 0.5)
+    stated_total: int = 0               # 혜택 문구에 적힌 '총 비용' (검증용)
+    stated_period: str = ''             # '총 비용' 기준 계약기간 (문구에 없으면 '')
+    stated_rules: Tuple[str, ...] = ()  # '총 비용'에 포함된 할인 규칙 (문구에 없으면 ())
+
+
+@dataclass(frozen=True)
+class CommonFacts:
+    """공통 혜택 팩트"""
+    card_discount_cap: int = 0          # 제휴카드 월 할인 한도
+    bundle_discount: bool = False       # 복수 구독 추가 할인 안내 여부
+    energy_rebate_rate: float = 0.0     # 에너지 으뜸 효율 환급률
+    energy_rebate_cap: int = 0          # 환급 한도 (구매)
+
+
+@dataclass
+class FactReport:
+    """추출 검증 리포트 (제품 id 또는 'common' 단위)"""
+    scope: Any
+    sources: Dict[str, str] = field(default_factory=dict)   # 필드 → 원문
+    unparsed: List[str] = field(default_factory=list)       # 숫자가 있지만 해석하지 못한 문구
+    warnings: List[str] = field(default_factory=list)
+
+
+def _set(values: Dict[str, Any], report: FactReport, name: str, value: Any, source: str):
+    """같은 필드가 서로 다른 값으로 두 번 나오면 경고 (처음 값 유지)"""
+    if name in values and values[name] != value:
+        report.warnings.append(f"{name} 값 충돌: {values[name]} / {value} ('{source}')")
+        return
+    values[name] = value
+    report.sources[name] = source
+
+
+def is_price_sentence(text: str) -> bool:
+    """금액/비율/포인트, '총 비용', 초기 할인처럼 팩트나 가격 엔진 값과 겹치는 숫자가 있는 혜택 문장"""
+    return bool(_PRICE_SENTENCE_PATTERN.search(text) or _STATED_TOTAL_PATTERN.search(text)
+                or _INTRO_PATTERN.search(text))
+
+
+def _qualitative(benefits: Any) -> List[str]:
+    return [str(benefit) for benefit in benefits or [] if not is_price_sentence(str(benefit))]
+
+
+def extract_product_facts(product: Dict) -> Tuple[ProductFacts, FactReport]:
+    """제품 하나의 구독 혜택 문장 → ProductFacts + 리포트"""
+    report = FactReport(scope=product.get('id'))
+    values: Dict[str, Any] = {}
+    for benefit in product.get('subscription_benefits') or []:
+        text = str(benefit)
+        matched = False
+        match = _POINTS_PATTERN.search(text)
+        if match:
+            _set(values, report, 'membership_points', _to_int(match.group(1)), text)
+            matched = True
+        match = _STATED_TOTAL_PATTERN.search(text)
+        if match:
+            # '모든 혜택을 받을 경우 총 비용 ...' 요약 문장은 검증용 값만 보관 (가격 테이블과 비교)
+            _set(values, report, 'stated_total', _to_int(match.group(1)), text)
+            period = _STATED_PERIOD_PATTERN.search(text)
+            if period:
+                years = int(period.group(1)) if period.group(1) else int(period.group(2)) // 12
+                _set(values, report, 'stated_period', f"{years}년", text)
+            listed = text[text.find('(') + 1:text.find(')')] if '(' in text and ')' in text else ''
+            rules = tuple(dict.fromkeys(rule for word, rule in _STATED_RULE_WORDS if word in listed))
+            if rules:
+                _set(values, report, 'stated_rules', rules, text)
+            continue
+        match = _PREPAY_RATE_PATTERN.search(text)
+        if match:
+            _set(values, report, 'prepay_rate', float(match.group(1)) / 100, text)
+            amount = _PREPAY_AMOUNT_PATTERN.search(text)
+            if amount:
+                _set(values, report, 'prepay_monthly_discount', _to_int(amount.group(1)), text)
+            else:
+                report.warnings.append(f"선결제 문구에 월 할인액 없음: '{text}'")
+            matched = True
+        match = _INTRO_PATTERN.search(text)
+        if match:
+            rate = 0.5 if match.group(2) == '반값' else float(match.group(3)) / 100
+            _set(values, report, 'intro_discount_months', int(match.group(1)), text)
+            _set(values, report, 'intro_discount_rate', rate, text)
+            matched = True
+        if not matched and _HAS_NUMBER.search(text):
+            report.unparsed.append(text)
+    return ProductFacts(product_id=product.get('id'), **values), report
+
+
+def extract_common_facts(data: Dict) -> Tuple[CommonFacts, FactReport]:
+    """공통 구독/구매 혜택 문장 → CommonFacts + 리포트"""
+    report = FactReport(scope='common')
+    values: Dict[str, Any] = {}
+    benefits = list(data.get('common_subscription_benefits') or []) + list(data.get('common_purchase_benefits') or [])
+    for benefit in benefits:
+        text = str(benefit)
+        matched = False
+        match = _CARD_CAP_PATTERN.search(text)
+        if match:
+            _set(values, report, 'card_discount_cap', _to_int(match.group(1)), text)
+            matched = True
+        if '복수 구독' in text and '할인' in text:
+            _set(values, report, 'bundle_discount', True, text)
+            matched = True
+        if '환급' in text:
+            rate = _REBATE_RATE_PATTERN.search(text)
+            if rate:
+                # 구독/구매 문구 모두 같은 환급률이어야 함 (다르면 충돌 경고)
+                _set(values, report, 'energy_rebate_rate', float(rate.group(1)) / 100, text)
+                matched = True
+            cap = _REBATE_CAP_PATTERN.search(text)
+            if cap:
+                _set(values, report, 'energy_rebate_cap', int(cap.group(1)) * 10000, text)
+        if not matched and _HAS_NUMBER.search(text):
+            report.unparsed.append(text)
+    return CommonFacts(**values), report
+
+
+class CatalogFacts:
+    """카탈로그 스냅샷 하나에 대한 혜택 팩트 (불변)"""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.common, common_report = extract_common_facts(snapshot.data)
+        self.reports: List[FactReport] = [common_report]
+        self._products: Dict[Any, ProductFacts] = {}
+        self._product_reports: Dict[Any, FactReport] = {}
+        self._common_benefits = {
+            kind: _qualitative(snapshot.data.get(f'common_{kind}_benefits')) for kind in ('purchase', 'subscription')
+        }
+        self._prompt_benefits: Dict[Tuple[Any, str], List[str]] = {}
+        for product in snapshot.products:
+            facts, report = extract_product_facts(product)
+            for kind in ('purchase', 'subscription'):
+                self._prompt_benefits[(product.get('id'), kind)] = (
+                    _qualitative(product.get(f'{kind}_benefits')) + self._common_benefits[kind]
+                )
+            self._products[product.get('id')] = facts
+            self._product_reports[product.get('id')] = report
+            self.reports.append(report)
+
+    def product(self, product_id: Any) -> ProductFacts:
+        """제품 팩트 (없는 제품이면 전부 0인 팩트)"""
+        return self._products.get(product_id) or ProductFacts(product_id=product_id)
+
+    def prompt_benefits(self, product_id: Any, kind: str) -> List[str]:
+        """프롬프트용 혜택 문구 (kind: 'purchase' / 'subscription', 제품 문구 → 공통 문구 순)
+
+        '총 비용'이나 할인 금액이 적힌 문장은 가격 엔진 계산과 어긋날 수 있으므로 빼고, 숫자는 팩트/가격 테이블 값을 씁니다.
+        """
+        benefits = self._prompt_benefits.get((product_id, kind))
+        return list(benefits) if benefits is not None else list(self._common_benefits.get(kind, []))
+
+    def check_stated_totals(
+        self,
+        net_totals: Callable[[Any, Optional[str], Tuple[str, ...]], Tuple[Optional[str], List[int]]],
+    ) -> List[str]:
+        """혜택 문구의 '총 비용'을 가격 엔진 실부담과 비교한 경고 목록 (팩트/리포트는 바꾸지 않음)
+
+        net_totals(제품 id, 기간, 규칙) → (사용한 기간, 케어옵션별 실부담 목록)
+        """
+        warnings = []
+        for product_id, facts in self._products.items():
+            if not facts.stated_total:
+                continue
+            period, candidates = net_totals(product_id, facts.stated_period or None, facts.stated_rules)
+            if not candidates:
+                warning = f"총 비용 {facts.stated_total:,}원을 확인할 가격 없음 ({facts.stated_period or '대표 기간'})"
+            else:
+                closest = min(candidates, key=lambda total: abs(total - facts.stated_total))
+                if abs(closest - facts.stated_total) <= facts.stated_total * STATED_TOTAL_TOLERANCE:
+                    continue
+                rules = ', '.join(facts.stated_rules) or 'max'
+                warning = (f"총 비용 불일치: 문구 {facts.stated_total:,}원 / 가격 엔진 {closest:,}원 "
+                           f"({period}, {rules})")
+            warnings.append(f"[{product_id}] {warning}")
+        return warnings
+
+    @property
+    def warnings(self) -> List[str]:
+        return [f"[{report.scope}] {warning}" for report in self.reports for warning in report.warnings]
+
+    def report(self, pricing: Any = None) -> Dict[str, Any]:
+        """검증 리포트 JSON (pricing(PricingTable)을 주면 '총 비용' 문구와 가격 엔진 비교 결과 포함)"""
+        stated_totals = self.check_stated_totals(pricing.stated_net_totals) if pricing is not None else []
+        return {
+            'catalog_version': self.version,
+            'common': asdict(self.common),
+            'products': [asdict(facts) for facts in self._products.values()],
+            'reports': [asdict(report) for report in self.reports],
+            'stated_total_warnings': stated_totals,
+            'warning_count': sum(len(report.warnings) for report in self.reports) + len(stated_totals),
+            'unparsed_count': sum(len(report.unparsed) for report in self.reports),
+        }
+
+
+def build_catalog_facts(snapshot: CatalogSnapshot) -> CatalogFacts:
+    facts = CatalogFacts(snapshot)
+    for warning in facts.warnings:
+        print(f"혜택 팩트 추출 경고: {warning}")
+    return facts
+
+
+catalog.register_derived('benefit_facts', build_catalog_facts)
+
+
+def facts_for(snapshot: CatalogSnapshot) -> CatalogFacts:
+    """특정 스냅샷의 혜택 팩트"""
+    return snapshot.derived('benefit_facts', build_catalog_facts)
+
+
+def get_benefit_facts(path: str = DEFAULT_PRODUCTS_FILE) -> CatalogFacts:
+    """현재 카탈로그 버전의 혜택 팩트"""
+    return facts_for(catalog.get_catalog(path))
+
+
+if __name__ == "__main__":
+    # 사용법: python benefit_facts.py [products.json|products.db]
+    from pricing import get_pricing_table  # '총 비용' 비교 (가격 테이블이 이 모듈을 import)
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PRODUCTS_FILE
+    print(json.dumps(get_benefit_facts(path).report(get_pricing_table(path)), ensure_ascii=False, indent=2))
@@ -0,0 +1,124 @@
+"""
+복수 구독 묶음 분석
+- 여러 제품을 함께 구독할 때 제품별 대표 계약기간의 월 구독료/총 비용 합계
+- 복수 구독 할인(bundle 규칙) 적용 전후 비교, 모두 일시불 구매했을 때와 비교
+- 가격 테이블/비용 곡선 배열만 사용 (LLM 호출 없음)
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from cost_curves import CostCurves
+from discount_rules import SCENARIO_LABELS
+
+
+def bundle_analysis(curves: CostCurves, product_ids: Sequence[Any], scenario: str = "max",
+                    period: Optional[str] = None) -> Dict[str, Any]:
+    """제품 묶음 구독 비용 분석
+
+    period를 생략하면 제품별 대표 계약기간(best_period)을 사용합니다.
+    구독 기간이 없는 제품은 일시불 구매로만 합계에 포함됩니다.
+    """
+    table = curves.table
+    if scenario not in table.scenarios:
+        raise ValueError(f"Unknown scenario: {scenario}")
+    s = table.scenarios.index(scenario)
+    rule = table.discounts.rules.get('bundle')
+    rate = float(rule.params.get('rate', 0)) if rule else 0.0
+    bundle_in_scenario = 'bundle' in table.discounts.scenario_rules[scenario]
+    bundle_amounts = table.discounts.amounts.get('bundle')
+
+    products: List[Dict[str, Any]] = []
+    for pid in product_ids:
+        if not table.has_product(pid):
+            continue
+        i = table.product_index(pid)
+        chosen = period if period in table.product_periods(pid) else table.best_period(pid)
+        item = {
+            'id': pid,
+            'name': table.product_names[i],
+            'purchase_price': int(curves.purchase_price[i]),
+            'purchase_upfront': int(curves.purchase_upfront[i, s]),
+            'period': chosen,
+            'months': None,
+            'monthly': None,
+            'bundle_discount': 0,
+            'bundled_monthly': None,
+            'total': None,
+            'bundled_total': None,
+        }
+        if chosen is not None:
+            t = table.period_index(chosen)
+            months = int(table.months[t])
+            monthly = float(curves.subscription_monthly[i, t, s])
+            bundle = float(bundle_amounts[i, t]) if bundle_amounts is not None else 0.0
+            # 시나리오에 복수 구독 할인이 이미 포함되어 있으면 할인 전 금액을 역산
+            single = monthly + bundle if bundle_in_scenario else monthly
+            bundled = max(0.0, single - bundle)
+            credit = float(curves.credit[i, t, s])
+            item.update({
+                'months': months,
+                'monthly': int(single),
+                'bundle_discount': int(bundle),
+                'bundled_monthly': int(bundled),
+                'total': int(single * months - credit),
+                'bundled_total': int(bundled * months - credit),
+            })
+        products.append(item)
+
+    subscribed = [item for item in products if item['period'] is not None]
+    eligible = len(subscribed) >= 2 and table.facts.common.bundle_discount
+    monthly = sum(item['monthly'] for item in subscribed)
+    bundled_monthly = sum(item['bundled_monthly'] for item in subscribed) if eligible else monthly
+    total = sum(item['total'] for item in subscribed)
+    bundled_total = sum(item['bundled_total'] for item in subscribed) if eligible else total
+
+    if len(subscribed) < 2:
+        note = "복수 구독 할인은 2개 이상 구독할 때 적용됩니다"
+    elif not table.facts.common.bundle_discount:
+        note = "카탈로그에 복수 구독 할인 안내가 없습니다"
+    elif not rate:
+        note = "복수 구독 할인율이 설정되지 않았습니다 (BUNDLE_DISCOUNT_RATE)"
+    else:
+        note = f"복수 구독 시 제품별 기본요금의 {rate * 100:g}% 추가 할인"
+
+    return {
+        'catalog_version': curves.version,
+        'scenario': scenario,
+        'label': SCENARIO_LABELS.get(scenario, scenario),
+        'eligible': bool(eligible),
+        'bundle_rate': rate,
+        'note': note,
+        'products': products,
+        'combined': {
+            'monthly': monthly,
+            'bundled_monthly': bundled_monthly,
+            'monthly_saving': monthly - bundled_monthly,
+            'total': total,
+            'bundled_total': bundled_total,
+            'total_saving': total - bundled_total,
+            'purchase_upfront': int(np.sum([item['purchase_upfront'] for item in products])) if products else 0,
+        },
+    }
+
+
+def bundle_summary(analysis: Dict[str, Any]) -> str:
+    """안내봇 발언용 묶음 분석 문장"""
+    products = analysis['products']
+    if not products:
+        return "비교할 제품 정보가 없어요."
+    combined = analysis['combined']
+    names = ', '.join(item['name'] for item in products)
+    lines = [f"{names}을(를) 함께 보면, 모두 일시불로 사면 {combined['purchase_upfront']:,}원이 한 번에 들어요."]
+    if combined['monthly']:
+        plans = ', '.join(f"{item['name']} {item['period']}" for item in products if item['period'])
+        lines.append(f"모두 구독({plans})하면 월 {combined['monthly']:,}원, 계약기간 총 {combined['total']:,}원이에요.")
+        if combined['monthly_saving']:
+            lines.append(
+                f"복수 구독 할인을 받으면 월 {combined['bundled_monthly']:,}원으로 "
+                f"매달 {combined['monthly_saving']:,}원, 총 {combined['total_saving']:,}원을 아낄 수 있어요."
+            )
+        else:
+            lines.append(f"{analysis['note']}.")
+    return ' '.join(lines)
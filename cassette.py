@@ -0,0 +1,176 @@
+"""
+LLM 호출 녹화/재생 (카세트)
+- 모델 호출 경계(DynamicAIChatBotSystem._call_ai_api)에서 요청 지문 + 스트리밍 청크 도착 시각을 파일에 기록
+- 재생 모드는 같은 지문의 응답을 기록된 시각(또는 배율을 곱한 시각)에 맞춰 돌려줌
+- 실제 토큰 없이 /product/debate/dynamic, /respond 전체 플로우를 실제와 비슷한 지연으로 실행/벤치마크/회귀 테스트
+- 카세트 사용 중에는 플로우의 무작위 선택(인트로 문구, 첫 응답 봇)을 요청 내용으로 고정 (DynamicAIChatBotSystem.flow_rng)
+  → 전역 난수 시드와 무관하게 녹화 때와 같은 프롬프트/지문
+
+LLM_CASSETTE_MODE=record LLM_CASSETTE_PATH=cassettes/debate.json python main.py   # 녹화
+LLM_CASSETTE_MODE=replay LLM_CASSETTE_PATH=cassettes/debate.json python main.py   # 재생
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from config import Config
+
+CASSETTE_MODES = ("off", "record", "replay")
+CASSETTE_FORMAT_VERSION = 1
+
+
+class CassetteMiss(LookupError):
+    """재생 모드에서 기록되지 않은 요청"""
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """요청 지문 (stream 여부와 무관, 프롬프트/모델/샘플링 파라미터 기준)"""
+    request = {key: value for key, value in payload.items() if key != 'stream'}
+    return hashlib.sha256(json.dumps(request, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """녹화된 LLM 호출 모음 (파일 하나)
+
+    같은 지문이 여러 번 기록되면 재생 시 기록 순서대로 돌려주고, 끝나면 처음부터 반복합니다.
+    time_scale: 재생 지연 배율 (1.0 = 기록 그대로, 0 = 지연 없음)
+    """
+
+    def __init__(self, path: str, mode: str = "replay", time_scale: float = 1.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"지원하지 않는 카세트 모드입니다: {mode}. {', '.join(CASSETTE_MODES)} 중 하나를 사용하세요.")
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self.plays = 0
+        self.misses: List[str] = []
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saving = False
+        if os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return sum(len(items) for items in self.interactions.values())
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.interactions = {}
+        for interaction in data.get('interactions', []):
+            self.interactions.setdefault(interaction['fingerprint'], []).append(interaction)
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (녹화 중 서버가 죽어도 이전 파일 유지)"""
+        with self._lock:
+            interactions = [item for items in self.interactions.values() for item in items]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': CASSETTE_FORMAT_VERSION, 'interactions': interactions}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    async def save_async(self):
+        """녹화 중 저장: 파일 쓰기는 스레드에서 (이벤트 루프를 막지 않음)
+
+        이미 저장 중이면 다시 쓰지 않고 표시만 해 두고, 진행 중인 저장이 끝난 뒤 한 번 더 저장합니다
+        (동시에 끝난 호출들이 파일 전체를 한 번씩 다시 쓰지 않도록 묶음 저장).
+        """
+        self._dirty = True
+        if self._saving:
+            return
+        self._saving = True
+        try:
+            while self._dirty:
+                self._dirty = False
+                await asyncio.to_thread(self.save)
+        finally:
+            self._saving = False
+
+    def _next(self, key: str) -> Dict[str, Any]:
+        items = self.interactions.get(key)
+        if not items:
+            self.misses.append(key)
+            raise CassetteMiss(f"카세트에 없는 요청입니다: {key[:12]}")
+        with self._lock:
+            n = self._cursor.get(key, 0)
+            self._cursor[key] = n + 1
+        self.plays += 1
+        return items[n % len(items)]
+
+    async def replay_stream(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """기록된 청크를 기록 시각 × time_scale에 맞춰 전달"""
+        interaction = self._next(fingerprint(payload))
+        elapsed = 0.0
+        for chunk in interaction['chunks']:
+            delay = (chunk['t'] - elapsed) * self.time_scale
+            elapsed = chunk['t']
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield chunk['text']
+
+    async def record_stream(
+        self,
+        payload: Dict[str, Any],
+        upstream: Callable[[Dict[str, Any]], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """업스트림 스트리밍 응답을 그대로 전달하며 청크별 도착 시각 기록 (완료 시 스레드에서 파일 저장)"""
+        started = time.perf_counter()
+        chunks = []
+        async for text in upstream(payload):
+            chunks.append({'t': round(time.perf_counter() - started, 4), 'text': text})
+            yield text
+        interaction = {
+            'fingerprint': fingerprint(payload),
+            'request': {key: value for key, value in payload.items() if key != 'stream'},
+            'content': ''.join(chunk['text'] for chunk in chunks),
+            'chunks': chunks,
+            'ttft': chunks[0]['t'] if chunks else None,
+            'total': round(time.perf_counter() - started, 4),
+            'recorded_at': datetime.now().isoformat(),
+        }
+        with self._lock:
+            self.interactions.setdefault(interaction['fingerprint'], []).append(interaction)
+        await self.save_async()
+
+    def stream(
+        self,
+        payload: Dict[str, Any],
+        upstream: Callable[[Dict[str, Any]], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """모드에 맞는 청크 스트림 (record: 업스트림 + 기록, replay: 기록 재생)"""
+        if self.mode == "record":
+            return self.record_stream(payload, upstream)
+        return self.replay_stream(payload)
+
+    async def complete(
+        self,
+        payload: Dict[str, Any],
+        upstream: Callable[[Dict[str, Any]], AsyncIterator[str]],
+    ) -> str:
+        """비스트리밍 호출용: 전체 응답 텍스트 (재생 시 마지막 청크 시각까지 대기)"""
+        return ''.join([text async for text in self.stream(payload, upstream)]).strip()
+
+
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """LLM_CASSETTE_MODE/PATH 설정 기반 공유 카세트 (off면 None)"""
+    global _cassette
+    mode = Config.LLM_CASSETTE_MODE
+    if mode == "off" or not Config.LLM_CASSETTE_PATH:
+        return None
+    if _cassette is None or _cassette.path != Config.LLM_CASSETTE_PATH or _cassette.mode != mode:
+        _cassette = Cassette(Config.LLM_CASSETTE_PATH, mode, Config.LLM_CASSETTE_TIME_SCALE)
+    return _cassette
@@ -0,0 +1,375 @@
+"""
+제품 카탈로그 스냅샷
+- new_products.json을 프로세스당 한 번만 파싱
+- id / 이름 / 정규화 이름 인덱스로 O(1) 조회
+- 모든 소비자(ProductManager, 챗봇 플로우, API)가 같은 스냅샷을 공유
+- 파일 mtime 폴링 → 이벤트 루프 밖에서 파싱/검증 → 새 버전 스냅샷으로 원자적 교체
+- 파생 캐시(VersionedCache)는 카탈로그 버전이 바뀌면 자동으로 비워짐
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from catalog_sqlite import get_store, is_sqlite_path
+from config import Config
+
+# CATALOG_BACKEND=sqlite면 SQLite 저장소, 아니면 JSON 파일
+DEFAULT_PRODUCTS_FILE = Config.CATALOG_DB_PATH if Config.CATALOG_BACKEND == "sqlite" else "new_products.json"
+
+_NAME_STRIP = re.compile(r"[\s\-_/·.,()\[\]]+")
+
+
+def normalize_name(name: str) -> str:
+    """이름 정규화 (NFKC, 소문자, 공백/구분기호 제거)"""
+    return _NAME_STRIP.sub("", unicodedata.normalize("NFKC", name or "")).lower()
+
+
+class CatalogSnapshot:
+    """불변 카탈로그 스냅샷 (공유 객체이므로 내부 dict/list를 수정하지 말 것)"""
+
+    def __init__(
+        self,
+        data: Dict[str, Any],
+        version: int = 0,
+        source: Optional[str] = None,
+        stamp: Optional[Tuple[int, int]] = None,
+    ):
+        self.data = data
+        self.version = version
+        self.source = source
+        self.stamp = stamp  # 로드 시점 파일 (mtime_ns, size)
+        self._digest: Optional[str] = None
+        self._derived: Dict[str, Any] = {}  # 스냅샷별 파생 데이터 (가격 테이블 등)
+        self._derived_lock = threading.RLock()  # 파생 데이터끼리 서로 참조 가능
+        self.products: List[Dict] = data.get('products', [])
+        self.common_subscription_benefits: List[str] = data.get('common_subscription_benefits', [])
+        self.common_purchase_benefits: List[str] = data.get('common_purchase_benefits', [])
+        self.subscription_service_info: Dict = data.get('subscription_service_info', {})
+        self.penalty_info: Dict = data.get('penalty_info', {})
+
+        # 인덱스 (중복 시 먼저 나온 제품 우선 - 기존 선형 탐색과 동일)
+        self.by_id: Dict[Any, Dict] = {}
+        self.by_name: Dict[str, Dict] = {}
+        self.by_normalized_name: Dict[str, Dict] = {}
+        for product in self.products:
+            self.by_id.setdefault(product.get('id'), product)
+            name = product.get('name')
+            if name is not None:
+                self.by_name.setdefault(name, product)
+                self.by_normalized_name.setdefault(normalize_name(name), product)
+
+    def __len__(self):
+        return len(self.products)
+
+    def __repr__(self):
+        return f"CatalogSnapshot(version={self.version}, products={len(self.products)}, source={self.source!r})"
+
+    @property
+    def digest(self) -> str:
+        """내용 해시 (version은 프로세스마다 다시 세므로, 다른 프로세스가 만든 데이터와 비교할 때 사용)"""
+        if self._digest is None:
+            payload = json.dumps(self.data, ensure_ascii=False, sort_keys=True)
+            self._digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+        return self._digest
+
+    def get(self, product_id: Any) -> Optional[Dict]:
+        """ID로 제품 조회"""
+        return self.by_id.get(product_id)
+
+    def get_by_name(self, name: str, fuzzy: bool = False) -> Optional[Dict]:
+        """이름으로 제품 조회 (fuzzy면 정규화 이름으로도 조회)"""
+        product = self.by_name.get(name)
+        if product is None and fuzzy:
+            product = self.by_normalized_name.get(normalize_name(name))
+        return product
+
+    def derived(self, name: str, builder: Callable[["CatalogSnapshot"], Any]) -> Any:
+        """스냅샷별 파생 데이터 (최초 1회 builder(snapshot)로 생성, 버전이 바뀌면 새 스냅샷에서 다시 생성)"""
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = builder(self)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """저장용 전체 데이터 (공통 혜택/위약금 정보 포함)"""
+        return self.data
+
+
+EMPTY_CATALOG = CatalogSnapshot({})
+
+# 카탈로그 로드 시 미리 계산할 파생 데이터 (pricing 등 모듈이 import 시 등록)
+_derived_builders: Dict[str, Callable[[CatalogSnapshot], Any]] = {}
+
+
+def register_derived(name: str, builder: Callable[[CatalogSnapshot], Any]):
+    """파생 데이터 빌더 등록 (리로드 시 교체 전에 미리 계산)"""
+    _derived_builders[name] = builder
+
+
+def warm(snapshot: CatalogSnapshot) -> CatalogSnapshot:
+    """등록된 파생 데이터를 모두 계산"""
+    for name, builder in list(_derived_builders.items()):
+        try:
+            snapshot.derived(name, builder)
+        except Exception as e:
+            print(f"파생 데이터 '{name}' 계산 중 오류 발생: {e}")
+    return snapshot
+
+_lock = threading.RLock()
+_reload_lock = threading.Lock()
+_snapshots: Dict[str, CatalogSnapshot] = {}
+_versions: Dict[str, int] = {}
+_rejected: Dict[str, Tuple[int, int]] = {}  # 검증 실패한 파일 stamp (같은 파일 재파싱 방지)
+stats = {'parses': 0, 'reloads': 0, 'rejected': 0}  # 벤치마크/테스트용
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """파일 변경 감지용 (mtime_ns, size), SQLite는 (리비전, -1)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if is_sqlite_path(path):
+        return (get_store(path).revision(), -1)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def parse_catalog(path: str) -> Dict[str, Any]:
+    """카탈로그 파일 파싱 (JSON 또는 SQLite)"""
+    if is_sqlite_path(path):
+        data = get_store(path).load_document()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    stats['parses'] += 1
+    if not isinstance(data, dict) or not isinstance(data.get('products', []), list):
+        raise ValueError(f"잘못된 카탈로그 형식입니다: {path}")
+    return data
+
+
+def validate_catalog(data: Dict[str, Any]) -> List[str]:
+    """카탈로그 검증 (오류 메시지 목록, 비어 있으면 정상)"""
+    errors = []
+    products = data.get('products', [])
+    if not isinstance(products, list):
+        return ["products는 리스트여야 합니다"]
+
+    seen_ids = set()
+    for i, product in enumerate(products):
+        if not isinstance(product, dict):
+            errors.append(f"products[{i}]: 객체가 아닙니다")
+            continue
+        product_id = product.get('id')
+        if not isinstance(product_id, int):
+            errors.append(f"products[{i}]: id가 정수가 아닙니다")
+        elif product_id in seen_ids:
+            errors.append(f"products[{i}]: 중복 id {product_id}")
+        seen_ids.add(product_id)
+        if not isinstance(product.get('name'), str):
+            errors.append(f"products[{i}]: name이 없습니다")
+        if not isinstance(product.get('purchase_price', 0), (int, float)):
+            errors.append(f"products[{i}]: purchase_price가 숫자가 아닙니다")
+        prices = product.get('subscription_price', {})
+        if not isinstance(prices, dict) or not all(isinstance(v, (int, float)) for v in prices.values()):
+            errors.append(f"products[{i}]: subscription_price 형식 오류")
+    return errors
+
+
+def publish(
+    path: str,
+    data: Dict[str, Any],
+    stamp: Optional[Tuple[int, int]] = None,
+    prewarm: bool = False,
+) -> CatalogSnapshot:
+    """새 스냅샷을 만들어 원자적으로 교체 (버전 1 증가, prewarm이면 파생 데이터를 교체 전에 계산)"""
+    key = _key(path)
+    if prewarm:
+        with _lock:
+            version = _versions.get(key, 0) + 1
+            _versions[key] = version  # 계산 중 다른 publish와 버전이 겹치지 않도록 먼저 예약
+        snapshot = warm(CatalogSnapshot(data, version=version, source=key, stamp=stamp))
+        with _lock:
+            current = _snapshots.get(key)
+            if current is None or current.version < version:
+                _snapshots[key] = snapshot
+        return snapshot
+
+    with _lock:
+        version = _versions.get(key, 0) + 1
+        snapshot = CatalogSnapshot(data, version=version, source=key, stamp=stamp)
+        _versions[key] = version
+        _snapshots[key] = snapshot
+    return snapshot
+
+
+def get_catalog(path: str = DEFAULT_PRODUCTS_FILE) -> CatalogSnapshot:
+    """공유 카탈로그 스냅샷 (최초 호출 시 한 번만 파싱)"""
+    snapshot = _snapshots.get(_key(path))
+    if snapshot is not None:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshots.get(_key(path))
+        if snapshot is not None:
+            return snapshot
+        stamp = file_stamp(path)
+        try:
+            data = parse_catalog(path) if stamp else {}
+        except Exception as e:
+            print(f"제품 데이터 로드 중 오류 발생: {e}")
+            data = {}
+        return publish(path, data, stamp)
+
+
+def reload_if_changed(path: str = DEFAULT_PRODUCTS_FILE) -> Optional[CatalogSnapshot]:
+    """파일이 바뀌었으면 파싱/검증 후 새 스냅샷으로 교체 (블로킹 - 이벤트 루프 밖에서 호출)
+
+    파싱이나 검증에 실패하면 기존 스냅샷을 유지합니다.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        return None  # 다른 리로드 진행 중
+    try:
+        current = get_catalog(path)
+        stamp = file_stamp(path)
+        if stamp is None or stamp == current.stamp or stamp == _rejected.get(_key(path)):
+            return None
+
+        try:
+            data = parse_catalog(path)
+            errors = validate_catalog(data)
+        except Exception as e:
+            errors = [str(e)]
+        if errors:
+            _rejected[_key(path)] = stamp
+            stats['rejected'] += 1
+            print(f"카탈로그 리로드 실패 (기존 버전 {current.version} 유지): {'; '.join(errors[:5])}")
+            return None
+
+        snapshot = publish(path, data, stamp, prewarm=True)
+        stats['reloads'] += 1
+        print(f"🔄 카탈로그 리로드: 버전 {snapshot.version} ({len(snapshot)}개 제품)")
+        return snapshot
+    finally:
+        _reload_lock.release()
+
+
+class CatalogWatcher:
+    """카탈로그 파일 mtime 폴링 (asyncio 태스크, 파싱은 스레드에서)"""
+
+    def __init__(self, path: str = DEFAULT_PRODUCTS_FILE, interval: Optional[float] = None):
+        self.path = path
+        self.interval = Config.CATALOG_POLL_INTERVAL if interval is None else interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self) -> Optional[CatalogSnapshot]:
+        """한 번 확인 (변경 시 새 스냅샷 반환)"""
+        return await asyncio.to_thread(reload_if_changed, self.path)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"카탈로그 감시 중 오류 발생: {e}")
+
+    def start(self) -> asyncio.Task:
+        """감시 시작 (이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            get_catalog(self.path)
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def stop(self):
+        """감시 중지"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class VersionedCache:
+    """카탈로그 버전에 묶인 파생 캐시 (스냅샷이 교체되면 다음 접근 시 비워짐)"""
+
+    def __init__(self, path: str = DEFAULT_PRODUCTS_FILE, maxsize: Optional[int] = None):
+        self.path = path
+        self.maxsize = maxsize
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def _sync(self):
+        version = get_catalog(self.path).version
+        if version != self.version:
+            self._data.clear()
+            self.version = version
+
+    def __len__(self):
+        self._sync()
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        self._sync()
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self._sync()
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self.maxsize:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._sync()
+        self._data[key] = value
+        if self.maxsize:
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """캐시에 없으면 compute() 결과를 저장 후 반환"""
+        self._sync()
+        if key in self._data:
+            return self.get(key)
+        self.misses += 1
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def clear(self):
+        self._data.clear()
+
+
+def reset(path: Optional[str] = None):
+    """캐시된 스냅샷 제거 (테스트용)"""
+    with _lock:
+        if path is None:
+            _snapshots.clear()
+            _rejected.clear()
+        else:
+            _snapshots.pop(_key(path), None)
+            _rejected.pop(_key(path), None)
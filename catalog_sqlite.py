@@ -0,0 +1,442 @@
+"""
+SQLite 제품 카탈로그 저장소 (선택 사항)
+- 제품 / 기간별 구독가 / 케어서비스 가격 / 혜택 테이블
+- 혜택 텍스트 FTS5 검색 인덱스
+- WAL 모드, 제품 단위(row-level) 추가/수정/삭제
+- new_products.json 가져오기/내보내기
+
+소규모 배포는 기존 JSON 파일을 그대로 사용하고, CATALOG_BACKEND=sqlite일 때 이 저장소를 사용합니다.
+
+사용법:
+    python catalog_sqlite.py import new_products.json products.db
+    python catalog_sqlite.py export products.db new_products.json
+    python catalog_sqlite.py search products.db "제휴카드 할인"
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# 테이블 컬럼으로 저장하는 제품 필드 (나머지는 extra JSON)
+PRODUCT_COLUMNS = ('id', 'name', 'description', 'image', 'purchase_price')
+BENEFIT_KINDS = {'purchase_benefits': 'purchase', 'subscription_benefits': 'subscription'}
+COMMON_BENEFIT_KEYS = {'common_purchase_benefits': 'purchase', 'common_subscription_benefits': 'subscription'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    image TEXT,
+    purchase_price INTEGER,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products(purchase_price);
+CREATE TABLE IF NOT EXISTS subscription_prices (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    period TEXT NOT NULL,
+    months INTEGER,
+    monthly_price INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (product_id, period)
+);
+CREATE INDEX IF NOT EXISTS idx_subscription_prices_price ON subscription_prices(monthly_price);
+CREATE TABLE IF NOT EXISTS care_service_prices (
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    contract TEXT NOT NULL,            -- 'purchase' 또는 'subscription'
+    period TEXT NOT NULL DEFAULT '',   -- 구독 계약 기간 (구매는 '')
+    option TEXT NOT NULL,              -- 방문 주기 옵션
+    monthly_price INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (product_id, contract, period, option)
+);
+CREATE TABLE IF NOT EXISTS benefits (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER REFERENCES products(id) ON DELETE CASCADE,  -- NULL이면 공통 혜택
+    kind TEXT NOT NULL,                -- 'purchase' 또는 'subscription'
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_benefits_product ON benefits(product_id, kind, position);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS benefits_fts USING fts5(
+    text, content='benefits', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER IF NOT EXISTS benefits_ai AFTER INSERT ON benefits BEGIN
+    INSERT INTO benefits_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS benefits_ad AFTER DELETE ON benefits BEGIN
+    INSERT INTO benefits_fts(benefits_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS benefits_au AFTER UPDATE ON benefits BEGIN
+    INSERT INTO benefits_fts(benefits_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO benefits_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# trigram 토크나이저는 3글자 이상 부분 문자열 검색 (한국어 조사 붙은 단어도 매칭)
+TRIGRAM_MIN_LENGTH = 3
+
+
+def is_sqlite_path(path: str) -> bool:
+    """SQLite 카탈로그 경로 여부 (확장자 기준)"""
+    return str(path).lower().endswith(SQLITE_SUFFIXES)
+
+
+def period_months(period: str) -> Optional[int]:
+    """'6년' → 72, '36개월' → 36"""
+    match = re.match(r'^\s*(\d+)\s*(년|개월)', period or '')
+    if not match:
+        return None
+    value = int(match.group(1))
+    return value * 12 if match.group(2) == '년' else value
+
+
+def _numeric_care_prices(care_price: Any) -> bool:
+    """케어서비스 가격이 {'purchase': {옵션: 금액}, 'subscription': {기간: {옵션: 금액}}} 형식인지"""
+    if not isinstance(care_price, dict) or not care_price:
+        return False
+    if set(care_price) - {'purchase', 'subscription'}:
+        return False
+    purchase = care_price.get('purchase', {})
+    subscription = care_price.get('subscription', {})
+    return (
+        isinstance(purchase, dict)
+        and all(isinstance(v, int) for v in purchase.values())
+        and isinstance(subscription, dict)
+        and all(isinstance(options, dict) and all(isinstance(v, int) for v in options.values())
+                for options in subscription.values())
+    )
+
+
+class SQLiteCatalogStore:
+    """SQLite 카탈로그 저장소 (스레드별 커넥션)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.fts_tokenizer = None
+        self._init_schema()
+
+    # ------------------------------------------------------------------
+    # 커넥션 / 스키마
+    # ------------------------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA busy_timeout = 30000")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _init_schema(self):
+        conn = self.conn
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.executescript(SCHEMA)
+        for tokenizer in ('trigram', 'unicode61'):
+            try:
+                conn.executescript(FTS_SCHEMA.format(tokenizer=tokenizer))
+                self.fts_tokenizer = tokenizer
+                break
+            except sqlite3.OperationalError as e:
+                if 'no such module' in str(e):
+                    print(f"⚠️ FTS5를 사용할 수 없어 혜택 검색은 LIKE로 동작합니다: {e}")
+                    break
+                continue  # trigram 미지원 SQLite
+        conn.commit()
+
+    def revision(self) -> int:
+        """쓰기마다 1씩 증가하는 리비전 (카탈로그 변경 감지용)"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row['value']) if row else 0
+
+    def _bump_revision(self, conn: sqlite3.Connection):
+        conn.execute(
+            "INSERT INTO meta(key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+
+    def _insert_product(self, conn: sqlite3.Connection, product: Dict, position: int):
+        product_id = product['id']
+        extra = {
+            key: value for key, value in product.items()
+            if key not in PRODUCT_COLUMNS and key not in BENEFIT_KINDS and key != 'subscription_price'
+        }
+        care_price = product.get('care_service_price')
+        if _numeric_care_prices(care_price):
+            extra.pop('care_service_price', None)
+
+        conn.execute(
+            "INSERT INTO products(id, position, name, description, image, purchase_price, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                product_id, position, product.get('name', ''), product.get('description'),
+                product.get('image'), product.get('purchase_price'), json.dumps(extra, ensure_ascii=False),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO subscription_prices(product_id, period, months, monthly_price, position) VALUES (?, ?, ?, ?, ?)",
+            [
+                (product_id, period, period_months(period), price, i)
+                for i, (period, price) in enumerate((product.get('subscription_price') or {}).items())
+            ],
+        )
+        if _numeric_care_prices(care_price):
+            rows = [
+                (product_id, 'purchase', '', option, price, i)
+                for i, (option, price) in enumerate(care_price.get('purchase', {}).items())
+            ]
+            for period, options in care_price.get('subscription', {}).items():
+                rows.extend(
+                    (product_id, 'subscription', period, option, price, len(rows) + i)
+                    for i, (option, price) in enumerate(options.items())
+                )
+            conn.executemany(
+                "INSERT INTO care_service_prices(product_id, contract, period, option, monthly_price, position) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        for key, kind in BENEFIT_KINDS.items():
+            conn.executemany(
+                "INSERT INTO benefits(product_id, kind, position, text) VALUES (?, ?, ?, ?)",
+                [(product_id, kind, i, text) for i, text in enumerate(product.get(key) or [])],
+            )
+
+    def _delete_product(self, conn: sqlite3.Connection, product_id: int):
+        # benefits 삭제는 FTS 트리거를 거쳐야 하므로 CASCADE에 맡기지 않고 명시적으로 삭제
+        conn.execute("DELETE FROM benefits WHERE product_id = ?", (product_id,))
+        conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+
+    def import_document(self, data: Dict[str, Any]):
+        """JSON 카탈로그 전체 가져오기 (기존 데이터 교체)"""
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                conn.execute("DELETE FROM benefits")
+                conn.execute("DELETE FROM products")
+                conn.execute("DELETE FROM meta WHERE key != 'revision'")
+                for position, product in enumerate(data.get('products', [])):
+                    self._insert_product(conn, product, position)
+                for key, kind in COMMON_BENEFIT_KEYS.items():
+                    conn.executemany(
+                        "INSERT INTO benefits(product_id, kind, position, text) VALUES (NULL, ?, ?, ?)",
+                        [(kind, i, text) for i, text in enumerate(data.get(key) or [])],
+                    )
+                # penalty_info, subscription_service_info 등 나머지 최상위 키
+                for key, value in data.items():
+                    if key != 'products' and key not in COMMON_BENEFIT_KEYS:
+                        conn.execute(
+                            "INSERT INTO meta(key, value) VALUES (?, ?)",
+                            (f"doc:{key}", json.dumps(value, ensure_ascii=False)),
+                        )
+                self._bump_revision(conn)
+
+    def import_json(self, json_path: str):
+        """new_products.json 파일 가져오기 (마이그레이션)"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            self.import_document(json.load(f))
+
+    def upsert_product(self, product: Dict) -> Dict:
+        """제품 한 건 추가/교체 (id가 없으면 새로 할당)"""
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                if 'id' not in product:
+                    row = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 AS next_id FROM products").fetchone()
+                    product['id'] = row['next_id']
+                row = conn.execute("SELECT position FROM products WHERE id = ?", (product['id'],)).fetchone()
+                if row:
+                    position = row['position']
+                    self._delete_product(conn, product['id'])
+                else:
+                    position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 AS p FROM products").fetchone()['p']
+                self._insert_product(conn, product, position)
+                self._bump_revision(conn)
+        return product
+
+    def delete_product(self, product_id: int) -> bool:
+        """제품 한 건 삭제"""
+        with self._write_lock:
+            conn = self.conn
+            with conn:
+                exists = conn.execute("SELECT 1 FROM products WHERE id = ?", (product_id,)).fetchone()
+                if not exists:
+                    return False
+                self._delete_product(conn, product_id)
+                self._bump_revision(conn)
+        return True
+
+    # ------------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------------
+
+    def _load_products(self, where: str = "", params: Tuple = ()) -> List[Dict]:
+        conn = self.conn
+        rows = conn.execute(f"SELECT * FROM products {where} ORDER BY position", params).fetchall()
+        if not rows:
+            return []
+        products: Dict[int, Dict] = {}
+        for row in rows:
+            product = {key: row[key] for key in PRODUCT_COLUMNS if row[key] is not None}
+            product.update(json.loads(row['extra']))
+            products[row['id']] = product
+
+        # 제품 id 조건은 하위 테이블에도 그대로 적용
+        sub_where = where.replace("WHERE id", "WHERE product_id")
+        for row in conn.execute(
+            f"SELECT product_id, period, monthly_price FROM subscription_prices {sub_where} ORDER BY product_id, position", params
+        ):
+            products[row['product_id']].setdefault('subscription_price', {})[row['period']] = row['monthly_price']
+        for row in conn.execute(
+            f"SELECT * FROM care_service_prices {sub_where} ORDER BY product_id, position", params
+        ):
+            care = products[row['product_id']].setdefault('care_service_price', {})
+            if row['contract'] == 'purchase':
+                care.setdefault('purchase', {})[row['option']] = row['monthly_price']
+            else:
+                care.setdefault('subscription', {}).setdefault(row['period'], {})[row['option']] = row['monthly_price']
+        benefit_where = "WHERE product_id IS NOT NULL" if not where else sub_where
+        for row in conn.execute(
+            f"SELECT product_id, kind, text FROM benefits {benefit_where} ORDER BY product_id, kind, position", params
+        ):
+            products[row['product_id']].setdefault(f"{row['kind']}_benefits", []).append(row['text'])
+
+        for product in products.values():
+            product.setdefault('subscription_price', {})
+            product.setdefault('purchase_benefits', [])
+            product.setdefault('subscription_benefits', [])
+        return list(products.values())
+
+    def get_product(self, product_id: int) -> Optional[Dict]:
+        """제품 한 건 조회"""
+        products = self._load_products("WHERE id = ?", (product_id,))
+        return products[0] if products else None
+
+    def load_document(self) -> Dict[str, Any]:
+        """new_products.json과 같은 형식의 전체 카탈로그"""
+        conn = self.conn
+        data: Dict[str, Any] = {}
+        for key, kind in COMMON_BENEFIT_KEYS.items():
+            data[key] = [
+                row['text'] for row in conn.execute(
+                    "SELECT text FROM benefits WHERE product_id IS NULL AND kind = ? ORDER BY position", (kind,)
+                )
+            ]
+        for row in conn.execute("SELECT key, value FROM meta WHERE key LIKE 'doc:%'"):
+            data[row['key'][len('doc:'):]] = json.loads(row['value'])
+        data['products'] = self._load_products()
+        return data
+
+    def export_json(self, json_path: str):
+        """JSON 파일로 내보내기"""
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.load_document(), f, ensure_ascii=False, indent=2)
+
+    def search_benefits(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """혜택 텍스트 검색 (공백 구분 단어 모두 포함, 관련도 순)
+
+        3글자 이상 단어는 FTS5 인덱스로, 짧은 단어는 LIKE 조건으로 검색합니다.
+        """
+        terms = [term for term in (query or '').split() if term]
+        if not terms:
+            return []
+        if self.fts_tokenizer == 'trigram':
+            fts_terms = [term for term in terms if len(term) >= TRIGRAM_MIN_LENGTH]
+        elif self.fts_tokenizer:
+            fts_terms = terms
+        else:
+            fts_terms = []
+        like_terms = [term for term in terms if term not in fts_terms]
+
+        params: List[Any] = []
+        conditions = []
+        if fts_terms:
+            sql = (
+                "SELECT b.id, b.product_id, b.kind, b.text, bm25(benefits_fts) AS score "
+                "FROM benefits_fts JOIN benefits b ON b.id = benefits_fts.rowid WHERE benefits_fts MATCH ?"
+            )
+            params.append(' AND '.join('"' + term.replace('"', '""') + '"' for term in fts_terms))
+        else:
+            sql = "SELECT b.id, b.product_id, b.kind, b.text, 0.0 AS score FROM benefits b WHERE 1 = 1"
+        for term in like_terms:
+            conditions.append("b.text LIKE ?")
+            params.append(f"%{term}%")
+        if conditions:
+            sql += " AND " + " AND ".join(conditions)
+        sql += " ORDER BY score, b.product_id, b.position LIMIT ?"
+        params.append(limit)
+
+        return [
+            {'product_id': row['product_id'], 'kind': row['kind'], 'text': row['text']}
+            for row in self.conn.execute(sql, params)
+        ]
+
+
+_stores: Dict[str, SQLiteCatalogStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str) -> SQLiteCatalogStore:
+    """경로별 공유 저장소"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SQLiteCatalogStore(path)
+        return store
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 3:
+        print(__doc__)
+        return 1
+    command = argv[0]
+    if command == 'import':
+        store = get_store(argv[2])
+        store.import_json(argv[1])
+        print(f"✅ {argv[1]} → {argv[2]} ({len(store.load_document()['products'])}개 제품)")
+    elif command == 'export':
+        get_store(argv[1]).export_json(argv[2])
+        print(f"✅ {argv[1]} → {argv[2]}")
+    elif command == 'search':
+        for hit in get_store(argv[1]).search_benefits(' '.join(argv[2:])):
+            owner = '공통' if hit['product_id'] is None else f"제품 {hit['product_id']}"
+            print(f"[{owner}/{hit['kind']}] {hit['text']}")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
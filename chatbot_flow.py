@@ -3,9 +3,9 @@
 """
 from typing import List, Dict, Optional, Any
 import random
-import re
 from datetime import datetime
 from product_manager import ProductManager
+from product_search import budget_context
 import asyncio
 import httpx
 from config import Config
@@ -33,7 +33,7 @@ class ImprovedChatBotFlow:
             return {}
         
         # 구매봇 초기 의견 - 완전 AI 생성
-        purchase_benefits = product.get('purchase_benefits', [])
+        purchase_benefits = self.product_manager.benefit_facts.prompt_benefits(product_id, 'purchase')
         purchase_context = f"""
         제품: {product['name']}
         구매 가격: {product.get('purchase_price', 0):,}원
@@ -50,7 +50,7 @@ class ImprovedChatBotFlow:
         
         # 구독봇 초기 의견 - 완전 AI 생성
         subscription_prices = product.get('subscription_price', {})
-        subscription_benefits = product.get('subscription_benefits', [])
+        subscription_benefits = self.product_manager.benefit_facts.prompt_benefits(product_id, 'subscription')
         
         if subscription_prices:
             best_period = '6년' if '6년' in subscription_prices else list(subscription_prices.keys())[-1]
@@ -228,10 +228,13 @@ class ImprovedChatBotFlow:
                 speaker
             )
         
+        # 예산 조건("월 5만원 이하")이 있으면 정렬 인덱스 검색 결과를 함께 전달
+        _, _, budget_line = budget_context(user_input, product_id, self.product_manager.snapshot)
+        
         if speaker == "구매봇":
-            return await self._generate_purchase_response(product, user_input, conversation_history)
+            return await self._generate_purchase_response(product, user_input, conversation_history, budget_line)
         elif speaker == "구독봇":
-            return await self._generate_subscription_response(product, user_input, conversation_history)
+            return await self._generate_subscription_response(product, user_input, conversation_history, budget_line)
         else:
             # 안내봇이나 기타 응답
             context = f"""
@@ -310,13 +313,14 @@ class ImprovedChatBotFlow:
     # Private helper methods
     # 분석 헬퍼 메서드들도 제거 - AI가 자체적으로 분석
     
-    async def _generate_purchase_response(self, product: Dict, user_input: str, history: List[Dict]) -> str:
+    async def _generate_purchase_response(self, product: Dict, user_input: str, history: List[Dict], extra_context: str = "") -> str:
         """구매봇 응답 생성 - 완전 AI 기반"""
         context = f"""
         제품: {product['name']}
         구매가: {product.get('purchase_price', 0):,}원
         사용자 입력: {user_input}
         최근 대화: {' / '.join([f"{msg['speaker']}: {msg['message'][:50]}" for msg in history[-3:]])}
+        {extra_context}
         """
         
         prompt = f"""당신은 구매를 추천하는 구매봇입니다.
@@ -326,7 +330,7 @@ class ImprovedChatBotFlow:
         
         return await self.generate_natural_response(prompt, context, "구매봇")
     
-    async def _generate_subscription_response(self, product: Dict, user_input: str, history: List[Dict]) -> str:
+    async def _generate_subscription_response(self, product: Dict, user_input: str, history: List[Dict], extra_context: str = "") -> str:
         """구독봇 응답 생성 - 완전 AI 기반"""
         subscription_prices = product.get('subscription_price', {})
         
@@ -341,11 +345,13 @@ class ImprovedChatBotFlow:
             할인: {price_info['discount_details']}
             사용자 입력: {user_input}
             최근 대화: {' / '.join([f"{msg['speaker']}: {msg['message'][:50]}" for msg in history[-3:]])}
+            {extra_context}
             """
         else:
             context = f"""
             제품: {product['name']}
             사용자 입력: {user_input}
+            {extra_context}
             """
         
         prompt = f"""당신은 구독을 추천하는 구독봇입니다.
@@ -360,57 +366,17 @@ class ImprovedChatBotFlow:
     # 사용자 선호도 분석도 AI가 직접 수행
     
     def _calculate_discounted_subscription_price(self, product: Dict, period: str) -> Dict:
-        """최대 할인 적용된 구독 가격 계산"""
-        base_monthly_price = product.get('subscription_price', {}).get(period, 0)
-        if base_monthly_price == 0:
+        """최대 할인 적용된 구독 가격 (할인 규칙 엔진의 최대 할인 견적, 멤버십 포인트는 총액에서 차감)"""
+        quote = self.product_manager.pricing.quote(product.get('id'), period, scenario="max")
+        if not quote or quote['base_monthly'] == 0:
             return {'monthly': 0, 'total': 0, 'discount_details': ''}
         
-        period_years = int(period.replace('년', ''))
-        total_months = period_years * 12
-        
-        # 1. 선결제 할인 찾기 (subscription_benefits에서)
-        prepay_discount = 0
-        membership_points = 0
-        benefits = product.get('subscription_benefits', [])
-        
-        for benefit in benefits:
-            if '선 결제' in benefit and '할인' in benefit:
-                # "구독 요금의 30% 선 결제 시, 월 2,600원 추가 할인" 같은 패턴 파싱
-                discount_match = re.search(r'월\s*([\d,]+)원\s*(?:추가\s*)?할인', benefit)
-                if discount_match:
-                    prepay_discount = int(discount_match.group(1).replace(',', ''))
-            
-            if '멤버십 포인트' in benefit and '적립' in benefit:
-                # "구독 시 LG전자 멤버십 포인트 250,000P 적립됨" 같은 패턴 파싱
-                points_match = re.search(r'([\d,]+)P', benefit)
-                if points_match:
-                    membership_points = int(points_match.group(1).replace(',', ''))
-        
-        # 2. 제휴 카드 할인 (최대 22,000원)
-        card_discount = min(22000, int(base_monthly_price * 0.2))  # 보통 20% 정도, 최대 22,000원
-        
-        # 3. 최종 월 구독료 계산
-        final_monthly_price = base_monthly_price - prepay_discount - card_discount
-        final_monthly_price = max(0, final_monthly_price)  # 음수 방지
-        
-        # 4. 총 비용 계산 (멤버십 포인트는 총액에서 차감)
-        total_price = (final_monthly_price * total_months) - membership_points
-        
-        # 할인 내역 문자열 생성
-        discount_details = []
-        if prepay_discount > 0:
-            discount_details.append(f"선결제 할인 월 {prepay_discount:,}원")
-        if card_discount > 0:
-            discount_details.append(f"제휴카드 할인 월 {card_discount:,}원")
-        if membership_points > 0:
-            discount_details.append(f"멤버십 포인트 {membership_points:,}P 적립")
-        
         return {
-            'base_monthly': base_monthly_price,
-            'final_monthly': final_monthly_price,
-            'total': total_price,
-            'total_months': total_months,
-            'discount_details': ', '.join(discount_details) if discount_details else '할인 없음'
+            'base_monthly': quote['base_monthly'],
+            'final_monthly': quote['final_monthly'],
+            'total': quote['net_total'],
+            'total_months': quote['total_months'],
+            'discount_details': quote['discount_details']
         }
     
     def _get_best_subscription_price(self, product: Dict) -> int:
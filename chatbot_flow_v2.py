@@ -4,8 +4,6 @@ new_products.json 데이터를 활용한 자연스러운 대화 생성
 """
 from typing import List, Dict, Optional, Any
 import random
-import re
-import json
 from datetime import datetime
 from product_manager import ProductManager
 import asyncio
@@ -26,10 +24,11 @@ class RealAIChatBotFlow:
             'bot_arguments': [],
             'current_topic': None
         }
-        
-        # 제품 데이터 로드
-        with open('new_products.json', 'r', encoding='utf-8') as f:
-            self.product_data = json.load(f)
+    
+    @property
+    def product_data(self) -> Dict:
+        """공유 카탈로그 스냅샷의 전체 데이터"""
+        return self.product_manager.snapshot.data
     
     async def call_ai(self, system_prompt: str, user_prompt: str, temperature: float = 0.8) -> str:
         """AI API 호출 - 실제 LLM 응답 생성"""
@@ -75,7 +74,7 @@ class RealAIChatBotFlow:
             return "제품 정보가 없긴해..."
         
         # 구매 혜택 데이터
-        purchase_benefits = product.get('purchase_benefits', [])
+        purchase_benefits = self.product_manager.benefit_facts.prompt_benefits(product_id, 'purchase')
         common_benefits = self.product_data.get('common_purchase_benefits', [])
         
         system_prompt = """당신은 LG 가전 구매를 강력히 추천하는 '박구매' 입니다.
@@ -113,12 +112,11 @@ class RealAIChatBotFlow:
         if not product:
             return "제품 정보가 없긴해..."
         
-        # 구독 가격 계산
-        subscription_prices = product.get('subscription_price', {})
-        best_period = '6년' if '6년' in subscription_prices else list(subscription_prices.keys())[-1] if subscription_prices else None
+        # 대표 계약기간 (6년, 없으면 가장 긴 기간)
+        best_period = self.product_manager.pricing.best_period(product_id)
         
         # 구독 혜택 데이터
-        subscription_benefits = product.get('subscription_benefits', [])
+        subscription_benefits = self.product_manager.benefit_facts.prompt_benefits(product_id, 'subscription')
         common_benefits = self.product_data.get('common_subscription_benefits', [])
         
         system_prompt = """당신은 LG 가전 구독을 강력히 추천하는 '김구독' 입니다.
@@ -140,32 +138,14 @@ class RealAIChatBotFlow:
             recent = context['history'][-3:] if len(context['history']) > 3 else context['history']
             conversation_context = "\n최근 대화:\n" + "\n".join([f"{m['speaker']}: {m['message']}" for m in recent])
         
-        # 할인 계산
-        if subscription_prices and best_period:
-            monthly = subscription_prices[best_period]
-            period_years = int(best_period.replace('년', ''))
-            total_months = period_years * 12
-            
-            # 할인 적용 (제휴카드 최대 22,000원)
-            card_discount = min(22000, int(monthly * 0.2))
-            final_monthly = monthly - card_discount
-            
-            # 멤버십 포인트 찾기
-            membership_points = 0
-            for benefit in subscription_benefits:
-                if '멤버십' in benefit and '포인트' in benefit:
-                    match = re.search(r'([\d,]+)P', benefit)
-                    if match:
-                        membership_points = int(match.group(1).replace(',', ''))
-                        break
-            
-            total_price = (final_monthly * total_months) - membership_points
-            
+        # 할인 계산 (가격 테이블, 최대 할인 시나리오)
+        quote = self.product_manager.pricing.quote(product_id, best_period, scenario="max") if best_period else None
+        if quote:
             price_info = f"""
-기본: 월 {monthly:,}원
-할인 후: 월 {final_monthly:,}원
-{best_period} 계약시 총 {total_months}개월 {total_price:,}원
-멤버십 포인트 {membership_points:,}P 적립"""
+기본: 월 {quote['base_monthly']:,}원
+할인 후: 월 {quote['final_monthly']:,}원
+{best_period} 계약시 총 {quote['total_months']}개월 {quote['net_total']:,}원
+멤버십 포인트 {quote['membership_points']:,}P 적립"""
         else:
             price_info = "구독 가격 정보 없음"
         
@@ -302,7 +282,7 @@ class RealAIChatBotFlow:
             구매의 장점으로 반박하거나, 구독의 단점을 지적하세요.
             말투: 모든 문장을 '~긴해'로 끝냄"""
             
-            benefits = product.get('purchase_benefits', [])
+            benefits = self.product_manager.benefit_facts.prompt_benefits(product_id, 'purchase')
             context = f"구매 장점: {', '.join(benefits[:2])}" if benefits else "완전 소유, 경제성"
             
         else:  # 구독봇
@@ -311,7 +291,7 @@ class RealAIChatBotFlow:
             구독의 장점으로 반박하거나, 구매의 단점을 지적하세요.
             말투: 모든 문장을 '~긴해'로 끝냄"""
             
-            benefits = product.get('subscription_benefits', [])
+            benefits = self.product_manager.benefit_facts.prompt_benefits(product_id, 'subscription')
             context = f"구독 장점: {', '.join(benefits[:2])}" if benefits else "케어서비스, 낮은 초기비용"
         
         user_prompt = f"""제품: {product['name']}
@@ -9,10 +9,24 @@ import os
 import json
 import random
 import asyncio
+import hashlib
 import httpx
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 from dotenv import load_dotenv
 
+from cassette import Cassette, get_cassette
+from catalog import VersionedCache, get_catalog
+from config import Config
+from metrics import LLMCallTimer, record_cache
+from shared_state import SharedCache, SharedRateLimiter
+import tracing
+from usage import ledger as usage_ledger
+from pricing import get_pricing_table
+from benefit_facts import get_benefit_facts
+from cost_curves import get_cost_curves
+from penalty import get_penalty_table
+from recommender import fast_conclusion, get_recommender, profile_from_history, ranking_summary
+
 load_dotenv()
 
 class DynamicAIChatBotSystem:
@@ -20,36 +34,166 @@ class DynamicAIChatBotSystem:
     
     def __init__(self):
         self.api_key = os.getenv("FRIENDLI_API_KEY")
-        self.base_url = "https://inference.friendli.ai/v1/chat/completions"
-        
-        # 제품 데이터 로드
-        with open('new_products.json', 'r', encoding='utf-8') as f:
-            self.products_data = json.load(f)
+        # FRIENDLI_BASE_URL을 지정하면 그 주소 사용 (예: 로컬 대역 서버 http://localhost:8900/v1)
+        base_url = os.getenv("FRIENDLI_BASE_URL")
+        self.base_url = f"{base_url.rstrip('/')}/chat/completions" if base_url else "https://inference.friendli.ai/v1/chat/completions"
+        # 카탈로그 버전별 LLM 응답 캐시 (카탈로그 리로드 시 자동 무효화)
+        self._response_cache = VersionedCache(maxsize=Config.LLM_CACHE_SIZE)
+        # 워커 간 공유 응답 캐시 / 호출 수 제한 (SHARED_STATE_URL이 비어 있으면 캐시는 프로세스 것만 사용)
+        self._shared_cache = SharedCache("llm")
+        self._rate_limiter = SharedRateLimiter("llm", Config.LLM_RATE_LIMIT)
+        # 녹화/재생 카세트 (None이면 LLM_CASSETTE_MODE 설정을 따름)
+        self.cassette: Optional[Cassette] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
     
-    async def _call_ai_api(self, messages: List[Dict], temperature: float = 0.9, max_tokens: int = 500) -> str:
-        """EXAONE API 직접 호출"""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
+    def _http_client(self) -> httpx.AsyncClient:
+        """이벤트 루프별 공유 HTTP 클라이언트
+        호출마다 새로 만들면 SSL 컨텍스트 생성(인증서 로드)이 이벤트 루프를 막고 연결도 재사용되지 않음"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=100)
+            )
+            self._client_loop = loop
+        return self._client
+    
+    def flow_rng(self, *parts: Any) -> Optional[random.Random]:
+        """카세트 사용 중이면 요청 내용(parts)으로 시드한 난수 생성기, 아니면 None (전역 random 사용)
+
+        논쟁 플로우의 인트로 문구 / 먼저 응답할 봇은 다음 턴 프롬프트에 들어가므로, 전역 난수로 고르면
+        녹화 때와 요청 지문이 달라져 재생이 빗나갑니다. 같은 요청이면 녹화/재생 모두 같은 것을 고릅니다.
+        """
+        cassette = self.cassette if self.cassette is not None else get_cassette()
+        if cassette is None:
+            return None
+        return random.Random(json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str))
+    
+    async def aclose(self):
+        """공유 HTTP 클라이언트 닫기 (앱 종료 시)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    @property
+    def products_data(self) -> Dict:
+        """공유 카탈로그 스냅샷의 전체 데이터"""
+        return get_catalog().data
+    
+    def _build_payload(self, messages: List[Dict], temperature: float, max_tokens: int) -> Dict:
+        """EXAONE 요청 본문"""
+        return {
             "model": "exaone-3.5-32b-instruct",
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "stream": False
         }
+    
+    @staticmethod
+    def cache_key(payload: Dict) -> str:
+        """LLM 응답 캐시 키 (요청 본문 해시, 프롬프트에 제품 데이터가 들어가므로 카탈로그가 바뀌면 키도 바뀜)"""
+        return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    async def _call_ai_api(self, messages: List[Dict], temperature: float = 0.9, max_tokens: int = 500,
+                           call_site: str = "other", bot: Optional[str] = None, product_id: Optional[int] = None) -> str:
+        """EXAONE API 직접 호출 (call_site / bot / product_id: 메트릭·추적·사용량 레이블)"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
         
+        payload = self._build_payload(messages, temperature, max_tokens)
+        cassette = self.cassette if self.cassette is not None else get_cassette()
+        provider = "cassette" if cassette is not None and cassette.mode == "replay" else "friendli"
+        
+        with tracing.span(f"llm:{call_site}", provider=provider, max_tokens=max_tokens) as span:
+            cache_key = None
+            if Config.LLM_CACHE_ENABLED:
+                cache_key = self.cache_key(payload)
+                cached = self._response_cache.get(cache_key)
+                if cached is None:
+                    # 다른 워커가 만든 응답
+                    cached = await self._shared_cache.get(cache_key)
+                    if cached is not None:
+                        self._response_cache.set(cache_key, cached)
+                record_cache("llm_response", cached is not None)
+                span.set('cache_hit', cached is not None)
+                if cached is not None:
+                    usage_ledger.record(call_site, provider, bot, product_id, cached=True)
+                    return cached
+            
+            if provider != "cassette":
+                await self._rate_limiter.acquire(provider)
+            timer = LLMCallTimer(call_site, provider)
+            try:
+                usage = {}
+                if cassette is not None:
+                    # 녹화: 스트리밍으로 받아 청크 시각 기록, 재생: 기록된 시각에 맞춰 응답
+                    content = await cassette.complete(payload, self._stream_upstream)
+                else:
+                    response = await self._http_client().post(self.base_url, json=payload, headers=headers)
+                    response.raise_for_status()
+                    result = response.json()
+                    content = result['choices'][0]['message']['content'].strip()
+                    usage = result.get('usage') or {}
+                timer.finish(prompt_tokens=usage.get('prompt_tokens'), completion_tokens=usage.get('completion_tokens'))
+                # usage가 없으면(카세트 재생 등) 로컬 추정
+                spent = usage_ledger.record(call_site, provider, bot, product_id,
+                                            usage.get('prompt_tokens'), usage.get('completion_tokens'),
+                                            messages=messages, content=content)
+                span.set('prompt_tokens', spent['prompt_tokens'])
+                span.set('completion_tokens', spent['completion_tokens'])
+                if spent['estimated']:
+                    span.set('tokens_estimated', True)
+                if cache_key is not None:
+                    self._response_cache.set(cache_key, content)
+                    await self._shared_cache.set(cache_key, content)
+                return content
+            except Exception as e:
+                print(f"AI API 호출 실패: {e}")
+                timer.finish("fallback")
+                span.set('fallback', type(e).__name__)
+                return self._get_fallback_response()
+    
+    async def _stream_upstream(self, payload: Dict) -> AsyncIterator[str]:
+        """스트리밍 요청으로 응답 청크(content delta)를 받음 (카세트 녹화용)"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        async with self._http_client().stream("POST", self.base_url, json={**payload, "stream": True}, headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get('choices') or []
+                delta = (choices[0].get('delta') or {}).get('content') if choices else None
+                if delta:
+                    yield delta
+    
+    def seed_cache(self, entries: List[Dict]) -> int:
+        """미리 생성한 응답으로 LLM 캐시 채우기 ({'key': ..., 'content': ...} 목록), 추가한 개수 반환"""
+        count = 0
+        for entry in entries:
+            if entry.get('key') and entry.get('content'):
+                self._response_cache.set(entry['key'], entry['content'])
+                count += 1
+        return count
+    
+    def load_cache_file(self, path: str) -> int:
+        """JSONL 캐시 파일(batch_debates.py --seed-cache 결과) 로드"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.base_url, json=payload, headers=headers)
-                response.raise_for_status()
-                result = response.json()
-                return result['choices'][0]['message']['content'].strip()
-        except Exception as e:
-            print(f"AI API 호출 실패: {e}")
-            return self._get_fallback_response()
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"LLM 캐시 파일 로드 실패: {e}")
+            return 0
+        return self.seed_cache(entries)
     
     def _get_fallback_response(self) -> str:
         """API 실패 시 기본 응답"""
@@ -57,40 +201,35 @@ class DynamicAIChatBotSystem:
     
     def _get_product_info(self, product_id: int) -> Dict:
         """제품 정보 가져오기"""
-        products = self.products_data.get("products", [])
-        for product in products:
-            if product["id"] == product_id:
-                return product
-        return products[0] if products else {}
+        snapshot = get_catalog()
+        product = snapshot.get(product_id)
+        if product is not None:
+            return product
+        return snapshot.products[0] if snapshot.products else {}
     
     def _calculate_subscription_discount(self, product: Dict, period: str) -> Dict:
-        """구독 할인 계산"""
-        base_price = product.get('subscription_price', {}).get(period, 0)
-        
-        # 실제 할인 계산 로직
-        discounts = {
-            'affiliate_card': min(22000, base_price * 0.2),  # 제휴카드 최대 22,000원
-            'membership_points': 0,  # 제품별 멤버십 포인트
-            'prepayment': base_price * 0.03 if '선결제' in str(product.get('subscription_benefits', [])) else 0
-        }
-        
-        # 멤버십 포인트 추출
-        for benefit in product.get('subscription_benefits', []):
-            if '멤버십 포인트' in benefit and 'P 적립' in benefit:
-                try:
-                    points_str = benefit.split('멤버십 포인트')[1].split('P')[0].strip()
-                    points = int(''.join(filter(str.isdigit, points_str)))
-                    discounts['membership_points'] = points
-                except:
-                    pass
-        
-        final_price = base_price - discounts['affiliate_card'] - discounts['prepayment']
-        
+        """구독 할인 정보 (할인 규칙 엔진의 최대 할인 시나리오, ImprovedChatBotFlow와 같은 견적)"""
+        quote = get_pricing_table().quote(product.get('id'), period, scenario="max")
+        if not quote:
+            base_price = product.get('subscription_price', {}).get(period, 0)
+            return {
+                'base_price': base_price,
+                'discounts': {'affiliate_card': 0, 'membership_points': 0, 'prepayment': 0, 'intro': 0},
+                'final_price': base_price,
+                'total_payment': 0,
+                'net_total': 0
+            }
         return {
-            'base_price': base_price,
-            'discounts': discounts,
-            'final_price': final_price,
-            'total_payment': final_price * int(period.replace('년', '')) * 12
+            'base_price': quote['base_monthly'],
+            'discounts': {
+                'affiliate_card': quote['card_discount'],
+                'membership_points': quote['membership_points'],
+                'prepayment': quote['prepay_discount'],
+                'intro': quote['intro_discount']
+            },
+            'final_price': quote['final_monthly'],
+            'total_payment': quote['total'],
+            'net_total': quote['net_total']
         }
     
     async def generate_purchase_argument(self, product_id: int, context: Dict = None) -> str:
@@ -101,16 +240,25 @@ class DynamicAIChatBotSystem:
         previous_statements = context.get('previous_statements', []) if context else []
         conversation_turn = context.get('turn', 1) if context else 1
         
+        # 6년 기준 구독 비용 (가격 테이블)
+        subscription_cost = get_pricing_table().quote(product.get('id'), '6년', scenario="base") or {'base_monthly': 0, 'total': 0}
+        break_even = get_cost_curves().summary(product.get('id'), '6년')
+        break_even_line = (
+            f"손익분기: 최대 할인 기준 {break_even['break_even_month']}개월째부터 구독 누적 비용이 구매가를 넘어섬\n"
+            if break_even and break_even['break_even_month'] else ""
+        )
+        penalty_line = get_penalty_table().prompt_line(product.get('id'), '6년')
+        
         # AI에게 줄 컨텍스트 구성
         product_context = f"""
 제품 정보:
 - 이름: {product['name']}
 - 일시불 가격: {product['purchase_price']:,}원
-- 구매 혜택: {', '.join(product.get('purchase_benefits', [])[:3])}
-
-구독 가격 (6년 기준): 월 {product.get('subscription_price', {}).get('6년', 0):,}원
-총 구독 비용 (6년): {product.get('subscription_price', {}).get('6년', 0) * 72:,}원
+- 구매 혜택: {', '.join(get_benefit_facts().prompt_benefits(product.get('id'), 'purchase')[:3])}
 
+구독 가격 (6년 기준): 월 {subscription_cost['base_monthly']:,}원
+총 구독 비용 (6년): {subscription_cost['total']:,}원
+{break_even_line}{penalty_line}
 이전 대화 내용:
 {chr(10).join(previous_statements[-3:]) if previous_statements else '(첫 대화)'}
 """
@@ -136,7 +284,8 @@ class DynamicAIChatBotSystem:
             }
         ]
         
-        response = await self._call_ai_api(messages, temperature=0.9)
+        response = await self._call_ai_api(messages, temperature=0.9, call_site="purchase",
+                                           bot="구매봇", product_id=product_id)
         return response
     
     async def generate_subscription_argument(self, product_id: int, context: Dict = None) -> str:
@@ -148,6 +297,12 @@ class DynamicAIChatBotSystem:
         
         previous_statements = context.get('previous_statements', []) if context else []
         conversation_turn = context.get('turn', 1) if context else 1
+        facts = get_benefit_facts().product(product.get('id'))
+        intro_line = (
+            f"- 초기 할인: 첫 {facts.intro_discount_months}개월 {int(facts.intro_discount_rate * 100)}% "
+            f"(총 {discount_info['discounts']['intro']:,}원)\n"
+            if discount_info['discounts']['intro'] else ""
+        )
         
         product_context = f"""
 제품 정보:
@@ -155,9 +310,12 @@ class DynamicAIChatBotSystem:
 - 일시불 가격: {product['purchase_price']:,}원
 - 구독 가격 (6년): 월 {discount_info['base_price']:,}원
 - 제휴카드 할인: 월 {discount_info['discounts']['affiliate_card']:,}원
-- 최종 월 구독료: {discount_info['final_price']:,}원
+- 선결제 할인: 월 {discount_info['discounts']['prepayment']:,}원
+- 멤버십 포인트: {discount_info['discounts']['membership_points']:,}P 적립
+{intro_line}- 최종 월 구독료: {discount_info['final_price']:,}원
 - 6년 총 납부액: {discount_info['total_payment']:,}원
-- 구독 혜택: {', '.join(product.get('subscription_benefits', [])[:3])}
+- 포인트/초기 할인 차감 후 실부담: {discount_info['net_total']:,}원
+- 구독 혜택: {', '.join(get_benefit_facts().prompt_benefits(product.get('id'), 'subscription')[:3])}
 
 이전 대화 내용:
 {chr(10).join(previous_statements[-3:]) if previous_statements else '(첫 대화)'}
@@ -186,7 +344,8 @@ class DynamicAIChatBotSystem:
             }
         ]
         
-        response = await self._call_ai_api(messages, temperature=0.9)
+        response = await self._call_ai_api(messages, temperature=0.9, call_site="subscription",
+                                           bot="구독봇", product_id=product_id)
         return response
     
     async def generate_dynamic_question(self, product_id: int, conversation_history: List[Dict]) -> str:
@@ -240,26 +399,33 @@ class DynamicAIChatBotSystem:
             }
         ]
         
-        response = await self._call_ai_api(messages, temperature=1.0)  # 더 창의적인 질문을 위해 temperature 높임
+        # 더 창의적인 질문을 위해 temperature 높임
+        response = await self._call_ai_api(messages, temperature=1.0, call_site="question",
+                                           bot="안내봇", product_id=product_id)
         return response.strip()
     
-    async def respond_to_user_input(self, product_id: int, user_input: str, bot_type: str, conversation_history: List[Dict]) -> str:
-        """사용자 입력에 대한 봇 응답 생성"""
+    async def respond_to_user_input(self, product_id: int, user_input: str, bot_type: str, conversation_history: List[Dict],
+                                    extra_context: str = "") -> str:
+        """사용자 입력에 대한 봇 응답 생성 (extra_context: 예산 검색 결과 등 추가 데이터)"""
         product = self._get_product_info(product_id)
         
         # 봇 타입에 따른 관점 설정
         if bot_type == '구매봇':
             perspective = "구매를 추천하는 입장"
-            key_points = product.get('purchase_benefits', [])
+            key_points = get_benefit_facts().prompt_benefits(product.get('id'), 'purchase')
         else:
             perspective = "구독을 추천하는 입장"
-            key_points = product.get('subscription_benefits', [])
+            key_points = get_benefit_facts().prompt_benefits(product.get('id'), 'subscription')
         
+        # 해지/위약금 질문에 정확한 금액으로 답하도록 위약금 테이블 값 제공
+        penalty_line = get_penalty_table().prompt_line(product.get('id'), '6년')
         context = f"""
 제품: {product['name']}
 사용자 입력: "{user_input}"
 내 입장: {perspective}
 내가 강조할 수 있는 포인트: {', '.join(key_points[:3])}
+{penalty_line}
+{extra_context}
 """
         
         messages = [
@@ -280,7 +446,8 @@ class DynamicAIChatBotSystem:
             }
         ]
         
-        response = await self._call_ai_api(messages, temperature=0.8)
+        response = await self._call_ai_api(messages, temperature=0.8, call_site="response",
+                                           bot=bot_type, product_id=product_id)
         return response
     
     async def generate_rebuttal(self, product_id: int, opponent_statement: str, my_bot_type: str, turn: int) -> str:
@@ -289,10 +456,10 @@ class DynamicAIChatBotSystem:
         
         if my_bot_type == '구매봇':
             my_perspective = "구매가 더 유리하다"
-            my_points = product.get('purchase_benefits', [])
+            my_points = get_benefit_facts().prompt_benefits(product.get('id'), 'purchase')
         else:
             my_perspective = "구독이 더 유리하다"
-            my_points = product.get('subscription_benefits', [])
+            my_points = get_benefit_facts().prompt_benefits(product.get('id'), 'subscription')
         
         # 대화가 진행될수록 다른 포인트 강조
         focus_point = my_points[turn % len(my_points)] if my_points else ""
@@ -317,49 +484,40 @@ class DynamicAIChatBotSystem:
             }
         ]
         
-        response = await self._call_ai_api(messages, temperature=0.85)
+        response = await self._call_ai_api(messages, temperature=0.85, call_site="rebuttal",
+                                           bot=my_bot_type, product_id=product_id)
         return response
     
     async def generate_conclusion(self, product_id: int, conversation_history: List[Dict]) -> str:
-        """최종 결론 생성"""
+        """최종 결론 생성 (로컬 추천 순위 기반, 빠른 모드면 LLM 호출 없이 생성)"""
         product = self._get_product_info(product_id)
+        recommender = get_recommender()
+        profile = profile_from_history(conversation_history)
+        ranking = recommender.rank(profile, [product.get('id')])
         
-        # 대화 내용 요약
-        purchase_points = []
-        subscription_points = []
-        
-        for msg in conversation_history:
-            if msg.get('speaker') == '구매봇':
-                purchase_points.append(msg.get('content', ''))
-            elif msg.get('speaker') == '구독봇':
-                subscription_points.append(msg.get('content', ''))
+        if Config.CONCLUSION_FAST_MODE:
+            return fast_conclusion(product['name'], profile, ranking)
         
         messages = [
             {
                 "role": "system",
                 "content": """당신은 공정하고 전문적인 LG 가전 상담 안내봇입니다.
-양쪽의 장단점을 균형있게 정리하고, 고객의 상황에 맞는 추천을 제시합니다."""
+주어진 추천 순위를 근거로 고객 상황에 맞는 결론을 친근하게 전달합니다."""
             },
             {
                 "role": "user",
                 "content": f"""제품: {product['name']}
+고객 조건: {profile.describe()}
 
-구매 측 주요 주장:
-{chr(10).join(purchase_points[-3:]) if purchase_points else '없음'}
-
-구독 측 주요 주장:
-{chr(10).join(subscription_points[-3:]) if subscription_points else '없음'}
-
-위 내용을 바탕으로 공정하고 균형잡힌 최종 결론을 제시해주세요.
-1. 구매가 유리한 경우 (구체적인 상황 제시)
-2. 구독이 유리한 경우 (구체적인 상황 제시)
-3. 최종 추천
+추천 순위 (계산 결과):
+{ranking_summary(ranking) or '가격 정보 없음'}
 
-5-6문장으로 명확하게 정리해주세요."""
+1위를 최종 추천으로, 2위와 비교해 이유를 숫자와 함께 3-4문장으로 정리해주세요."""
             }
         ]
         
-        response = await self._call_ai_api(messages, temperature=0.7, max_tokens=800)
+        response = await self._call_ai_api(messages, temperature=0.7, max_tokens=Config.CONCLUSION_MAX_TOKENS,
+                                           call_site="conclusion", bot="안내봇", product_id=product_id)
         return response
 
 
@@ -3,9 +3,12 @@ from typing import List, Dict, Optional, Any
 import asyncio
 from config import Config
 from product_manager import ProductManager
+from cost_curves import cost_curves_for
+from metrics import LLMCallTimer
+import tracing
+from usage import ledger as usage_ledger
+from turn_graph import TurnGraph, TurnNode
 from datetime import datetime
-import json
-import random
 
 class ChatBot:
     def __init__(self, name: str, model: str, personality: str, stance: str):
@@ -54,53 +57,61 @@ class ChatBot:
         # 제품 정보 추출
         product_name = product.get('name', '제품')
         purchase_price = product.get('purchase_price', 0)
-        subscription_prices = product.get('subscription_price', {})
         
         # 구체적인 데이터 컨텍스트 생성
         data_context = f"\n\n[필수 참조 데이터 - 반드시 이 데이터를 기반으로 응답하세요]\n"
         data_context += f"제품명: {product_name}\n"
         data_context += f"구매가격: {purchase_price:,}원\n"
         
-        if subscription_prices:
+        # 기간별 월 요금/총액 (가격 테이블)
+        pricing = self.product_manager.pricing
+        subscription_totals = pricing.subscription_totals(self.current_product_id)
+        if subscription_totals:
             data_context += "구독가격:\n"
-            for period, price in subscription_prices.items():
-                months = int(period.replace('년', '')) * 12
-                total = price * months
-                data_context += f"  - {period}: 월 {price:,}원 (총 {total:,}원)\n"
+            for period, cost in subscription_totals.items():
+                data_context += f"  - {period}: 월 {cost['monthly']:,}원 (총 {cost['total']:,}원)\n"
         
         # 입장별 구체적인 데이터 추가
         if self.stance == "구매":
             # 구매 관련 구체적 데이터
-            purchase_benefits = product.get('purchase_benefits', [])
+            # 혜택 문구 ('총 비용' 등 금액 문장은 제외, 숫자는 가격 테이블/팩트 값 사용)
+            purchase_benefits = self.product_manager.benefit_facts.prompt_benefits(self.current_product_id, 'purchase')
             if purchase_benefits:
                 # 턴에 따라 다른 혜택 선택
                 selected_benefit = purchase_benefits[min(self.turn_count - 1, len(purchase_benefits) - 1)]
                 data_context += f"\n[이번 턴에 강조할 구매 혜택]: {selected_benefit}\n"
             
             # 구독과의 비교 데이터
-            if subscription_prices:
-                best_period = '6년' if '6년' in subscription_prices else list(subscription_prices.keys())[-1]
-                months = int(best_period.replace('년', '')) * 12
-                sub_total = subscription_prices[best_period] * months
+            best_period = pricing.best_period(self.current_product_id)
+            if best_period:
+                sub_total = subscription_totals[best_period]['total']
                 savings = sub_total - purchase_price
                 if savings > 0:
                     data_context += f"\n[비교 포인트]: {best_period} 구독 시 총 {sub_total:,}원으로 구매보다 {savings:,}원 더 비쌈!\n"
+                # 손익분기 (비용 곡선, 최대 할인 기준)
+                break_even = cost_curves_for(self.product_manager.snapshot).summary(self.current_product_id, best_period)
+                if break_even and break_even['break_even_month']:
+                    data_context += (
+                        f"[손익분기]: 최대 할인을 다 받아도 {break_even['break_even_month']}개월째부터 "
+                        f"구독 누적 비용이 구매가를 넘어섬 (중고 판매 포함 시 {break_even['break_even_month_with_resale']}개월째)\n"
+                    )
             
             # 중고 판매 가치
             if purchase_price > 1000000:
                 resale_value = int(purchase_price * 0.6)
                 data_context += f"[중고 판매]: 나중에 팔면 약 {resale_value:,}원 회수 가능\n"
             
-            # 위약금 정보
-            penalty_info = self.product_manager.get_penalty_info()
-            if penalty_info:
-                early_termination = penalty_info.get('early_termination_fee', {})
-                if early_termination:
-                    data_context += f"[구독 위약금]: 1년 내 해지 시 잔여기간 요금의 30% 위약금!\n"
+            # 위약금 정보 (위약금 테이블의 정확한 금액)
+            best_period = self.product_manager.pricing.best_period(self.current_product_id)
+            penalty_line = self.product_manager.penalties.prompt_line(self.current_product_id, best_period) if best_period else ""
+            if penalty_line:
+                data_context += f"[구독 위약금]: {penalty_line}\n"
         
         else:  # 구독
             # 구독 관련 구체적 데이터
-            subscription_benefits = product.get('subscription_benefits', [])
+            subscription_benefits = self.product_manager.benefit_facts.prompt_benefits(
+                self.current_product_id, 'subscription'
+            )
             if subscription_benefits:
                 # 턴에 따라 다른 혜택 선택
                 selected_benefit = subscription_benefits[min(self.turn_count - 1, len(subscription_benefits) - 1)]
@@ -116,11 +127,20 @@ class ChatBot:
                 if service_types:
                     data_context += f"[케어서비스]: {', '.join(service_types)} 포함\n"
             
-            # 멤버십 포인트 정보 추출
-            for benefit in subscription_benefits:
-                if '멤버십' in benefit and '포인트' in benefit:
-                    data_context += f"[특별 혜택]: {benefit}\n"
-                    break
+            # 혜택 팩트 (카탈로그 로드 시 추출한 숫자)
+            facts = self.product_manager.benefit_facts.product(self.current_product_id)
+            if facts.membership_points:
+                data_context += f"[특별 혜택]: 구독 시 멤버십 포인트 {facts.membership_points:,}P 적립\n"
+            if facts.prepay_monthly_discount:
+                data_context += (
+                    f"[특별 혜택]: 구독 요금의 {int(facts.prepay_rate * 100)}% 선결제 시 "
+                    f"월 {facts.prepay_monthly_discount:,}원 추가 할인\n"
+                )
+            if facts.intro_discount_months:
+                data_context += (
+                    f"[특별 혜택]: 첫 {facts.intro_discount_months}개월 구독료 "
+                    f"{int(facts.intro_discount_rate * 100)}% 할인\n"
+                )
         
         # 경쟁적 논거 추가
         competitive_arg = self.product_manager.get_competitive_argument(
@@ -141,6 +161,7 @@ class ChatBot:
     
     async def generate_streaming_response(self, message: str, context: str = "", debate_mode: bool = False):
         """스트리밍 응답 생성 (제너레이터)"""
+        timer = span = None
         try:
             # 데이터 기반 컨텍스트 추가
             if debate_mode and self.current_product_id:
@@ -281,10 +302,13 @@ class ChatBot:
                 # 최종 요약 생성 시에는 더 많은 토큰 허용 (3문장 제한으로 줄임)
                 if "최종 요약" in message or "결론" in message:
                     max_tokens = 300
+                    call_site = "conclusion"
                 else:
                     max_tokens = 150
+                    call_site = "question"
             else:
                 max_tokens = 150 if debate_mode else 500  # 논쟁 모드에서 짧은 응답으로 제한
+                call_site = ("purchase" if self.stance == "구매" else "subscription") if debate_mode else "chat"
             
             # AI Provider에 따라 모델 이름 설정
             if Config.AI_PROVIDER == "azure":
@@ -295,6 +319,8 @@ class ChatBot:
                 model_name = self.model
             
             # EXAONE의 경우 스트리밍 비활성화 (연결 오류 방지)
+            timer = LLMCallTimer(call_site, Config.AI_PROVIDER)
+            span = tracing.start_span(f"llm:{call_site}", provider=Config.AI_PROVIDER, bot=self.name, max_tokens=max_tokens)
             if Config.AI_PROVIDER == "exaone":
                 response = await asyncio.to_thread(
                     self.client.chat.completions.create,
@@ -319,15 +345,31 @@ class ChatBot:
                 # EXAONE: 일반 응답 처리
                 if response.choices and len(response.choices) > 0:
                     full_response = response.choices[0].message.content
+                    usage = getattr(response, 'usage', None)
+                    timer.finish(prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                                 completion_tokens=getattr(usage, 'completion_tokens', None))
+                    spent = usage_ledger.record(call_site, Config.AI_PROVIDER, self.name, self.current_product_id,
+                                                getattr(usage, 'prompt_tokens', None), getattr(usage, 'completion_tokens', None),
+                                                messages=messages, content=full_response)
+                    span.set('prompt_tokens', spent['prompt_tokens'])
+                    span.set('completion_tokens', spent['completion_tokens'])
+                    span.end()
                     # 전체 응답을 한 번에 yield (타이핑 효과를 위해)
                     yield full_response
                 else:
                     print("EXAONE 응답에 choices가 없습니다.")
+                    timer.finish("fallback")
+                    span.end()
                     yield "응답을 생성할 수 없긴해"
             else:
                 # Azure: 스트리밍 응답 처리
+                # 동기 스트림의 다음 청크 대기(소켓 읽기)는 스레드에서 (이벤트 루프를 막지 않도록)
                 full_response = ""
-                for chunk in response:
+                chunks = iter(response)
+                while True:
+                    chunk = await asyncio.to_thread(next, chunks, None)
+                    if chunk is None:
+                        break
                     try:
                         if (chunk.choices and 
                             len(chunk.choices) > 0 and 
@@ -335,11 +377,21 @@ class ChatBot:
                             chunk.choices[0].delta.content is not None):
                             content = chunk.choices[0].delta.content
                             if content and content.strip():  # 빈 내용이나 공백만 있는 경우 무시
+                                timer.first_token()
                                 full_response += content
                                 yield content
                     except Exception as chunk_error:
                         print(f"청크 처리 중 오류: {chunk_error}")
                         continue
+                timer.finish()
+                # 스트리밍 응답에는 usage가 없어 로컬 추정
+                spent = usage_ledger.record(call_site, Config.AI_PROVIDER, self.name, self.current_product_id,
+                                            messages=messages, content=full_response)
+                span.set('ttft_ms', round(timer.ttft * 1000, 3) if timer.ttft is not None else None)
+                span.set('prompt_tokens', spent['prompt_tokens'])
+                span.set('completion_tokens', spent['completion_tokens'])
+                span.set('tokens_estimated', True)
+                span.end()
             
             # 대화 히스토리에 추가
             self.conversation_history.append({"role": "user", "content": message})
@@ -348,6 +400,10 @@ class ChatBot:
         except Exception as e:
             error_str = str(e)
             print(f"{self.name} 스트리밍 응답 생성 중 오류: {error_str}")
+            if timer is not None:
+                timer.finish("error")
+                span.set('error', type(e).__name__)
+                span.end()
             
             # 콘텐츠 필터링 오류인 경우 백그라운드에서 재시도
             if "content_filter" in error_str or "ResponsibleAIPolicyViolation" in error_str:
@@ -487,80 +543,58 @@ class ChatBotManager:
         purchase_bot = self.chatbots["구매봇"]
         subscription_bot = self.chatbots["구독봇"]
         
-        # 첫 번째 발언
+        # 첫 번째 발언 (구매봇/구독봇 첫 발언은 서로 독립적이므로 동시에 생성)
         first_message = f"{product_name}에 대한 구매/구독 선택"
+        first_context = f"제품: {product_name}\n고객정보: {user_info if user_info else '일반 고객'}"
         
-        # 구매봇 첫 발언
-        purchase_response = await purchase_bot.generate_response(
-            first_message,
-            f"제품: {product_name}\n고객정보: {user_info if user_info else '일반 고객'}",
-            debate_mode=True
-        )
-        
-        conversation.append({
-            "speaker": "구매봇",
-            "message": purchase_response,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # 구독봇 첫 발언
-        subscription_response = await subscription_bot.generate_response(
-            first_message,
-            f"제품: {product_name}\n고객정보: {user_info if user_info else '일반 고객'}",
-            debate_mode=True
-        )
-        
-        conversation.append({
-            "speaker": "구독봇",
-            "message": subscription_response,
-            "timestamp": datetime.now().isoformat()
-        })
+        nodes = [
+            TurnNode('구매봇_1', '구매봇', lambda r: purchase_bot.generate_response(first_message, first_context, debate_mode=True)),
+            TurnNode('구독봇_1', '구독봇', lambda r: subscription_bot.generate_response(first_message, first_context, debate_mode=True)),
+        ]
         
-        # 나머지 턴 진행
+        # 나머지 턴 진행 (직전 상대 발언에 반박)
         for turn in range(1, max_turns):
-            # 구매봇 차례
-            purchase_response = await purchase_bot.generate_response(
-                f"구독봇이 '{subscription_response}'라고 했는데 어떻게 생각해?",
-                f"턴 {turn + 1}/{max_turns}",
-                debate_mode=True
-            )
-            
-            conversation.append({
-                "speaker": "구매봇",
-                "message": purchase_response,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # 구독봇 차례
-            subscription_response = await subscription_bot.generate_response(
-                f"구매봇이 '{purchase_response}'라고 했는데 어떻게 생각해?",
-                f"턴 {turn + 1}/{max_turns}",
-                debate_mode=True
+            prev_subscription, purchase_key = f"구독봇_{turn}", f"구매봇_{turn + 1}"
+            subscription_key = f"구독봇_{turn + 1}"
+            turn_context = f"턴 {turn + 1}/{max_turns}"
+            nodes.append(TurnNode(
+                purchase_key, '구매봇',
+                lambda r, prev=prev_subscription, ctx=turn_context: purchase_bot.generate_response(
+                    f"구독봇이 '{r[prev]}'라고 했는데 어떻게 생각해?", ctx, debate_mode=True
+                ),
+                deps=(prev_subscription,),
+            ))
+            nodes.append(TurnNode(
+                subscription_key, '구독봇',
+                lambda r, prev=purchase_key, ctx=turn_context: subscription_bot.generate_response(
+                    f"구매봇이 '{r[prev]}'라고 했는데 어떻게 생각해?", ctx, debate_mode=True
+                ),
+                deps=(purchase_key,),
+            ))
+        
+        # 안내봇 최종 정리 (최근 6개 발언 참조)
+        debate_keys = [node.key for node in nodes]
+        recent_nodes = nodes[-6:]
+        
+        def final_summary(r):
+            summary_context = f"제품: {product_name}\n\n논쟁 요약:\n"
+            for node in recent_nodes:
+                summary_context += f"- {node.speaker}: {r[node.key]}\n"
+            return guide_bot.generate_response(
+                "이번 논쟁을 정리하고 고객에게 선택에 도움이 되는 조언을 해줘",
+                summary_context,
+                debate_mode=False
             )
-            
-            conversation.append({
-                "speaker": "구독봇",
-                "message": subscription_response,
-                "timestamp": datetime.now().isoformat()
-            })
         
-        # 안내봇 최종 정리
-        summary_context = f"제품: {product_name}\n\n논쟁 요약:\n"
-        for msg in conversation[-6:]:  # 최근 6개 메시지 참조
-            if msg["speaker"] in ["구매봇", "구독봇"]:
-                summary_context += f"- {msg['speaker']}: {msg['message']}\n"
+        nodes.append(TurnNode('안내봇_정리', '안내봇', final_summary, deps=debate_keys))
         
-        final_summary = await guide_bot.generate_response(
-            "이번 논쟁을 정리하고 고객에게 선택에 도움이 되는 조언을 해줘",
-            summary_context,
-            debate_mode=False
-        )
-        
-        conversation.append({
-            "speaker": "안내봇",
-            "message": final_summary,
-            "timestamp": datetime.now().isoformat()
-        })
+        results = await TurnGraph(nodes).run()
+        for node in nodes:
+            conversation.append({
+                "speaker": node.speaker,
+                "message": results[node.key].text,
+                "timestamp": datetime.fromtimestamp(results[node.key].completed_at).isoformat()
+            })
         
         # 대화 로그에 추가
         self.conversation_log.extend(conversation)
@@ -30,7 +30,92 @@ class Config:
     # 웹서버 설정
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", 8080))
-    
+
+    # 스트리밍 페이싱 설정 ("none", "fixed", "adaptive")
+    STREAM_PACING_MODE = os.getenv("STREAM_PACING_MODE", "adaptive")
+    STREAM_TURN_DELAY = float(os.getenv("STREAM_TURN_DELAY", 0.5))
+    STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 30))
+    STREAM_CHUNK_DELAY = float(os.getenv("STREAM_CHUNK_DELAY", 0.02))
+    STREAM_MIN_WRITE_INTERVAL = float(os.getenv("STREAM_MIN_WRITE_INTERVAL", 0.05))
+    STREAM_ADAPTIVE_MIN_RATE = float(os.getenv("STREAM_ADAPTIVE_MIN_RATE", 300))
+
+    # 논쟁 턴 그래프 설정 (true면 구독봇 첫 주장이 구매봇 첫 주장을 인용하므로 순차 실행)
+    DEBATE_QUOTE_OPENING = os.getenv("DEBATE_QUOTE_OPENING", "false").lower() == "true"
+    # 여러 제품 비교 논쟁: 한 요청의 최대 제품 수 / 동시 LLM 호출 수
+    COMPARE_MAX_PRODUCTS = int(os.getenv("COMPARE_MAX_PRODUCTS", 4))
+    COMPARE_MAX_CONCURRENCY = int(os.getenv("COMPARE_MAX_CONCURRENCY", 4))
+
+    # 카탈로그 저장소 ("json": new_products.json, "sqlite": CATALOG_DB_PATH)
+    CATALOG_BACKEND = os.getenv("CATALOG_BACKEND", "json")
+    CATALOG_DB_PATH = os.getenv("CATALOG_DB_PATH", "products.db")
+
+    # 카탈로그 핫 리로드 설정 (new_products.json 변경 시 재시작 없이 반영)
+    CATALOG_WATCH = os.getenv("CATALOG_WATCH", "true").lower() == "true"
+    CATALOG_POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", 2.0))
+
+    # LLM 응답 캐시 (같은 카탈로그 버전 + 같은 요청이면 재사용, 기본 비활성)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 1000))
+    # 배치 생성기(batch_debates.py)가 만든 캐시 / 첫 논쟁 풀 파일 (JSONL, 비우면 사용 안 함)
+    LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE", "")
+    OPENING_POOL_FILE = os.getenv("OPENING_POOL_FILE", "")
+
+    # LLM 호출 녹화/재생 (off | record | replay), 재생 지연 배율 (1.0 = 기록 그대로, 0 = 지연 없음)
+    LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+    LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "")
+    LLM_CASSETTE_TIME_SCALE = float(os.getenv("LLM_CASSETTE_TIME_SCALE", 1.0))
+
+    # 복수 구독 추가 할인율 (카탈로그 문구에 금액이 없어 기본 0, 예: 0.05)
+    BUNDLE_DISCOUNT_RATE = float(os.getenv("BUNDLE_DISCOUNT_RATE", 0))
+
+    # 결론 생성: 로컬 추천 순위를 프롬프트에 넣어 짧게 생성, 빠른 모드면 LLM 호출 생략
+    CONCLUSION_FAST_MODE = os.getenv("CONCLUSION_FAST_MODE", "false").lower() == "true"
+    CONCLUSION_MAX_TOKENS = int(os.getenv("CONCLUSION_MAX_TOKENS", 300))
+
+    # /metrics (Prometheus 텍스트 형식) 수집 여부
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # 세션 추적: 샘플링 비율(0이면 끔, 1이면 모든 세션), 내보낼 파일과 형식 (jsonl | otlp)
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+    TRACE_EXPORT_FORMAT = os.getenv("TRACE_EXPORT_FORMAT", "jsonl")
+
+    # 이벤트 루프 지연 감시: 임계값(ms)보다 오래 막히면 막은 스택 기록, strict면 테스트 서버 종료 시 실패
+    LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+    LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", 100))
+    LOOP_MONITOR_STRICT = os.getenv("LOOP_MONITOR_STRICT", "false").lower() == "true"
+
+    # 관리자 전용 디버그 엔드포인트(/debug/profile) 토큰 (비어 있으면 사용 불가), 프로파일 최대 시간(초)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+
+    # 토큰 / 비용 집계: 가격("provider=입력/출력" 100만 토큰당 USD, 예: friendli=0.6/0.6,azure=2.5/10),
+    # 날짜별 롤업 파일 폴더와 저장 주기(초), 메모리에 유지할 세션 수
+    LLM_PRICES = os.getenv("LLM_PRICES", "")
+    USAGE_ROLLUP_DIR = os.getenv("USAGE_ROLLUP_DIR", "usage")
+    USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", 60))
+    USAGE_MAX_SESSIONS = int(os.getenv("USAGE_MAX_SESSIONS", 10000))
+
+    # 운영 실행(serve.py): 워커 수(0이면 CPU 수), SIGTERM 후 열린 SSE 스트림을 기다리는 시간(초),
+    # 준비 완료 전 워밍업(카탈로그 / 프롬프트 데이터 / 캐시 / LLM 연결 풀)과 미리 열어둘 연결 수
+    WORKERS = int(os.getenv("WORKERS", 0))
+    DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", 30))
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", 2))
+
+    # 워커 간 공유 상태 (세션 / LLM 응답 캐시 / TTS 캐시 색인 / 속도 제한)
+    # 비우면 프로세스 메모리, sqlite:///경로.db (한 서버), redis://호스트:포트/DB (여러 서버)
+    # serve.py는 워커가 2개 이상이고 비어 있으면 /dev/shm의 SQLite 파일을 사용
+    SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "")
+    SHARED_STATE_PREFIX = os.getenv("SHARED_STATE_PREFIX", "aimystery:")
+    SESSION_TTL = float(os.getenv("SESSION_TTL", 6 * 3600))
+    SHARED_CACHE_TTL = float(os.getenv("SHARED_CACHE_TTL", 24 * 3600))
+    # LLM API 호출 수 제한 (모든 워커 합계, 초당, 0이면 제한 없음)
+    LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", 0))
+    # TTS 음성 파일 캐시 폴더와 색인 유지 시간(초)
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+    TTS_CACHE_TTL = float(os.getenv("TTS_CACHE_TTL", 7 * 24 * 3600))
+
     @classmethod
     def validate(cls):
         """필수 환경변수 검증"""
@@ -0,0 +1,200 @@
+"""
+누적 비용 곡선 / 손익분기 서비스
+- 구매(일시불 + 케어) vs 모든 구독 기간의 월별 누적 비용
+- 중도 해지 위약금(penalty_info)과 중고 판매 회수액(구매가 × 0.6) 반영
+- 손익분기 월: 구독 누적 비용이 구매 비용을 넘어서는 첫 달
+- 전 제품 × 전 기간 × 전 시나리오를 한 번에 계산, 카탈로그 버전별 캐시
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+import catalog
+from catalog import CatalogSnapshot, DEFAULT_PRODUCTS_FILE
+from penalty import penalty_for
+from pricing import PricingTable, pricing_for
+
+RESALE_RATE = 0.6  # 중고 판매 예상 회수율 (get_specific_benefit_data와 동일)
+RESPONSE_CACHE_SIZE = 128  # 제품 조합 × 시나리오별 응답 캐시 (LRU)
+
+
+class CostCurves:
+    """카탈로그 스냅샷 하나에 대한 누적 비용 / 손익분기 테이블
+
+    케어서비스가 필수인 제품은 가장 저렴한 케어옵션을 구매/구독 모두에 포함합니다.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, table: Optional[PricingTable] = None):
+        table = table or pricing_for(snapshot)
+        self.table = table
+        self.version = snapshot.version
+        self.max_months = int(table.months.max()) if len(table.months) else 0
+        self.month_axis = np.arange(self.max_months + 1)
+        self.penalties = penalty_for(snapshot)
+        self.rates = self.penalties.rates
+        self._responses: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        P = len(table.product_ids)
+        mandatory = np.array(
+            [bool((product.get('care_service') or {}).get('mandatory')) for product in snapshot.products], dtype=bool
+        ).reshape(P)
+
+        # 제품별 기본 케어옵션: 필수면 가장 저렴한 유료 옵션, 아니면 케어 없음(0번)
+        care = table.care_monthly  # (P, T, C)
+        if care.shape[2] > 1:
+            paid_care = np.where(np.isnan(care[:, :, 1:]), np.inf, care[:, :, 1:])
+            cheapest = np.argmin(paid_care, axis=2) + 1  # (P, T)
+            has_paid = np.isfinite(np.min(paid_care, axis=2))
+            self.care_index = np.where(mandatory[:, None] & has_paid, cheapest, 0)
+            purchase_care = np.where(np.isnan(table.purchase_care_monthly[:, 1:]), np.inf, table.purchase_care_monthly[:, 1:])
+            cheapest_purchase = np.min(purchase_care, axis=1)
+            self.purchase_care_monthly = np.where(mandatory & np.isfinite(cheapest_purchase), cheapest_purchase, 0.0)
+        else:
+            self.care_index = np.zeros(care.shape[:2], dtype=int)
+            self.purchase_care_monthly = np.zeros(P)
+
+        # (P, T, S) 케어 포함 월 구독료 / 시작 시 일회성 차감(포인트 등), (P, S) 구매 일시불 (환급 차감)
+        p_idx, t_idx = np.meshgrid(np.arange(P), np.arange(len(table.periods)), indexing='ij')
+        self.subscription_monthly = table.monthly[p_idx, t_idx, self.care_index, :]
+        self.credit = table.credit
+        self.purchase_price = table.purchase_price
+        self.purchase_upfront = self.purchase_price[:, None] - table.purchase_credit
+        self.resale = np.floor(self.purchase_price * RESALE_RATE)
+
+        self.break_even = self._break_even(self.purchase_upfront)
+        self.break_even_with_resale = self._break_even(self.purchase_upfront - self.resale[:, None])
+
+    def _break_even(self, purchase_upfront: np.ndarray) -> np.ndarray:
+        """(P, T, S) 구독 누적 비용이 구매 누적 비용 이상이 되는 첫 달 (계약기간 내 없으면 -1)
+
+        구독: monthly × m − credit, 구매: upfront(P, S) + purchase_care × m
+        """
+        slope = self.subscription_monthly - self.purchase_care_monthly[:, None, None]
+        gap = purchase_upfront[:, None, :] + self.credit
+        with np.errstate(divide='ignore', invalid='ignore'):
+            month = np.ceil(gap / slope)
+        month = np.where(gap <= 0, 0, month)
+        contract = self.table.months[None, :, None]
+        valid = ((slope > 0) & (month <= contract)) | (gap <= 0)
+        return np.where(valid & ~np.isnan(self.subscription_monthly), month, -1).astype(int)
+
+    def curves(self, product_indices: Sequence[int], scenario: str = "max") -> Dict[str, np.ndarray]:
+        """선택한 제품들의 월별 곡선 (제품 × 기간 × 월 벡터 연산)"""
+        s = self.table.scenarios.index(scenario)
+        idx = np.asarray(product_indices, dtype=int)
+        m = self.month_axis[None, None, :]                               # (1, 1, M)
+        contract = self.table.months[None, :, None]                      # (1, T, 1)
+        monthly = self.subscription_monthly[idx][:, :, s][:, :, None]    # (n, T, 1)
+
+        paid_months = np.minimum(m, contract)
+        cumulative = monthly * paid_months - self.credit[idx][:, :, s][:, :, None]
+        penalty = self.penalties.penalty[idx]                            # (n, T, M) 위약금 테이블
+        exit_cost = cumulative + penalty
+
+        purchase = self.purchase_upfront[idx][:, s][:, None] + self.purchase_care_monthly[idx][:, None] * self.month_axis[None, :]
+        return {
+            'subscription': cumulative,
+            'penalty': penalty,
+            'exit_cost': exit_cost,
+            'purchase': purchase,
+            'purchase_net_resale': purchase - self.resale[idx][:, None],
+        }
+
+    def summary(self, product_id: Any, period: str, scenario: str = "max") -> Optional[Dict[str, Any]]:
+        """프롬프트용 요약 (손익분기 월 등)"""
+        table = self.table
+        i = table.product_index(product_id)
+        t = table.period_index(period)
+        if i is None or t is None or scenario not in table.scenarios:
+            return None
+        s = table.scenarios.index(scenario)
+        if np.isnan(self.subscription_monthly[i, t, s]):
+            return None
+        months = int(table.months[t])
+        return {
+            'period': period,
+            'months': months,
+            'subscription_total': int(self.subscription_monthly[i, t, s] * months - self.credit[i, t, s]),
+            'purchase_total': int(self.purchase_upfront[i, s] + self.purchase_care_monthly[i] * months),
+            'resale_value': int(self.resale[i]),
+            'break_even_month': int(self.break_even[i, t, s]) if self.break_even[i, t, s] >= 0 else None,
+            'break_even_month_with_resale': (
+                int(self.break_even_with_resale[i, t, s]) if self.break_even_with_resale[i, t, s] >= 0 else None
+            ),
+        }
+
+    def response(self, product_ids: Optional[Sequence[Any]] = None, scenario: str = "max") -> Dict[str, Any]:
+        """차트용 JSON (제품은 카탈로그 순서, 중복 제거한 제품 조합 × 시나리오별 LRU 캐시)"""
+        table = self.table
+        if product_ids is None:
+            indices = list(range(len(table.product_ids)))
+        else:
+            indices = sorted({table.product_index(pid) for pid in product_ids if table.has_product(pid)})
+        key = (tuple(indices), scenario)
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                return cached
+
+        s = table.scenarios.index(scenario)
+        data = self.curves(indices, scenario)
+        products = []
+        for a, i in enumerate(indices):
+            subscriptions = {}
+            for t, period in enumerate(table.periods):
+                if np.isnan(self.subscription_monthly[i, t, s]):
+                    continue
+                subscriptions[period] = {
+                    'monthly': int(self.subscription_monthly[i, t, s]),
+                    'care_option': table.care_options[self.care_index[i, t]],
+                    'cumulative': data['subscription'][a, t].astype(int).tolist(),
+                    'exit_cost': data['exit_cost'][a, t].astype(int).tolist(),
+                    'break_even_month': int(self.break_even[i, t, s]) if self.break_even[i, t, s] >= 0 else None,
+                    'break_even_month_with_resale': (
+                        int(self.break_even_with_resale[i, t, s]) if self.break_even_with_resale[i, t, s] >= 0 else None
+                    ),
+                }
+            products.append({
+                'id': table.product_ids[i],
+                'name': table.product_names[i],
+                'purchase': data['purchase'][a].astype(int).tolist(),
+                'purchase_net_resale': data['purchase_net_resale'][a].astype(int).tolist(),
+                'resale_value': int(self.resale[i]),
+                'subscriptions': subscriptions,
+            })
+
+        result = {
+            'catalog_version': self.version,
+            'scenario': scenario,
+            'months': self.month_axis.tolist(),
+            'termination_rates': self.rates.tolist(),
+            'resale_rate': RESALE_RATE,
+            'products': products,
+        }
+        with self._lock:
+            self._responses[key] = result
+            while len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return result
+
+
+def build_cost_curves(snapshot: CatalogSnapshot) -> CostCurves:
+    return CostCurves(snapshot)
+
+
+catalog.register_derived('cost_curves', build_cost_curves)
+
+
+def cost_curves_for(snapshot: CatalogSnapshot) -> CostCurves:
+    """특정 스냅샷의 비용 곡선"""
+    return snapshot.derived('cost_curves', build_cost_curves)
+
+
+def get_cost_curves(path: str = DEFAULT_PRODUCTS_FILE) -> CostCurves:
+    """현재 카탈로그 버전의 비용 곡선"""
+    return cost_curves_for(catalog.get_catalog(path))
@@ -0,0 +1,316 @@
+"""
+논쟁 플로우 선언 모듈
+- 구매 → 구독 → 재반박 → 재반박 → 안내봇 질문 순서를 턴 그래프로 선언
+- api.py, api_v3.py, api_v3_complete.py가 같은 선언을 공유
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from turn_graph import TurnGraph, TurnNode, TurnRun
+
+CONCLUSION_REQUEST = "이제 결론을 내줘"
+
+OPENING_INTRO_PHRASES = [
+    "오호, 둘 다 좋은 포인트가 있긴해!",
+    "음... 각자 일리가 있긴해!",
+    "재밌는 논쟁이긴해!",
+    "고민이 되긴해!",
+    "둘 다 설득력이 있긴해!"
+]
+
+TRANSITION_PHRASES = [
+    "흥미로운 의견들이긴해!",
+    "둘 다 일리가 있긴해!",
+    "좋은 포인트들이긴해!",
+    "각자 장점이 있긴해!",
+    "고민될만 하긴해!"
+]
+
+IMPROVED_OPENING_INTROS = [
+    "둘 다 좋은 점이 있긴해!",
+    "각자 장단점이 있긴해!",
+    "흥미로운 의견들이긴해!",
+    "고민이 되긴해!"
+]
+
+IMPROVED_TRANSITION_INTROS = [
+    "흥미로운 논쟁이긴해!",
+    "둘 다 일리가 있긴해!",
+    "각자 좋은 점이 있긴해!",
+    "재미있는 토론이긴해!",
+    "이런 관점도 있긴해!"
+]
+
+
+def other_bot(bot: str) -> str:
+    """상대 봇 이름"""
+    return '구독봇' if bot == '구매봇' else '구매봇'
+
+
+def graph_history(turn_run: TurnRun, base: Optional[List[Dict[str, Any]]] = None, key: str = 'content') -> List[Dict[str, Any]]:
+    """완료된 턴들을 대화 히스토리 형식으로 변환 (표시 순서)"""
+    history = list(base or [])
+    for node in turn_run.graph.nodes:
+        result = turn_run.results.get(node.key)
+        if result is not None:
+            history.append({'speaker': node.speaker, key: result.display_text})
+    return history
+
+
+def question_suggestions(question: str) -> List[str]:
+    """안내봇 질문에 대한 기본 선택지"""
+    return [question.replace('?', '').strip(), CONCLUSION_REQUEST]
+
+
+# ---------------------------------------------------------------------------
+# chatbot_flow_v3 (DynamicAIChatBotSystem) 플로우
+# ---------------------------------------------------------------------------
+
+def dynamic_opening_graph(system, product_id: int, quote_opening: Optional[bool] = None,
+                          rng: Optional[random.Random] = None) -> TurnGraph:
+    """첫 논쟁 플로우: 구매 주장 → 구독 주장 → 재반박 2회 → 안내봇 질문
+
+    quote_opening이 False면 구독 주장이 구매 주장을 인용하지 않으므로 두 주장이 동시에 생성됩니다.
+    rng를 주면 인트로 문구를 그 난수 생성기로 고릅니다 (기본: 전역 random).
+    """
+    if quote_opening is None:
+        quote_opening = Config.DEBATE_QUOTE_OPENING
+    intro = (rng or random).choice(OPENING_INTRO_PHRASES)
+
+    def opening_history(r):
+        return [
+            {'speaker': '구매봇', 'content': r['purchase']},
+            {'speaker': '구독봇', 'content': r['subscription']},
+            {'speaker': '구매봇', 'content': r['purchase_rebuttal']},
+            {'speaker': '구독봇', 'content': r['subscription_rebuttal']},
+        ]
+
+    return TurnGraph([
+        TurnNode(
+            'purchase', '구매봇',
+            lambda r: system.generate_purchase_argument(product_id, {'turn': 1, 'previous_statements': []}),
+        ),
+        TurnNode(
+            'subscription', '구독봇',
+            lambda r: system.generate_subscription_argument(
+                product_id, {'turn': 1, 'previous_statements': [r['purchase']] if quote_opening else []}
+            ),
+            deps=('purchase',) if quote_opening else (),
+        ),
+        TurnNode(
+            'purchase_rebuttal', '구매봇',
+            lambda r: system.generate_rebuttal(product_id, r['subscription'], '구매봇', 2),
+            deps=('subscription',),
+        ),
+        TurnNode(
+            'subscription_rebuttal', '구독봇',
+            lambda r: system.generate_rebuttal(product_id, r['purchase_rebuttal'], '구독봇', 2),
+            deps=('purchase_rebuttal',),
+        ),
+        TurnNode(
+            'question', '안내봇',
+            lambda r: system.generate_dynamic_question(product_id, opening_history(r)),
+            deps=('purchase', 'subscription', 'purchase_rebuttal', 'subscription_rebuttal'),
+            render=lambda question: f"{intro} {question}",
+            complete=False,
+        ),
+    ])
+
+
+def stored_opening_graph(turns: Dict[str, str]) -> TurnGraph:
+    """미리 생성한 첫 논쟁(opening_pool)을 같은 순서/형식으로 재생 (LLM 호출 없음)"""
+    intro = random.choice(OPENING_INTRO_PHRASES)
+
+    def stored(key):
+        async def run(r):
+            return turns[key]
+        return run
+
+    return TurnGraph([
+        TurnNode('purchase', '구매봇', stored('purchase')),
+        TurnNode('subscription', '구독봇', stored('subscription')),
+        TurnNode('purchase_rebuttal', '구매봇', stored('purchase_rebuttal')),
+        TurnNode('subscription_rebuttal', '구독봇', stored('subscription_rebuttal')),
+        TurnNode(
+            'question', '안내봇', stored('question'),
+            render=lambda question: f"{intro} {question}",
+            complete=False,
+        ),
+    ])
+
+
+def dynamic_response_graph(
+    system,
+    product_id: int,
+    user_input: str,
+    conversation_history: List[Dict[str, Any]],
+    first_bot: Optional[str] = None,
+    extra_context: str = "",
+    rng: Optional[random.Random] = None,
+) -> TurnGraph:
+    """사용자 응답 플로우: 봇 응답 → 상대 반박 → 재반박 → 안내봇 질문
+
+    extra_context(예: 예산 검색 결과)는 사용자 입력에 바로 답하는 첫 봇 턴에만 전달됩니다.
+    rng를 주면 첫 봇 / 전환 문구를 그 난수 생성기로 고릅니다 (기본: 전역 random).
+    """
+    rng = rng or random
+    first_bot = first_bot or rng.choice(['구매봇', '구독봇'])
+    second_bot = other_bot(first_bot)
+    transition = rng.choice(TRANSITION_PHRASES)
+    history = list(conversation_history)  # 사용자 입력 포함
+
+    def response_history(r):
+        return history + [
+            {'speaker': first_bot, 'content': r['first']},
+            {'speaker': second_bot, 'content': r['second']},
+            {'speaker': first_bot, 'content': r['final']},
+        ]
+
+    return TurnGraph([
+        TurnNode(
+            'first', first_bot,
+            lambda r: system.respond_to_user_input(product_id, user_input, first_bot, history, extra_context),
+        ),
+        TurnNode(
+            'second', second_bot,
+            lambda r: system.generate_rebuttal(product_id, r['first'], second_bot, len(history) + 1),
+            deps=('first',),
+        ),
+        TurnNode(
+            'final', first_bot,
+            lambda r: system.generate_rebuttal(product_id, r['second'], first_bot, len(history) + 2),
+            deps=('second',),
+        ),
+        TurnNode(
+            'question', '안내봇',
+            lambda r: system.generate_dynamic_question(product_id, response_history(r)),
+            deps=('first', 'second', 'final'),
+            render=lambda question: f"{transition} {question}",
+            complete=False,
+        ),
+    ])
+
+
+def dynamic_compare_graph(system, products: List[Dict[str, Any]], max_concurrency: Optional[int] = None) -> TurnGraph:
+    """여러 제품 비교 플로우: 제품별 구매/구독 첫 주장을 모두 동시에 생성 (동시 호출 수 제한)
+
+    모든 턴이 서로 독립적이므로 완료 순서대로 스트리밍하면 전체 지연이 가장 느린 제품에 가깝습니다.
+    이벤트에는 product_id/product_name이 붙습니다.
+    """
+    nodes = []
+    for product in products:
+        product_id = product['id']
+        tags = {'product_id': product_id, 'product_name': product.get('name', '')}
+        nodes.append(TurnNode(
+            f"purchase_{product_id}", '구매봇',
+            lambda r, pid=product_id: system.generate_purchase_argument(pid, {'turn': 1, 'previous_statements': []}),
+            tags=tags,
+        ))
+        nodes.append(TurnNode(
+            f"subscription_{product_id}", '구독봇',
+            lambda r, pid=product_id: system.generate_subscription_argument(pid, {'turn': 1, 'previous_statements': []}),
+            tags=tags,
+        ))
+    return TurnGraph(nodes, max_concurrency=max_concurrency or Config.COMPARE_MAX_CONCURRENCY)
+
+
+def dynamic_conclusion_graph(system, product_id: int, conversation_history: List[Dict[str, Any]]) -> TurnGraph:
+    """결론 플로우: 안내봇 최종 결론"""
+    return TurnGraph([
+        TurnNode('conclusion', '안내봇', lambda r: system.generate_conclusion(product_id, conversation_history)),
+    ])
+
+
+# ---------------------------------------------------------------------------
+# chatbot_flow_v2 / chatbot_flow (api.py improved 플로우)
+# ---------------------------------------------------------------------------
+
+def improved_opening_graph(ai_flow, product_id: int, quote_opening: Optional[bool] = None) -> TurnGraph:
+    """개선 플로우 첫 논쟁: 구매 의견 → 구독 의견 → 안내봇 질문 (선택지는 graph.extras에 저장)"""
+    if quote_opening is None:
+        quote_opening = Config.DEBATE_QUOTE_OPENING
+    intro = random.choice(IMPROVED_OPENING_INTROS)
+    extras: Dict[str, Any] = {}
+
+    async def guide_question(r):
+        history = [
+            {'speaker': '구매봇', 'message': r['purchase']},
+            {'speaker': '구독봇', 'message': r['subscription']},
+        ]
+        question = await ai_flow.generate_guide_bot_question(product_id, history)
+        extras['suggestions'] = question['suggestions']
+        return question['question']
+
+    return TurnGraph([
+        TurnNode(
+            'purchase', '구매봇',
+            lambda r: ai_flow.generate_purchase_bot_argument(product_id, {'history': []}),
+            fields={'turn': 1},
+        ),
+        TurnNode(
+            'subscription', '구독봇',
+            lambda r: ai_flow.generate_subscription_bot_argument(
+                product_id, {'history': [{'speaker': '구매봇', 'message': r['purchase']}] if quote_opening else []}
+            ),
+            deps=('purchase',) if quote_opening else (),
+            fields={'turn': 2},
+        ),
+        TurnNode(
+            'question', '안내봇', guide_question,
+            deps=('purchase', 'subscription'),
+            render=lambda question: f"{intro} {question}",
+            complete=False,
+        ),
+    ], extras=extras)
+
+
+def improved_response_graph(
+    improved_flow,
+    product_id: int,
+    user_input: str,
+    conversation_history: List[Dict[str, Any]],
+    responding_bot: Optional[str] = None,
+) -> TurnGraph:
+    """개선 플로우 사용자 응답: 봇 응답 → 반박 → 재반박, 안내봇 질문은 응답과 동시에 생성"""
+    responding_bot = responding_bot or random.choice(['구매봇', '구독봇'])
+    rebutting_bot = other_bot(responding_bot)
+    turn_count = len([msg for msg in conversation_history if msg.get('speaker') in ['구매봇', '구독봇']])
+    intro = random.choice(IMPROVED_TRANSITION_INTROS)
+    extras: Dict[str, Any] = {}
+
+    async def guide_question(r):
+        question = await improved_flow.generate_guide_question(product_id, turn_count + 3, conversation_history)
+        extras['suggestions'] = question['suggestions']
+        return question['question']
+
+    return TurnGraph([
+        TurnNode(
+            'response', responding_bot,
+            lambda r: improved_flow.generate_response_to_user(product_id, user_input, responding_bot, conversation_history),
+        ),
+        TurnNode(
+            'rebuttal', rebutting_bot,
+            lambda r: improved_flow.generate_rebuttal(product_id, r['response'], rebutting_bot, turn_count + 1),
+            deps=('response',),
+        ),
+        TurnNode(
+            'final', responding_bot,
+            lambda r: improved_flow.generate_rebuttal(product_id, r['rebuttal'], responding_bot, turn_count + 2),
+            deps=('rebuttal',),
+        ),
+        # 안내봇 질문은 이전 히스토리만 참조하므로 봇 응답들과 병렬 실행
+        TurnNode(
+            'question', '안내봇', guide_question,
+            render=lambda question: f"{intro} {question}",
+            complete=False,
+        ),
+    ], extras=extras)
+
+
+def improved_conclusion_graph(improved_flow, product_id: int, conversation_history: List[Dict[str, Any]]) -> TurnGraph:
+    """개선 플로우 결론"""
+    return TurnGraph([
+        TurnNode('conclusion', '안내봇', lambda r: improved_flow.generate_final_conclusion(product_id, conversation_history)),
+    ])
@@ -0,0 +1,237 @@
+"""
+선언형 할인 규칙 엔진
+- 할인 규칙(제휴카드, 선결제, 복수 구독, 멤버십 포인트, 초기 할인, 에너지 환급)을 데이터로 선언
+- 카탈로그 버전마다 규칙을 (제품 × 계약기간) NumPy 배열로 한 번에 컴파일
+- 시나리오 = 적용할 규칙 이름 묶음, (제품, 기간, 시나리오) 단위 조회는 메모이즈
+- 가격 테이블(pricing)이 이 엔진의 결과로 월 요금/총액/실부담 텐서를 만듦
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benefit_facts import CatalogFacts
+from config import Config
+
+# 제휴카드: 기본 구독료의 20%, 월 한도 22,000원 (기존 챗봇 계산기와 같은 규칙)
+# 카탈로그의 '총 비용' 문구는 카드 실적 최고 구간(항상 22,000원)을 가정하므로 요금이 11만원 미만인 제품은
+# 문구보다 엔진 실부담이 큼 → /catalog/facts의 stated_total_warnings로 확인
+CARD_DISCOUNT_RATE = 0.2
+CARD_DISCOUNT_CAP = 22000  # 공통 혜택 문구에 한도가 없을 때 기본값
+
+
+@dataclass(frozen=True)
+class DiscountRule:
+    """할인 규칙 선언
+
+    target: 'monthly'(매달 할인) / 'credit'(구독 일회성 차감) / 'purchase_credit'(구매 일회성 차감)
+    formula: _FORMULAS 키, params: 계산식 파라미터
+    """
+    name: str
+    label: str
+    formula: str
+    targets: Tuple[str, ...] = ('monthly',)
+    params: Dict[str, Any] = field(default_factory=dict)
+    detail: str = "{label} {amount:,}원"
+
+
+RULES: Tuple[DiscountRule, ...] = (
+    DiscountRule('card', '제휴카드 할인', 'percent_capped',
+                 params={'rate': CARD_DISCOUNT_RATE, 'cap_fact': 'card_discount_cap', 'default_cap': CARD_DISCOUNT_CAP},
+                 detail="{label} 월 {amount:,}원"),
+    DiscountRule('prepay', '선결제 할인', 'product_monthly',
+                 params={'fact': 'prepay_monthly_discount'}, detail="{label} 월 {amount:,}원"),
+    # 카탈로그 문구에 복수 구독 할인 금액이 없어 BUNDLE_DISCOUNT_RATE를 설정해야 적용됨
+    DiscountRule('bundle', '복수 구독 할인', 'bundle_percent',
+                 params={'rate': Config.BUNDLE_DISCOUNT_RATE}, detail="{label} 월 {amount:,}원"),
+    DiscountRule('points', '멤버십 포인트', 'product_once', targets=('credit',),
+                 params={'fact': 'membership_points'}, detail="{label} {amount:,}P 적립"),
+    DiscountRule('intro', '초기 할인', 'intro_percent', targets=('credit',)),
+    DiscountRule('energy_rebate', '에너지 효율 환급', 'price_percent_capped', targets=('credit', 'purchase_credit')),
+)
+
+# 할인 시나리오 (뒤로 갈수록 더 많은 할인 적용)
+# max: 구독자 누구나 받는 제품 혜택(포인트, 첫 N개월 초기 할인)까지 포함, 챗봇 프롬프트/계산기 기준
+SCENARIOS: Dict[str, Tuple[str, ...]] = {
+    "base": (),
+    "card": ('card',),
+    "card_prepay": ('card', 'prepay'),
+    "max": ('card', 'prepay', 'points', 'intro'),
+    "all": ('card', 'prepay', 'bundle', 'points', 'intro', 'energy_rebate'),
+}
+SCENARIO_LABELS = {
+    "base": "할인 없음",
+    "card": "제휴카드 할인",
+    "card_prepay": "제휴카드 + 선결제 할인",
+    "max": "최대 할인 (제휴카드 + 선결제 + 멤버십 포인트 + 초기 할인)",
+    "all": "전체 혜택 (최대 할인 + 복수 구독 + 에너지 환급)",
+}
+
+
+@dataclass
+class RuleContext:
+    """규칙 컴파일 입력 (가격 테이블 축과 혜택 팩트)"""
+    facts: CatalogFacts
+    product_ids: List[Any]
+    base_monthly: np.ndarray    # (P, T), 제공하지 않는 기간은 NaN
+    months: np.ndarray          # (T,)
+    purchase_price: np.ndarray  # (P,)
+
+    def per_product(self, name: str) -> np.ndarray:
+        """제품 팩트 필드 → (P,) 배열"""
+        return np.array([getattr(self.facts.product(pid), name) for pid in self.product_ids], dtype=np.float64).reshape(-1)
+
+
+def _percent_capped(ctx: RuleContext, params: Dict) -> np.ndarray:
+    cap = getattr(ctx.facts.common, params['cap_fact']) or params['default_cap']
+    return np.minimum(cap, np.floor(ctx.base_monthly * params['rate']))
+
+
+def _product_monthly(ctx: RuleContext, params: Dict) -> np.ndarray:
+    return np.broadcast_to(ctx.per_product(params['fact'])[:, None], ctx.base_monthly.shape).copy()
+
+
+def _bundle_percent(ctx: RuleContext, params: Dict) -> np.ndarray:
+    rate = params['rate'] if ctx.facts.common.bundle_discount else 0.0
+    return np.floor(ctx.base_monthly * rate)
+
+
+def _product_once(ctx: RuleContext, params: Dict) -> np.ndarray:
+    return _product_monthly(ctx, params)
+
+
+def _intro_percent(ctx: RuleContext, params: Dict) -> np.ndarray:
+    """첫 N개월 기본요금 × 할인율 (계약기간보다 길면 계약기간까지)"""
+    rate = ctx.per_product('intro_discount_rate')[:, None]
+    intro_months = np.minimum(ctx.per_product('intro_discount_months')[:, None], ctx.months[None, :])
+    return np.floor(ctx.base_monthly * rate) * intro_months
+
+
+def _price_percent_capped(ctx: RuleContext, params: Dict) -> np.ndarray:
+    """제품 가격 × 환급률 (한도 적용), 기간과 무관"""
+    common = ctx.facts.common
+    cap = common.energy_rebate_cap or np.inf
+    rebate = np.minimum(cap, np.floor(ctx.purchase_price * common.energy_rebate_rate))
+    return np.broadcast_to(rebate[:, None], ctx.base_monthly.shape).copy()
+
+
+_FORMULAS: Dict[str, Callable[[RuleContext, Dict], np.ndarray]] = {
+    'percent_capped': _percent_capped,
+    'product_monthly': _product_monthly,
+    'bundle_percent': _bundle_percent,
+    'product_once': _product_once,
+    'intro_percent': _intro_percent,
+    'price_percent_capped': _price_percent_capped,
+}
+
+
+class DiscountEngine:
+    """규칙 × 시나리오를 컴파일한 할인 평가기 (카탈로그 버전마다 1개, 불변)
+
+    amounts[rule]: (P, T) 규칙별 할인액
+    monthly_discount / credit: (P, T, S), purchase_credit: (P, S)
+    """
+
+    def __init__(
+        self,
+        ctx: RuleContext,
+        periods: Sequence[str],
+        rules: Sequence[DiscountRule] = RULES,
+        scenarios: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ):
+        scenarios = scenarios or SCENARIOS
+        self.rules = {rule.name: rule for rule in rules}
+        self.scenarios: List[str] = list(scenarios)
+        self.scenario_rules = {name: tuple(scenarios[name]) for name in self.scenarios}
+        self.product_ids = list(ctx.product_ids)
+        self.periods = list(periods)
+        self._product_index = {pid: i for i, pid in enumerate(self.product_ids)}
+        self._period_index = {period: t for t, period in enumerate(self.periods)}
+        self._memo: Dict[Tuple, Optional[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+        for name, names in self.scenario_rules.items():
+            unknown = [rule for rule in names if rule not in self.rules]
+            if unknown:
+                raise ValueError(f"시나리오 '{name}'에 없는 할인 규칙: {unknown}")
+
+        missing = np.isnan(ctx.base_monthly)
+        self.amounts: Dict[str, np.ndarray] = {}
+        raw: Dict[str, np.ndarray] = {}
+        for rule in rules:
+            raw[rule.name] = _FORMULAS[rule.formula](ctx, rule.params)
+            self.amounts[rule.name] = np.where(missing, np.nan, raw[rule.name])
+
+        P, T = ctx.base_monthly.shape
+        S = len(self.scenarios)
+        self.monthly_discount = np.zeros((P, T, S))
+        self.credit = np.zeros((P, T, S))
+        self.purchase_credit = np.zeros((P, S))
+        for s, name in enumerate(self.scenarios):
+            for rule_name in self.scenario_rules[name]:
+                rule, amount = self.rules[rule_name], self.amounts[rule_name]
+                if 'monthly' in rule.targets:
+                    self.monthly_discount[:, :, s] += amount
+                if 'credit' in rule.targets:
+                    self.credit[:, :, s] += amount
+                if 'purchase_credit' in rule.targets:
+                    # 구매 환급은 구독 제공 기간과 무관 (구독이 없는 제품도 적용)
+                    self.purchase_credit[:, s] += np.nan_to_num(raw[rule_name]).max(axis=1) if T else 0
+        self.monthly_discount[missing] = np.nan
+        self.credit[missing] = np.nan
+
+    def evaluate(self, product_id: Any, period: str, scenario: str = "max") -> Optional[Dict[str, Any]]:
+        """(제품, 기간, 시나리오) 한 칸의 규칙별 할인 내역 (메모이즈, 없는 조합이면 None)"""
+        key = (product_id, period, scenario)
+        if key in self._memo:
+            return self._memo[key]
+        i = self._product_index.get(product_id)
+        t = self._period_index.get(period)
+        if i is None or t is None or scenario not in self.scenario_rules or np.isnan(self.monthly_discount[i, t, 0]):
+            return None
+
+        s = self.scenarios.index(scenario)
+        applied = {}
+        details = []
+        for rule_name in self.scenario_rules[scenario]:
+            rule = self.rules[rule_name]
+            amount = int(self.amounts[rule_name][i, t])
+            applied[rule_name] = amount
+            if amount:
+                details.append(rule.detail.format(label=rule.label, amount=amount))
+        result = {
+            'product_id': product_id,
+            'period': period,
+            'scenario': scenario,
+            'rules': applied,
+            'monthly_discount': int(self.monthly_discount[i, t, s]),
+            'credit': int(self.credit[i, t, s]),
+            'purchase_credit': int(self.purchase_credit[i, s]),
+            'details': details,
+        }
+        with self._lock:
+            self._memo[key] = result
+        return result
+
+    def evaluate_batch(self, scenario: str = "max", product_ids: Optional[Sequence[Any]] = None) -> Dict[str, Any]:
+        """카탈로그 전체(또는 선택 제품) × 제공 기간 일괄 평가"""
+        ids = [pid for pid in (product_ids if product_ids is not None else self.product_ids) if pid in self._product_index]
+        products = []
+        for pid in ids:
+            periods = {}
+            for period in self.periods:
+                result = self.evaluate(pid, period, scenario)
+                if result:
+                    periods[period] = result
+            products.append({'id': pid, 'periods': periods})
+        return {
+            'scenario': scenario,
+            'label': SCENARIO_LABELS.get(scenario, scenario),
+            'rules': [
+                {'name': name, 'label': self.rules[name].label, 'targets': list(self.rules[name].targets)}
+                for name in self.scenario_rules.get(scenario, ())
+            ],
+            'products': products,
+        }
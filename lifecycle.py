@@ -0,0 +1,177 @@
+"""
+워커 생명주기: 준비 전 워밍업 / 준비 상태 / SIGTERM 시 SSE 스트림 드레인
+- 워밍업: 카탈로그와 파생 테이블, 제품별 프롬프트 데이터, 응답 캐시, LLM 연결 풀을 첫 요청 전에 준비
+  (앱 startup에서 실행되므로 uvicorn은 워밍업이 끝난 뒤에야 소켓에서 연결을 받음)
+- 드레인: SIGTERM을 받으면 새 연결은 받지 않고, 열린 SSE 스트림은 DRAIN_TIMEOUT까지 끝까지 보냄
+  시간이 지나면 server_draining 이벤트를 보내고 스트림을 닫음 (클라이언트는 다른 워커로 재시도)
+
+GET /health/ready    준비 완료 200, 워밍업 / 드레인 중 503
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import uvicorn
+
+import catalog
+from config import Config
+from cost_curves import get_cost_curves
+from opening_pool import get_opening_pool
+from penalty import get_penalty_table
+from pricing import get_pricing_table
+from streaming import sse_event
+from usage import estimate_tokens
+
+DRAIN_GRACE_SECONDS = 5.0  # 드레인 시간이 지나도 끝나지 않는 요청을 uvicorn이 취소하기 전 여유
+PROMPT_PERIOD = '6년'  # 논쟁 프롬프트가 인용하는 계약 기간
+
+
+def _warm_catalog(system) -> Dict[str, Any]:
+    """카탈로그 파싱 + 등록된 파생 데이터(가격 / 비용 곡선 / 위약금 / 팩트 / 검색 색인 / 추천기) 계산"""
+    snapshot = catalog.warm(catalog.get_catalog())
+    return {'products': len(snapshot.products), 'version': snapshot.version}
+
+
+def _warm_prompts(system) -> Dict[str, Any]:
+    """제품별 프롬프트에 들어가는 숫자 문장을 한 번씩 만들어 조회 경로 준비 (토크나이저 로드 포함)"""
+    pricing, curves, penalties = get_pricing_table(), get_cost_curves(), get_penalty_table()
+    products = catalog.get_catalog().products
+    for product in products:
+        pid = product.get('id')
+        pricing.quote(pid, PROMPT_PERIOD, scenario="base")
+        pricing.quote(pid, PROMPT_PERIOD, scenario="max")
+        curves.summary(pid, PROMPT_PERIOD)
+        penalties.prompt_line(pid, PROMPT_PERIOD)
+    estimate_tokens("워밍업")
+    return {'products': len(products)}
+
+
+def _warm_caches(system) -> Dict[str, Any]:
+    """미리 만든 LLM 응답 / 첫 논쟁 풀 로드, 전체 카탈로그 조회 응답 캐시 채우기"""
+    loaded = 0
+    if Config.LLM_CACHE_ENABLED and Config.LLM_CACHE_FILE:
+        loaded = system.load_cache_file(Config.LLM_CACHE_FILE)
+        print(f"LLM 캐시 {loaded}건 로드: {Config.LLM_CACHE_FILE}")
+    get_cost_curves().response()
+    get_penalty_table().response()
+    return {'llm_cache': loaded, 'opening_pool': len(get_opening_pool())}
+
+
+async def _warm_connections(system) -> Dict[str, Any]:
+    """LLM API 연결 풀에 TLS 연결을 미리 열어둠 (응답 코드는 상관없음, 실패해도 첫 요청에서 다시 연결)"""
+    client = system._http_client()
+    parts = urlsplit(system.base_url)
+    origin = f"{parts.scheme}://{parts.netloc}/"
+
+    async def connect() -> bool:
+        try:
+            await client.head(origin, timeout=5.0)
+            return True
+        except Exception as e:
+            print(f"LLM 연결 워밍업 실패: {e}")
+            return False
+
+    results = await asyncio.gather(*(connect() for _ in range(Config.WARMUP_CONNECTIONS)))
+    return {'opened': sum(results), 'origin': origin}
+
+
+WARMUP_STEPS: Tuple[Tuple[str, Callable], ...] = (
+    ('catalog', _warm_catalog),
+    ('prompts', _warm_prompts),
+    ('caches', _warm_caches),
+    ('connections', _warm_connections),
+)
+
+
+class Lifecycle:
+    """워커 하나의 상태 (starting → warming → ready → draining → stopped)"""
+
+    def __init__(self):
+        self.state = "starting"
+        self.warmup_ms = 0.0
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.open_streams = 0
+        self.drain_deadline: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def draining(self) -> bool:
+        return self.drain_deadline is not None
+
+    async def warmup(self, system, steps=WARMUP_STEPS) -> Dict[str, Any]:
+        """워밍업 단계 실행 (동기 단계는 스레드에서, 실패한 단계는 기록만 하고 계속)"""
+        self.state = "warming"
+        self.drain_deadline = None
+        self.steps = {}
+        started = time.perf_counter()
+        for name, step in steps:
+            step_started = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(step):
+                    result = await step(system)
+                else:
+                    result = await asyncio.to_thread(step, system)
+                self.steps[name] = {'ok': True, **result}
+            except Exception as e:
+                print(f"워밍업 '{name}' 중 오류 발생: {e}")
+                self.steps[name] = {'ok': False, 'error': str(e)}
+            self.steps[name]['ms'] = round((time.perf_counter() - step_started) * 1000, 3)
+        self.warmup_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.state = "ready"
+        return self.report()
+
+    def mark_ready(self):
+        """워밍업 없이 준비 완료 (WARMUP_ENABLED=false)"""
+        self.state = "ready"
+        self.drain_deadline = None
+
+    def begin_drain(self, timeout: Optional[float] = None):
+        """드레인 시작 (이미 시작했으면 기존 마감 시간 유지)"""
+        if self.draining:
+            return
+        self.state = "draining"
+        self.drain_deadline = time.monotonic() + (Config.DRAIN_TIMEOUT if timeout is None else timeout)
+        print(f"🛑 드레인 시작: 열린 스트림 {self.open_streams}개, 최대 {self.drain_deadline - time.monotonic():.0f}초 대기")
+
+    def stopped(self):
+        self.state = "stopped"
+
+    async def track(self, events: AsyncIterator[str]) -> AsyncIterator[str]:
+        """SSE 스트림 래퍼: 열린 스트림 수 집계, 드레인 마감이 지나면 server_draining 이벤트 후 종료"""
+        self.open_streams += 1
+        try:
+            async for event in events:
+                yield event
+                if self.drain_deadline is not None and time.monotonic() >= self.drain_deadline:
+                    yield sse_event({'type': 'server_draining', 'message': '서버가 재시작 중입니다. 잠시 후 다시 시도해주세요.'})
+                    break
+        finally:
+            self.open_streams -= 1
+            await events.aclose()
+
+    def report(self) -> Dict[str, Any]:
+        remaining = max(0.0, self.drain_deadline - time.monotonic()) if self.drain_deadline is not None else None
+        return {
+            'state': self.state,
+            'warmup_ms': self.warmup_ms,
+            'steps': self.steps,
+            'open_streams': self.open_streams,
+            'drain_remaining_s': round(remaining, 3) if remaining is not None else None,
+        }
+
+
+class DrainingServer(uvicorn.Server):
+    """SIGTERM / SIGINT를 받으면 먼저 드레인을 시작하는 uvicorn 서버 (워커 프로세스에서 실행)"""
+
+    def handle_exit(self, sig, frame):
+        if not self.should_exit:
+            lifecycle.begin_drain()
+        super().handle_exit(sig, frame)
+
+
+lifecycle = Lifecycle()
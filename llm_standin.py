@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+로컬 LLM 대역 서버 (OpenAI / Friendli / Azure OpenAI 호환 chat-completions 일부)
+- 실제 토큰 비용 없이 용량 계획/부하 테스트를 하기 위한 서버
+- 경로: /v1/chat/completions, /serverless/v1/chat/completions 등 .../chat/completions 전부,
+  Azure 배포 경로 /openai/deployments/{deployment}/chat/completions?api-version=...
+- 스트리밍(SSE chat.completion.chunk) / 비스트리밍 응답, max_tokens 초과 시 finish_reason=length
+- 지연 프로필: 첫 토큰까지 시간(TTFT, 로그정규분포) / 초당 토큰 수(TPS, 정규분포)
+- 오류 주입: 500 오류 비율, 429(Retry-After) 비율
+- 응답: 프롬프트에서 구매봇/구독봇/안내봇/선택지/결론 요청을 구분해 봇 말투('~긴해')의 한국어 문장 반환
+
+실행:
+    python llm_standin.py --port 8900 --profile friendli
+    FRIENDLI_BASE_URL=http://localhost:8900/v1 python main.py
+    AZURE_OPENAI_ENDPOINT=http://localhost:8900 AI_PROVIDER=azure python main.py
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """지연/오류 프로필"""
+    ttft_ms: float = 400.0          # 첫 토큰까지 시간 중앙값
+    ttft_sigma: float = 0.3         # TTFT 로그정규분포 sigma (0이면 고정)
+    tokens_per_second: float = 40.0
+    tps_jitter: float = 0.2         # TPS 표준편차 / 평균
+    error_rate: float = 0.0         # 500 오류 비율
+    rate_limit_rate: float = 0.0    # 429 비율
+    retry_after: int = 1            # 429 Retry-After (초)
+
+
+LATENCY_PROFILES: Dict[str, LatencyProfile] = {
+    "instant": LatencyProfile(ttft_ms=0, ttft_sigma=0, tokens_per_second=0, tps_jitter=0),
+    "fast": LatencyProfile(ttft_ms=150, ttft_sigma=0.2, tokens_per_second=120),
+    "friendli": LatencyProfile(ttft_ms=400, ttft_sigma=0.35, tokens_per_second=45),
+    "azure": LatencyProfile(ttft_ms=700, ttft_sigma=0.4, tokens_per_second=60),
+    "degraded": LatencyProfile(ttft_ms=2500, ttft_sigma=0.6, tokens_per_second=15, error_rate=0.02, rate_limit_rate=0.05),
+}
+
+CANNED_RESPONSES: Dict[str, List[str]] = {
+    'purchase': [
+        "한 번 사면 완전히 내 거라 추가 비용 걱정이 없긴해. 6년 넘게 쓰면 구독보다 총 비용이 확실히 적긴해. 나중에 중고로 팔아서 일부 회수할 수도 있긴해.",
+        "일시불이 처음엔 부담돼도 길게 보면 제일 경제적이긴해. 계약 기간이나 위약금에 묶일 일도 없긴해.",
+        "카드 무이자 할부를 쓰면 월 부담도 크지 않긴해. 소유권이 있으니 원하는 대로 쓰고 처분할 수 있긴해.",
+    ],
+    'subscription': [
+        "목돈 없이 매달 나눠 내니까 부담이 훨씬 적긴해. 정기 케어서비스로 필터 교체랑 점검까지 다 해주긴해.",
+        "6년 계약하면 제휴카드 할인까지 받아서 월 부담이 확 줄긴해. 고장 나도 무상 수리라 걱정이 없긴해.",
+        "이사할 때 무상 재설치도 해주니까 편하긴해. 관리 신경 쓸 필요 없이 늘 새것처럼 쓸 수 있긴해.",
+    ],
+    'question': [
+        "이 제품을 몇 년 정도 사용하실 계획이신가요?",
+        "매달 나가는 비용과 한 번에 내는 목돈 중 어느 쪽이 더 편하신가요?",
+        "필터 교체나 청소 같은 관리를 직접 하실 수 있으신가요?",
+        "가까운 시일 안에 이사 계획이 있으신가요?",
+    ],
+    'options': [
+        "옵션1: 오래 쓸 거라 사는 게 나아요\n옵션2: 매달 나눠 내는 게 편해요",
+        "옵션1: 목돈이 있어서 일시불도 괜찮아요\n옵션2: 관리까지 맡기고 싶어요",
+    ],
+    'conclusion': [
+        "정리하면 오래 쓰실 계획이라면 구매가 총 비용 면에서 유리하긴해. 초기 부담을 줄이고 관리까지 맡기고 싶다면 구독이 더 잘 맞긴해. 고객님 상황에서는 사용 기간을 기준으로 결정하시는 걸 추천드리긴해.",
+    ],
+    'general': [
+        "좋은 질문이긴해. 사용 기간과 예산을 같이 생각해 보면 답이 나오긴해.",
+    ],
+}
+
+_TOKEN_PATTERN = re.compile(r'\s*\S{1,3}')
+
+
+def tokenize(text: str) -> List[str]:
+    """한국어 응답을 대략적인 토큰 단위(공백 포함 1~3글자)로 분할"""
+    return _TOKEN_PATTERN.findall(text)
+
+
+def classify(messages: List[Dict[str, Any]]) -> str:
+    """요청 메시지로 응답 종류 결정"""
+    system = ' '.join(str(m.get('content', '')) for m in messages if m.get('role') == 'system')
+    last_user = next((str(m.get('content', '')) for m in reversed(messages) if m.get('role') == 'user'), '')
+    if '옵션1' in last_user:
+        return 'options'
+    if '결론' in last_user or '최종' in last_user or '정리' in last_user:
+        return 'conclusion'
+    if '안내봇' in system or '질문' in last_user:
+        return 'question'
+    if '구독봇' in system or '구독을' in system:
+        return 'subscription'
+    if '구매봇' in system or '구매를' in system:
+        return 'purchase'
+    return 'general'
+
+
+@dataclass
+class StandinStats:
+    requests: int = 0
+    streaming: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    completion_tokens: int = 0
+
+
+def create_app(profile: Optional[LatencyProfile] = None, seed: Optional[int] = None) -> FastAPI:
+    """대역 서버 앱 (프로필은 app.state.profile, 통계는 app.state.stats)"""
+    app = FastAPI(title="LLM 대역 서버")
+    app.state.profile = profile or LATENCY_PROFILES["friendli"]
+    app.state.stats = StandinStats()
+    rng = random.Random(seed)
+
+    def sample_ttft(p: LatencyProfile) -> float:
+        if p.ttft_ms <= 0:
+            return 0.0
+        return p.ttft_ms / 1000 * (rng.lognormvariate(0, p.ttft_sigma) if p.ttft_sigma else 1.0)
+
+    def sample_tps(p: LatencyProfile) -> float:
+        if p.tokens_per_second <= 0:
+            return 0.0
+        return max(1.0, rng.gauss(p.tokens_per_second, p.tokens_per_second * p.tps_jitter))
+
+    async def completions(request: Request, model: Optional[str] = None):
+        p: LatencyProfile = app.state.profile
+        stats: StandinStats = app.state.stats
+        body = await request.json()
+        stats.requests += 1
+
+        roll = rng.random()
+        if roll < p.rate_limit_rate:
+            stats.rate_limited += 1
+            return JSONResponse(
+                {'error': {'message': 'Rate limit exceeded (stand-in)', 'type': 'rate_limit_error', 'code': '429'}},
+                status_code=429, headers={'Retry-After': str(p.retry_after)},
+            )
+        if roll < p.rate_limit_rate + p.error_rate:
+            stats.errors += 1
+            return JSONResponse({'error': {'message': 'Internal error (stand-in)', 'type': 'server_error'}}, status_code=500)
+
+        messages = body.get('messages') or []
+        kind = classify(messages)
+        tokens = tokenize(rng.choice(CANNED_RESPONSES[kind]))
+        max_tokens = body.get('max_tokens') or len(tokens)
+        finish_reason = 'length' if len(tokens) > max_tokens else 'stop'
+        tokens = tokens[:max_tokens]
+        stats.completion_tokens += len(tokens)
+        prompt_tokens = sum(len(tokenize(str(m.get('content', '')))) for m in messages)
+        model_name = model or body.get('model') or 'stand-in'
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        ttft, tps = sample_ttft(p), sample_tps(p)
+
+        if body.get('stream'):
+            stats.streaming += 1
+
+            async def stream():
+                def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+                    return "data: " + json.dumps({
+                        'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model_name,
+                        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}],
+                    }, ensure_ascii=False) + "\n\n"
+
+                if ttft:
+                    await asyncio.sleep(ttft)
+                yield chunk({'role': 'assistant', 'content': ''})
+                for n, token in enumerate(tokens):
+                    if n and tps:
+                        await asyncio.sleep(1 / tps)
+                    yield chunk({'content': token})
+                yield chunk({}, finish_reason)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        delay = ttft + (max(len(tokens) - 1, 0) / tps if tps else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        return {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': model_name,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                'finish_reason': finish_reason,
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(tokens),
+                'total_tokens': prompt_tokens + len(tokens),
+            },
+        }
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def azure_chat_completions(deployment: str, request: Request):
+        """Azure OpenAI 배포 경로 (api-version 쿼리는 무시)"""
+        return await completions(request, model=deployment)
+
+    @app.post("/{prefix:path}/chat/completions")
+    async def chat_completions(prefix: str, request: Request):
+        """OpenAI / Friendli 경로 (/v1, /serverless/v1, /dedicated/v1 ...)"""
+        return await completions(request)
+
+    @app.post("/chat/completions")
+    async def root_chat_completions(request: Request):
+        return await completions(request)
+
+    @app.get("/stats")
+    async def get_stats():
+        return {'profile': asdict(app.state.profile), **asdict(app.state.stats)}
+
+    @app.get("/health")
+    async def health():
+        return {'status': 'healthy'}
+
+    return app
+
+
+CREDENTIAL_VARS = ('AZURE_OPENAI_API_KEY', 'AZURE_OPENAI_ENDPOINT')
+
+
+@contextlib.contextmanager
+def standin_credentials(endpoint: str = "https://example.invalid") -> Iterator[None]:
+    """실제 키가 없을 때 LLM 클라이언트를 만들 수 있도록 더미 Azure 자격 증명 설정 (벗어나면 원래 값으로 복원)"""
+    from config import Config
+
+    dummy = {'AZURE_OPENAI_API_KEY': "standin", 'AZURE_OPENAI_ENDPOINT': endpoint}
+    saved_env = {name: os.environ.get(name) for name in CREDENTIAL_VARS}
+    saved_config = {name: getattr(Config, name) for name in CREDENTIAL_VARS}
+    for name in CREDENTIAL_VARS:
+        os.environ[name] = os.environ.get(name) or dummy[name]
+        setattr(Config, name, getattr(Config, name) or os.environ[name])
+    try:
+        yield
+    finally:
+        for name in CREDENTIAL_VARS:
+            setattr(Config, name, saved_config[name])
+            if saved_env[name] is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = saved_env[name]
+
+
+def main(argv: Optional[List[str]] = None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="로컬 LLM 대역 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--profile', choices=sorted(LATENCY_PROFILES), default='friendli')
+    parser.add_argument('--ttft-ms', type=float, help="TTFT 중앙값 (프로필 값 덮어쓰기)")
+    parser.add_argument('--ttft-sigma', type=float)
+    parser.add_argument('--tps', type=float, help="초당 토큰 수 평균")
+    parser.add_argument('--tps-jitter', type=float)
+    parser.add_argument('--error-rate', type=float)
+    parser.add_argument('--rate-limit-rate', type=float)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    overrides = {
+        'ttft_ms': args.ttft_ms,
+        'ttft_sigma': args.ttft_sigma,
+        'tokens_per_second': args.tps,
+        'tps_jitter': args.tps_jitter,
+        'error_rate': args.error_rate,
+        'rate_limit_rate': args.rate_limit_rate,
+    }
+    profile = replace(LATENCY_PROFILES[args.profile], **{k: v for k, v in overrides.items() if v is not None})
+    print(f"LLM 대역 서버: http://{args.host}:{args.port} ({args.profile}: {profile})")
+    uvicorn.run(create_app(profile, args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+이벤트 루프 지연 감시 / 막는 호출 탐지
+- 루프 안의 하트비트 태스크가 interval마다 깨어나 예정보다 늦은 시간(지연)을 기록
+- 별도 감시 스레드가 하트비트가 임계값보다 늦어지면 그 순간 루프 스레드의 스택을 캡처 (막고 있는 코드)
+- 막힌 위치(이 저장소 코드 중 가장 안쪽 프레임)별 횟수 / 누적·최대 시간을 모아 GET /debug/event-loop로 노출
+- strict 모드에서는 check()가 LoopBlockedError를 던져 테스트를 실패시킴
+
+monitor.start()          # 이벤트 루프 안에서 (앱 startup)
+monitor.report()
+monitor.check()          # 막힌 적이 있으면 LoopBlockedError
+"""
+
+import asyncio
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from metrics import event_loop_blocked, event_loop_lag
+
+MAX_STACK_FRAMES = 20
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()[name] for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+
+
+class LoopBlockedError(AssertionError):
+    """strict 모드에서 이벤트 루프가 임계값보다 오래 막힌 경우"""
+
+
+def _is_app_frame(filename: str) -> bool:
+    return not filename.startswith(_LIBRARY_PATHS) and not filename.startswith('<')
+
+
+def _format_frame(frame: traceback.FrameSummary) -> str:
+    filename = frame.filename
+    if filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    return f"{filename}:{frame.lineno} {frame.name}"
+
+
+def _culprit(stack: List[traceback.FrameSummary]) -> str:
+    """막은 위치: 가장 안쪽의 앱 코드 프레임 (없으면 가장 안쪽 프레임)"""
+    for frame in reversed(stack):
+        if _is_app_frame(frame.filename) and not frame.filename.endswith('loop_monitor.py'):
+            return _format_frame(frame)
+    return _format_frame(stack[-1]) if stack else "unknown"
+
+
+class LoopMonitor:
+    """이벤트 루프 하나의 지연 / 막힘 기록 (start는 루프 안에서, 통계는 start마다 초기화)"""
+
+    def __init__(self, threshold_ms: Optional[float] = None, interval_ms: Optional[float] = None,
+                 max_recent: int = 50):
+        self.threshold = (Config.LOOP_BLOCK_THRESHOLD_MS if threshold_ms is None else threshold_ms) / 1000
+        # 하트비트 간격: 임계값보다 충분히 짧게 (지연 측정 해상도)
+        self.interval = (interval_ms / 1000) if interval_ms is not None else min(0.05, self.threshold / 2)
+        self._recent: "deque[Dict[str, Any]]" = deque(maxlen=max_recent)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._reset()
+
+    def _reset(self):
+        self.beats = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.blocked = 0
+        self.blocked_time = 0.0
+        self.offenders: Dict[str, Dict[str, Any]] = {}
+        self._recent.clear()
+        self._due = time.perf_counter() + self.interval
+        self._captured: Optional[List[traceback.FrameSummary]] = None
+        self._captured_due: Optional[float] = None
+        self._loop_thread: Optional[int] = None
+        self._started: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> asyncio.Task:
+        """감시 시작 (이벤트 루프 안에서 호출)"""
+        if self.running:
+            return self._task
+        self._reset()
+        self._loop_thread = threading.get_ident()
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.ensure_future(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        return self._task
+
+    def stop(self):
+        """감시 중지 (기록은 다음 start까지 유지)"""
+        # 하트비트가 깨어나기 전에 중지되는 경우 진행 중이던 막힘도 기록
+        if self.running and time.perf_counter() - self._due >= self.threshold:
+            self._record(time.perf_counter() - self._due)
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._watchdog is not None and self._watchdog is not threading.current_thread():
+            self._watchdog.join(timeout=1)
+        self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            self._due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self._record(time.perf_counter() - self._due)
+
+    def _record(self, lag: float):
+        lag = max(0.0, lag)
+        self.beats += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if Config.METRICS_ENABLED:
+            event_loop_lag.observe(lag)
+        if lag < self.threshold:
+            return
+
+        # 감시 스레드가 막힌 동안 캡처한 스택 (GIL을 놓지 않는 C 호출처럼 캡처 기회가 없었으면 unknown)
+        stack = self._captured if self._captured_due == self._due else None
+        self._captured = self._captured_due = None
+        culprit = _culprit(stack) if stack else "unknown"
+        frames = [_format_frame(frame) for frame in stack[-MAX_STACK_FRAMES:]] if stack else []
+
+        self.blocked += 1
+        self.blocked_time += lag
+        if Config.METRICS_ENABLED:
+            event_loop_blocked.inc()
+        offender = self.offenders.setdefault(culprit, {'location': culprit, 'count': 0, 'total_ms': 0.0,
+                                                       'max_ms': 0.0, 'stack': frames})
+        offender['count'] += 1
+        offender['total_ms'] += lag * 1000
+        if lag * 1000 >= offender['max_ms']:
+            offender['max_ms'] = lag * 1000
+            offender['stack'] = frames
+        self._recent.append({'at': time.time(), 'blocked_ms': round(lag * 1000, 3), 'location': culprit})
+        if Config.LOOP_MONITOR_STRICT:
+            print(f"⚠️ 이벤트 루프가 {lag * 1000:.0f}ms 막힘: {culprit}")
+
+    def _watch(self):
+        poll = min(self.interval, self.threshold / 4)
+        while not self._stop.wait(poll):
+            due = self._due
+            if self._captured_due == due or time.perf_counter() - due < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._captured = traceback.extract_stack(frame)
+                self._captured_due = due
+            del frame
+
+    def check(self):
+        """막힌 적이 있으면 LoopBlockedError (strict 모드 테스트용)"""
+        if self.blocked:
+            worst = ", ".join(f"{o['location']} ({o['count']}회, 최대 {o['max_ms']:.0f}ms)" for o in self.worst(3))
+            raise LoopBlockedError(f"이벤트 루프가 {self.threshold * 1000:.0f}ms보다 오래 {self.blocked}번 막혔습니다: {worst}")
+
+    def worst(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """누적 막힌 시간이 긴 위치 순"""
+        return sorted(self.offenders.values(), key=lambda o: o['total_ms'], reverse=True)[:limit]
+
+    def report(self, limit: int = 10) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'threshold_ms': self.threshold * 1000,
+            'interval_ms': self.interval * 1000,
+            'uptime_s': round(time.perf_counter() - self._started, 3) if self._started else 0.0,
+            'lag_ms': {
+                'mean': round(self.total_lag / self.beats * 1000, 3) if self.beats else 0.0,
+                'max': round(self.max_lag * 1000, 3),
+                'samples': self.beats,
+            },
+            'blocked': self.blocked,
+            'blocked_ms_total': round(self.blocked_time * 1000, 3),
+            'offenders': [dict(o, total_ms=round(o['total_ms'], 3), max_ms=round(o['max_ms'], 3))
+                          for o in self.worst(limit)],
+            'recent': list(self._recent)[-limit:],
+        }
+
+
+monitor = LoopMonitor()
@@ -0,0 +1,332 @@
+"""
+Prometheus 텍스트 형식 메트릭
+- 카운터 / 게이지 / 히스토그램, 레이블별 자식은 처음 사용할 때 생성
+- 업데이트는 잠금 없이 리스트 원소 증가만 수행 (이벤트 루프 스레드에서 호출, 운영에서 항상 켜 둘 수 있는 비용)
+- MetricsMiddleware: 라우트별 요청 시간, SSE 첫 이벤트 / waiting_user까지 시간, 열린 SSE 스트림 수
+- GET /metrics가 render() 결과를 반환
+"""
+
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import Config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        """레이블 값 순서는 labelnames와 같음"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: 레이블 {self.labelnames}가 필요합니다")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+                for key, child in list(self._children.items())]
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            counts = list(child.counts)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """메트릭 모음 (등록 순서대로 출력)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"이미 등록된 메트릭입니다: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+# HTTP / SSE
+http_requests = registry.counter(
+    "http_requests_total", "HTTP 요청 수", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "요청 시작부터 응답 완료까지 시간 (SSE는 스트림 종료까지)", ("method", "route"))
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "처리 중인 HTTP 요청 수")
+sse_first_event = registry.histogram(
+    "sse_first_event_seconds", "SSE 요청 시작부터 첫 이벤트 전송까지 시간", ("route",))
+sse_waiting_user = registry.histogram(
+    "sse_waiting_user_seconds", "SSE 요청 시작부터 waiting_user 이벤트 전송까지 시간", ("route",))
+sse_active_streams = registry.gauge(
+    "sse_active_streams", "열려 있는 SSE 스트림 수 (진행 중인 상담 세션)", ("route",))
+
+# LLM
+llm_calls = registry.counter(
+    "llm_calls_total", "LLM 호출 수 (outcome: ok / error / fallback)", ("call_site", "provider", "outcome"))
+llm_ttft = registry.histogram(
+    "llm_ttft_seconds", "LLM 첫 토큰까지 시간 (비스트리밍 호출은 응답 수신까지)", ("call_site", "provider"))
+llm_duration = registry.histogram(
+    "llm_duration_seconds", "LLM 호출 전체 시간", ("call_site", "provider"))
+llm_tokens = registry.counter(
+    "llm_tokens_total", "LLM 토큰 수 (API usage 기준, kind: prompt / completion)", ("call_site", "provider", "kind"))
+cache_requests = registry.counter(
+    "cache_requests_total", "캐시 조회 수 (cache: llm_response / opening_pool, result: hit / miss)", ("cache", "result"))
+
+# 이벤트 루프
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "이벤트 루프 하트비트가 예정보다 늦게 깨어난 시간",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+event_loop_blocked = registry.counter(
+    "event_loop_blocked_total", "이벤트 루프가 LOOP_BLOCK_THRESHOLD_MS보다 오래 막힌 횟수")
+
+
+class LLMCallTimer:
+    """LLM 호출 하나의 시간/토큰 기록
+
+    timer = LLMCallTimer('purchase', 'friendli')
+    ... 첫 청크 수신 시 timer.first_token()
+    timer.finish(prompt_tokens=..., completion_tokens=...)
+    """
+
+    __slots__ = ('call_site', 'provider', 'started', 'ttft', 'finished')
+
+    def __init__(self, call_site: str, provider: str):
+        self.call_site = call_site
+        self.provider = provider
+        self.started = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self.finished = False
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+
+    def finish(self, outcome: str = "ok", prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
+        if self.finished or not Config.METRICS_ENABLED:
+            return
+        self.finished = True
+        elapsed = time.perf_counter() - self.started
+        labels = (self.call_site, self.provider)
+        llm_calls.labels(*labels, outcome).inc()
+        if outcome == "ok":
+            llm_ttft.labels(*labels).observe(self.ttft if self.ttft is not None else elapsed)
+            llm_duration.labels(*labels).observe(elapsed)
+        if prompt_tokens:
+            llm_tokens.labels(*labels, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            llm_tokens.labels(*labels, "completion").inc(completion_tokens)
+
+
+def record_cache(cache: str, hit: bool):
+    if Config.METRICS_ENABLED:
+        cache_requests.labels(cache, "hit" if hit else "miss").inc()
+
+
+_WAITING_USER_MARKER = b'"type": "waiting_user"'
+
+
+class MetricsMiddleware:
+    """ASGI 미들웨어: 라우트 템플릿별 요청 시간, SSE 첫 이벤트 / waiting_user 시간, 열린 스트림 수"""
+
+    def __init__(self, app: Callable):
+        self.app = app
+        self._routes: Dict[Any, str] = {}
+
+    def _route(self, scope: Dict[str, Any]) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            app = scope.get('app')
+            for candidate in getattr(app, 'routes', []):
+                if getattr(candidate, 'endpoint', None) is endpoint or getattr(candidate, 'app', None) is endpoint:
+                    route = candidate.path
+                    break
+            else:
+                route = "unmatched"
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope['type'] != 'http' or not Config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {'status': 500, 'sse': False, 'first': False, 'waiting': False, 'route': None}
+        http_in_flight.inc()
+
+        async def send_wrapper(message: Dict[str, Any]):
+            if message['type'] == 'http.response.start':
+                state['status'] = message['status']
+                for name, value in message.get('headers', []):
+                    if name.lower() == b'content-type' and value.startswith(b'text/event-stream'):
+                        state['sse'] = True
+                        state['route'] = self._route(scope)
+                        sse_active_streams.labels(state['route']).inc()
+            elif message['type'] == 'http.response.body' and state['sse']:
+                body = message.get('body', b'')
+                if body and not state['first']:
+                    state['first'] = True
+                    sse_first_event.labels(state['route']).observe(time.perf_counter() - started)
+                if body and not state['waiting'] and _WAITING_USER_MARKER in body:
+                    state['waiting'] = True
+                    sse_waiting_user.labels(state['route']).observe(time.perf_counter() - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = state['route'] or self._route(scope)
+            if state['sse']:
+                sse_active_streams.labels(route).dec()
+            http_in_flight.dec()
+            method = scope.get('method', '')
+            http_requests.labels(method, route, state['status']).inc()
+            http_request_duration.labels(method, route).observe(time.perf_counter() - started)
@@ -0,0 +1,87 @@
+"""
+미리 생성한 첫 논쟁 풀
+- 배치 생성기(batch_debates.py --opening-pool)가 만든 JSONL을 제품별로 보관
+- /product/debate/dynamic 요청 시 풀에 제품 항목이 있으면 LLM 호출 없이 그중 하나를 스트리밍
+- 현재 카탈로그와 내용 해시(catalog_digest)가 같은 항목만 사용 (리로드로 가격/혜택이 바뀌면 옛 논쟁은 재생하지 않음)
+- 한 줄 형식: {"product_id": 0, "catalog_digest": "...", "turns": {"purchase": ..., "subscription": ...,
+  "purchase_rebuttal": ..., "subscription_rebuttal": ..., "question": ...}, ...}
+"""
+
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from catalog import get_catalog
+from config import Config
+
+OPENING_TURN_KEYS = ('purchase', 'subscription', 'purchase_rebuttal', 'subscription_rebuttal', 'question')
+
+
+class OpeningPool:
+    """제품 id → 첫 논쟁 목록"""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._entries: Dict[Any, List[Dict[str, Any]]] = {}
+        self._current: Optional[Tuple[str, Dict[Any, List[Dict[str, Any]]]]] = None  # (카탈로그 해시, 제품별 항목)
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def load(self, path: str) -> int:
+        """JSONL 파일의 항목 추가 (형식이 맞지 않는 줄은 건너뜀), 추가한 개수 반환"""
+        count = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if self.add(entry):
+                    count += 1
+        return count
+
+    def add(self, entry: Dict[str, Any]) -> bool:
+        turns = entry.get('turns') or {}
+        if 'product_id' not in entry or not all(turns.get(key) for key in OPENING_TURN_KEYS):
+            return False
+        self._entries.setdefault(entry['product_id'], []).append(entry)
+        self._current = None
+        return True
+
+    def products(self) -> List[Any]:
+        return list(self._entries)
+
+    def _matching(self, catalog_digest: str) -> Dict[Any, List[Dict[str, Any]]]:
+        """카탈로그 해시가 같은 항목만 (해시가 바뀔 때만 다시 거름)"""
+        if self._current is None or self._current[0] != catalog_digest:
+            matching = {}
+            for product_id, entries in self._entries.items():
+                current = [entry for entry in entries if entry.get('catalog_digest') == catalog_digest]
+                if current:
+                    matching[product_id] = current
+            self._current = (catalog_digest, matching)
+        return self._current[1]
+
+    def pick(self, product_id: Any, catalog_digest: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """현재 카탈로그(기본: get_catalog())로 만든 제품의 첫 논쟁 하나 (없으면 None)"""
+        if catalog_digest is None:
+            catalog_digest = get_catalog().digest
+        entries = self._matching(catalog_digest).get(product_id)
+        return random.choice(entries) if entries else None
+
+
+_pool: Optional[OpeningPool] = None
+
+
+def get_opening_pool() -> OpeningPool:
+    """OPENING_POOL_FILE 기반 공유 풀 (처음 사용할 때 로드)"""
+    global _pool
+    if _pool is None or _pool.path != Config.OPENING_POOL_FILE:
+        _pool = OpeningPool(Config.OPENING_POOL_FILE)
+    return _pool
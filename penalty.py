@@ -0,0 +1,230 @@
+"""
+중도 해지 위약금 모델
+- penalty_info의 위약금 문장('잔여 의무사용기간 내 총 요금의 30%')을 로드 시 한 번만 구조화
+- 전 제품 × 전 계약기간 × 해지 시점(경과 개월) 위약금을 한 번에 계산, 카탈로그 버전별 캐시
+- 조회 테이블(/pricing/penalties)과 프롬프트용 정확한 금액 문장 제공
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import catalog
+from catalog import CatalogSnapshot, DEFAULT_PRODUCTS_FILE
+from pricing import PricingTable, pricing_for
+
+# penalty_info.early_termination_fee.rates 키 → 적용 구간 (경과 개월 [시작, 끝))
+TERMINATION_RATE_WINDOWS = {
+    'before_1_year': (0, 12),
+    '1_to_2_years': (12, 24),
+    'after_2_years': (24, None),
+}
+# 프롬프트에 넣을 대표 해지 시점 (경과 개월)
+PROMPT_EXIT_MONTHS = (6, 18, 36)
+
+_RATE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+
+
+@dataclass(frozen=True)
+class PenaltyTier:
+    """경과 개월 [start, end) 구간의 위약금률"""
+    key: str
+    start: int
+    end: Optional[int]
+    rate: float
+    text: str = ""
+
+
+class PenaltyModel:
+    """penalty_info를 구조화한 위약금 규칙 (불변)"""
+
+    def __init__(self, tiers: Sequence[PenaltyTier], pre_discount_base: bool = True, retrieval_fee: str = ""):
+        self.tiers: Tuple[PenaltyTier, ...] = tuple(sorted(tiers, key=lambda tier: tier.start))
+        self.pre_discount_base = pre_discount_base
+        self.retrieval_fee = retrieval_fee
+
+    @classmethod
+    def from_penalty_info(cls, penalty_info: Optional[Dict]) -> "PenaltyModel":
+        """penalty_info 문장 파싱 (숫자가 없는 구간은 건너뜀)"""
+        info = penalty_info or {}
+        early = info.get('early_termination_fee') or {}
+        prose = early.get('rates') or {}
+        tiers = []
+        for key, (start, end) in TERMINATION_RATE_WINDOWS.items():
+            text = str(prose.get(key, ''))
+            match = _RATE_PATTERN.search(text)
+            if match:
+                tiers.append(PenaltyTier(key, start, end, float(match.group(1)) / 100, text))
+        description = str(early.get('description', ''))
+        return cls(
+            tiers,
+            # "월요금은 할인되기 전의 기본요금을 기준" → 할인 전 기본요금 기준 (문구가 없어도 기본값)
+            pre_discount_base='할인되기 전' in description or '할인 전' in description or not description,
+            retrieval_fee=str((info.get('retrieval_fee') or {}).get('description', '')),
+        )
+
+    def rates(self, months: int) -> np.ndarray:
+        """경과 개월(0..months)별 위약금률 (잔여 기간 기본요금 대비)"""
+        rates = np.zeros(months + 1)
+        for tier in self.tiers:
+            rates[tier.start:tier.end] = tier.rate
+        return rates
+
+    def rate_at(self, exit_month: int) -> float:
+        for tier in self.tiers:
+            if exit_month >= tier.start and (tier.end is None or exit_month < tier.end):
+                return tier.rate
+        return 0.0
+
+    @property
+    def max_rate(self) -> float:
+        return max((tier.rate for tier in self.tiers), default=0.0)
+
+    @property
+    def basis_label(self) -> str:
+        """위약금 계산 기준 문구 (프롬프트용)"""
+        if self.pre_discount_base:
+            return "할인 전 기본요금 × 잔여 개월 기준"
+        return "제휴카드·선결제 할인 후 요금 × 잔여 개월 기준"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'tiers': [
+                {'key': tier.key, 'from_month': tier.start, 'to_month': tier.end, 'rate': tier.rate}
+                for tier in self.tiers
+            ],
+            'base': 'pre_discount' if self.pre_discount_base else 'discounted',
+            'retrieval_fee': self.retrieval_fee,
+        }
+
+
+def termination_rates(penalty_info: Dict, months: int) -> np.ndarray:
+    """경과 개월(0..months)별 중도 해지 위약금률 (잔여 기간 기본요금 대비)"""
+    return PenaltyModel.from_penalty_info(penalty_info).rates(months)
+
+
+class PenaltyTable:
+    """카탈로그 스냅샷 하나에 대한 위약금 테이블 (불변)
+
+    축: product(P) × period(T) × 해지 시점 경과 개월(M, 0..최장 계약기간)
+    위약금 = 기본 월요금 × 잔여 개월 × 위약금률, 제공하지 않는 기간은 NaN입니다.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, table: Optional[PricingTable] = None):
+        table = table or pricing_for(snapshot)
+        self.table = table
+        self.version = snapshot.version
+        self.model = PenaltyModel.from_penalty_info(snapshot.penalty_info)
+        self.max_months = int(table.months.max()) if len(table.months) else 0
+        self.month_axis = np.arange(self.max_months + 1)
+        self.rates = self.model.rates(self.max_months)
+        self._responses: Dict[Optional[int], Dict[str, Any]] = {}  # 해지 시점 → 전체 카탈로그 응답
+        self._lock = threading.Lock()
+
+        # (P, T, M) 한 번에 계산 (기본요금 기준, 할인 후 기준이면 카드+선결제 할인 반영)
+        base = table.base_monthly
+        if not self.model.pre_discount_base:
+            base = np.maximum(0, base - table.monthly_discount[:, :, table.scenarios.index('card_prepay')])
+        self.base = base
+        self.remaining = np.maximum(table.months[:, None] - self.month_axis[None, :], 0)  # (T, M)
+        self.penalty = np.floor(base[:, :, None] * self.remaining[None, :, :] * self.rates[None, None, :])
+
+    def _indices(self, product_id: Any, period: str) -> Optional[Tuple[int, int]]:
+        i = self.table.product_index(product_id)
+        t = self.table.period_index(period)
+        if i is None or t is None or np.isnan(self.base[i, t]):
+            return None
+        return i, t
+
+    def lookup(self, product_id: Any, period: str, exit_month: int) -> Optional[Dict[str, Any]]:
+        """제품/기간/해지 시점 한 칸의 위약금 (없는 조합이면 None)"""
+        indices = self._indices(product_id, period)
+        if indices is None or exit_month < 0:
+            return None
+        i, t = indices
+        months = int(self.table.months[t])
+        m = min(int(exit_month), months)
+        return {
+            'product_id': product_id,
+            'period': period,
+            'exit_month': m,
+            'contract_months': months,
+            'remaining_months': int(self.remaining[t, m]),
+            'base_monthly': int(self.base[i, t]),
+            'rate': float(self.rates[m]),
+            'penalty': int(self.penalty[i, t, m]),
+        }
+
+    def schedule(self, product_id: Any, period: str) -> List[int]:
+        """계약기간 동안 경과 개월(0..계약기간)별 위약금"""
+        indices = self._indices(product_id, period)
+        if indices is None:
+            return []
+        i, t = indices
+        return self.penalty[i, t, :int(self.table.months[t]) + 1].astype(int).tolist()
+
+    def prompt_line(self, product_id: Any, period: str, exit_months: Sequence[int] = PROMPT_EXIT_MONTHS) -> str:
+        """프롬프트용 정확한 위약금 문장 (없는 조합이면 빈 문자열)"""
+        quotes = [self.lookup(product_id, period, m) for m in exit_months]
+        quotes = [q for q in quotes if q and q['penalty'] > 0 and q['exit_month'] < q['contract_months']]
+        if not quotes:
+            return ""
+        parts = [f"{q['exit_month']}개월 차 해지 시 {q['penalty']:,}원({int(q['rate'] * 100)}%)" for q in quotes]
+        return f"{period} 구독 중도 해지 위약금: " + ", ".join(parts) + f" ({self.model.basis_label})"
+
+    def response(self, product_ids: Optional[Sequence[Any]] = None, exit_month: Optional[int] = None) -> Dict[str, Any]:
+        """조회 테이블 JSON (exit_month를 주면 해당 시점 값만)
+
+        exit_month는 최장 계약기간으로 제한하고, 전체 카탈로그 응답만 해지 시점별로 캐시합니다
+        (최대 최장 계약기간 + 2개, 제품을 고른 요청은 매번 계산).
+        """
+        table = self.table
+        if exit_month is not None:
+            exit_month = min(int(exit_month), self.max_months)
+        if product_ids is None:
+            cached = self._responses.get(exit_month)
+            if cached is not None:
+                return cached
+        ids = list(dict.fromkeys(pid for pid in (product_ids if product_ids is not None else table.product_ids)
+                                 if table.has_product(pid)))
+
+        products = []
+        for pid in ids:
+            periods = {}
+            for period in table.product_periods(pid):
+                if exit_month is None:
+                    periods[period] = self.schedule(pid, period)
+                else:
+                    periods[period] = self.lookup(pid, period, exit_month)
+            products.append({'id': pid, 'name': table.product_names[table.product_index(pid)], 'penalties': periods})
+
+        result = {
+            'catalog_version': self.version,
+            'model': self.model.to_dict(),
+            'exit_month': exit_month,
+            'products': products,
+        }
+        if product_ids is None:
+            with self._lock:
+                self._responses[exit_month] = result
+        return result
+
+
+def build_penalty_table(snapshot: CatalogSnapshot) -> PenaltyTable:
+    return PenaltyTable(snapshot)
+
+
+catalog.register_derived('penalty', build_penalty_table)
+
+
+def penalty_for(snapshot: CatalogSnapshot) -> PenaltyTable:
+    """특정 스냅샷의 위약금 테이블"""
+    return snapshot.derived('penalty', build_penalty_table)
+
+
+def get_penalty_table(path: str = DEFAULT_PRODUCTS_FILE) -> PenaltyTable:
+    """현재 카탈로그 버전의 위약금 테이블"""
+    return penalty_for(catalog.get_catalog(path))
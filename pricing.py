@@ -0,0 +1,290 @@
+"""
+NumPy 가격 매트릭스 엔진
+- 카탈로그 로드 시 (제품 × 계약기간 × 케어옵션 × 할인 시나리오) 텐서를 한 번에 계산
+- 월 요금 / 총액 / 혜택 차감 후 실부담(net)
+- 할인액은 할인 규칙 엔진(discount_rules)이 같은 축으로 컴파일한 결과를 사용
+- 프롬프트 빌더와 /pricing/matrix 엔드포인트가 같은 테이블을 사용
+- 혜택 문구의 '총 비용'은 같은 기간 / 같은 할인 규칙의 실부담(stated_net_totals)과 비교 (facts.report(table))
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import catalog
+from benefit_facts import facts_for
+from catalog import CatalogSnapshot, DEFAULT_PRODUCTS_FILE
+from catalog_sqlite import period_months
+from discount_rules import (  # noqa: F401  (기존 import 경로 유지)
+    CARD_DISCOUNT_CAP,
+    CARD_DISCOUNT_RATE,
+    SCENARIO_LABELS,
+    SCENARIOS,
+    DiscountEngine,
+    RuleContext,
+)
+
+NO_CARE = "없음"
+DEFAULT_CARE_OPTION = "방문없음/자가관리"
+
+def _care_prices(product: Dict) -> Dict[str, Any]:
+    """구매/구독 케어서비스 가격표 ({'subscription': {기간: {옵션: 가격}}, 'purchase': {옵션: 가격}})
+
+    '무료' 같은 문자열이나 구매/구독 구분이 없는 형식이면 {}를 반환합니다. 이런 제품은 케어 옵션 열이 모두 NaN이고
+    '없음' 열(케어 0원)만 계산됩니다.
+    """
+    care_price = product.get('care_service_price')
+    return care_price if isinstance(care_price, dict) and 'subscription' in care_price else {}
+
+
+def _int_or_none(value: float) -> Optional[int]:
+    return None if np.isnan(value) else int(round(value))
+
+
+class PricingTable:
+    """카탈로그 스냅샷 하나에 대한 가격 텐서 (불변)
+
+    축: product(P) × period(T) × care(C) × scenario(S)
+    제공하지 않는 조합은 NaN입니다.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        facts = facts_for(snapshot)
+        self.facts = facts
+        self.card_discount_cap = facts.common.card_discount_cap or CARD_DISCOUNT_CAP
+        products = snapshot.products
+        self.product_ids: List[Any] = [product.get('id') for product in products]
+        self.product_names: List[str] = [product.get('name', '') for product in products]
+        self._product_index = {product_id: i for i, product_id in enumerate(self.product_ids)}
+
+        # 계약기간 축 (개월 수 순서)
+        periods = {period for product in products for period in (product.get('subscription_price') or {})}
+        self.periods: List[str] = sorted(
+            (period for period in periods if period_months(period)), key=period_months
+        )
+        self.months = np.array([period_months(period) for period in self.periods], dtype=np.float64)
+        self._period_index = {period: i for i, period in enumerate(self.periods)}
+
+        # 케어옵션 축 (0번은 케어서비스 없음)
+        care_options: List[str] = [NO_CARE]
+        for product in products:
+            for options in _care_prices(product).get('subscription', {}).values():
+                for option in options:
+                    if option not in care_options:
+                        care_options.append(option)
+        self.care_options = care_options
+        self._care_index = {option: i for i, option in enumerate(care_options)}
+
+        self.scenarios: List[str] = list(SCENARIOS)
+        self._scenario_index = {scenario: i for i, scenario in enumerate(self.scenarios)}
+
+        P, T, C = len(products), len(self.periods), len(self.care_options)
+        self.purchase_price = np.array([product.get('purchase_price', 0) or 0 for product in products], dtype=np.float64)
+        self.base_monthly = np.full((P, T), np.nan)
+        self.care_monthly = np.full((P, T, C), np.nan)
+        self.purchase_care_monthly = np.full((P, C), np.nan)
+
+        for i, product in enumerate(products):
+            for period, price in (product.get('subscription_price') or {}).items():
+                t = self._period_index.get(period)
+                if t is not None:
+                    self.base_monthly[i, t] = price
+            self.care_monthly[i, :, 0] = 0
+            self.purchase_care_monthly[i, 0] = 0
+            care = _care_prices(product)
+            for period, options in care.get('subscription', {}).items():
+                t = self._period_index.get(period)
+                for option, price in options.items():
+                    if t is not None and isinstance(price, (int, float)):
+                        self.care_monthly[i, t, self._care_index[option]] = price
+            for option, price in care.get('purchase', {}).items():
+                if option in self._care_index and isinstance(price, (int, float)):
+                    self.purchase_care_monthly[i, self._care_index[option]] = price
+
+        self._quotes: Dict[tuple, Optional[Dict[str, Any]]] = {}
+        self._compute()
+
+    def _compute(self):
+        """할인 규칙 컴파일 후 월 요금/총액 텐서 일괄 계산"""
+        base = self.base_monthly  # (P, T)
+        self.discounts = DiscountEngine(
+            RuleContext(self.facts, self.product_ids, base, self.months, self.purchase_price), self.periods
+        )
+        self.card_discount = self.discounts.amounts['card']
+        # (P, T, S) 월 할인액 / 일회성 차감(포인트, 초기 할인, 환급), (P, S) 구매 환급
+        self.monthly_discount = self.discounts.monthly_discount
+        self.credit = self.discounts.credit
+        self.purchase_credit = self.discounts.purchase_credit
+
+        # (P, T, S) 할인 후 구독료 (음수 방지)
+        discounted = np.maximum(0, base[..., None] - self.monthly_discount)
+        # (P, T, C, S) 케어서비스 포함 월 요금 / 총액 / 일회성 차감 후 실부담
+        self.monthly = discounted[:, :, None, :] + self.care_monthly[..., None]
+        self.total = self.monthly * self.months[None, :, None, None]
+        self.net = self.total - self.credit[:, :, None, :]
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+
+    def has_product(self, product_id: Any) -> bool:
+        return product_id in self._product_index
+
+    def product_index(self, product_id: Any) -> Optional[int]:
+        """제품 id → 제품 축 인덱스 (없으면 None)"""
+        return self._product_index.get(product_id)
+
+    def period_index(self, period: str) -> Optional[int]:
+        """계약기간 → 기간 축 인덱스 (없으면 None)"""
+        return self._period_index.get(period)
+
+    def product_periods(self, product_id: Any) -> List[str]:
+        """제품이 제공하는 계약기간 (짧은 순)"""
+        i = self._product_index.get(product_id)
+        if i is None:
+            return []
+        return [period for t, period in enumerate(self.periods) if not np.isnan(self.base_monthly[i, t])]
+
+    def best_period(self, product_id: Any) -> Optional[str]:
+        """대표 계약기간 (6년이 있으면 6년, 없으면 가장 긴 기간)"""
+        periods = self.product_periods(product_id)
+        if not periods:
+            return None
+        return '6년' if '6년' in periods else periods[-1]
+
+    def quote(
+        self,
+        product_id: Any,
+        period: str,
+        care: Optional[str] = None,
+        scenario: str = "max",
+    ) -> Optional[Dict[str, Any]]:
+        """제품/기간/케어옵션/시나리오 한 칸의 가격 정보 (없는 조합이면 None, 조합별 메모이즈)"""
+        key = (product_id, period, care or NO_CARE, scenario)
+        if key in self._quotes:
+            return self._quotes[key]
+        self._quotes[key] = quote = self._quote(product_id, period, care, scenario)
+        return quote
+
+    def _quote(self, product_id: Any, period: str, care: Optional[str], scenario: str) -> Optional[Dict[str, Any]]:
+        i = self._product_index.get(product_id)
+        t = self._period_index.get(period)
+        c = self._care_index.get(care or NO_CARE)
+        s = self._scenario_index.get(scenario)
+        if i is None or t is None or c is None or s is None or np.isnan(self.monthly[i, t, c, s]):
+            return None
+
+        discount = self.discounts.evaluate(product_id, period, scenario)
+        rules = discount['rules']
+        return {
+            'product_id': product_id,
+            'period': period,
+            'care_option': self.care_options[c],
+            'scenario': scenario,
+            'total_months': int(self.months[t]),
+            'base_monthly': int(self.base_monthly[i, t]),
+            'card_discount': rules.get('card', 0),
+            'prepay_discount': rules.get('prepay', 0),
+            'bundle_discount': rules.get('bundle', 0),
+            'membership_points': rules.get('points', 0),
+            'intro_discount': rules.get('intro', 0),
+            'energy_rebate': rules.get('energy_rebate', 0),
+            'one_time_credit': discount['credit'],
+            'care_monthly': int(self.care_monthly[i, t, c]),
+            'final_monthly': int(self.monthly[i, t, c, s]),
+            'total': int(self.total[i, t, c, s]),
+            'net_total': int(self.net[i, t, c, s]),
+            'discount_details': ', '.join(discount['details']) if discount['details'] else '할인 없음',
+        }
+
+    def stated_net_totals(
+        self, product_id: Any, period: Optional[str], rules: Sequence[str]
+    ) -> Tuple[Optional[str], List[int]]:
+        """지정한 할인 규칙만 적용한 실부담 (케어옵션별), 규칙이 없으면 'max' 시나리오
+
+        혜택 문구의 '총 비용'과 비교용 → (사용한 기간, 실부담 목록)
+        """
+        i = self._product_index.get(product_id)
+        period = period or self.best_period(product_id)
+        t = self._period_index.get(period)
+        if i is None or t is None or np.isnan(self.base_monthly[i, t]):
+            return period, []
+        engine = self.discounts
+        names = [name for name in (rules or engine.scenario_rules['max']) if name in engine.rules]
+        monthly_discount = sum(engine.amounts[name][i, t] for name in names if 'monthly' in engine.rules[name].targets)
+        credit = sum(engine.amounts[name][i, t] for name in names if 'credit' in engine.rules[name].targets)
+        discounted = max(0.0, self.base_monthly[i, t] - monthly_discount)
+        care = self.care_monthly[i, t]
+        totals = (discounted + care[~np.isnan(care)]) * self.months[t] - credit
+        return period, [int(round(total)) for total in totals]
+
+    def subscription_totals(self, product_id: Any, scenario: str = "base", care: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """제품의 기간별 월 요금/총액 {'6년': {'monthly': .., 'total': .., 'months': ..}}"""
+        totals = {}
+        for period in self.product_periods(product_id):
+            quote = self.quote(product_id, period, care=care, scenario=scenario)
+            if quote:
+                totals[period] = {'monthly': quote['final_monthly'], 'total': quote['total'], 'months': quote['total_months']}
+        return totals
+
+    def matrix(
+        self,
+        product_ids: Optional[Sequence[Any]] = None,
+        periods: Optional[Sequence[str]] = None,
+        care_options: Optional[Sequence[str]] = None,
+        scenarios: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """요청한 부분 텐서를 JSON 직렬화 가능한 형태로 반환 (없는 조합은 null)"""
+        ids = [pid for pid in (product_ids if product_ids is not None else self.product_ids) if pid in self._product_index]
+        periods = [p for p in (periods or self.periods) if p in self._period_index]
+        care_options = [c for c in (care_options or self.care_options) if c in self._care_index]
+        scenarios = [s for s in (scenarios or self.scenarios) if s in self._scenario_index]
+
+        pi = [self._product_index[pid] for pid in ids]
+        ti = [self._period_index[p] for p in periods]
+        ci = [self._care_index[c] for c in care_options]
+        si = [self._scenario_index[s] for s in scenarios]
+        grid = np.ix_(pi, ti, ci, si)
+        monthly, total, net = self.monthly[grid], self.total[grid], self.net[grid]
+
+        products = []
+        for a, product_id in enumerate(ids):
+            i = pi[a]
+            products.append({
+                'id': product_id,
+                'name': self.product_names[i],
+                'purchase_price': int(self.purchase_price[i]),
+                'monthly': [[[_int_or_none(v) for v in row] for row in plane] for plane in monthly[a]],
+                'total': [[[_int_or_none(v) for v in row] for row in plane] for plane in total[a]],
+                'net_total': [[[_int_or_none(v) for v in row] for row in plane] for plane in net[a]],
+            })
+
+        return {
+            'catalog_version': self.version,
+            'axes': {
+                'period': periods,
+                'months': [int(self.months[t]) for t in ti],
+                'care_option': care_options,
+                'scenario': scenarios,
+            },
+            'scenario_labels': {s: SCENARIO_LABELS[s] for s in scenarios},
+            'products': products,
+        }
+
+
+def build_pricing_table(snapshot: CatalogSnapshot) -> PricingTable:
+    return PricingTable(snapshot)
+
+
+catalog.register_derived('pricing', build_pricing_table)
+
+
+def get_pricing_table(path: str = DEFAULT_PRODUCTS_FILE) -> PricingTable:
+    """현재 카탈로그 버전의 가격 테이블 (버전별로 한 번만 계산)"""
+    return catalog.get_catalog(path).derived('pricing', build_pricing_table)
+
+
+def pricing_for(snapshot: CatalogSnapshot) -> PricingTable:
+    """특정 스냅샷의 가격 테이블"""
+    return snapshot.derived('pricing', build_pricing_table)
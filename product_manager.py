@@ -3,43 +3,77 @@ import os
 from typing import List, Dict, Optional, Tuple
 import random
 
+import catalog
+from catalog import DEFAULT_PRODUCTS_FILE, CatalogSnapshot
+from catalog_sqlite import get_store, is_sqlite_path
+from benefit_facts import CatalogFacts, facts_for
+from penalty import PenaltyTable, penalty_for
+from pricing import DEFAULT_CARE_OPTION, PricingTable, pricing_for
+
 class ProductManager:
-    def __init__(self, products_file: str = "new_products.json"):
+    def __init__(self, products_file: str = DEFAULT_PRODUCTS_FILE):
         self.products_file = products_file
-        self.products = self.load_products()
-        self.penalty_info = {}
+        # 프로세스 공유 스냅샷 사용 (파일은 최초 1회만 파싱)
+        catalog.get_catalog(products_file)
+    
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """현재 카탈로그 스냅샷"""
+        return catalog.get_catalog(self.products_file)
+    
+    @property
+    def products(self) -> List[Dict]:
+        return self.snapshot.products
+    
+    @property
+    def common_subscription_benefits(self) -> List[str]:
+        return self.snapshot.common_subscription_benefits
+    
+    @property
+    def common_purchase_benefits(self) -> List[str]:
+        return self.snapshot.common_purchase_benefits
+    
+    @property
+    def subscription_service_info(self) -> Dict:
+        return self.snapshot.subscription_service_info
+    
+    @property
+    def penalty_info(self) -> Dict:
+        return self.snapshot.penalty_info
+    
+    @property
+    def uses_sqlite(self) -> bool:
+        """SQLite 저장소 사용 여부 (products_file 확장자 기준)"""
+        return is_sqlite_path(self.products_file)
     
     def load_products(self) -> List[Dict]:
-        """제품 데이터를 JSON 파일에서 로드"""
+        """제품 데이터를 저장소에서 다시 로드 (공유 스냅샷 교체)"""
         try:
             if os.path.exists(self.products_file):
-                with open(self.products_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.common_subscription_benefits = data.get('common_subscription_benefits', [])
-                    self.common_purchase_benefits = data.get('common_purchase_benefits', [])
-                    self.subscription_service_info = data.get('subscription_service_info', {})
-                    self.penalty_info = data.get('penalty_info', {})
-                    return data.get('products', [])
-            else:
-                self.common_subscription_benefits = []
-                self.common_purchase_benefits = []
-                self.subscription_service_info = {}
-                self.penalty_info = {}
-                return []
+                data = catalog.parse_catalog(self.products_file)
+                return catalog.publish(self.products_file, data, catalog.file_stamp(self.products_file)).products
+            return catalog.publish(self.products_file, {}).products
         except Exception as e:
             print(f"제품 데이터 로드 중 오류 발생: {e}")
-            self.common_subscription_benefits = []
-            self.common_purchase_benefits = []
-            self.subscription_service_info = {}
-            self.penalty_info = {}
-            return []
+            return self.products
+    
+    def _publish_products(self, products: List[Dict]):
+        """공유 스냅샷은 수정하지 않고 새 제품 목록으로 교체"""
+        data = dict(self.snapshot.to_dict())
+        data['products'] = products
+        catalog.publish(self.products_file, data, catalog.file_stamp(self.products_file))
     
-    def save_products(self) -> bool:
-        """제품 데이터를 JSON 파일에 저장"""
+    def save_products(self, products: Optional[List[Dict]] = None) -> bool:
+        """제품 데이터 전체 저장 (공통 혜택/위약금 정보 포함, 공유 스냅샷도 교체)"""
         try:
-            data = {"products": self.products}
-            with open(self.products_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            data = dict(self.snapshot.to_dict())
+            data['products'] = self.products if products is None else products
+            if self.uses_sqlite:
+                get_store(self.products_file).import_document(data)
+            else:
+                with open(self.products_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            self._publish_products(data['products'])
             return True
         except Exception as e:
             print(f"제품 데이터 저장 중 오류 발생: {e}")
@@ -47,17 +81,33 @@ class ProductManager:
     
     def get_product_by_id(self, product_id: int) -> Optional[Dict]:
         """ID로 제품 정보 조회"""
-        for product in self.products:
-            if product.get('id') == product_id:
-                return product
-        return None
+        return self.snapshot.get(product_id)
     
-    def get_product_by_name(self, name: str) -> Optional[Dict]:
-        """이름으로 제품 정보 조회"""
-        for product in self.products:
-            if product.get('name') == name:
-                return product
-        return None
+    def get_product_by_name(self, name: str, fuzzy: bool = False) -> Optional[Dict]:
+        """이름으로 제품 정보 조회 (fuzzy면 공백/대소문자 무시)"""
+        return self.snapshot.get_by_name(name, fuzzy=fuzzy)
+    
+    def search_benefits(self, query: str, limit: int = 20) -> List[Dict]:
+        """혜택 텍스트 검색 (SQLite는 FTS5, JSON은 부분 문자열 매칭)"""
+        if self.uses_sqlite:
+            return get_store(self.products_file).search_benefits(query, limit)
+        terms = query.split()
+        if not terms:
+            return []
+        hits = []
+        snapshot = self.snapshot
+        sources = [(None, 'purchase', snapshot.common_purchase_benefits),
+                   (None, 'subscription', snapshot.common_subscription_benefits)]
+        for product in snapshot.products:
+            sources.append((product.get('id'), 'purchase', product.get('purchase_benefits', [])))
+            sources.append((product.get('id'), 'subscription', product.get('subscription_benefits', [])))
+        for product_id, kind, texts in sources:
+            for text in texts:
+                if all(term in text for term in terms):
+                    hits.append({'product_id': product_id, 'kind': kind, 'text': text})
+                    if len(hits) >= limit:
+                        return hits
+        return hits
     
     def get_all_products(self) -> List[Dict]:
         """모든 제품 정보 조회"""
@@ -71,8 +121,12 @@ class ProductManager:
                 max_id = max([p.get('id', 0) for p in self.products], default=0)
                 product['id'] = max_id + 1
             
-            self.products.append(product)
-            return self.save_products()
+            if self.uses_sqlite:
+                # 해당 제품 행만 추가
+                get_store(self.products_file).upsert_product(product)
+                self._publish_products(self.products + [product])
+                return True
+            return self.save_products(self.products + [product])
         except Exception as e:
             print(f"제품 추가 중 오류 발생: {e}")
             return False
@@ -80,11 +134,16 @@ class ProductManager:
     def update_product(self, product_id: int, updated_product: Dict) -> bool:
         """제품 정보 업데이트"""
         try:
-            for i, product in enumerate(self.products):
+            products = list(self.products)
+            for i, product in enumerate(products):
                 if product.get('id') == product_id:
                     updated_product['id'] = product_id
-                    self.products[i] = updated_product
-                    return self.save_products()
+                    products[i] = updated_product
+                    if self.uses_sqlite:
+                        get_store(self.products_file).upsert_product(updated_product)
+                        self._publish_products(products)
+                        return True
+                    return self.save_products(products)
             return False
         except Exception as e:
             print(f"제품 업데이트 중 오류 발생: {e}")
@@ -93,8 +152,13 @@ class ProductManager:
     def delete_product(self, product_id: int) -> bool:
         """제품 삭제"""
         try:
-            self.products = [p for p in self.products if p.get('id') != product_id]
-            return self.save_products()
+            products = [p for p in self.products if p.get('id') != product_id]
+            if self.uses_sqlite:
+                if not get_store(self.products_file).delete_product(product_id):
+                    return False
+                self._publish_products(products)
+                return True
+            return self.save_products(products)
         except Exception as e:
             print(f"제품 삭제 중 오류 발생: {e}")
             return False
@@ -103,32 +167,32 @@ class ProductManager:
         """구매 유도 논거 조회 (공통 + 제품별)"""
         product = self.get_product_by_id(product_id)
         if product:
-            common_benefits = getattr(self, 'common_purchase_benefits', [])
+            common_benefits = self.common_purchase_benefits
             product_benefits = product.get('purchase_benefits', [])
             return common_benefits + product_benefits
-        return getattr(self, 'common_purchase_benefits', [])
+        return self.common_purchase_benefits
     
     def get_subscription_arguments(self, product_id: int) -> List[str]:
         """구독 유도 논거 조회 (공통 + 제품별)"""
         product = self.get_product_by_id(product_id)
         if product:
-            common_benefits = getattr(self, 'common_subscription_benefits', [])
+            common_benefits = self.common_subscription_benefits
             product_benefits = product.get('subscription_benefits', [])
             return common_benefits + product_benefits
-        return getattr(self, 'common_subscription_benefits', [])
+        return self.common_subscription_benefits
     
     
     def get_common_subscription_benefits(self) -> List[str]:
         """공통 구독 혜택 조회"""
-        return getattr(self, 'common_subscription_benefits', [])
+        return self.common_subscription_benefits
     
     def get_common_purchase_benefits(self) -> List[str]:
         """공통 구매 혜택 조회"""
-        return getattr(self, 'common_purchase_benefits', [])
+        return self.common_purchase_benefits
     
     def get_subscription_service_info(self) -> Dict:
         """구독 서비스 정보 조회"""
-        return getattr(self, 'subscription_service_info', {})
+        return self.subscription_service_info
     
     def get_care_service_info(self, product_id: int) -> Optional[Dict]:
         """제품별 케어 서비스 정보 조회"""
@@ -144,6 +208,21 @@ class ProductManager:
             return product.get('contract_periods', [])
         return []
     
+    @property
+    def pricing(self) -> PricingTable:
+        """현재 카탈로그 버전의 가격 테이블"""
+        return pricing_for(self.snapshot)
+    
+    @property
+    def benefit_facts(self) -> CatalogFacts:
+        """현재 카탈로그 버전의 혜택 팩트 (혜택 문구에서 추출한 숫자)"""
+        return facts_for(self.snapshot)
+    
+    @property
+    def penalties(self) -> PenaltyTable:
+        """현재 카탈로그 버전의 위약금 테이블"""
+        return penalty_for(self.snapshot)
+    
     def get_penalty_info(self) -> Dict:
         """위약금 정보 조회"""
         return self.penalty_info
@@ -155,23 +234,17 @@ class ProductManager:
             return 0, "제품 정보를 찾을 수 없습니다"
         
         if is_subscription:
-            # 구독 비용 계산
-            subscription_prices = product.get('subscription_price', {})
-            if period in subscription_prices:
-                monthly_price = subscription_prices[period]
-                months = int(period.replace('년', '')) * 12
-                total = monthly_price * months
-                
-                # 케어서비스 비용 추가 (있는 경우)
-                care_price = product.get('care_service_price', {})
-                if isinstance(care_price, dict) and 'subscription' in care_price:
-                    if period in care_price['subscription']:
-                        # 기본 케어서비스 비용 (방문없음/자가관리 기준)
-                        care_monthly = care_price['subscription'][period].get('방문없음/자가관리', 0)
-                        total += care_monthly * months
-                        return total, f"월 {monthly_price:,}원 x {months}개월 + 케어서비스 월 {care_monthly:,}원 = 총 {total:,}원"
-                
-                return total, f"월 {monthly_price:,}원 x {months}개월 = 총 {total:,}원"
+            # 구독 비용 (가격 테이블, 케어서비스는 방문없음/자가관리 기준)
+            pricing = self.pricing
+            quote = pricing.quote(product_id, period, care=DEFAULT_CARE_OPTION, scenario="base")
+            if quote:
+                return quote['total'], (
+                    f"월 {quote['base_monthly']:,}원 x {quote['total_months']}개월 + "
+                    f"케어서비스 월 {quote['care_monthly']:,}원 = 총 {quote['total']:,}원"
+                )
+            quote = pricing.quote(product_id, period, scenario="base")
+            if quote:
+                return quote['total'], f"월 {quote['base_monthly']:,}원 x {quote['total_months']}개월 = 총 {quote['total']:,}원"
             return 0, "해당 기간의 구독 가격 정보가 없습니다"
         else:
             # 구매 비용
@@ -228,6 +301,12 @@ class ProductManager:
         
         return benefits
     
+    def get_penalty_amount(self, product: Dict, exit_month: int, period: Optional[str] = None) -> int:
+        """해지 시점(경과 개월)의 위약금 (위약금 테이블, 기간 생략 시 대표 기간)"""
+        period = period or self.pricing.best_period(product.get('id'))
+        quote = self.penalties.lookup(product.get('id'), period, exit_month) if period else None
+        return quote['penalty'] if quote else 0
+    
     def get_competitive_argument(self, product_id: int, stance: str, turn: int) -> str:
         """턴에 따른 경쟁적 논거 생성"""
         product = self.get_product_by_id(product_id)
@@ -241,7 +320,7 @@ class ProductManager:
                 # 턴 2: 중고 판매 강조
                 lambda p: f"구매하면 나중에 중고로 팔 수 있어! 최소 {int(p.get('purchase_price', 0) * 0.5):,}원은 회수 가능하지만 구독은 그냥 돈만 버리는 거야",
                 # 턴 3: 위약금 공격
-                lambda p: f"구독은 중간에 해지하면 위약금 폭탄! 잔여기간 요금의 최대 30%를 물어야 해",
+                lambda p: f"구독은 중간에 해지하면 위약금 폭탄! {self.pricing.best_period(p['id'])} 구독 6개월 만에 해지하면 위약금만 {self.get_penalty_amount(p, 6):,}원이야",
                 # 턴 4: 소유권 강조
                 lambda p: f"내 것이 되는 게 최고야! 구독은 계속 남의 것, 구매는 영원히 내 것",
                 # 턴 5: 월 고정비 부담
@@ -255,7 +334,10 @@ class ProductManager:
                 # 턴 3: 최신 제품 교체
                 lambda p: f"6년 후 신제품으로 자연스럽게 교체! 구매한 제품은 6년 후면 구식이 돼",
                 # 턴 4: 할인 혜택 강조
-                lambda p: f"제휴카드로 월 최대 22,000원 할인! 멤버십 포인트도 쌓여서 실제론 훨씬 저렴해",
+                lambda p: f"제휴카드로 월 최대 {self.pricing.card_discount_cap:,}원 할인! " + (
+                    f"멤버십 포인트도 {self.benefit_facts.product(p['id']).membership_points:,}P나 쌓여서 실제론 훨씬 저렴해"
+                    if self.benefit_facts.product(p['id']).membership_points else "선결제 할인까지 받으면 실제론 훨씬 저렴해"
+                ),
                 # 턴 5: 고장 리스크
                 lambda p: f"비싼 가전 구매 후 고장나면? 수리비 수십만원! 구독은 무상 AS로 걱정 끝"
             ]
@@ -270,20 +352,15 @@ class ProductManager:
         return ""
     
     def calculate_subscription_total(self, product: Dict) -> int:
-        """6년 구독 총 비용 계산"""
-        subscription_prices = product.get('subscription_price', {})
-        if '6년' in subscription_prices:
-            return subscription_prices['6년'] * 72  # 6년 = 72개월
-        elif subscription_prices:
-            # 가장 긴 기간 선택
-            longest = max(subscription_prices.keys(), key=lambda x: int(x.replace('년', '')))
-            months = int(longest.replace('년', '')) * 12
-            return subscription_prices[longest] * months
-        return 0
+        """대표 기간(6년, 없으면 가장 긴 기간) 구독 총 비용"""
+        pricing = self.pricing
+        period = pricing.best_period(product.get('id'))
+        quote = pricing.quote(product.get('id'), period, scenario="base") if period else None
+        return quote['total'] if quote else 0
     
     def get_avg_subscription_price(self, product: Dict) -> int:
         """평균 구독료 계산"""
-        subscription_prices = product.get('subscription_price', {})
-        if subscription_prices:
-            return sum(subscription_prices.values()) // len(subscription_prices)
+        totals = self.pricing.subscription_totals(product.get('id'))
+        if totals:
+            return sum(item['monthly'] for item in totals.values()) // len(totals)
         return 0
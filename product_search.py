@@ -0,0 +1,322 @@
+"""
+예산 조건 제품 검색
+- 사용자 문장에서 예산/기간 조건 추출 ("월 5만원 이하", "일시불 200만원 안쪽", "월 10만원대", "1년에 50만원", "6년 계약", "36개월 쓸")
+- 구매가 / 기간별 월 구독료 / 기간별 총 비용 정렬 인덱스 (카탈로그 버전별 1회 구축)
+- 범위 조회는 bisect로 처리 (/products/search, 다음 봇 턴 프롬프트 주입)
+"""
+
+import bisect
+import re
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import catalog
+from catalog import CatalogSnapshot, DEFAULT_PRODUCTS_FILE
+from cost_curves import CostCurves, cost_curves_for
+from pricing import SCENARIO_LABELS
+
+# 금액: "5만원", "3만 5천원", "50,000원", "1.5만원", "250만"
+_AMOUNT_PATTERN = re.compile(
+    r'(?P<man>\d+(?:\.\d+)?)\s*만\s*(?:(?P<cheon>\d+)\s*천)?\s*원?'
+    r'|(?P<won>\d{1,3}(?:,\d{3})+|\d+)\s*원'
+)
+# 계약기간: 기간 뒤에 계약/사용 표현이 와야 함 ("6년 계약", "36개월 정도 쓸"), "2년 후 이사"·"1년에 50만원"은 제외
+_PERIOD_PATTERN = re.compile(
+    r'(\d+)\s*(년|개월)\s*(?:(?:이상|정도|쯤|동안|넘게|간|만|짜리|은|는|이|도|까지|으로|로)\s*){0,3}'
+    r'(?:계약|약정|구독|렌탈|쓸|쓰려|쓰고|써|사용|이용)'
+)
+_PURCHASE_WORDS = ('일시불', '구매', '한 번에', '한번에', '목돈', '사는')
+_TOTAL_WORDS = ('총', '전체', '통틀어', '합쳐서')
+_MIN_WORDS = ('이상', '넘는', '초과', '부터')
+# "100만원 이상은 못 써요" / "초과는 안 돼요" / "넘는 건 부담돼요": 하한 표현을 부정하면 상한
+_NEGATED_MIN_PATTERN = re.compile(
+    r'(?:이상|넘는|초과|부터)\S*\s*(?:건|거는|것은)?\s*(?:못|안\s|안돼|안되|않|부담|싫|힘들|어렵)'
+)
+# 금액 앞의 월 단위 표현 ("6개월"의 월은 제외)
+_MONTHLY_PATTERN = re.compile(r'(?<!개)월|매달|달에|한\s*달')
+# 월/매달 표현 없이 이보다 큰 금액은 월 구독료로 보지 않음 ("100만원 이상은 못 써요"는 목돈)
+MONTHLY_AMOUNT_CEILING = 300000
+# 금액 바로 앞의 연간 표현: "1년에", "2년에", "연", "연간", "매년", "일 년에"
+_YEARLY_PATTERN = re.compile(r'(?:(\d+)\s*년\s*에|연간?|매년|일\s*년에|한\s*해에?)\s*$')
+
+
+@dataclass
+class BudgetQuery:
+    """예산 검색 조건 (None이면 조건 없음)"""
+    monthly_min: Optional[int] = None
+    monthly_max: Optional[int] = None
+    purchase_min: Optional[int] = None
+    purchase_max: Optional[int] = None
+    total_min: Optional[int] = None
+    total_max: Optional[int] = None
+    period: Optional[str] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return all(value is None for value in asdict(self).values())
+
+    @property
+    def has_amount(self) -> bool:
+        """금액 조건이 하나라도 있는지 (기간만 있는 문장은 검색하지 않음)"""
+        return any(value is not None for name, value in asdict(self).items() if name != 'period')
+
+    def describe(self) -> str:
+        """프롬프트/응답용 조건 문장"""
+        parts = []
+        for label, low, high in (
+            ('월', self.monthly_min, self.monthly_max),
+            ('일시불', self.purchase_min, self.purchase_max),
+            ('총', self.total_min, self.total_max),
+        ):
+            if low is not None and high is not None:
+                parts.append(f"{label} {low:,}~{high:,}원")
+            elif high is not None:
+                parts.append(f"{label} {high:,}원 이하")
+            elif low is not None:
+                parts.append(f"{label} {low:,}원 이상")
+        if self.period:
+            parts.append(f"{self.period} 계약")
+        return ', '.join(parts)
+
+
+def _amount(match: re.Match) -> int:
+    if match.group('man') is not None:
+        return int(float(match.group('man')) * 10000 + int(match.group('cheon') or 0) * 1000)
+    return int(match.group('won').replace(',', ''))
+
+
+def _period_label(count: int, unit: str) -> str:
+    """'36개월' → '3년' (1년 단위면 년으로 통일)"""
+    if unit == '개월' and count % 12 == 0:
+        return f"{count // 12}년"
+    return f"{count}{unit}"
+
+
+def _decade_step(amount: int) -> int:
+    """'N만원대'의 폭: 끝자리 0의 자리수 (10만원대 → 10만, 3만원대 → 1만, 15만원대 → 1만)"""
+    step = 1
+    while amount % (step * 10) == 0:
+        step *= 10
+    return step
+
+
+def parse_budget(text: str) -> BudgetQuery:
+    """한국어 문장에서 예산/기간 조건 추출
+
+    금액 앞 문맥(월/일시불/총/N년에)으로 종류를, 뒤 문맥(이하/이상/정도/대)으로 상한/하한을 정합니다.
+    종류 단서가 없으면 월 구독료로 보고, "N년에 얼마"는 N×12개월로 나눈 월 금액으로 바꿉니다.
+    단서 없이 MONTHLY_AMOUNT_CEILING보다 큰 금액은 월 구독료 범위를 벗어나므로 무시합니다.
+    계약기간은 계약/사용 표현이 뒤따르는 첫 번째 기간만 읽습니다.
+    """
+    query = BudgetQuery()
+    text = text or ''
+    for match in _AMOUNT_PATTERN.finditer(text):
+        amount = _amount(match)
+        if amount <= 0:
+            continue
+        before = text[max(0, match.start() - 12):match.start()]
+        after = text[match.end():match.end() + 12]
+        if any(word in before for word in _TOTAL_WORDS):
+            kind = 'total'
+        elif any(word in before or word in after[:8] for word in _PURCHASE_WORDS):
+            kind = 'purchase'
+        else:
+            kind = 'monthly'  # '월', '매달' 등이 없어도 구독 상담이므로 월 구독료로 해석
+
+        if after.startswith('대'):
+            # "10만원대" = 10만 ~ 19만 9,999원
+            low, high = amount, amount + _decade_step(amount) - 1
+        elif any(word in after[:8] for word in _MIN_WORDS) and not _NEGATED_MIN_PATTERN.search(after):
+            low, high = amount, None
+        else:
+            # 이상/초과가 아니면 상한 (이하, 이내, 정도, 쯤 등 예산 표현, "이상은 못 써요")
+            low, high = None, amount
+
+        yearly = _YEARLY_PATTERN.search(before)
+        if (kind == 'monthly' and not yearly and amount > MONTHLY_AMOUNT_CEILING
+                and not _MONTHLY_PATTERN.search(before)):
+            continue
+        if kind == 'monthly' and yearly:
+            months = 12 * int(yearly.group(1) or 1)
+            low = low // months if low is not None else None
+            high = high // months if high is not None else None
+        if low is not None:
+            setattr(query, f"{kind}_min", low)
+        if high is not None:
+            setattr(query, f"{kind}_max", high)
+
+    # 첫 번째 기간 표현만 사용
+    for match in _PERIOD_PATTERN.finditer(text):
+        count, unit = int(match.group(1)), match.group(2)
+        if count > 0:
+            query.period = _period_label(count, unit)
+            break
+    return query
+
+
+class SearchIndex:
+    """카탈로그 스냅샷 하나에 대한 정렬 가격 인덱스 (불변)
+
+    구독 가격은 비용 곡선과 같은 기준(필수 케어서비스 포함)입니다.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, curves: Optional[CostCurves] = None):
+        curves = curves or cost_curves_for(snapshot)
+        table = curves.table
+        self.version = snapshot.version
+        self.curves = curves
+        self.table = table
+        self.product_ids: List[Any] = list(table.product_ids)
+        self.scenarios: List[str] = list(table.scenarios)
+        self.periods: List[str] = list(table.periods)
+
+        # 구매가 인덱스
+        self.purchase = self._sorted(curves.purchase_price, range(len(self.product_ids)))
+
+        # (기간, 시나리오)별 월 구독료 / 총 비용 인덱스, 기간 무관(None)은 제품별 최저가
+        monthly = curves.subscription_monthly                                # (P, T, S)
+        total = monthly * table.months[None, :, None] - curves.credit        # (P, T, S)
+        self.monthly: Dict[Tuple[Optional[str], str], Tuple[List[float], List[Tuple[int, int]]]] = {}
+        self.total: Dict[Tuple[Optional[str], str], Tuple[List[float], List[Tuple[int, int]]]] = {}
+        for s, scenario in enumerate(self.scenarios):
+            for t, period in enumerate(self.periods):
+                cells = [(i, t) for i in range(len(self.product_ids)) if not np.isnan(monthly[i, t, s])]
+                self.monthly[(period, scenario)] = self._sorted_cells(monthly[:, :, s], cells)
+                self.total[(period, scenario)] = self._sorted_cells(total[:, :, s], cells)
+            cheapest = []
+            for i in range(len(self.product_ids)):
+                row = monthly[i, :, s]
+                if not np.all(np.isnan(row)):
+                    cheapest.append((i, int(np.nanargmin(row))))
+            self.monthly[(None, scenario)] = self._sorted_cells(monthly[:, :, s], cheapest)
+            cheapest_total = []
+            for i in range(len(self.product_ids)):
+                row = total[i, :, s]
+                if not np.all(np.isnan(row)):
+                    cheapest_total.append((i, int(np.nanargmin(row))))
+            self.total[(None, scenario)] = self._sorted_cells(total[:, :, s], cheapest_total)
+
+    @staticmethod
+    def _sorted(values: np.ndarray, indices) -> Tuple[List[float], List[int]]:
+        pairs = sorted((float(values[i]), i) for i in indices)
+        return [value for value, _ in pairs], [i for _, i in pairs]
+
+    @staticmethod
+    def _sorted_cells(values: np.ndarray, cells: List[Tuple[int, int]]) -> Tuple[List[float], List[Tuple[int, int]]]:
+        pairs = sorted((float(values[i, t]), (i, t)) for i, t in cells)
+        return [value for value, _ in pairs], [cell for _, cell in pairs]
+
+    @staticmethod
+    def _range(index: Tuple[List[float], List[Any]], low: Optional[int], high: Optional[int]) -> List[Any]:
+        """정렬 배열에서 [low, high] 구간 (bisect)"""
+        keys, items = index
+        start = bisect.bisect_left(keys, low) if low is not None else 0
+        end = bisect.bisect_right(keys, high) if high is not None else len(keys)
+        return items[start:end]
+
+    def search(self, query: BudgetQuery, scenario: str = "base", limit: int = 10) -> List[Dict[str, Any]]:
+        """조건을 모두 만족하는 제품 (월 구독료 낮은 순, 카탈로그에 없는 계약기간은 무시)"""
+        if scenario not in self.scenarios:
+            raise ValueError(f"Unknown scenario: {scenario}")
+        period = query.period if query.period in self.periods else None
+
+        # 후보 (제품, 기간) 셀: 기간이 정해지면 그 기간, 아니면 제품별 최저가 기간
+        candidates: Optional[Dict[int, int]] = None
+
+        def narrow(cells):
+            nonlocal candidates
+            found = {i: t for i, t in cells}
+            candidates = found if candidates is None else {i: t for i, t in candidates.items() if i in found}
+
+        if query.monthly_min is not None or query.monthly_max is not None:
+            narrow(self._range(self.monthly[(period, scenario)], query.monthly_min, query.monthly_max))
+        if query.total_min is not None or query.total_max is not None:
+            narrow(self._range(self.total[(period, scenario)], query.total_min, query.total_max))
+        if query.purchase_min is not None or query.purchase_max is not None:
+            allowed = set(self._range(self.purchase, query.purchase_min, query.purchase_max))
+            if candidates is None:
+                # 구매 조건만 있으면 구독이 없는 제품도 검색됨 (기간 지정 시 제외)
+                base = dict(self.monthly[(period, scenario)][1])
+                candidates = {i: base.get(i, -1) for i in allowed if i in base or period is None}
+            else:
+                candidates = {i: t for i, t in candidates.items() if i in allowed}
+        if candidates is None:
+            candidates = dict(self.monthly[(period, scenario)][1])
+
+        s = self.scenarios.index(scenario)
+        results = []
+        for i, t in candidates.items():
+            item = {
+                'id': self.product_ids[i],
+                'name': self.table.product_names[i],
+                'purchase_price': int(self.curves.purchase_price[i]),
+                'period': None,
+                'monthly': None,
+                'total': None,
+            }
+            if t >= 0:
+                monthly = self.curves.subscription_monthly[i, t, s]
+                item.update({
+                    'period': self.periods[t],
+                    'monthly': int(monthly),
+                    'total': int(monthly * self.table.months[t] - self.curves.credit[i, t, s]),
+                })
+            results.append(item)
+        results.sort(key=lambda item: (item['monthly'] is None, item['monthly'] or 0, item['purchase_price']))
+        return results[:limit]
+
+    def supported(self, query: BudgetQuery) -> BudgetQuery:
+        """카탈로그에 없는 계약기간을 뺀 조건 (검색 결과 문장이 쓰지 않은 조건을 말하지 않도록)"""
+        if query.period and query.period not in self.periods:
+            return replace(query, period=None)
+        return query
+
+    def describe_results(self, query: BudgetQuery, results: List[Dict[str, Any]], scenario: str = "base",
+                         current_product_id: Any = None) -> str:
+        """다음 봇 턴 프롬프트용 검색 결과 문장"""
+        condition = query.describe()
+        label = SCENARIO_LABELS.get(scenario, scenario)
+        if not results:
+            return f"[예산 검색] {condition} ({label}) 조건을 만족하는 제품 없음"
+        items = []
+        for item in results[:5]:
+            if item['monthly'] is not None:
+                items.append(f"{item['name']} {item['period']} 월 {item['monthly']:,}원(총 {item['total']:,}원)")
+            else:
+                items.append(f"{item['name']} 일시불 {item['purchase_price']:,}원")
+        line = f"[예산 검색] {condition} ({label}): " + ", ".join(items)
+        if current_product_id is not None:
+            fits = any(item['id'] == current_product_id for item in results)
+            line += f" / 현재 제품은 조건 {'충족' if fits else '불충족'}"
+        return line
+
+
+def build_search_index(snapshot: CatalogSnapshot) -> SearchIndex:
+    return SearchIndex(snapshot)
+
+
+catalog.register_derived('search_index', build_search_index)
+
+
+def search_index_for(snapshot: CatalogSnapshot) -> SearchIndex:
+    """특정 스냅샷의 검색 인덱스"""
+    return snapshot.derived('search_index', build_search_index)
+
+
+def get_search_index(path: str = DEFAULT_PRODUCTS_FILE) -> SearchIndex:
+    """현재 카탈로그 버전의 검색 인덱스"""
+    return search_index_for(catalog.get_catalog(path))
+
+
+def budget_context(user_input: str, current_product_id: Any = None, snapshot: Optional[CatalogSnapshot] = None,
+                   scenario: str = "base") -> Tuple[BudgetQuery, List[Dict[str, Any]], str]:
+    """사용자 입력에 예산 조건이 있으면 검색 결과와 프롬프트 문장 반환 (없으면 빈 문장)"""
+    query = parse_budget(user_input)
+    if not query.has_amount:
+        return query, [], ""
+    index = search_index_for(snapshot) if snapshot is not None else get_search_index()
+    query = index.supported(query)
+    results = index.search(query, scenario)
+    return query, results, index.describe_results(query, results, scenario, current_product_id)
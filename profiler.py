@@ -0,0 +1,221 @@
+"""
+실행 중인 워커의 샘플링 프로파일러 (표준 라이브러리만 사용)
+- 요청이 들어온 동안에만 샘플러 스레드를 띄워 interval마다 sys._current_frames()로 모든 스레드 스택을 수집
+- 같은 스레드에서 asyncio 태스크의 await 체인(코루틴 → 코루틴 → 대기 중인 Future)도 수집
+- 결과는 collapsed 형식 ("프레임;프레임;... 횟수") → flamegraph.pl, speedscope, inferno에 그대로 입력
+- 프로파일 중이 아니면 스레드도 훅도 없음 (유휴 비용 0)
+
+GET /debug/profile?seconds=10&kind=threads   (X-Admin-Token 헤더 필요)
+"""
+
+import asyncio
+import gc
+import inspect
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+PROFILE_KINDS = ("threads", "tasks")
+
+# 대기 중인 스레드의 가장 안쪽 프레임 (include_idle=False면 제외)
+_IDLE_LEAVES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('thread.py', '_worker'),
+    ('queue.py', 'get'),
+    ('socket.py', 'accept'),
+}
+
+
+def _frame_label(code: Any, lineno: Optional[int]) -> str:
+    filename = code.co_filename
+    if filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    else:
+        filename = os.path.basename(filename)
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({filename}:{lineno})"
+
+
+def _is_idle(frame: Any) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+def _thread_stack(frame: Any) -> List[str]:
+    """바깥 → 안쪽 순서 프레임 목록"""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_target(awaitable: Any) -> Any:
+    """async for가 기다리는 async_generator_asend는 생성기를 속성으로 노출하지 않아 참조에서 찾음"""
+    if type(awaitable).__name__ in ('async_generator_asend', 'async_generator_athrow'):
+        return next((ref for ref in gc.get_referents(awaitable) if inspect.isasyncgen(ref)), awaitable)
+    return awaitable
+
+
+def _await_chain(coro: Any) -> List[str]:
+    """태스크 코루틴의 await 체인 (코루틴 / 생성기 / async 생성기 → 대기 중인 Future)"""
+    stack = []
+    while coro is not None:
+        coro = _await_target(coro)
+        for prefix in ('cr', 'ag', 'gi'):
+            code = getattr(coro, f'{prefix}_code', None)
+            if code is not None:
+                break
+        else:
+            kind = type(coro).__name__
+            stack.append('Future' if kind == 'FutureIter' else kind)
+            break
+        frame = getattr(coro, f'{prefix}_frame', None)
+        stack.append(_frame_label(code, frame.f_lineno if frame is not None else None))
+        coro = getattr(coro, 'gi_yieldfrom' if prefix == 'gi' else f'{prefix}_await', None)
+    return stack
+
+
+_NUMBERED_TASK = re.compile(r'^Task-\d+$')
+_LINENO = re.compile(r':(\d+|None)\)$')
+
+
+class SamplingProfiler:
+    """기간 동안 스레드 / asyncio 태스크 스택 표본 수집"""
+
+    def __init__(self, interval: float = 0.005, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 include_idle: bool = False, task_every: int = 4):
+        self.interval = interval
+        self.loop = loop
+        self.include_idle = include_idle
+        self.task_every = task_every  # 태스크 목록 순회는 비용이 커서 N번에 한 번
+        self.threads: Counter = Counter()
+        self.tasks: Counter = Counter()
+        self.samples = 0
+        self.task_samples = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        started = time.perf_counter()
+        next_at = started
+        while not self._stop.is_set():
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == me or (not self.include_idle and _is_idle(frame)):
+                    continue
+                self.threads[(f"thread:{names.get(ident, ident)}", *_thread_stack(frame))] += 1
+            del frames
+            if self.loop is not None and self.samples % self.task_every == 0:
+                self._sample_tasks()
+            self.samples += 1
+            next_at += self.interval
+            self._stop.wait(max(0.0, next_at - time.perf_counter()))
+        self.elapsed = time.perf_counter() - started
+
+    def _sample_tasks(self):
+        try:
+            tasks = list(asyncio.all_tasks(self.loop))
+        except RuntimeError:  # 다른 스레드에서 태스크 집합이 바뀌는 중
+            self.errors += 1
+            return
+        self.task_samples += 1
+        for task in tasks:
+            try:
+                chain = _await_chain(task.get_coro())
+            except Exception:
+                self.errors += 1
+                continue
+            # 기본 이름(Task-123)은 묶어서 같은 await 체인끼리 합쳐지도록
+            name = task.get_name()
+            self.tasks[("task" if _NUMBERED_TASK.match(name) else f"task:{name}", *chain)] += 1
+
+    def collapsed(self, kind: str = "threads") -> str:
+        """collapsed 형식 (횟수 내림차순)"""
+        counts = self.tasks if kind == "tasks" else self.threads
+        return "".join(f"{';'.join(frame.replace(';', ':') for frame in stack)} {count}\n"
+                       for stack, count in counts.most_common())
+
+    def top(self, kind: str = "threads", limit: int = 20) -> List[Dict[str, Any]]:
+        """함수별(줄 번호 무시) 가장 안쪽 프레임 횟수(self) / 스택에 포함된 횟수(total), total 내림차순"""
+        counts = self.tasks if kind == "tasks" else self.threads
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in counts.items():
+            functions = [_LINENO.sub(')', frame) for frame in stack[1:]]
+            if functions:
+                own[functions[-1]] += count
+            for function in set(functions):
+                total[function] += count
+        return [{'frame': function, 'self': own[function], 'total': count}
+                for function, count in total.most_common(limit)]
+
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        return {
+            'duration_s': round(self.elapsed, 3),
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'task_samples': self.task_samples,
+            'errors': self.errors,
+            'threads': self.top("threads", limit),
+            'tasks': self.top("tasks", limit),
+        }
+
+
+_active: Optional[SamplingProfiler] = None
+
+
+def busy() -> bool:
+    """다른 프로파일이 수집 중인지 (워커당 하나만)"""
+    return _active is not None
+
+
+async def profile(seconds: float, interval: float = 0.005, include_idle: bool = False) -> SamplingProfiler:
+    """현재 이벤트 루프를 포함해 seconds 동안 수집 (수집 중에도 루프는 막지 않음)"""
+    global _active
+    if _active is not None:
+        raise RuntimeError("이미 프로파일 수집 중입니다")
+    profiler = _active = SamplingProfiler(interval, asyncio.get_running_loop(), include_idle)
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(profiler.stop)
+        _active = None
+    return profiler
+
+
+def parse_collapsed(text: str) -> List[Tuple[List[str], int]]:
+    """collapsed 텍스트 → (스택, 횟수) 목록"""
+    result = []
+    for line in text.splitlines():
+        if line.strip():
+            stack, count = line.rsplit(' ', 1)
+            result.append((stack.split(';'), int(count)))
+    return result
@@ -0,0 +1,320 @@
+"""
+로컬 추천 스코어러 (LLM 호출 없음)
+- 사용자 답변에서 선호 프로필 추출: 예산(월/일시불), 사용 기간, 케어서비스 필요 여부, 이사 계획
+- (제품, 플랜) 특성 벡터: 사용 기간 기준 총 비용(중도 해지 위약금 포함), 월 부담, 초기 비용, 케어 포함, 무상 재설치
+- NumPy 벡터 연산으로 점수를 매겨 순위 결정 → 결론 프롬프트 축약 또는 빠른 모드에서 LLM 생략
+"""
+
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import catalog
+from catalog import CatalogSnapshot, DEFAULT_PRODUCTS_FILE
+from cost_curves import CostCurves, cost_curves_for
+from product_search import parse_budget
+
+DEFAULT_YEARS = 6  # 사용 기간을 말하지 않았을 때 기준 (최장 구독 기간)
+
+# 점수 가중치
+COST_WEIGHT = 1.0
+BUDGET_PENALTY = 0.5      # 예산 초과 비율만큼 감점 (최대 이 값)
+LUMP_SUM_PENALTY = 0.1    # 월 예산만 말했을 때 일시불 목돈 감점
+CARE_BONUS = 0.15
+REINSTALL_BONUS = 0.1
+
+# 사용 기간: 기간 뒤에 사용 동사가 와야 함 ("5년 정도 쓸", "36개월만 사용"), "2년 뒤에 이사"는 제외
+_YEARS_PATTERN = re.compile(
+    r'(\d+)\s*(년|개월)\s*(?:(?:이상|정도|쯤|동안|넘게|간|만|은|는|이|도|까지)\s*){0,3}(?:쓸|쓰려|쓰고|써|사용|이용)'
+)
+_LONG_WORDS = ('평생', '오래', '계속', '고장날 때까지', '장기')
+_SHORT_WORDS = ('잠깐', '단기', '몇 년만', '임시', '짧게')
+_CARE_YES = ('관리', '케어', '청소', '필터', '점검', '귀찮')
+_CARE_NO = ('자가관리', '직접 관리', '관리 필요 없', '케어 필요 없', '관리는 괜찮', '혼자 관리')
+_MOVE_YES = ('이사', '이전 설치', '옮길', '전근', '이주')
+_MOVE_NO = ('이사 계획 없', '이사 안', '이사할 일 없', '이사 생각 없', '오래 살')
+
+
+@dataclass
+class PreferenceProfile:
+    """사용자 선호 프로필 (None이면 언급 없음)"""
+    monthly_budget: Optional[int] = None
+    upfront_budget: Optional[int] = None
+    years: Optional[float] = None
+    wants_care: Optional[bool] = None
+    moving: Optional[bool] = None
+    sources: Dict[str, str] = field(default_factory=dict)  # 필드 → 근거 문장
+
+    @property
+    def horizon_months(self) -> int:
+        return int(round((self.years or DEFAULT_YEARS) * 12))
+
+    def describe(self) -> str:
+        parts = []
+        if self.monthly_budget:
+            parts.append(f"월 예산 {self.monthly_budget:,}원")
+        if self.upfront_budget:
+            parts.append(f"일시불 예산 {self.upfront_budget:,}원")
+        parts.append(f"사용 기간 {self.years or DEFAULT_YEARS:g}년{'' if self.years else '(기본값)'}")
+        if self.wants_care is not None:
+            parts.append("케어서비스 필요" if self.wants_care else "자가관리 선호")
+        if self.moving is not None:
+            parts.append("이사 계획 있음" if self.moving else "이사 계획 없음")
+        return ', '.join(parts)
+
+
+def _has(text: str, words: Sequence[str]) -> bool:
+    return any(word in text for word in words)
+
+
+def parse_preferences(answers: Sequence[str]) -> PreferenceProfile:
+    """사용자 답변들 → 선호 프로필 (뒤에 나온 답변이 앞 답변을 덮어씀)"""
+    profile = PreferenceProfile()
+    for text in answers:
+        text = str(text or '')
+        if not text:
+            continue
+        budget = parse_budget(text)
+        if budget.monthly_max:
+            profile.monthly_budget = budget.monthly_max
+            profile.sources['monthly_budget'] = text
+        if budget.purchase_max:
+            profile.upfront_budget = budget.purchase_max
+            profile.sources['upfront_budget'] = text
+
+        # 사용 기간: 금액 표현이 없는 기간 숫자 > 장기/단기 표현
+        if not budget.has_amount or budget.period:
+            match = _YEARS_PATTERN.search(text)
+            if match:
+                count = int(match.group(1))
+                profile.years = count if match.group(2) == '년' else count / 12
+                profile.sources['years'] = text
+        if profile.sources.get('years') != text:
+            if _has(text, _LONG_WORDS):
+                profile.years = 10
+                profile.sources['years'] = text
+            elif _has(text, _SHORT_WORDS):
+                profile.years = 2
+                profile.sources['years'] = text
+
+        # 부정 표현을 먼저 확인 ('관리 필요 없'에는 '관리'가 포함됨)
+        if _has(text, _CARE_NO):
+            profile.wants_care = False
+            profile.sources['wants_care'] = text
+        elif _has(text, _CARE_YES):
+            profile.wants_care = True
+            profile.sources['wants_care'] = text
+        if _has(text, _MOVE_NO):
+            profile.moving = False
+            profile.sources['moving'] = text
+        elif _has(text, _MOVE_YES):
+            profile.moving = True
+            profile.sources['moving'] = text
+    return profile
+
+
+def profile_from_history(conversation_history: Sequence[Dict[str, Any]]) -> PreferenceProfile:
+    """대화 기록의 사용자 발언으로 프로필 생성"""
+    return parse_preferences([
+        msg.get('content') or msg.get('message') or ''
+        for msg in conversation_history or []
+        if msg.get('speaker') == '사용자'
+    ])
+
+
+class Recommender:
+    """카탈로그 스냅샷 하나에 대한 (제품, 플랜) 특성 테이블 (불변)
+
+    플랜 축: 0번 = 일시불 구매, 1..T = 구독 기간 (가격 테이블 기간 순서)
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, curves: Optional[CostCurves] = None):
+        curves = curves or cost_curves_for(snapshot)
+        table = curves.table
+        self.version = snapshot.version
+        self.curves = curves
+        self.table = table
+        self.plans: List[Optional[str]] = [None] + list(table.periods)
+        self.plan_labels: List[str] = ['일시불 구매'] + [f"{period} 구독" for period in table.periods]
+        P = len(table.product_ids)
+
+        # (P,) 케어서비스 제공 여부 (service_types가 '없음'이 아닌 제품)
+        self.has_care = np.array([
+            bool(service) and service != '없음'
+            for service in ((product.get('care_service') or {}).get('service_types') for product in snapshot.products)
+        ], dtype=bool).reshape(P)
+        self.reinstall = any('재설치' in benefit for benefit in snapshot.common_subscription_benefits or [])
+
+    def features(self, product_indices: Sequence[int], profile: PreferenceProfile, scenario: str = "max") -> Dict[str, np.ndarray]:
+        """(n, 1+T) 특성: 사용 기간 기준 총 비용, 월 부담, 초기 비용, 케어 포함, 재설치 지원, 제공 여부"""
+        curves, table = self.curves, self.table
+        idx = np.asarray(product_indices, dtype=int)
+        s = table.scenarios.index(scenario)
+        horizon = profile.horizon_months
+        m = min(horizon, curves.max_months)
+        extra = horizon - m  # 곡선 범위(최장 계약) 이후 기간
+
+        data = curves.curves(idx, scenario)
+        n, T = len(idx), len(table.periods)
+        cost = np.full((n, 1 + T), np.nan)
+        monthly = np.zeros((n, 1 + T))
+        upfront = np.zeros((n, 1 + T))
+        care = np.zeros((n, 1 + T), dtype=bool)
+
+        purchase_care = curves.purchase_care_monthly[idx]
+        cost[:, 0] = data['purchase'][:, m] + purchase_care * extra
+        monthly[:, 0] = purchase_care
+        care[:, 0] = purchase_care > 0  # 필수 케어서비스는 구매 비용에도 포함됨
+        upfront[:, 0] = curves.purchase_upfront[idx, s]
+        # 구독: 사용 기간 전에 계약이 끝나면 만료 시점 비용 + 이후 소유 제품의 필수 케어 비용,
+        # 아니면 그 시점 해지 비용(위약금 포함)
+        after_contract = np.maximum(horizon - table.months, 0)  # (T,)
+        cost[:, 1:] = data['exit_cost'][:, :, m] + purchase_care[:, None] * after_contract[None, :]
+        monthly[:, 1:] = curves.subscription_monthly[idx][:, :, s]
+        care[:, 1:] = self.has_care[idx][:, None]
+        reinstall = np.zeros((n, 1 + T), dtype=bool)
+        reinstall[:, 1:] = self.reinstall
+        available = ~np.isnan(cost)
+        return {
+            'cost': cost, 'monthly': monthly, 'upfront': upfront,
+            'care': care, 'reinstall': reinstall, 'available': available,
+        }
+
+    def score(self, features: Dict[str, np.ndarray], profile: PreferenceProfile) -> np.ndarray:
+        """(n, 1+T) 점수 (높을수록 추천, 제공하지 않는 플랜은 -inf)"""
+        cost, available = features['cost'], features['available']
+        cheapest = np.nanmin(np.where(available, cost, np.nan)) if available.any() else 1.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = COST_WEIGHT * np.where(cost > 0, cheapest / cost, 1.0)
+
+        is_subscription = np.zeros_like(available)
+        is_subscription[:, 1:] = True
+        if profile.monthly_budget:
+            over = np.clip(features['monthly'] / profile.monthly_budget - 1, 0, 1)
+            score -= BUDGET_PENALTY * np.where(is_subscription, over, 0)
+            if not profile.upfront_budget:
+                score[:, 0] -= LUMP_SUM_PENALTY
+        if profile.upfront_budget:
+            over = np.clip(features['upfront'] / profile.upfront_budget - 1, 0, 1)
+            score -= BUDGET_PENALTY * np.where(is_subscription, 0, over)
+        if profile.wants_care:
+            score += CARE_BONUS * features['care']
+        if profile.moving:
+            score += REINSTALL_BONUS * features['reinstall']
+        return np.where(available, score, -np.inf)
+
+    def rank(
+        self,
+        profile: PreferenceProfile,
+        product_ids: Optional[Sequence[Any]] = None,
+        scenario: str = "max",
+        limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """(제품, 플랜) 추천 순위"""
+        table = self.table
+        ids = [pid for pid in (product_ids if product_ids is not None else table.product_ids) if table.has_product(pid)]
+        if not ids:
+            return []
+        indices = [table.product_index(pid) for pid in ids]
+        features = self.features(indices, profile, scenario)
+        scores = self.score(features, profile)
+
+        order = np.argsort(-scores, axis=None, kind='stable')
+        ranking = []
+        for flat in order:
+            a, plan = np.unravel_index(flat, scores.shape)
+            if not np.isfinite(scores[a, plan]):
+                break
+            ranking.append(self._describe(ids[a], indices[a], int(plan), features, scores, a, profile))
+            if len(ranking) >= limit:
+                break
+        return ranking
+
+    def _describe(self, product_id, i, plan, features, scores, a, profile) -> Dict[str, Any]:
+        reasons = []
+        cost = int(features['cost'][a, plan])
+        years = profile.years or DEFAULT_YEARS
+        reasons.append(f"{years:g}년 사용 시 총 {cost:,}원")
+        if plan > 0:
+            months = int(self.table.months[plan - 1])
+            if profile.horizon_months < months:
+                reasons.append(f"{profile.horizon_months}개월 차 해지 위약금 포함")
+            monthly = int(features['monthly'][a, plan])
+            if profile.monthly_budget:
+                reasons.append(f"월 {monthly:,}원으로 예산 {'이내' if monthly <= profile.monthly_budget else '초과'}")
+            if profile.wants_care and features['care'][a, plan]:
+                reasons.append("케어서비스 포함")
+            if profile.moving and features['reinstall'][a, plan]:
+                reasons.append("이사 시 무상 재설치")
+        else:
+            upfront = int(features['upfront'][a, plan])
+            if profile.upfront_budget:
+                reasons.append(f"일시불 {upfront:,}원으로 예산 {'이내' if upfront <= profile.upfront_budget else '초과'}")
+            reasons.append(f"중고 판매 시 약 {int(self.curves.resale[i]):,}원 회수 가능")
+        return {
+            'product_id': product_id,
+            'product_name': self.table.product_names[i],
+            'plan': 'purchase' if plan == 0 else 'subscription',
+            'period': self.plans[plan],
+            'label': self.plan_labels[plan],
+            'score': round(float(scores[a, plan]), 4),
+            'horizon_cost': cost,
+            'monthly': int(features['monthly'][a, plan]),
+            'upfront': int(features['upfront'][a, plan]),
+            'reasons': reasons,
+        }
+
+    def recommend(self, conversation_history: Sequence[Dict[str, Any]], product_ids: Optional[Sequence[Any]] = None,
+                  scenario: str = "max", limit: int = 5) -> Dict[str, Any]:
+        """대화 기록 → 프로필 + 순위 (API 응답용)"""
+        profile = profile_from_history(conversation_history)
+        return {
+            'catalog_version': self.version,
+            'profile': asdict(profile),
+            'profile_summary': profile.describe(),
+            'ranking': self.rank(profile, product_ids, scenario, limit),
+        }
+
+
+def ranking_summary(ranking: List[Dict[str, Any]], limit: int = 3) -> str:
+    """결론 프롬프트용 순위 요약 (한 줄씩)"""
+    return '\n'.join(
+        f"{n}. {item['label']} - {', '.join(item['reasons'])}"
+        for n, item in enumerate(ranking[:limit], 1)
+    )
+
+
+def fast_conclusion(product_name: str, profile: PreferenceProfile, ranking: List[Dict[str, Any]]) -> str:
+    """LLM 없이 만드는 결론 문장 (빠른 모드)"""
+    if not ranking:
+        return f"{product_name} 비교할 수 있는 가격 정보가 없어서, 매장 상담으로 확인해 보시는 걸 추천드려요."
+    best = ranking[0]
+    lines = [f"고객님 조건({profile.describe()})으로 {product_name} 구매와 구독을 비교해 봤어요."]
+    lines.append(f"가장 유리한 선택은 {best['label']}이에요. {', '.join(best['reasons'])}.")
+    if len(ranking) > 1:
+        second = ranking[1]
+        lines.append(f"차선책은 {second['label']}이고, {second['reasons'][0]}이에요.")
+    if best['plan'] == 'subscription':
+        lines.append("목돈 부담 없이 관리까지 받고 싶다면 구독으로 결정하셔도 좋아요.")
+    else:
+        lines.append("오래 쓰실 계획이라면 구매가 총 비용 면에서 더 이득이에요.")
+    return ' '.join(lines)
+
+
+def build_recommender(snapshot: CatalogSnapshot) -> Recommender:
+    return Recommender(snapshot)
+
+
+catalog.register_derived('recommender', build_recommender)
+
+
+def recommender_for(snapshot: CatalogSnapshot) -> Recommender:
+    """특정 스냅샷의 추천 스코어러"""
+    return snapshot.derived('recommender', build_recommender)
+
+
+def get_recommender(path: str = DEFAULT_PRODUCTS_FILE) -> Recommender:
+    """현재 카탈로그 버전의 추천 스코어러"""
+    return recommender_for(catalog.get_catalog(path))
@@ -0,0 +1,245 @@
+"""
+로컬 Redis 대역 서버 (테스트 / 개발용, 실제 Redis 없이 RESP 프로토콜로 공유 상태 확인)
+- shared_state.RedisState가 쓰는 명령만 구현: PING, GET, SET [EX|PX] [NX|XX], DEL, EXISTS, INCR, INCRBY,
+  EXPIRE, PEXPIRE, TTL, PTTL, DBSIZE, FLUSHDB, SELECT, AUTH, QUIT
+- 모든 클라이언트가 하나의 이벤트 루프에서 처리되므로 명령 하나하나가 원자적
+- 데이터는 메모리에만 (재시작하면 사라짐)
+
+사용법:
+    python redis_standin.py --port 6390
+    SHARED_STATE_URL=redis://127.0.0.1:6390/0 python serve.py
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+def _encode(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, RedisProtocolError):
+        return f"-ERR {value}\r\n".encode('utf-8')
+    if isinstance(value, SimpleString):
+        return f"+{value}\r\n".encode('utf-8')
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+    data = value if isinstance(value, bytes) else str(value).encode('utf-8')
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class SimpleString(str):
+    pass
+
+
+OK = SimpleString("OK")
+
+
+class RedisStandin:
+    """키 → (값, 만료 시각) 메모리 저장소와 명령 처리"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+        self.connections = 0
+        self._writers = set()
+
+    def _live(self, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self.data[key]
+            return None
+        return item
+
+    def execute(self, args: List[bytes]) -> Any:
+        self.commands += 1
+        if not args:
+            return RedisProtocolError("empty command")
+        name = args[0].decode().upper()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return RedisProtocolError(f"unknown command '{name}'")
+        try:
+            return handler(*args[1:])
+        except TypeError:
+            return RedisProtocolError(f"wrong number of arguments for '{name.lower()}' command")
+        except ValueError:
+            return RedisProtocolError("value is not an integer or out of range")
+
+    def cmd_ping(self, message: Optional[bytes] = None):
+        return message if message is not None else SimpleString("PONG")
+
+    def cmd_auth(self, *args):
+        return OK
+
+    def cmd_select(self, db: bytes):
+        return OK
+
+    def cmd_get(self, key: bytes):
+        item = self._live(key)
+        return item[0] if item is not None else None
+
+    def cmd_set(self, key: bytes, value: bytes, *options: bytes):
+        expires = None
+        only_new = only_existing = False
+        opts = [o.upper() for o in options]
+        i = 0
+        while i < len(opts):
+            if opts[i] in (b'EX', b'PX'):
+                amount = int(options[i + 1])
+                expires = time.time() + (amount if opts[i] == b'EX' else amount / 1000)
+                i += 2
+                continue
+            only_new |= opts[i] == b'NX'
+            only_existing |= opts[i] == b'XX'
+            i += 1
+        exists = self._live(key) is not None
+        if (only_new and exists) or (only_existing and not exists):
+            return None
+        self.data[key] = (value, expires)
+        return OK
+
+    def cmd_del(self, *keys: bytes):
+        return sum(1 for key in keys if self._live(key) is not None and self.data.pop(key, None) is not None)
+
+    def cmd_exists(self, *keys: bytes):
+        return sum(1 for key in keys if self._live(key) is not None)
+
+    def cmd_incrby(self, key: bytes, amount: bytes):
+        item = self._live(key)
+        value = (int(item[0]) if item is not None else 0) + int(amount)
+        self.data[key] = (str(value).encode(), item[1] if item is not None else None)
+        return value
+
+    def cmd_incr(self, key: bytes):
+        return self.cmd_incrby(key, b"1")
+
+    def cmd_pexpire(self, key: bytes, ms: bytes):
+        item = self._live(key)
+        if item is None:
+            return 0
+        self.data[key] = (item[0], time.time() + int(ms) / 1000)
+        return 1
+
+    def cmd_expire(self, key: bytes, seconds: bytes):
+        return self.cmd_pexpire(key, str(int(seconds) * 1000).encode())
+
+    def cmd_pttl(self, key: bytes):
+        item = self._live(key)
+        if item is None:
+            return -2
+        return -1 if item[1] is None else int((item[1] - time.time()) * 1000)
+
+    def cmd_ttl(self, key: bytes):
+        ms = self.cmd_pttl(key)
+        return ms if ms < 0 else (ms + 999) // 1000
+
+    def cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._live(key) is not None)
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        return OK
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                if args and args[0].upper() == b'QUIT':
+                    writer.write(_encode(OK))
+                    await writer.drain()
+                    break
+                writer.write(_encode(self.execute(args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def disconnect_all(self):
+        """열린 클라이언트 연결을 모두 닫고 처리가 끝날 때까지 대기"""
+        for writer in list(self._writers):
+            writer.close()
+        while self._writers:
+            await asyncio.sleep(0.01)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """RESP 배열 명령 하나 (인라인 명령도 허용), 연결이 닫히면 None"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readline()
+        length = int(header[1:-2])
+        data = await reader.readexactly(length + 2)
+        args.append(data[:-2])
+    return args
+
+
+def serve_in_thread(host: str = '127.0.0.1', port: int = 0):
+    """별도 스레드에서 대역 서버 실행 → (url, 저장소, 종료 함수)"""
+    standin = RedisStandin()
+    ready = threading.Event()
+    holder: Dict[str, Any] = {}
+
+    async def run():
+        server = await asyncio.start_server(standin.handle, host, port)
+        holder['port'] = server.sockets[0].getsockname()[1]
+        holder['stop'] = asyncio.Event()
+        ready.set()
+        async with server:
+            await holder['stop'].wait()
+            await standin.disconnect_all()
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+    thread.start()
+    ready.wait(10)
+
+    def stop():
+        loop.call_soon_threadsafe(holder['stop'].set)
+        thread.join(timeout=10)
+        loop.close()
+
+    return f"redis://{host}:{holder['port']}/0", standin, stop
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="로컬 Redis 대역 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = await asyncio.start_server(RedisStandin().handle, args.host, args.port)
+        print(f"Redis 대역 서버: redis://{args.host}:{args.port}/0")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+운영 실행 (개발용 자동 재시작은 main.py)
+- 워커 프로세스 N개 (WORKERS, 0이면 이 프로세스가 쓸 수 있는 CPU 수)가 같은 소켓을 공유
+- uvloop / httptools가 설치되어 있으면 사용 (없으면 asyncio / h11)
+- 각 워커는 워밍업이 끝난 뒤에 연결을 받음 (GET /health/ready)
+- SIGTERM: 모든 워커가 동시에 드레인 (새 연결 중지, 열린 SSE 스트림은 DRAIN_TIMEOUT까지 마저 보냄)
+- 워커가 2개 이상인데 SHARED_STATE_URL이 없으면 /dev/shm의 SQLite 파일로 세션 / 캐시를 공유
+
+python serve.py
+python serve.py --workers 4 --port 8000
+"""
+
+import argparse
+import importlib.util
+import os
+from typing import List, Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from config import Config
+from lifecycle import DRAIN_GRACE_SECONDS, DrainingServer
+from shared_state import default_local_url
+
+
+def default_workers() -> int:
+    """CPU 수 (컨테이너 / taskset으로 제한된 경우 허용된 CPU 수)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def event_loop_name() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol_name() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+class DrainingMultiprocess(Multiprocess):
+    """종료 시 워커마다 순서대로 기다리지 않고 모두에게 SIGTERM을 보낸 뒤 함께 기다림 (드레인 시간 1회분)"""
+
+    def shutdown(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        print(f"👋 부모 프로세스 [{self.pid}] 종료")
+
+
+def build_config(host: str, port: int, workers: int, log_level: str = "info") -> uvicorn.Config:
+    return uvicorn.Config(
+        "api_v3_complete:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop=event_loop_name(),
+        http=http_protocol_name(),
+        log_level=log_level,
+        timeout_graceful_shutdown=int(Config.DRAIN_TIMEOUT + DRAIN_GRACE_SECONDS),
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="운영 서버 실행 (멀티 워커 / 워밍업 / SIGTERM 드레인)")
+    parser.add_argument('--host', default=Config.HOST)
+    parser.add_argument('--port', type=int, default=Config.PORT)
+    parser.add_argument('--workers', type=int, default=Config.WORKERS, help="워커 수 (0이면 CPU 수)")
+    parser.add_argument('--log-level', default="info")
+    args = parser.parse_args(argv)
+
+    try:
+        Config.validate()
+    except ValueError as e:
+        print(f"❌ 설정 오류: {e}")
+        exit(1)
+
+    workers = args.workers or default_workers()
+    if workers > 1 and not Config.SHARED_STATE_URL:
+        # 워커 프로세스는 환경변수로 설정을 읽음
+        Config.SHARED_STATE_URL = os.environ['SHARED_STATE_URL'] = default_local_url(f"aimystery-state-{args.port}")
+    config = build_config(args.host, args.port, workers, args.log_level)
+    print("🚀 챗봇 대화 시스템을 운영 모드로 시작합니다...")
+    print(f"📍 서버 주소: http://{args.host}:{args.port}")
+    print(f"⚙️ 워커 {workers}개, 이벤트 루프 {config.loop}, HTTP {config.http}, 드레인 최대 {Config.DRAIN_TIMEOUT:.0f}초")
+    print(f"🗄️ 공유 상태: {Config.SHARED_STATE_URL or '프로세스 메모리'}")
+    print("=" * 50)
+
+    server = DrainingServer(config)
+    if workers > 1:
+        sock = config.bind_socket()
+        DrainingMultiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
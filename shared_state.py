@@ -0,0 +1,493 @@
+"""
+워커 간 공유 상태 (세션 / LLM 응답 캐시 / TTS 캐시 색인 / 속도 제한)
+- SHARED_STATE_URL로 저장소 선택
+    ""                      프로세스 메모리 (워커 1개, 기본값)
+    sqlite:///경로.db        한 서버의 워커끼리 공유 (/dev/shm 아래면 공유 메모리, 외부 서비스 불필요)
+    redis://호스트:포트/DB   여러 서버가 공유 (RESP 프로토콜, 테스트는 redis_standin.py)
+- 값은 문자열, 네임스페이스별 키, 선택적 TTL(초), 원자적 incr (속도 제한 카운터)
+- 저장소 메서드는 동기 (스레드 안전), 이벤트 루프에서는 a로 시작하는 async 버전 사용
+
+state = get_shared_state()
+await state.aset('session', session_id, json.dumps(data), ttl=3600)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from config import Config
+
+PURGE_EVERY = 1000  # SQLite: 쓰기 N번마다 만료된 키 정리
+
+
+class SharedStateError(RuntimeError):
+    """공유 상태 저장소 오류 (연결 실패, Redis 오류 응답 등)"""
+
+
+class SharedState:
+    """공유 상태 저장소 인터페이스"""
+
+    shared = True  # 다른 프로세스와 공유되는지 (메모리 저장소는 False)
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    def incr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """원자적으로 더한 뒤 값 반환 (키가 없거나 만료됐으면 amount부터, TTL은 처음 만들 때만 설정)"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def get_json(self, namespace: str, key: str) -> Any:
+        value = self.get(namespace, key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        self.set(namespace, key, json.dumps(value, ensure_ascii=False), ttl)
+
+    # 이벤트 루프용 (파일 / 소켓 I/O는 스레드에서)
+    async def aget(self, namespace: str, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        await asyncio.to_thread(self.set, namespace, key, value, ttl)
+
+    async def adelete(self, namespace: str, key: str):
+        await asyncio.to_thread(self.delete, namespace, key)
+
+    async def aincr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return await asyncio.to_thread(self.incr, namespace, key, amount, ttl)
+
+    async def aget_json(self, namespace: str, key: str) -> Any:
+        value = await self.aget(namespace, key)
+        return json.loads(value) if value is not None else None
+
+    async def aset_json(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        await self.aset(namespace, key, json.dumps(value, ensure_ascii=False), ttl)
+
+
+class MemoryState(SharedState):
+    """프로세스 메모리 저장소 (공유 안 됨, I/O가 없어 async 버전도 바로 실행)"""
+
+    shared = False
+
+    def __init__(self):
+        self._data: Dict[Tuple[str, str], Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, item_key: Tuple[str, str]) -> Optional[Tuple[str, Optional[float]]]:
+        item = self._data.get(item_key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[item_key]
+            return None
+        return item
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._live((namespace, key))
+            return item[0] if item is not None else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[(namespace, key)] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.pop((namespace, key), None)
+
+    def incr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            item = self._live((namespace, key))
+            if item is None:
+                value, expires = amount, (time.time() + ttl if ttl else None)
+            else:
+                value, expires = int(item[0]) + amount, item[1]
+            self._data[(namespace, key)] = (str(value), expires)
+            return value
+
+    async def aget(self, namespace: str, key: str) -> Optional[str]:
+        return self.get(namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        self.set(namespace, key, value, ttl)
+
+    async def adelete(self, namespace: str, key: str):
+        self.delete(namespace, key)
+
+    async def aincr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return self.incr(namespace, key, amount, ttl)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_shared_state_expires ON shared_state(expires_at);
+"""
+
+_SQLITE_INCR = """
+INSERT INTO shared_state (namespace, key, value, expires_at) VALUES (?1, ?2, ?3, ?4)
+ON CONFLICT (namespace, key) DO UPDATE SET
+    value = CASE WHEN expires_at IS NOT NULL AND expires_at <= ?5 THEN excluded.value
+                 ELSE CAST(value AS INTEGER) + ?3 END,
+    expires_at = CASE WHEN expires_at IS NOT NULL AND expires_at <= ?5 THEN excluded.expires_at
+                      ELSE expires_at END
+RETURNING value
+"""
+
+
+class SQLiteState(SharedState):
+    """SQLite 파일 저장소 (WAL, 스레드별 커넥션, 문장 하나가 곧 트랜잭션이라 incr도 원자적)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self.conn
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SQLITE_SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout = 30000")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.conn.execute("DELETE FROM shared_state WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT value FROM shared_state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO shared_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time() + ttl if ttl else None),
+        )
+        self._wrote()
+
+    def delete(self, namespace: str, key: str):
+        self.conn.execute("DELETE FROM shared_state WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def incr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        row = self.conn.execute(_SQLITE_INCR, (namespace, key, amount, now + ttl if ttl else None, now)).fetchone()
+        self._wrote()
+        return int(row[0])
+
+
+class RedisState(SharedState):
+    """Redis 저장소 (RESP2 프로토콜 직접 구현, 스레드별 연결, 키는 prefix + namespace:key)"""
+
+    def __init__(self, url: str, prefix: Optional[str] = None, timeout: float = 5.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 6379
+        self.db = int(parts.path.strip('/') or 0)
+        self.password = unquote(parts.password) if parts.password else None
+        self.prefix = Config.SHARED_STATE_PREFIX if prefix is None else prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock, self._local.reader = sock, sock.makefile('rb')
+        if self.password:
+            self._roundtrip('AUTH', self.password)
+        if self.db:
+            self._roundtrip('SELECT', self.db)
+
+    def close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            self._local.reader.close()
+            sock.close()
+            self._local.sock = None
+
+    @staticmethod
+    def _encode(args: Tuple[Any, ...]) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self) -> Any:
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Redis 연결이 끊어졌습니다")
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode('utf-8')
+        if kind == b'-':
+            raise SharedStateError(body.decode('utf-8'))
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2].decode('utf-8')
+        if kind == b'*':
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise SharedStateError(f"알 수 없는 Redis 응답: {line!r}")
+
+    def _roundtrip(self, *args) -> Any:
+        self._local.sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def command(self, *args) -> Any:
+        """명령 하나 실행 (연결이 끊어졌으면 한 번 다시 연결)"""
+        for attempt in range(2):
+            if getattr(self._local, 'sock', None) is None:
+                try:
+                    self._connect()
+                except OSError as e:
+                    raise SharedStateError(f"Redis 연결 실패 ({self.host}:{self.port}): {e}") from e
+            try:
+                return self._roundtrip(*args)
+            except (ConnectionError, OSError):
+                self.close()
+                if attempt:
+                    raise
+        return None
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        return self.command('GET', self._key(namespace, key))
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        if ttl:
+            self.command('SET', self._key(namespace, key), value, 'PX', max(1, int(ttl * 1000)))
+        else:
+            self.command('SET', self._key(namespace, key), value)
+
+    def delete(self, namespace: str, key: str):
+        self.command('DEL', self._key(namespace, key))
+
+    def incr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        name = self._key(namespace, key)
+        value = self.command('INCRBY', name, amount)
+        if ttl and value == amount:  # 이번에 만든 키에만 만료 설정
+            self.command('PEXPIRE', name, max(1, int(ttl * 1000)))
+        return value
+
+
+def open_state(url: str) -> SharedState:
+    """URL로 저장소 생성 ("" → 메모리, sqlite:///경로, redis://호스트:포트/DB)"""
+    if not url or url == "memory://":
+        return MemoryState()
+    if url.startswith("sqlite:///"):
+        return SQLiteState(url[len("sqlite:///"):])
+    if url.startswith("redis://"):
+        return RedisState(url)
+    raise ValueError(f"지원하지 않는 SHARED_STATE_URL입니다: {url}")
+
+
+def default_local_url(name: str = "aimystery-state") -> str:
+    """한 서버용 SQLite 경로 (/dev/shm이 있으면 공유 메모리 위에)"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return f"sqlite:///{os.path.join(directory, name + '.db')}"
+
+
+_state: Optional[SharedState] = None
+_state_url: Optional[str] = None
+_state_lock = threading.Lock()
+
+
+def get_shared_state() -> SharedState:
+    """SHARED_STATE_URL 기반 프로세스 공용 저장소 (처음 사용할 때 연결, 설정이 바뀌면 다시 생성)"""
+    global _state, _state_url
+    url = Config.SHARED_STATE_URL
+    if _state is None or _state_url != url:
+        with _state_lock:
+            if _state is None or _state_url != url:
+                if _state is not None:
+                    _state.close()
+                _state, _state_url = open_state(url), url
+    return _state
+
+
+class SessionStore:
+    """세션 대화 기록 (어느 워커에서든 session_id로 이어서 응답)"""
+
+    namespace = "session"
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await get_shared_state().aget_json(self.namespace, session_id)
+
+    async def save(self, session_id: str, product_id: Any, history: List[Dict[str, Any]]):
+        """저장 실패는 기록만 (클라이언트가 history를 보내면 계속 동작)"""
+        try:
+            await get_shared_state().aset_json(self.namespace, session_id, {
+                'product_id': product_id,
+                'history': history,
+                'updated_at': time.time(),
+            }, ttl=Config.SESSION_TTL)
+        except Exception as e:
+            print(f"세션 저장 실패 ({session_id}): {e}")
+
+
+class SharedCache:
+    """프로세스 캐시 뒤의 공유 캐시 계층 (메모리 저장소면 사용 안 함, 저장소 오류는 캐시 미스로 처리)"""
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    @property
+    def enabled(self) -> bool:
+        return get_shared_state().shared
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            return await get_shared_state().aget(self.namespace, key)
+        except Exception as e:
+            print(f"공유 캐시 조회 실패 ({self.namespace}): {e}")
+            return None
+
+    async def set(self, key: str, value: str):
+        if not self.enabled:
+            return
+        try:
+            await get_shared_state().aset(self.namespace, key, value,
+                                          ttl=Config.SHARED_CACHE_TTL if self.ttl is None else self.ttl)
+        except Exception as e:
+            print(f"공유 캐시 저장 실패 ({self.namespace}): {e}")
+
+
+class SharedRateLimiter:
+    """모든 워커 합계 기준 고정 창 속도 제한 (window초마다 limit회, limit이 0이면 제한 없음, 저장소 오류 시 허용)"""
+
+    namespace = "rate"
+
+    def __init__(self, name: str, limit: float, window: float = 1.0):
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    async def hit(self, key: str = "") -> float:
+        """한 번 사용, 허용이면 0 / 초과면 다음 창까지 남은 초"""
+        if not self.limit:
+            return 0.0
+        now = time.time()
+        slot = int(now // self.window)
+        try:
+            count = await get_shared_state().aincr(self.namespace, f"{self.name}:{key}:{slot}", ttl=self.window * 2)
+        except Exception as e:  # 저장소 장애로 요청을 막지는 않음
+            print(f"속도 제한 확인 실패 ({self.name}): {e}")
+            return 0.0
+        if count <= self.limit:
+            return 0.0
+        return (slot + 1) * self.window - now
+
+    async def acquire(self, key: str = ""):
+        """허용될 때까지 대기"""
+        while True:
+            wait = await self.hit(key)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class TTSCacheIndex:
+    """(텍스트, 음성, 속도) → 음성 파일 색인 (파일은 TTS_CACHE_DIR, 색인은 공유 상태)"""
+
+    namespace = "tts"
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+
+    @staticmethod
+    def key(text: str, voice: str, speed: float) -> str:
+        return hashlib.sha256(json.dumps([text, voice, speed], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory or Config.TTS_CACHE_DIR, filename)
+
+    async def lookup(self, text: str, voice: str, speed: float) -> Optional[bytes]:
+        """색인에 있고 파일도 있으면 음성 데이터 (다른 서버가 만든 파일이라 없거나 저장소 오류면 None)"""
+        try:
+            entry = await get_shared_state().aget_json(self.namespace, self.key(text, voice, speed))
+            if not entry:
+                return None
+            return await asyncio.to_thread(_read_file, self._path(entry['file']))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"TTS 캐시 조회 실패: {e}")
+            return None
+
+    async def store(self, text: str, voice: str, speed: float, audio: bytes, fmt: str = "mp3") -> Optional[str]:
+        """파일 저장 후 색인 등록 (실패해도 음성 응답은 그대로)"""
+        key = self.key(text, voice, speed)
+        filename = f"{key}.{fmt}"
+        try:
+            await asyncio.to_thread(_write_file, self._path(filename), audio)
+            await get_shared_state().aset_json(self.namespace, key, {'file': filename, 'bytes': len(audio)},
+                                               ttl=Config.TTS_CACHE_TTL)
+        except Exception as e:
+            print(f"TTS 캐시 저장 실패: {e}")
+            return None
+        return filename
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _write_file(path: str, data: bytes):
+    """같은 파일을 여러 워커가 동시에 써도 깨지지 않도록 임시 파일 후 교체"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+session_store = SessionStore()
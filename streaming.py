@@ -0,0 +1,137 @@
+"""
+SSE 스트리밍 출력 및 페이싱(pacing) 모듈
+- none: 지연 없이 한 번에 전송 (타이핑 애니메이션은 클라이언트가 담당)
+- fixed: 기존 방식 (턴 시작 전 0.5초, 30자마다 0.02초)
+- adaptive: 측정된 업스트림 생성 속도에 맞춰 전송
+"""
+
+import asyncio
+import json
+import math
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, Literal, Optional
+
+from config import Config
+
+PacingMode = Literal["none", "fixed", "adaptive"]
+PACING_MODES = ("none", "fixed", "adaptive")
+
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    """SSE data 이벤트 문자열 생성"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+class StreamPacer:
+    """요청 단위 스트리밍 페이싱 관리 클래스
+
+    여러 개의 작은 청크를 하나의 쓰기로 합쳐서(coalescing) 쓰기 간격이
+    min_write_interval 이상이 되도록 하므로, 청크마다 sleep 하던 기존 방식보다
+    이벤트 수와 대기 횟수가 크게 줄어듭니다.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        turn_delay: Optional[float] = None,
+        chunk_size: Optional[int] = None,
+        chunk_delay: Optional[float] = None,
+        min_write_interval: Optional[float] = None,
+    ):
+        self.mode = mode or Config.STREAM_PACING_MODE
+        if self.mode not in PACING_MODES:
+            raise ValueError(f"지원하지 않는 페이싱 모드입니다: {self.mode}. {', '.join(PACING_MODES)} 중 하나를 사용하세요.")
+
+        self.turn_delay = Config.STREAM_TURN_DELAY if turn_delay is None else turn_delay
+        self.chunk_size = chunk_size or Config.STREAM_CHUNK_SIZE
+        self.chunk_delay = Config.STREAM_CHUNK_DELAY if chunk_delay is None else chunk_delay
+        self.min_write_interval = (
+            Config.STREAM_MIN_WRITE_INTERVAL if min_write_interval is None else min_write_interval
+        )
+
+        # 업스트림 생성 속도 측정값 (문자/초, 지수이동평균)
+        self._upstream_rate: Optional[float] = None
+        # 마지막 업스트림 호출 대기 시간 (그동안 타이핑 표시가 노출됨)
+        self._last_wait = 0.0
+
+    @classmethod
+    def for_request(cls, mode: Optional[str] = None, **kwargs) -> "StreamPacer":
+        """요청별 페이싱 모드로 생성 (None이면 Config 기본값 사용)"""
+        return cls(mode=mode, **kwargs)
+
+    @property
+    def upstream_rate(self) -> Optional[float]:
+        """측정된 업스트림 생성 속도 (문자/초)"""
+        return self._upstream_rate
+
+    def record_upstream(self, chars: int, seconds: float):
+        """업스트림 응답 길이와 소요 시간 기록"""
+        if chars <= 0 or seconds <= 0:
+            return
+        rate = chars / seconds
+        if self._upstream_rate is None:
+            self._upstream_rate = rate
+        else:
+            self._upstream_rate = 0.7 * self._upstream_rate + 0.3 * rate
+
+    async def timed(self, awaitable: Awaitable[str]) -> str:
+        """업스트림 호출을 기다리며 생성 속도를 측정"""
+        started = time.perf_counter()
+        result = await awaitable
+        self._last_wait = time.perf_counter() - started
+        self.record_upstream(len(result or ""), self._last_wait)
+        return result
+
+    def _turn_pause(self, waited: float) -> float:
+        """턴 시작 전 대기 시간 계산 (waited: 이미 타이핑 표시가 노출된 시간)"""
+        if self.mode == "fixed":
+            return self.turn_delay
+        if self.mode == "adaptive":
+            return max(0.0, self.turn_delay - waited)
+        return 0.0
+
+    def _chars_per_second(self) -> float:
+        """현재 모드의 출력 속도 (문자/초)"""
+        fixed_rate = self.chunk_size / self.chunk_delay if self.chunk_delay > 0 else math.inf
+        if self.mode == "adaptive" and self._upstream_rate:
+            return min(max(self._upstream_rate, Config.STREAM_ADAPTIVE_MIN_RATE), fixed_rate)
+        return fixed_rate
+
+    def plan(self, text_length: int) -> tuple:
+        """(청크 크기, 청크 간 대기 시간) 반환"""
+        if self.mode == "none" or text_length == 0:
+            return max(text_length, 1), 0.0
+
+        rate = self._chars_per_second()
+        if math.isinf(rate):
+            return max(text_length, 1), 0.0
+
+        # 쓰기 간격이 min_write_interval 이상이 되도록 청크를 합침
+        group = max(self.chunk_size, math.ceil(self.min_write_interval * rate))
+        return group, group / rate
+
+    async def stream_text(
+        self,
+        speaker: str,
+        text: str,
+        waited: Optional[float] = None,
+        pause: bool = True,
+        **extra: Any,
+    ) -> AsyncIterator[str]:
+        """텍스트를 페이싱에 맞춰 streaming 이벤트로 전송
+
+        waited를 생략하면 직전 timed() 호출의 대기 시간을 사용합니다.
+        pause=False이면 턴 시작 전 대기를 건너뜁니다.
+        """
+        if waited is None:
+            waited, self._last_wait = self._last_wait, 0.0
+        delay_before = self._turn_pause(waited) if pause else 0.0
+        if delay_before > 0:
+            await asyncio.sleep(delay_before)
+
+        text = text or ""
+        chunk_size, delay = self.plan(len(text))
+        for i in range(0, len(text), chunk_size):
+            if i and delay > 0:
+                await asyncio.sleep(delay)
+            yield sse_event({'type': 'streaming', 'speaker': speaker, 'content': text[i:i + chunk_size], **extra})
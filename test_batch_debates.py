@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+배치 논쟁 생성기 테스트 (API 호출 없이)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import pytest
+
+from batch_debates import PERSONAS, CacheRecorder, RateLimiter, ResultWriter, main, run_batch
+from catalog import CatalogSnapshot, get_catalog
+from chatbot_flow_v3 import DynamicAIChatBotSystem
+from config import Config
+from debate_flows import stored_opening_graph
+from opening_pool import OpeningPool
+from streaming import StreamPacer
+from turn_graph import stream_turns
+
+PRODUCTS = [{'id': 0, 'name': 'TV'}, {'id': 1, 'name': '정수기'}]
+
+
+def fake_system(delay=0.02, log=None):
+    """_call_ai_api만 대역으로 바꾼 DynamicAIChatBotSystem (프롬프트 해시로 응답 생성)"""
+    system = DynamicAIChatBotSystem()
+
+    async def call(messages, temperature=0.9, max_tokens=500, **labels):
+        if log is not None:
+            log.append(time.perf_counter())
+        await asyncio.sleep(delay)
+        digest = hashlib.md5(json.dumps(messages, ensure_ascii=False).encode('utf-8')).hexdigest()[:8]
+        return f"응답 {digest}이긴해"
+
+    system._call_ai_api = call
+    return system
+
+
+def test_batch_writes_every_debate():
+    """제품 × 프로필 × 시드 논쟁이 모두 기록되고 논쟁마다 첫 논쟁 5회 + 응답 4회 호출"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "debates.jsonl")
+        summary = asyncio.run(run_batch(PRODUCTS, PERSONAS, 2, ResultWriter(path), system=fake_system(), concurrency=4))
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+    assert summary['debates'] == len(records) == len(PRODUCTS) * len(PERSONAS) * 2
+    assert summary['errors'] == 0
+    assert {(r['product_id'], r['persona'], r['seed']) for r in records} == {
+        (p['id'], persona['name'], seed) for p in PRODUCTS for persona in PERSONAS for seed in range(2)
+    }
+    for record in records:
+        assert record['llm_calls'] == 9
+        speakers = [turn['speaker'] for turn in record['turns']]
+        assert speakers[:5] == ['구매봇', '구독봇', '구매봇', '구독봇', '안내봇']
+        assert speakers[5] == '사용자' and speakers[-1] == '안내봇'
+
+
+def test_rate_limit_spaces_calls():
+    """초당 호출 수 제한: 호출 시작 예정 시각 간격 = 1/rate (벽시계 대신 멈춘 가짜 시계로 확인)"""
+    log = []
+    sleeps = []
+    rate = 50.0
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        await asyncio.sleep(0)
+
+    limiter = RateLimiter(rate, clock=lambda: 100.0, sleep=fake_sleep)
+    asyncio.run(run_batch(PRODUCTS[:1], PERSONAS[:1], 2, ResultWriter(os.devnull), system=fake_system(0.0, log),
+                          concurrency=2, limiter=limiter))
+    assert len(log) == 18
+    # 시계가 멈춰 있으므로 첫 호출은 바로, 나머지는 k/rate초 뒤로 차례대로 예약
+    assert sorted(sleeps) == pytest.approx([k / rate for k in range(1, 18)])
+
+    async def scheduled():
+        limiter = RateLimiter(rate, clock=lambda: 0.0, sleep=fake_sleep)
+        return [await limiter.acquire() for _ in range(3)]
+    assert asyncio.run(scheduled()) == pytest.approx([0.0, 1 / rate, 2 / rate])
+
+    async def burst():
+        limiter = RateLimiter(0)
+        return [await limiter.acquire() for _ in range(100)]
+    assert asyncio.run(burst()) == [None] * 100  # rate 0이면 제한 없음 (대기 없음)
+
+
+def test_job_rng_is_isolated():
+    """작업별 난수 생성기: 같은 시드면 동시 실행 순서와 관계없이 같은 인트로/첫 봇, 전역 난수는 건드리지 않음"""
+    import random
+
+    from debate_flows import dynamic_opening_graph, dynamic_response_graph
+
+    def picks(seed):
+        rng = random.Random(seed)
+        opening = dynamic_opening_graph(None, 0, rng=rng)
+        response = dynamic_response_graph(None, 0, "질문", [], rng=rng)
+        return opening.nodes[-1].render("?"), response.nodes[0].speaker, response.nodes[-1].render("?")
+
+    random.seed(7)
+    expected_global = random.random()
+    random.seed(7)
+    first = picks("0:페르소나:1")
+    assert random.random() == expected_global
+    assert picks("0:페르소나:1") == first
+
+
+def test_seeded_cache_and_opening_pool():
+    """생성 결과로 채운 캐시/첫 논쟁 풀을 서버 쪽에서 그대로 재사용"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "cache.jsonl")
+        pool_path = os.path.join(tmp, "openings.jsonl")
+        recorder = CacheRecorder()
+        asyncio.run(run_batch(PRODUCTS[:1], PERSONAS[:1], 1, ResultWriter(os.devnull), system=fake_system(),
+                              recorder=recorder, opening_pool_path=pool_path))
+        assert recorder.save(cache_path) == 9
+
+        # 캐시: 같은 프롬프트는 업스트림 호출 없이 기록된 응답 반환
+        server = DynamicAIChatBotSystem()
+        assert server.load_cache_file(cache_path) == 9
+        original = Config.LLM_CACHE_ENABLED
+        Config.LLM_CACHE_ENABLED = True
+        try:
+            text = asyncio.run(server.generate_purchase_argument(0, {'turn': 1, 'previous_statements': []}))
+        finally:
+            Config.LLM_CACHE_ENABLED = original
+        assert text in recorder.entries.values()
+
+        # 첫 논쟁 풀: 저장된 턴을 LLM 없이 같은 형식으로 재생
+        pool = OpeningPool(pool_path)
+        assert len(pool) == 1 and pool.pick(0) and pool.pick(1) is None
+        entry = pool.pick(0)
+        assert entry['catalog_digest'] == get_catalog().digest
+        # 카탈로그가 바뀌면(핫 리로드) 옛 카탈로그로 만든 논쟁은 재생하지 않음
+        changed = CatalogSnapshot({**get_catalog().data, 'products': get_catalog().products[1:]})
+        assert changed.digest != get_catalog().digest
+        assert pool.pick(0, changed.digest) is None and pool.pick(0) is entry
+
+        async def replay():
+            events = []
+            async for event in stream_turns(stored_opening_graph(entry['turns']).start(), StreamPacer('none')):
+                events.append(json.loads(event[6:]))
+            return events
+        events = asyncio.run(replay())
+        streamed = ''.join(e['content'] for e in events if e['type'] == 'streaming' and e['speaker'] == '구매봇')
+        assert entry['turns']['purchase'] in streamed
+
+
+def test_parquet_requires_pyarrow():
+    """pyarrow가 없으면 Parquet 출력은 안내 메시지와 함께 종료"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        try:
+            main(['--output', 'x.parquet', '--products', '0'])
+        except SystemExit as e:
+            assert 'pyarrow' in str(e)
+        else:
+            raise AssertionError("SystemExit이 발생해야 합니다")
+
+
+if __name__ == "__main__":
+    test_batch_writes_every_debate()
+    test_rate_limit_spaces_calls()
+    test_job_rng_is_isolated()
+    test_seeded_cache_and_opening_pool()
+    test_parquet_requires_pyarrow()
+    print("✅ 배치 논쟁 생성기 테스트 통과")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+핫 경로 마이크로 벤치마크 테스트 (소규모 실행 / 기준값 비교 판정 / 저장된 기준값 형식)
+"""
+
+import os
+
+import pytest
+
+import catalog
+from benchmarks.bench_hotpaths import (
+    BASELINE_FILE,
+    DEFAULT_SIZES,
+    compare,
+    load_baseline,
+    main,
+    run,
+    save_baseline,
+)
+from catalog import DEFAULT_PRODUCTS_FILE
+from llm_standin import standin_credentials
+
+
+@pytest.fixture(autouse=True)
+def credentials():
+    """ChatBot 클라이언트 생성용 더미 자격 증명 (테스트가 끝나면 원래대로)"""
+    with standin_credentials():
+        yield
+
+
+def test_small_run_restores_default_catalog():
+    before = catalog.get_catalog(DEFAULT_PRODUCTS_FILE)
+    report = run(sizes=[10], rounds=1, target_s=0.001)
+    results = report['results']
+
+    for name in ('validate_sentence_count', 'sse_event_short', 'product_by_id@10', 'pricing_quote@10',
+                 'data_driven_prompt_purchase@10', 'dynamic_purchase_prompt@10', 'dynamic_question_prompt@10'):
+        assert results[name] > 0, name
+        assert report['reference'][name] > 0, name
+    assert 'catalog_setup_ms@10' in results
+    # 합성 카탈로그는 실행 후 제거되고 원래 파일을 다시 읽음
+    after = catalog.get_catalog(DEFAULT_PRODUCTS_FILE)
+    assert len(after) == len(before)
+
+
+def test_compare_flags_regressions():
+    baseline = {'results': {'a': 10.0, 'b': 10.0, 'c': 10.0, 'd': 0.1, 'catalog_setup_ms@10': 5.0},
+                'reference': {'a': 1.0, 'b': 1.0, 'c': 1.0, 'd': 1.0}}
+    current = {'results': {'a': 20.0, 'b': 10.5, 'c': 5.0, 'd': 0.2, 'e': 1.0, 'catalog_setup_ms@10': 50.0},
+               'reference': {'a': 1.0, 'b': 1.0, 'c': 1.0, 'd': 1.0, 'e': 1.0}}
+    rows = {row['name']: row for row in compare(current, baseline, threshold=0.25)}
+
+    assert rows['a']['status'] == 'regression' and rows['a']['ratio'] == 2.0
+    assert rows['b']['status'] == 'ok'
+    assert rows['c']['status'] == 'improvement'
+    assert rows['d']['status'] == 'ok'  # 2배지만 차이가 잡음 수준
+    assert rows['e']['status'] == 'new'
+    assert rows['catalog_setup_ms@10']['status'] == 'ok'
+
+
+def test_compare_normalizes_by_reference():
+    """기계 전체가 2배 느려진 경우는 회귀가 아님"""
+    baseline = {'results': {'a': 10.0}, 'reference': {'a': 1.0}}
+    slower_machine = {'results': {'a': 20.0}, 'reference': {'a': 2.0}}
+    row = compare(slower_machine, baseline, threshold=0.25)[0]
+    assert row['raw_ratio'] == 2.0 and row['ratio'] == 1.0 and row['status'] == 'ok'
+
+    without_reference = {'results': {'a': 20.0}}
+    assert compare(without_reference, baseline, threshold=0.25)[0]['status'] == 'regression'
+
+
+def test_committed_baseline_covers_all_sizes():
+    baseline = load_baseline(BASELINE_FILE)
+    assert baseline['sizes'] == list(DEFAULT_SIZES)
+    for size in DEFAULT_SIZES:
+        assert f"product_by_id@{size}" in baseline['results']
+        assert f"dynamic_purchase_prompt@{size}" in baseline['results']
+    assert set(baseline['reference']) <= set(baseline['results'])
+
+
+def test_cli_compare_exit_code(path='/tmp/test_bench_hotpaths_baseline.json'):
+    report = run(sizes=[10], rounds=1, target_s=0.001, only=['sse_event'])
+    fast = dict(report, results={name: value / 100 for name, value in report['results'].items()})
+    save_baseline(fast, path)
+    argv = ['--sizes', '10', '--rounds', '1', '--target', '0.001', '--only', 'sse_event', '--baseline', path]
+    assert main(argv + ['--compare']) == 1
+
+    slow = dict(report, results={name: value * 100 for name, value in report['results'].items()})
+    save_baseline(slow, path)
+    assert main(argv + ['--compare']) == 0
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    with standin_credentials():
+        test_small_run_restores_default_catalog()
+        test_compare_flags_regressions()
+        test_compare_normalizes_by_reference()
+        test_committed_baseline_covers_all_sizes()
+        test_cli_compare_exit_code()
+    print("✅ 핫 경로 마이크로 벤치마크 테스트 통과")
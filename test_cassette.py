@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+LLM 호출 녹화/재생 테스트 (실제 API 호출 없이 /product/debate/dynamic, /respond 전체 플로우)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+
+import pytest
+
+from cassette import Cassette, fingerprint
+from chatbot_flow_v3 import dynamic_ai_system
+from debate_flows import CONCLUSION_REQUEST
+from llm_standin import standin_credentials
+
+CHUNK_DELAY = 0.02
+
+
+@pytest.fixture
+def api():
+    """api_v3_complete (import 시 ChatBot 클라이언트를 만들므로 더미 자격 증명으로 로드)"""
+    with standin_credentials():
+        import api_v3_complete
+        yield api_v3_complete
+
+
+async def fake_upstream(payload):
+    """스트리밍 업스트림 대역: 프롬프트 해시로 만든 응답을 3청크로 전송"""
+    digest = hashlib.md5(json.dumps(payload['messages'], ensure_ascii=False).encode('utf-8')).hexdigest()[:6]
+    for text in (f"응답 {digest} ", "그래서 추천하", "긴해!"):
+        await asyncio.sleep(CHUNK_DELAY)
+        yield text
+
+
+async def no_upstream(payload):
+    raise AssertionError("재생 모드에서 업스트림을 호출했습니다")
+    yield  # pragma: no cover
+
+
+async def _events(response):
+    return [json.loads(event[6:]) async for event in response.body_iterator]
+
+
+async def run_session(api, seed=7):
+    """첫 논쟁 → 사용자 응답 → 결론, 전체 이벤트 반환 (seed: 전역 난수 시드, 카세트 사용 중에는 결과와 무관해야 함)"""
+    random.seed(seed)
+    opening = await _events(await api.start_dynamic_debate(api.ProductDebateRequest(product_id=0, pacing="none")))
+    history = next(e for e in opening if e['type'] == 'guide_question')['history']
+    random.seed(seed + 1)
+    respond = await _events(await api.respond_to_user_dynamic(api.UserResponseRequest(
+        product_id=0, user_input="월 5만원 이하로 3년 쓸 거예요", conversation_history=history, pacing="none"
+    )))
+    history = next(e for e in respond if e['type'] == 'guide_question')['history']
+    conclusion = await _events(await api.respond_to_user_dynamic(api.UserResponseRequest(
+        product_id=0, user_input=CONCLUSION_REQUEST, conversation_history=history, pacing="none"
+    )))
+    return opening + respond + conclusion
+
+
+def _texts(events):
+    return [(e['speaker'], e['content']) for e in events if e['type'] == 'streaming']
+
+
+def _play(api, cassette, upstream, seed=7):
+    original = dynamic_ai_system.cassette, dynamic_ai_system._stream_upstream
+    dynamic_ai_system.cassette, dynamic_ai_system._stream_upstream = cassette, upstream
+    try:
+        started = time.perf_counter()
+        events = asyncio.run(run_session(api, seed))
+        return events, time.perf_counter() - started
+    finally:
+        dynamic_ai_system.cassette, dynamic_ai_system._stream_upstream = original
+
+
+def test_record_then_replay_full_flow(api):
+    """녹화한 카세트로 같은 플로우를 업스트림 없이 같은 결과/비슷한 지연으로 재생"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "debate.json")
+        recorded, record_s = _play(api, Cassette(path, "record"), fake_upstream)
+        assert not any(e['type'] == 'error' for e in recorded)
+
+        saved = Cassette(path, "replay")
+        assert len(saved) >= 10  # 첫 논쟁 5 + 응답 4 + 결론 1
+        interaction = next(iter(saved.interactions.values()))[0]
+        assert len(interaction['chunks']) == 3 and interaction['ttft'] >= CHUNK_DELAY * 0.9
+        assert interaction['fingerprint'] == fingerprint(interaction['request'])
+
+        # 전역 난수 시드가 녹화 때와 달라도 (서버 재시작 등) 인트로/첫 봇 선택이 같아 재생됨
+        replay = Cassette(path, "replay", time_scale=1.0)
+        replayed, replay_s = _play(api, replay, no_upstream, seed=1234)
+        assert not replay.misses
+        assert _texts(replayed) == _texts(recorded)
+        assert replay_s > record_s * 0.5  # 기록된 지연을 그대로 재현
+
+        instant = Cassette(path, "replay", time_scale=0)
+        fast, fast_s = _play(api, instant, no_upstream)
+        assert _texts(fast) == _texts(recorded)
+        assert fast_s < replay_s
+
+
+def test_replay_miss_falls_back():
+    """기록되지 않은 요청은 업스트림 실패와 같은 기본 응답으로 처리하고 miss로 기록"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = Cassette(os.path.join(tmp, "empty.json"), "replay")
+        original = dynamic_ai_system.cassette
+        dynamic_ai_system.cassette = cassette
+        try:
+            text = asyncio.run(dynamic_ai_system._call_ai_api([{'role': 'user', 'content': '안녕'}]))
+        finally:
+            dynamic_ai_system.cassette = original
+        assert text == dynamic_ai_system._get_fallback_response()
+        assert len(cassette.misses) == 1
+
+
+def test_record_saves_off_loop_in_batches():
+    """동시에 끝난 녹화 호출은 파일을 호출마다 다시 쓰지 않고 묶어서 저장 (저장은 이벤트 루프 밖 스레드)"""
+    import threading
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = Cassette(os.path.join(tmp, "batch.json"), "record")
+        save = cassette.save
+        threads = []
+
+        def counting_save():
+            threads.append(threading.current_thread())
+            save()
+        cassette.save = counting_save
+
+        async def record_all():
+            payloads = [{'messages': [{'role': 'user', 'content': f"질문 {n}"}]} for n in range(20)]
+            return await asyncio.gather(*(cassette.complete(payload, fake_upstream) for payload in payloads))
+
+        texts = asyncio.run(record_all())
+        assert len(set(texts)) == 20
+        assert 1 <= len(threads) < 20
+        assert threading.main_thread() not in threads
+        assert len(Cassette(cassette.path, "replay")) == 20
+
+
+if __name__ == "__main__":
+    with standin_credentials():
+        import api_v3_complete
+        test_record_then_replay_full_flow(api_v3_complete)
+        test_replay_miss_falls_back()
+        test_record_saves_off_loop_in_batches()
+    print("✅ LLM 녹화/재생 테스트 통과")
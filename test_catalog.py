@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+카탈로그 스냅샷 / ProductManager 인덱스 테스트
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import catalog
+from benchmarks.synthetic_catalog import write_catalog
+from product_manager import ProductManager
+
+
+def test_shared_snapshot_parses_once():
+    """ProductManager를 여러 번 생성해도 파일은 한 번만 파싱"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "products.json"), 2000)
+        catalog.reset(path)
+        before = catalog.stats['parses']
+
+        managers = [ProductManager(path) for _ in range(20)]
+
+        assert catalog.stats['parses'] - before == 1
+        assert all(pm.snapshot is managers[0].snapshot for pm in managers)
+        catalog.reset(path)
+
+
+def test_index_lookups():
+    """id / 이름 / 정규화 이름 조회"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "products.json"), 500)
+        catalog.reset(path)
+        pm = ProductManager(path)
+        last = pm.products[-1]
+
+        assert pm.get_product_by_id(499) is last
+        assert pm.get_product_by_id(500) is None
+        assert pm.get_product_by_name(last['name']) is last
+        assert pm.get_product_by_name(last['name'].replace(' ', '').upper()) is None
+        assert pm.get_product_by_name(last['name'].replace(' ', '').upper(), fuzzy=True) is last
+        catalog.reset(path)
+
+
+def test_save_swaps_snapshot_and_keeps_common_data():
+    """제품 추가 시 새 스냅샷으로 교체되고 공통 혜택/위약금 정보 유지"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "products.json"), 3)
+        catalog.reset(path)
+        pm = ProductManager(path)
+        old = pm.snapshot
+
+        assert pm.add_product({'name': '새 제품', 'purchase_price': 1000})
+        assert pm.snapshot.version == old.version + 1
+        assert len(old.products) == 3  # 기존 스냅샷은 그대로
+        assert pm.get_product_by_name('새 제품')['id'] == 3
+
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved['penalty_info'] == old.penalty_info
+        assert saved['common_subscription_benefits'] == old.common_subscription_benefits
+        catalog.reset(path)
+
+
+def _rewrite(path, mutate):
+    """카탈로그 파일 수정 (mtime이 확실히 바뀌도록 조정)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    mutate(data)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_hot_reload_swaps_version_and_invalidates_caches():
+    """파일 변경 시 새 버전으로 교체, 파생 캐시 무효화"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "products.json"), 3)
+        catalog.reset(path)
+        old = catalog.get_catalog(path)
+        cache = catalog.VersionedCache(path)
+        cache.set('price', old.get(0)['purchase_price'])
+
+        assert catalog.reload_if_changed(path) is None  # 변경 없음
+
+        _rewrite(path, lambda data: data['products'][0].update(purchase_price=777))
+        watcher = catalog.CatalogWatcher(path)
+        new = asyncio.run(watcher.check())
+
+        assert new is not None and new.version == old.version + 1
+        assert catalog.get_catalog(path) is new
+        assert ProductManager(path).get_product_by_id(0)['purchase_price'] == 777
+        assert old.get(0)['purchase_price'] != 777  # 기존 스냅샷은 그대로
+        assert cache.get('price') is None
+        catalog.reset(path)
+
+
+def test_invalid_reload_keeps_previous_snapshot():
+    """검증 실패 시 기존 스냅샷 유지"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_catalog(os.path.join(tmp, "products.json"), 3)
+        catalog.reset(path)
+        old = catalog.get_catalog(path)
+
+        _rewrite(path, lambda data: data['products'][1].update(id=0))
+        assert catalog.reload_if_changed(path) is None
+        assert catalog.get_catalog(path) is old
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"products": [')
+        assert catalog.reload_if_changed(path) is None
+        assert catalog.get_catalog(path) is old
+        catalog.reset(path)
+
+
+def test_versioned_cache_lru():
+    """maxsize 초과 시 오래된 항목 제거"""
+    cache = catalog.VersionedCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert 'b' not in cache and cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get_or_compute('d', lambda: 4) == 4 and len(cache) == 2
+
+
+if __name__ == "__main__":
+    test_shared_snapshot_parses_once()
+    test_index_lookups()
+    test_save_swaps_snapshot_and_keeps_common_data()
+    test_hot_reload_swaps_version_and_invalidates_caches()
+    test_invalid_reload_keeps_previous_snapshot()
+    test_versioned_cache_lru()
+    print("✅ 카탈로그 테스트 통과")
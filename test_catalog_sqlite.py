@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+SQLite 카탈로그 저장소 테스트
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+import catalog
+from catalog_sqlite import SQLiteCatalogStore
+from product_manager import ProductManager
+
+with open('new_products.json', 'r', encoding='utf-8') as f:
+    SOURCE = json.load(f)
+
+
+def test_import_round_trip():
+    """JSON 가져오기 → 내보내기 결과가 원본과 동일 (공통 혜택/위약금 정보 포함)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCatalogStore(os.path.join(tmp, "products.db"))
+        store.import_json('new_products.json')
+
+        assert store.load_document() == SOURCE
+        assert store.get_product(1) == SOURCE['products'][1]
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_benefit_search():
+    """혜택 FTS 검색 (긴 단어는 FTS5, 짧은 단어는 LIKE)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCatalogStore(os.path.join(tmp, "products.db"))
+        store.import_json('new_products.json')
+
+        hits = store.search_benefits('선 결제')
+        assert hits and all('선' in hit['text'] and '결제' in hit['text'] for hit in hits)
+        assert any(hit['product_id'] is None for hit in store.search_benefits('카드 할인'))
+        assert store.search_benefits('존재하지않는혜택') == []
+
+
+def test_row_level_updates_through_product_manager():
+    """ProductManager가 SQLite 경로면 제품 단위로 저장하고 스냅샷 교체"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "products.db")
+        SQLiteCatalogStore(path).import_json('new_products.json')
+        catalog.reset(path)
+        pm = ProductManager(path)
+        version = pm.snapshot.version
+
+        assert pm.add_product({'name': '테스트 제품', 'purchase_price': 1000, 'subscription_price': {'3년': 100},
+                               'subscription_benefits': ['테스트 전용 무료설치']})
+        updated = dict(pm.get_product_by_id(1), purchase_price=999000)
+        assert pm.update_product(1, updated)
+        assert pm.delete_product(0)
+
+        assert pm.snapshot.version == version + 3
+        assert catalog.reload_if_changed(path) is None  # 이미 반영된 리비전
+        document = SQLiteCatalogStore(path).load_document()
+        assert [p['id'] for p in document['products']] == [1, 2, 3, 4]
+        assert document['products'][0]['purchase_price'] == 999000
+        assert document['penalty_info'] == SOURCE['penalty_info']
+        assert pm.search_benefits('무료설치')[0]['product_id'] == 4
+        catalog.reset(path)
+
+
+def test_concurrent_writers():
+    """여러 스레드에서 동시에 제품 추가"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCatalogStore(os.path.join(tmp, "products.db"))
+        store.import_json('new_products.json')
+
+        def writer(offset):
+            for i in range(10):
+                store.upsert_product({'id': 100 + offset * 10 + i, 'name': f'제품 {offset}-{i}'})
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(store.load_document()['products']) == len(SOURCE['products']) + 40
+
+
+if __name__ == "__main__":
+    test_import_round_trip()
+    test_benefit_search()
+    test_row_level_updates_through_product_manager()
+    test_concurrent_writers()
+    print("✅ SQLite 카탈로그 테스트 통과")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+여러 제품 비교 논쟁 / 복수 구독 묶음 분석 테스트 (API 호출 없이)
+"""
+
+import asyncio
+import json
+import time
+
+from bundle import bundle_analysis, bundle_summary
+from cost_curves import get_cost_curves
+from debate_flows import dynamic_compare_graph
+from streaming import StreamPacer
+from turn_graph import stream_turns
+
+
+class SlowProductSystem:
+    """제품별로 응답 시간이 다른 DynamicAIChatBotSystem 대역 (동시 실행 수 기록)"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.running = 0
+        self.peak = 0
+
+    async def _reply(self, name, product_id):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delays[product_id])
+            return f"{product_id}번 {name} 주장이긴해"
+        finally:
+            self.running -= 1
+
+    def generate_purchase_argument(self, product_id, context):
+        return self._reply('구매', product_id)
+
+    def generate_subscription_argument(self, product_id, context):
+        return self._reply('구독', product_id)
+
+
+PRODUCTS = [{'id': 0, 'name': 'TV'}, {'id': 1, 'name': '정수기'}, {'id': 2, 'name': '건조기'}]
+
+
+async def _collect(system, max_concurrency):
+    turn_run = dynamic_compare_graph(system, PRODUCTS, max_concurrency=max_concurrency).start()
+    started = time.perf_counter()
+    events = [json.loads(event[6:]) async for event in stream_turns(turn_run, StreamPacer('none'), completion_order=True)]
+    return events, time.perf_counter() - started
+
+
+def test_fan_out_latency_close_to_slowest_product():
+    """제품별 주장이 동시에 생성되어 전체 지연 ≈ 가장 느린 제품, 빠른 제품부터 전송"""
+    system = SlowProductSystem({0: 0.3, 1: 0.05, 2: 0.1})
+    events, elapsed = asyncio.run(_collect(system, max_concurrency=6))
+    assert elapsed < 0.45, elapsed  # 순차 실행이면 0.9초
+    assert system.peak == 6
+
+    streamed = [event for event in events if event['type'] == 'streaming']
+    assert len(streamed) == 6
+    assert [event['product_id'] for event in streamed] == [1, 1, 2, 2, 0, 0]
+    assert all(event['product_name'] and event['content'].startswith(f"{event['product_id']}번") for event in streamed)
+    assert sum(event['type'] == 'complete' for event in events) == 6
+
+
+def test_fan_out_respects_concurrency_bound():
+    """동시 LLM 호출 수는 max_concurrency를 넘지 않음"""
+    system = SlowProductSystem({0: 0.05, 1: 0.05, 2: 0.05})
+    events, elapsed = asyncio.run(_collect(system, max_concurrency=2))
+    assert system.peak == 2
+    assert elapsed >= 0.14  # 6턴 / 2 = 3라운드
+    assert sum(event['type'] == 'streaming' for event in events) == 6
+
+
+def test_bundle_analysis_matches_pricing_tables():
+    """묶음 합계 = 제품별 대표 기간 월 구독료/총 비용 합, 1개만 구독하면 할인 대상 아님"""
+    curves = get_cost_curves()
+    table = curves.table
+    analysis = bundle_analysis(curves, [0, 1, 2], 'max')
+    s = table.scenarios.index('max')
+    expected_monthly = 0
+    for item in analysis['products']:
+        i = table.product_ids.index(item['id'])
+        t = table.periods.index(item['period'])
+        assert item['period'] == table.best_period(item['id'])
+        assert item['monthly'] == int(curves.subscription_monthly[i, t, s])
+        expected_monthly += item['monthly']
+    combined = analysis['combined']
+    assert combined['monthly'] == expected_monthly
+    assert combined['total'] == sum(item['total'] for item in analysis['products'])
+    assert combined['bundled_monthly'] == combined['monthly'] - combined['monthly_saving']
+    assert combined['purchase_upfront'] == sum(item['purchase_upfront'] for item in analysis['products'])
+
+    single = bundle_analysis(curves, [0], 'max')
+    assert not single['eligible'] and single['combined']['monthly_saving'] == 0
+    assert '2개 이상' in single['note']
+
+    summary = bundle_summary(analysis)
+    assert f"{combined['purchase_upfront']:,}원" in summary and f"월 {combined['monthly']:,}원" in summary
+
+
+if __name__ == "__main__":
+    test_fan_out_latency_close_to_slowest_product()
+    test_fan_out_respects_concurrency_bound()
+    test_bundle_analysis_matches_pricing_tables()
+    print("✅ 여러 제품 비교 테스트 통과")
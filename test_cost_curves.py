@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+누적 비용 곡선 / 손익분기 테스트
+"""
+
+import numpy as np
+
+import catalog
+import cost_curves
+from catalog import DEFAULT_PRODUCTS_FILE
+from cost_curves import CostCurves, get_cost_curves
+
+
+def test_break_even_matches_curve_crossing():
+    """닫힌 식으로 구한 손익분기 월 = 곡선이 처음 교차하는 달"""
+    curves = get_cost_curves()
+    table = curves.table
+    for s, scenario in enumerate(table.scenarios):
+        data = curves.curves(range(len(table.product_ids)), scenario)
+        for i in range(len(table.product_ids)):
+            for t in range(len(table.periods)):
+                if np.isnan(curves.subscription_monthly[i, t, s]):
+                    assert curves.break_even[i, t, s] == -1
+                    continue
+                months = int(table.months[t])
+                crossed = np.nonzero(data['subscription'][i, t, :months + 1] >= data['purchase'][i, :months + 1])[0]
+                expected = int(crossed[0]) if len(crossed) else -1
+                assert curves.break_even[i, t, s] == expected, (i, t, scenario)
+
+
+def test_exit_cost_includes_penalty_on_base_fee():
+    """중도 해지 비용 = 납부액 + 잔여기간 기본요금 × 위약금률"""
+    curves = get_cost_curves()
+    response = curves.response([0], 'max')
+    six_years = response['products'][0]['subscriptions']['6년']
+    quote = curves.table.quote(0, '6년', scenario='max')
+    month = 10
+    paid = quote['final_monthly'] * month - quote['membership_points']
+    assert six_years['exit_cost'][month] == int(paid + 65400 * (72 - month) * 0.3)
+    assert six_years['exit_cost'][72] == six_years['cumulative'][72]
+    assert response['products'][0]['resale_value'] == int(2720000 * 0.6)
+    assert curves.response([0], 'max') is response  # 캐시
+
+
+def test_response_cache_key_is_canonical_and_bounded():
+    """중복 / 순서가 다른 요청은 같은 응답, 캐시는 RESPONSE_CACHE_SIZE개까지"""
+    curves = CostCurves(catalog.get_catalog(DEFAULT_PRODUCTS_FILE))  # 빈 캐시
+    response = curves.response([1, 0], 'max')
+    assert [p['id'] for p in response['products']] == [0, 1]  # 카탈로그 순서
+    assert curves.response([0, 1, 0, 99], 'max') is response
+    assert len(curves._responses) == 1
+
+    saved = cost_curves.RESPONSE_CACHE_SIZE
+    cost_curves.RESPONSE_CACHE_SIZE = 3
+    try:
+        for ids in ([0], [1], [2], [3], [0, 2]):
+            curves.response(ids, 'base')
+        assert len(curves._responses) == 3
+        assert list(curves._responses) == [((2,), 'base'), ((3,), 'base'), ((0, 2), 'base')]  # 오래된 항목부터 제거
+    finally:
+        cost_curves.RESPONSE_CACHE_SIZE = saved
+
+
+if __name__ == "__main__":
+    test_break_even_matches_curve_crossing()
+    test_exit_cost_includes_penalty_on_base_fee()
+    test_response_cache_key_is_canonical_and_bounded()
+    print("✅ 비용 곡선 테스트 통과")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+할인 규칙 엔진 테스트
+"""
+
+import numpy as np
+
+import catalog
+from benefit_facts import facts_for
+from discount_rules import RULES, SCENARIOS, DiscountEngine, DiscountRule, RuleContext
+from pricing import PricingTable, get_pricing_table
+
+
+def test_scenarios_match_previous_calculators():
+    """기존 계산기와 동일: 카드 min(22,000, 20%) + 선결제, 포인트/초기 할인은 일회성 차감"""
+    engine = get_pricing_table().discounts
+    result = engine.evaluate(0, '6년', 'max')
+    card = min(22000, int(65400 * 0.2))
+    assert result['rules'] == {'card': card, 'prepay': 2600, 'points': 250000, 'intro': 0}
+    assert result['monthly_discount'] == card + 2600 and result['credit'] == 250000
+    assert result['details'] == [f"제휴카드 할인 월 {card:,}원", "선결제 할인 월 2,600원", "멤버십 포인트 250,000P 적립"]
+    assert engine.evaluate(0, '6년', 'base')['monthly_discount'] == 0
+    assert engine.evaluate(0, '6년', 'max') is result  # 메모이즈
+    assert engine.evaluate(2, '4년', 'max') is None  # 건조기는 6년만 제공
+
+
+def test_max_scenario_includes_intro_discount():
+    """프롬프트/계산기 기준 시나리오(max)에 정수기 첫 12개월 반값 포함"""
+    table = get_pricing_table()
+    water = table.quote(1, '6년', scenario='max')
+    assert water['intro_discount'] == int(28900 * 0.5) * 12
+    assert water['net_total'] == water['total'] - water['membership_points'] - water['intro_discount']
+    assert "초기 할인 173,400원" in water['discount_details']
+
+
+def test_all_scenario_adds_intro_and_energy_rebate():
+    """전체 혜택: 첫 12개월 반값(정수기), 에너지 환급 min(10%, 30만원) 구독/구매 모두 차감"""
+    table = get_pricing_table()
+    water = table.quote(1, '6년', scenario='all')
+    assert water['intro_discount'] == int(28900 * 0.5) * 12
+    assert water['energy_rebate'] == int(1128000 * 0.1)
+    assert water['net_total'] == water['total'] - water['membership_points'] - water['intro_discount'] - water['energy_rebate']
+    tv = table.discounts.evaluate(0, '6년', 'all')
+    assert tv['purchase_credit'] == 272000 and tv['rules']['bundle'] == 0  # 복수 구독 할인율 미설정
+
+
+def test_batch_matches_single_evaluation():
+    """일괄 평가 = 단일 평가, 텐서와 동일"""
+    table = get_pricing_table()
+    engine = table.discounts
+    batch = engine.evaluate_batch('card_prepay')
+    for product in batch['products']:
+        for period, result in product['periods'].items():
+            assert result == engine.evaluate(product['id'], period, 'card_prepay')
+            quote = table.quote(product['id'], period, scenario='card_prepay')
+            assert quote['final_monthly'] == quote['base_monthly'] - result['monthly_discount']
+
+
+def test_custom_rules_compile():
+    """규칙/시나리오를 선언만으로 추가, 없는 규칙 참조는 오류"""
+    snapshot = catalog.CatalogSnapshot({
+        'common_subscription_benefits': ['가전 복수 구독으로 월 구독료를 추가 할인 받을 수 있음'],
+        'products': [{'id': 1, 'name': 'x', 'purchase_price': 100000, 'subscription_price': {'3년': 10000}}],
+    })
+    table = PricingTable(snapshot)
+    ctx = RuleContext(facts_for(snapshot), table.product_ids, table.base_monthly, table.months, table.purchase_price)
+    rules = RULES[:2] + (DiscountRule('bundle', '복수 구독 할인', 'bundle_percent', params={'rate': 0.1}),)
+    engine = DiscountEngine(ctx, table.periods, rules, {'bundle_only': ('bundle',)})
+    assert engine.evaluate(1, '3년', 'bundle_only')['monthly_discount'] == 1000
+    assert np.isclose(engine.monthly_discount[0, 0, 0], 1000)
+    try:
+        DiscountEngine(ctx, table.periods, rules, {'broken': ('nope',)})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ValueError가 발생해야 합니다")
+    assert set(SCENARIOS) >= {'base', 'card', 'card_prepay', 'max', 'all'}
+
+
+if __name__ == "__main__":
+    test_scenarios_match_previous_calculators()
+    test_max_scenario_includes_intro_discount()
+    test_all_scenario_adds_intro_and_energy_rebate()
+    test_batch_matches_single_evaluation()
+    test_custom_rules_compile()
+    print("✅ 할인 규칙 엔진 테스트 통과")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+워커 생명주기 테스트 (워밍업 단계 / 스트림 드레인 / 준비 상태 엔드포인트 / serve.py 멀티 워커 SIGTERM 드레인)
+"""
+
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from lifecycle import Lifecycle
+from serve import build_config, default_workers
+
+
+def test_warmup_records_steps():
+    calls = []
+
+    def sync_step(system):
+        calls.append(('sync', system))
+        return {'items': 3}
+
+    async def async_step(system):
+        calls.append(('async', system))
+        return {'opened': 1}
+
+    def broken_step(system):
+        raise RuntimeError("카탈로그 없음")
+
+    state = Lifecycle()
+    assert not state.ready
+    report = asyncio.run(state.warmup("system", steps=(('a', sync_step), ('b', broken_step), ('c', async_step))))
+    assert state.ready and report['state'] == "ready"
+    assert calls == [('sync', "system"), ('async', "system")]  # 실패한 단계가 있어도 계속
+    assert report['steps']['a']['ok'] and report['steps']['a']['items'] == 3
+    assert report['steps']['b'] == {'ok': False, 'error': "카탈로그 없음", 'ms': report['steps']['b']['ms']}
+    assert report['steps']['c']['opened'] == 1 and report['warmup_ms'] >= 0
+
+
+def test_track_drains_after_deadline():
+    state = Lifecycle()
+    state.mark_ready()
+    closed = []
+
+    async def events():
+        try:
+            for i in range(5):
+                await asyncio.sleep(0)
+                yield f"data: {i}\n\n"
+        finally:
+            closed.append(True)
+
+    async def read(stream):
+        return [event async for event in stream]
+
+    async def scenario():
+        # 마감 전이면 끝까지 전송
+        state.begin_drain(timeout=60)
+        complete = await read(state.track(events()))
+        state.drain_deadline = None
+        # 마감이 지나면 이미 보낸 이벤트 뒤에 server_draining을 보내고 닫음
+        stream = state.track(events())
+        first = await stream.__anext__()
+        assert state.open_streams == 1
+        state.begin_drain(timeout=0)
+        rest = await read(stream)
+        return complete, [first] + rest
+
+    complete, cut = asyncio.run(scenario())
+    assert len(complete) == 5
+    assert cut[0] == "data: 0\n\n" and json.loads(cut[-1][6:])['type'] == "server_draining" and len(cut) == 2
+    assert closed == [True, True] and state.open_streams == 0
+    assert state.state == "draining" and not state.ready
+
+
+def test_ready_endpoint():
+    from benchmarks.load_sse import spawn_backend
+    from lifecycle import lifecycle
+
+    with spawn_backend('instant', seed=0) as backend:
+        ready = httpx.get(f"{backend['url']}/health/ready").json()
+        lifecycle.begin_drain(timeout=60)
+        try:
+            draining = httpx.get(f"{backend['url']}/health/ready")
+        finally:
+            lifecycle.mark_ready()
+
+    assert ready['status'] == "ready" and ready['state'] == "ready"
+    steps = ready['steps']
+    assert set(steps) == {'catalog', 'prompts', 'caches', 'connections'} and all(s['ok'] for s in steps.values())
+    assert steps['catalog']['products'] > 0 and steps['connections']['opened'] >= 1
+    assert draining.status_code == 503
+
+
+def test_launcher_config():
+    config = build_config("127.0.0.1", 8000, 3)
+    assert config.workers == 3 and config.loop in ("uvloop", "asyncio") and config.http in ("httptools", "h11")
+    assert config.timeout_graceful_shutdown > 0
+    assert default_workers() >= 1
+
+
+def _start_server(standin_url: str, port: int, rollup_dir: str, **env) -> subprocess.Popen:
+    environ = dict(os.environ, FRIENDLI_BASE_URL=f"{standin_url}/v1", USAGE_ROLLUP_DIR=rollup_dir,
+                   SHARED_STATE_URL=f"sqlite:///{os.path.join(rollup_dir, 'state.db')}",
+                   AZURE_OPENAI_API_KEY=os.environ.get('AZURE_OPENAI_API_KEY', 'standin'),
+                   AZURE_OPENAI_ENDPOINT=os.environ.get('AZURE_OPENAI_ENDPOINT', standin_url))
+    environ.update(env)
+    process = subprocess.Popen([sys.executable, "serve.py", "--workers", "2", "--host", "127.0.0.1", "--port", str(port),
+                                "--log-level", "warning"], env=environ, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/ready").status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    process.kill()
+    raise AssertionError("serve.py가 준비되지 않았습니다")
+
+
+def _sigterm_during_stream(process: subprocess.Popen, port: int):
+    """첫 이벤트를 받은 뒤 부모 프로세스에 SIGTERM, 스트림의 이벤트 종류와 종료 코드 반환"""
+    types = []
+    first = threading.Event()
+
+    def read():
+        with httpx.stream("POST", f"http://127.0.0.1:{port}/product/debate/dynamic", json={'product_id': 1},
+                          timeout=60) as response:
+            for line in response.iter_lines():
+                if line.startswith("data: "):
+                    types.append(json.loads(line[6:])['type'])
+                    first.set()
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    assert first.wait(30)
+    process.send_signal(signal.SIGTERM)
+    reader.join(60)
+    return types, process.wait(60)
+
+
+def test_sigterm_drains_open_streams():
+    from benchmarks.load_sse import _free_port, _serve_in_thread
+    from llm_standin import LATENCY_PROFILES, create_app
+
+    standin, thread, standin_url = _serve_in_thread(create_app(LATENCY_PROFILES['fast'], seed=0))
+    try:
+        with tempfile.TemporaryDirectory() as rollup_dir:
+            # 드레인 시간 안에 끝나는 스트림은 끝까지 받음
+            port = _free_port()
+            finished, code = _sigterm_during_stream(_start_server(standin_url, port, rollup_dir), port)
+            # 드레인 시간이 지나면 server_draining 후 닫힘
+            port = _free_port()
+            cut, cut_code = _sigterm_during_stream(_start_server(standin_url, port, rollup_dir, DRAIN_TIMEOUT="0"), port)
+            rollups = [name for name in os.listdir(rollup_dir) if name.startswith('usage-')]
+    finally:
+        standin.should_exit = True
+        thread.join(timeout=10)
+
+    assert code == 0 and cut_code == 0
+    assert finished[-1] == "waiting_user" and "server_draining" not in finished
+    assert cut[-1] == "server_draining" and "waiting_user" not in cut
+    assert rollups  # 종료 시 사용량 롤업 저장 (앱 shutdown까지 실행됨)
+
+
+if __name__ == "__main__":
+    test_warmup_records_steps()
+    test_track_drains_after_deadline()
+    test_ready_endpoint()
+    test_launcher_config()
+    test_sigterm_drains_open_streams()
+    print("✅ 워커 생명주기 테스트 통과")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+로컬 LLM 대역 서버 테스트 (실제 클라이언트 코드로 Friendli/Azure 경로 호출)
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from dataclasses import replace
+
+import httpx
+import uvicorn
+
+from llm_standin import LATENCY_PROFILES, LatencyProfile, classify, create_app, tokenize
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class RunningServer:
+    """백그라운드 스레드에서 uvicorn으로 대역 서버 실행"""
+
+    def __init__(self, profile: LatencyProfile, seed: int = 0):
+        self.app = create_app(profile, seed)
+        self.port = _free_port()
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host='127.0.0.1', port=self.port, log_level='error'))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started and time.time() < deadline:
+            time.sleep(0.02)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def test_classify_and_tokenize():
+    assert classify([{'role': 'system', 'content': '당신은 구매봇입니다'}, {'role': 'user', 'content': '주장'}]) == 'purchase'
+    assert classify([{'role': 'system', 'content': '당신은 구독봇입니다'}, {'role': 'user', 'content': '주장'}]) == 'subscription'
+    assert classify([{'role': 'system', 'content': '안내봇'}, {'role': 'user', 'content': '다음 질문'}]) == 'question'
+    assert classify([{'role': 'user', 'content': '형식:\n옵션1: ..'}]) == 'options'
+    assert ''.join(tokenize("한 번 사면 내 거긴해.")) == "한 번 사면 내 거긴해."
+
+
+def test_friendli_paths_and_timing():
+    """Friendli 경로: 비스트리밍/스트리밍, TTFT와 초당 토큰 수 반영, max_tokens 초과 시 length"""
+    profile = LatencyProfile(ttft_ms=100, ttft_sigma=0, tokens_per_second=100, tps_jitter=0)
+    with RunningServer(profile) as server:
+        body = {'model': 'exaone', 'messages': [{'role': 'system', 'content': '구매봇'}, {'role': 'user', 'content': '주장'}]}
+        started = time.perf_counter()
+        result = httpx.post(f"{server.url}/serverless/v1/chat/completions", json=body, timeout=10).json()
+        elapsed = time.perf_counter() - started
+        tokens = result['usage']['completion_tokens']
+        assert result['choices'][0]['message']['content'].endswith('긴해.')
+        assert elapsed >= 0.1 + (tokens - 1) / 100 * 0.9
+
+        chunks, first = [], None
+        started = time.perf_counter()
+        with httpx.stream('POST', f"{server.url}/v1/chat/completions", json={**body, 'stream': True, 'max_tokens': 5}, timeout=10) as response:
+            for line in response.iter_lines():
+                if line.startswith('data: ') and line != 'data: [DONE]':
+                    chunk = json.loads(line[6:])
+                    delta = chunk['choices'][0]['delta'].get('content')
+                    if delta:
+                        first = first or time.perf_counter() - started
+                        chunks.append(delta)
+                    finish = chunk['choices'][0]['finish_reason']
+        assert len(chunks) == 5 and finish == 'length'
+        assert 0.09 <= first < 0.5
+
+
+def test_error_and_rate_limit_injection():
+    """429(Retry-After) / 500 오류 비율 주입"""
+    with RunningServer(replace(LATENCY_PROFILES['instant'], rate_limit_rate=0.5, error_rate=0.25), seed=1) as server:
+        with httpx.Client(base_url=server.url, timeout=10) as client:
+            codes = [client.post("/v1/chat/completions", json={'messages': []}).status_code for _ in range(200)]
+            stats = client.get("/stats").json()
+    assert 70 < codes.count(429) < 130 and 25 < codes.count(500) < 75
+    assert stats['rate_limited'] == codes.count(429) and stats['errors'] == codes.count(500)
+
+
+def test_real_clients_work_against_standin():
+    """v3 _call_ai_api(FRIENDLI_BASE_URL)와 Azure OpenAI SDK 스트리밍이 그대로 동작"""
+    import os
+    from openai import AzureOpenAI
+    from chatbot_flow_v3 import DynamicAIChatBotSystem
+
+    with RunningServer(LATENCY_PROFILES['instant']) as server:
+        original = os.environ.get('FRIENDLI_BASE_URL')
+        os.environ['FRIENDLI_BASE_URL'] = f"{server.url}/v1"
+        try:
+            system = DynamicAIChatBotSystem()
+        finally:
+            if original is None:
+                os.environ.pop('FRIENDLI_BASE_URL')
+            else:
+                os.environ['FRIENDLI_BASE_URL'] = original
+        text = asyncio.run(system._call_ai_api([{'role': 'system', 'content': '당신은 구독봇입니다'}, {'role': 'user', 'content': '주장'}]))
+        assert text != system._get_fallback_response() and '긴해' in text
+
+        client = AzureOpenAI(api_key='x', api_version='2024-02-15-preview', azure_endpoint=server.url)
+        stream = client.chat.completions.create(
+            model='gpt-4o', messages=[{'role': 'system', 'content': '구매봇'}, {'role': 'user', 'content': '주장'}], stream=True
+        )
+        text = ''.join(chunk.choices[0].delta.content or '' for chunk in stream if chunk.choices)
+        assert '긴해' in text
+        assert httpx.get(f"{server.url}/stats").json()['streaming'] == 1
+
+
+if __name__ == "__main__":
+    test_classify_and_tokenize()
+    test_friendli_paths_and_timing()
+    test_error_and_rate_limit_injection()
+    test_real_clients_work_against_standin()
+    print("✅ LLM 대역 서버 테스트 통과")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+SSE 부하 테스트 도구 테스트 (LLM 대역 서버 + 앱을 이 프로세스에서 실행해 소규모 부하)
+"""
+
+import asyncio
+import json
+import os
+
+from benchmarks.load_sse import main, run_load, spawn_backend, summarize
+
+
+def test_summarize():
+    report = summarize([0.001, 0.002, 0.003, 0.004])
+    assert report['count'] == 4
+    assert report['p50'] == 2.5
+    assert report['max'] == 4.0
+    assert summarize([]) == {'count': 0}
+
+
+def test_spawned_load_run():
+    with spawn_backend('instant', seed=0) as backend:
+        report = asyncio.run(run_load(
+            backend['url'], sessions=6, concurrency=3, rounds=1, seed=0, server_probe=backend['server_probe'],
+        ))
+        stats = backend['standin'].state.stats
+
+    assert report['sessions'] == {'completed': 6, 'failed': 0}
+    assert report['error_rate'] == 0.0 and report['errors'] == {}
+    assert report['upstream_fallback_turns'] == 0
+    assert report['requests'] == 6 * 3  # 첫 논쟁 + respond 1회 + 결론
+    for kind in ('opening', 'respond', 'conclusion'):
+        assert report['ttfb_ms'][kind]['count'] == 6
+    assert report['time_to_waiting_user_ms']['count'] == 6
+    assert report['conclusion_ms']['count'] == 6
+    assert report['inter_event_ms']['count'] > 0
+    assert report['event_loop_lag_ms']['server']['count'] > 0
+    assert stats.requests > 0
+
+
+def test_cli_report_file(tmp_path='/tmp/test_load_sse_report.json'):
+    tmp_path = str(tmp_path)
+    if os.path.isdir(tmp_path):
+        tmp_path = os.path.join(tmp_path, 'report.json')
+    report = main(['--spawn', '--standin-profile', 'instant', '--sessions', '2', '--concurrency', '2',
+                   '--rounds', '0', '--products', '0', '--report', tmp_path])
+    with open(tmp_path, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['sessions']['completed'] == 2
+    assert saved['config']['product_ids'] == [0]
+    assert saved['config']['standin_profile'] == 'instant'
+    assert report['requests'] == 4
+
+
+if __name__ == "__main__":
+    test_summarize()
+    test_spawned_load_run()
+    test_cli_report_file()
+    print("✅ SSE 부하 테스트 도구 테스트 통과")
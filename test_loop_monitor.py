@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+이벤트 루프 감시 테스트 (막은 위치 / 스택 캡처, strict 모드, 챗봇 스트리밍이 루프를 막지 않는지, 앱 디버그 엔드포인트)
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from config import Config
+from llm_standin import standin_credentials
+from loop_monitor import LoopBlockedError, LoopMonitor
+from metrics import event_loop_blocked
+
+
+@pytest.fixture
+def credentials():
+    """ChatBot 클라이언트 생성용 더미 자격 증명 (호출은 가짜 클라이언트로 대체)"""
+    with standin_credentials():
+        yield
+
+
+def blocking_helper(seconds: float):
+    time.sleep(seconds)  # 이벤트 루프 안에서 동기 대기
+
+
+def test_captures_blocking_stack():
+    monitor = LoopMonitor(threshold_ms=80)
+    before = event_loop_blocked.labels().value
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        blocking_helper(0.3)
+        await asyncio.sleep(0.1)
+        monitor.stop()
+
+    asyncio.run(scenario())
+    report = monitor.report()
+    assert not report['running']
+    assert report['blocked'] >= 1
+    assert report['lag_ms']['max'] >= 250
+    worst = report['offenders'][0]
+    assert worst['location'].startswith("test_loop_monitor.py:") and worst['location'].endswith("blocking_helper"), worst
+    assert any("scenario" in frame for frame in worst['stack'])
+    assert worst['max_ms'] >= 250
+    assert report['recent'][-1]['location'] == worst['location']
+    assert event_loop_blocked.labels().value >= before + 1
+
+    try:
+        monitor.check()
+        assert False, "막힌 적이 있으면 LoopBlockedError"
+    except LoopBlockedError as e:
+        assert "blocking_helper" in str(e)
+
+
+def test_quiet_loop_passes_check():
+    monitor = LoopMonitor(threshold_ms=500)
+
+    async def scenario():
+        monitor.start()
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+        monitor.stop()
+
+    asyncio.run(scenario())
+    assert monitor.blocked == 0 and monitor.beats > 0
+    monitor.check()
+
+
+@pytest.mark.usefixtures("credentials")
+def test_streaming_chatbot_does_not_block_loop():
+    """동기 스트림의 청크 대기는 스레드에서 (청크 간 지연이 루프를 막으면 다른 세션이 함께 멈춤)"""
+    from chatbots import ChatBot
+
+    def slow_stream(**kwargs):
+        for word in ("일시불로", "사면", "끝이긴해"):
+            time.sleep(0.15)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+
+    saved = Config.AI_PROVIDER
+    Config.AI_PROVIDER = "azure"
+    try:
+        bot = ChatBot("구매봇", "gpt-4o", "테스트", "구매")
+    finally:
+        Config.AI_PROVIDER = saved
+    bot.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=slow_stream)))
+    monitor = LoopMonitor(threshold_ms=100)
+
+    async def scenario():
+        monitor.start()
+        chunks = [chunk async for chunk in bot.generate_streaming_response("안녕")]
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        return chunks
+
+    assert asyncio.run(scenario()) == ["일시불로", "사면", "끝이긴해"]
+    assert monitor.blocked == 0, monitor.report()
+
+
+def test_app_debug_endpoint():
+    from benchmarks.load_sse import spawn_backend
+
+    saved = Config.ADMIN_TOKEN
+    Config.ADMIN_TOKEN = "test-admin"
+    try:
+        with spawn_backend('instant', seed=0) as backend:
+            time.sleep(0.2)
+            url = f"{backend['url']}/debug/event-loop"
+            assert httpx.get(url).status_code == 403  # 관리자 전용
+            report = httpx.get(url, headers={'X-Admin-Token': 'test-admin'}).json()
+            text = httpx.get(f"{backend['url']}/metrics").text
+    finally:
+        Config.ADMIN_TOKEN = saved
+    assert report['running']
+    assert report['threshold_ms'] == Config.LOOP_BLOCK_THRESHOLD_MS
+    assert report['lag_ms']['samples'] > 0
+    assert 'event_loop_lag_seconds_count' in text
+
+
+if __name__ == "__main__":
+    test_captures_blocking_stack()
+    test_quiet_loop_passes_check()
+    with standin_credentials():
+        test_streaming_chatbot_does_not_block_loop()
+    test_app_debug_endpoint()
+    print("✅ 이벤트 루프 감시 테스트 통과")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+메트릭 테스트 (텍스트 형식 / 히스토그램 누적 / 실제 앱에서 HTTP·SSE·LLM 메트릭 수집)
+"""
+
+import asyncio
+import re
+
+import httpx
+
+from metrics import LLMCallTimer, Registry, llm_calls
+
+
+def parse(text: str) -> dict:
+    """'이름{레이블} 값' 줄을 dict로"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            key, value = line.rsplit(' ', 1)
+            samples[key] = float(value)
+    return samples
+
+
+def sample_sum(samples: dict, name: str, **labels) -> float:
+    """이름과 레이블이 맞는 샘플 값 합계"""
+    total = 0.0
+    for key, value in samples.items():
+        metric = key.split('{', 1)[0]
+        if metric == name and all(f'{k}="{v}"' in key for k, v in labels.items()):
+            total += value
+    return total
+
+
+def test_text_format():
+    registry = Registry()
+    requests = registry.counter("demo_requests_total", "요청 수", ("route",))
+    in_flight = registry.gauge("demo_in_flight", "처리 중")
+    latency = registry.histogram("demo_seconds", "지연", ("route",), buckets=(0.1, 1.0))
+
+    requests.labels("/a").inc()
+    requests.labels("/a").inc(2)
+    requests.labels('/b"q').inc()
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("/a").observe(value)
+
+    text = registry.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert "# TYPE demo_seconds histogram" in text
+    samples = parse(text)
+    assert samples['demo_requests_total{route="/a"}'] == 3
+    assert samples['demo_requests_total{route="/b\\"q"}'] == 1
+    assert samples['demo_in_flight'] == 1
+    assert samples['demo_seconds_bucket{route="/a",le="0.1"}'] == 2  # le는 이하 (0.1 포함)
+    assert samples['demo_seconds_bucket{route="/a",le="1"}'] == 3
+    assert samples['demo_seconds_bucket{route="/a",le="+Inf"}'] == 4
+    assert samples['demo_seconds_count{route="/a"}'] == 4
+    assert abs(samples['demo_seconds_sum{route="/a"}'] - 3.65) < 1e-9
+
+    try:
+        requests.labels("/a", "extra")
+        assert False, "레이블 개수가 다르면 ValueError"
+    except ValueError:
+        pass
+
+
+def test_llm_call_timer():
+    before = llm_calls.labels("test_site", "unit", "ok").value
+    timer = LLMCallTimer("test_site", "unit")
+    timer.first_token()
+    timer.finish(prompt_tokens=10, completion_tokens=5)
+    timer.finish()  # 두 번째 finish는 무시
+    assert llm_calls.labels("test_site", "unit", "ok").value == before + 1
+
+
+def test_app_metrics_under_load():
+    from benchmarks.load_sse import run_load, spawn_backend
+
+    with spawn_backend('instant', seed=0) as backend:
+        report = asyncio.run(run_load(backend['url'], sessions=3, concurrency=3, rounds=1, seed=0))
+        text = httpx.get(f"{backend['url']}/metrics").text
+        assert httpx.get(f"{backend['url']}/metrics").headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert report['sessions']['completed'] == 3
+    samples = parse(text)
+
+    route = "/product/debate/dynamic"
+    assert sample_sum(samples, 'http_requests_total', route=route, status="200") >= 3
+    assert sample_sum(samples, 'http_request_duration_seconds_count', route=route) >= 3
+    assert sample_sum(samples, 'sse_first_event_seconds_count', route=route) >= 3
+    assert sample_sum(samples, 'sse_waiting_user_seconds_count', route=route) >= 3
+    assert sample_sum(samples, 'sse_waiting_user_seconds_count', route=route + "/respond") >= 3
+    assert sample_sum(samples, 'sse_active_streams') == 0  # 모두 종료
+    assert sample_sum(samples, 'http_requests_total', route="/products") >= 1  # 라우트 템플릿 기준
+
+    for call_site in ('purchase', 'subscription', 'rebuttal', 'question', 'response'):
+        assert sample_sum(samples, 'llm_calls_total', call_site=call_site, provider="friendli", outcome="ok") >= 3, call_site
+        assert sample_sum(samples, 'llm_ttft_seconds_count', call_site=call_site) >= 3
+    assert sample_sum(samples, 'llm_tokens_total', kind="prompt") > 0
+    assert sample_sum(samples, 'llm_tokens_total', kind="completion") > 0
+    assert re.search(r'^http_requests_in_flight \d', text, re.M)
+
+
+if __name__ == "__main__":
+    test_text_format()
+    test_llm_call_timer()
+    test_app_metrics_under_load()
+    print("✅ 메트릭 테스트 통과")
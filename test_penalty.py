@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+중도 해지 위약금 모델 테스트
+"""
+
+import copy
+
+import numpy as np
+
+import catalog
+from catalog import DEFAULT_PRODUCTS_FILE
+from penalty import PenaltyModel, PenaltyTable, get_penalty_table, termination_rates
+
+PENALTY_INFO = {
+    'early_termination_fee': {
+        'description': '의무사용기간 내 고객 요청에 의한 임의 해지 시 위약금이 부과되며, 월요금은 할인되기 전의 기본요금을 기준으로 해요.',
+        'rates': {
+            'before_1_year': '잔여 의무사용기간 내 총 요금의 30%',
+            '1_to_2_years': '잔여 의무사용기간 내 총 요금의 20%',
+            'after_2_years': '잔여 의무사용기간 내 총 요금의 10%',
+        },
+    },
+}
+
+
+def test_model_parsed_from_penalty_prose():
+    """penalty_info 문장에서 경과 기간별 위약금률 구조화"""
+    model = PenaltyModel.from_penalty_info(PENALTY_INFO)
+    assert [(tier.start, tier.end, tier.rate) for tier in model.tiers] == [(0, 12, 0.3), (12, 24, 0.2), (24, None, 0.1)]
+    assert model.pre_discount_base and model.max_rate == 0.3
+    assert model.rate_at(11) == 0.3 and model.rate_at(12) == 0.2 and model.rate_at(60) == 0.1
+
+    rates = termination_rates(PENALTY_INFO, 36)
+    assert rates[0] == rates[11] == 0.3
+    assert rates[12] == rates[23] == 0.2
+    assert rates[24] == rates[36] == 0.1
+    assert not PenaltyModel.from_penalty_info({}).tiers
+
+
+def test_table_matches_scalar_formula():
+    """테이블 전체 = 기본 월요금 × 잔여 개월 × 위약금률 (스칼라 계산과 동일)"""
+    penalties = get_penalty_table()
+    table = penalties.table
+    for i, pid in enumerate(table.product_ids):
+        for t, period in enumerate(table.periods):
+            months = int(table.months[t])
+            schedule = penalties.schedule(pid, period)
+            if np.isnan(table.base_monthly[i, t]):
+                assert schedule == [] and penalties.lookup(pid, period, 1) is None
+                continue
+            base = int(table.base_monthly[i, t])
+            expected = [int(base * (months - m) * penalties.model.rate_at(m)) for m in range(months + 1)]
+            assert schedule == expected, (pid, period)
+
+
+def test_lookup_and_prompt_line():
+    """단일 조회와 프롬프트 문장에 정확한 금액 포함"""
+    penalties = get_penalty_table()
+    quote = penalties.lookup(0, '6년', 10)
+    assert quote['penalty'] == int(65400 * 62 * 0.3)
+    assert quote['remaining_months'] == 62 and quote['rate'] == 0.3
+    assert penalties.lookup(0, '6년', 100)['penalty'] == 0  # 계약 만료 이후
+    assert penalties.lookup(99, '6년', 1) is None
+
+    line = penalties.prompt_line(0, '6년')
+    assert line.startswith('6년 구독') and f"6개월 차 해지 시 {int(65400 * 66 * 0.3):,}원" in line
+
+    response = penalties.response([0], exit_month=12)
+    assert response['products'][0]['penalties']['6년']['penalty'] == int(65400 * 60 * 0.2)
+    assert penalties.response([0, 0], exit_month=12)['products'] == response['products']  # 중복 제거
+
+
+def test_response_cache_and_basis_line():
+    """전체 카탈로그 응답만 해지 시점별로 캐시 (최장 계약기간 이후는 같은 항목), 기준 문구는 모델에서"""
+    penalties = PenaltyTable(catalog.get_catalog(DEFAULT_PRODUCTS_FILE))  # 빈 캐시
+    full = penalties.response(exit_month=12)
+    assert penalties.response(exit_month=12) is full
+    beyond = penalties.response(exit_month=10 ** 6)
+    assert beyond is penalties.response(exit_month=10 ** 6 + 1) is penalties.response(exit_month=penalties.max_months)
+    assert beyond['exit_month'] == penalties.max_months
+    penalties.response([0], exit_month=5)
+    assert set(penalties._responses) == {12, penalties.max_months}
+
+    assert "(할인 전 기본요금 × 잔여 개월 기준)" in penalties.prompt_line(0, '6년')
+    data = copy.deepcopy(catalog.get_catalog(DEFAULT_PRODUCTS_FILE).data)
+    data['penalty_info']['early_termination_fee']['description'] = '월요금은 할인이 적용된 요금을 기준으로 해요.'
+    discounted = PenaltyTable(catalog.CatalogSnapshot(data, version=-1))
+    assert not discounted.model.pre_discount_base
+    line = discounted.prompt_line(0, '6년')
+    assert "할인 후 요금" in line and "할인 전" not in line
+
+
+if __name__ == "__main__":
+    test_model_parsed_from_penalty_prose()
+    test_table_matches_scalar_formula()
+    test_lookup_and_prompt_line()
+    test_response_cache_and_basis_line()
+    print("✅ 위약금 모델 테스트 통과")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+가격 매트릭스 엔진 테스트
+"""
+
+import numpy as np
+
+import catalog
+from pricing import PricingTable, get_pricing_table
+
+
+def test_tensor_shape_and_missing_cells():
+    """축 구성과 제공하지 않는 조합(NaN)"""
+    table = get_pricing_table()
+    assert table.periods == ['3년', '4년', '5년', '6년']
+    assert table.monthly.shape == (4, 4, len(table.care_options), len(table.scenarios))
+    assert table.quote(2, '4년') is None  # 건조기는 6년만 제공
+    assert table.quote(1, '6년', care='1회/6개월')['care_monthly'] == 3500
+    assert table.quote(0, '6년', care='1회/6개월') is None  # TV는 케어 가격 없음
+
+
+def test_quote_matches_previous_discount_math():
+    """기존 최대 할인 계산과 동일 (제휴카드 min(22,000, 20%) + 선결제 + 포인트 차감)"""
+    quote = get_pricing_table().quote(0, '6년', scenario='max')
+    card = min(22000, int(65400 * 0.2))
+    assert quote['card_discount'] == card
+    assert quote['prepay_discount'] == 2600
+    assert quote['final_monthly'] == 65400 - card - 2600
+    assert quote['net_total'] == (65400 - card - 2600) * 72 - 250000
+    assert get_pricing_table().quote(0, '6년', scenario='base')['total'] == 65400 * 72
+
+
+def test_matrix_subset_and_version_cache():
+    """부분 매트릭스 조회 및 카탈로그 버전별 1회 계산"""
+    table = get_pricing_table()
+    matrix = table.matrix([1], ['4년', '6년'], ['없음'], ['base', 'max'])
+    assert matrix['axes']['months'] == [48, 72]
+    assert matrix['products'][0]['monthly'] == [[[36900, 36900 - 7380]], [[28900, 28900 - 5780]]]
+    assert get_pricing_table() is table
+
+    snapshot = catalog.CatalogSnapshot({'products': [{'id': 7, 'name': 'x', 'purchase_price': 10, 'subscription_price': {'36개월': 1000}}]})
+    small = PricingTable(snapshot)
+    assert small.periods == ['36개월'] and np.isclose(small.total[0, 0, 0, 0], 36000)
+
+
+def test_string_care_price_uses_no_care_column():
+    """케어 가격이 '무료' 등 문자열이면 '없음'(0원) 열만 계산, 케어 옵션 조합은 없음"""
+    table = get_pricing_table()
+    dryer = table.quote(2, '6년', scenario='base')  # care_service_price: '무료'
+    assert dryer['care_option'] == '없음' and dryer['care_monthly'] == 0
+    assert dryer['total'] == 38900 * 72
+    assert table.quote(2, '6년', care='1회/6개월') is None
+
+    snapshot = catalog.CatalogSnapshot({'products': [
+        {'id': 7, 'name': 'x', 'purchase_price': 10, 'subscription_price': {'3년': 1000}, 'care_service_price': '무료'},
+    ]})
+    small = PricingTable(snapshot)
+    assert small.care_options == ['없음'] and small.quote(7, '3년', scenario='base')['total'] == 36000
+
+
+if __name__ == "__main__":
+    test_tensor_shape_and_missing_cells()
+    test_quote_matches_previous_discount_math()
+    test_matrix_subset_and_version_cache()
+    test_string_care_price_uses_no_care_column()
+    print("✅ 가격 매트릭스 테스트 통과")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+예산 조건 제품 검색 테스트
+"""
+
+import time
+
+from product_search import BudgetQuery, budget_context, get_search_index, parse_budget
+
+
+def test_parse_korean_budget_phrases():
+    """만원/원/천원, 월/일시불/총, 이하/이상, 년/개월 추출"""
+    assert parse_budget("월 5만원 이하로 부담없이 사용하고 싶어요") == BudgetQuery(monthly_max=50000)
+    assert parse_budget("일시불 200만원 안쪽이면 좋겠어") == BudgetQuery(purchase_max=2000000)
+    assert parse_budget("6년 계약으로 월 3만 5천원 정도") == BudgetQuery(monthly_max=35000, period='6년')
+    assert parse_budget("총 300만원 넘지 않게, 36개월 약정") == BudgetQuery(total_max=3000000, period='3년')
+    assert parse_budget("월 30,000원 이상 50,000원 이하") == BudgetQuery(monthly_min=30000, monthly_max=50000)
+    assert not parse_budget("6년이 좋아").has_amount
+    assert parse_budget("그냥 구경중이에요").is_empty
+
+
+def test_parse_negated_ranges_and_yearly_amounts():
+    # 하한 표현을 부정하면 상한
+    assert parse_budget("한 번에 100만원 이상은 못 써요") == BudgetQuery(purchase_max=1000000)
+    assert parse_budget("월 5만원 넘는 건 안 돼요") == BudgetQuery(monthly_max=50000)
+    # "N만원대"는 그 자리수의 구간
+    assert parse_budget("월 10만원대") == BudgetQuery(monthly_min=100000, monthly_max=199999)
+    assert parse_budget("3만원대로 6년 쓸 거예요") == BudgetQuery(monthly_min=30000, monthly_max=39999, period='6년')
+    # "N년에 얼마"는 계약기간이 아니라 연간 금액 (월 금액으로 환산)
+    assert parse_budget("1년에 50만원 정도") == BudgetQuery(monthly_max=500000 // 12)
+    assert parse_budget("2년에 120만원, 6년 계약") == BudgetQuery(monthly_max=50000, period='6년')
+    assert parse_budget("연 60만원 이하") == BudgetQuery(monthly_max=50000)
+
+
+def test_parse_ignores_unrelated_periods_and_lump_sums():
+    # 계약/사용 표현이 없는 기간은 계약기간이 아님
+    assert parse_budget("2년 후 이사 예정이라 월 4만원 이하면 좋겠어요") == BudgetQuery(monthly_max=40000)
+    _, results, line = budget_context("2년 후 이사 예정이라 월 4만원 이하면 좋겠어요", 0)
+    assert results and "계약" not in line
+    # 부담/싫음도 하한의 부정
+    assert parse_budget("월 5만원 넘는 건 부담돼요") == BudgetQuery(monthly_max=50000)
+    assert parse_budget("3만원 이상은 싫어요") == BudgetQuery(monthly_max=30000)
+    # 월 단서 없는 큰 금액은 월 구독료로 보지 않음
+    assert not parse_budget("100만원 이상은 못 써요").has_amount
+    assert parse_budget("월 100만원 이상은 못 써요") == BudgetQuery(monthly_max=1000000)
+    # 카탈로그에 없는 계약기간은 검색 조건에서 빠짐
+    query, results, line = budget_context("10년 약정으로 월 5만원 이하", 0)
+    assert query.period is None and results and "계약" not in line
+
+
+def test_range_search_matches_brute_force():
+    """bisect 범위 조회 = 전체 스캔 결과"""
+    index = get_search_index()
+    curves = index.curves
+    s = index.scenarios.index('base')
+    t = index.periods.index('6년')
+    for limit in (20000, 30000, 40000, 60000, 100000):
+        found = {item['id'] for item in index.search(BudgetQuery(monthly_max=limit, period='6년'))}
+        expected = {
+            pid for i, pid in enumerate(index.product_ids)
+            if curves.subscription_monthly[i, t, s] <= limit
+        }
+        assert found == expected, limit
+    results = index.search(BudgetQuery(monthly_max=50000))
+    assert [item['monthly'] for item in results] == sorted(item['monthly'] for item in results)
+    assert {item['id'] for item in index.search(BudgetQuery(purchase_max=1500000))} == {1, 2}
+    # 카탈로그에 없는 계약기간은 무시 (전부 걸러내지 않음)
+    assert index.search(BudgetQuery(monthly_max=50000, period='10년')) == index.search(BudgetQuery(monthly_max=50000))
+    assert index.supported(BudgetQuery(period='10년')) == BudgetQuery()
+
+
+def test_lookup_is_fast_and_context_line():
+    """조회 1건 1ms 미만, 다음 봇 턴 프롬프트 문장 생성"""
+    index = get_search_index()
+    query = parse_budget("월 5만원 이하")
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.search(query)
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+    _, results, line = budget_context("월 5만원 이하로 부담없이 사용하고 싶어요", 0)
+    assert results and line.startswith("[예산 검색] 월 50,000원 이하")
+    assert "현재 제품은 조건 불충족" in line
+    assert budget_context("결론을 내줘", 0)[2] == ""
+
+
+if __name__ == "__main__":
+    test_parse_korean_budget_phrases()
+    test_parse_negated_ranges_and_yearly_amounts()
+    test_parse_ignores_unrelated_periods_and_lump_sums()
+    test_range_search_matches_brute_force()
+    test_lookup_is_fast_and_context_line()
+    print("✅ 예산 검색 테스트 통과")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+샘플링 프로파일러 테스트 (스레드 스택 / async 생성기를 거치는 태스크 await 체인 / 챗봇 호출 지점 이름 / 관리자 엔드포인트)
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import profiler
+from config import Config
+from llm_standin import standin_credentials
+from profiler import SamplingProfiler, parse_collapsed
+
+
+@pytest.fixture
+def credentials():
+    """ChatBot 클라이언트 생성용 더미 자격 증명 (호출은 가짜 클라이언트로 대체)"""
+    with standin_credentials():
+        yield
+
+
+def spin(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def frames_of(text: str):
+    """collapsed 텍스트의 스택을 함수 이름만 남긴 목록으로"""
+    return [([frame.split(' (')[0] for frame in stack], count) for stack, count in parse_collapsed(text)]
+
+
+def test_thread_samples():
+    worker = threading.Thread(target=spin, args=(0.3,), name="spinner")
+    sampler = SamplingProfiler(interval=0.002)
+    sampler.start()
+    worker.start()
+    worker.join()
+    sampler.stop()
+
+    assert not sampler.running and sampler.samples > 10
+    text = sampler.collapsed("threads")
+    spinner = [(stack, count) for stack, count in frames_of(text) if stack[0] == "thread:spinner"]
+    assert spinner and all('spin' in stack for stack, _ in spinner)
+    assert "spin (test_profiler.py:" in text
+    assert "sampling-profiler" not in text  # 자기 자신은 제외
+    top = {row['frame'].split(' (')[0]: row for row in sampler.top("threads")}
+    assert top['spin']['total'] >= sum(count for _, count in spinner)
+
+
+def test_task_chain_through_async_generator():
+    async def ticker():
+        for i in range(4):
+            await asyncio.sleep(0.05)
+            yield i
+
+    async def consume():
+        values = []
+        async for i in ticker():
+            values.append(i)
+        return values
+
+    async def scenario():
+        task = asyncio.ensure_future(consume())
+        result = await profiler.profile(0.15, interval=0.002)
+        assert await task == [0, 1, 2, 3]
+        return result
+
+    assert not profiler.busy()
+    result = asyncio.run(scenario())
+    assert not profiler.busy()
+    chains = [stack for stack, _ in frames_of(result.collapsed("tasks"))]
+    # 기본 태스크 이름은 'task'로 묶이고, async for 아래 생성기 프레임까지 이어짐
+    expected = ['task', 'test_task_chain_through_async_generator.<locals>.consume',
+                'test_task_chain_through_async_generator.<locals>.ticker', 'sleep', 'Future']
+    assert expected in chains, chains
+    assert result.task_samples > 0 and result.report()['tasks']
+
+
+def test_one_profile_at_a_time():
+    async def scenario():
+        first = asyncio.ensure_future(profiler.profile(0.1))
+        await asyncio.sleep(0.01)
+        assert profiler.busy()
+        try:
+            await profiler.profile(0.1)
+            assert False, "동시에 두 번 수집하면 RuntimeError"
+        except RuntimeError:
+            pass
+        await first
+
+    asyncio.run(scenario())
+    assert not profiler.busy()
+    assert not any(t.name == "sampling-profiler" for t in threading.enumerate())  # 유휴 시 스레드 없음
+
+
+@pytest.mark.usefixtures("credentials")
+def test_chatbot_call_site_named():
+    from chatbots import ChatBot
+
+    def slow_stream(**kwargs):
+        for word in ("구독하면", "관리까지", "해주는거지"):
+            time.sleep(0.05)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+
+    saved = Config.AI_PROVIDER
+    Config.AI_PROVIDER = "azure"
+    try:
+        bot = ChatBot("구독봇", "gpt-4o", "테스트", "구독")
+    finally:
+        Config.AI_PROVIDER = saved
+    bot.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=slow_stream)))
+
+    async def scenario():
+        reply = asyncio.ensure_future(bot.generate_response("안녕"))
+        result = await profiler.profile(0.12, interval=0.002)
+        await reply
+        return result
+
+    text = asyncio.run(scenario()).collapsed("tasks")
+    assert "ChatBot.generate_response (chatbots.py:" in text
+    assert "ChatBot.generate_streaming_response (chatbots.py:" in text
+
+
+def test_admin_profile_endpoint():
+    from benchmarks.load_sse import run_load, spawn_backend
+
+    saved = Config.ADMIN_TOKEN
+    Config.ADMIN_TOKEN = "test-admin"
+    responses = {}
+    try:
+        with spawn_backend('instant', seed=0) as backend:
+            url = f"{backend['url']}/debug/profile"
+            assert httpx.get(url, params={'seconds': 0.1}).status_code == 403
+            assert httpx.get(url, params={'seconds': 0.1}, headers={'X-Admin-Token': 'wrong'}).status_code == 403
+            admin = {'X-Admin-Token': 'test-admin'}
+            assert httpx.get(url, params={'seconds': 0.1, 'kind': 'heap'}, headers=admin).status_code == 400
+            assert httpx.get(url, params={'seconds': 10 ** 6}, headers=admin).status_code == 400
+
+            def collect(kind: str):
+                responses[kind] = httpx.get(url, params={'seconds': 1.0, 'kind': kind}, headers=admin, timeout=30)
+
+            # 프로파일 수집 중에 부하 실행
+            for kind in ('threads', 'tasks'):
+                collector = threading.Thread(target=collect, args=(kind,))
+                collector.start()
+                time.sleep(0.1)
+                asyncio.run(run_load(backend['url'], sessions=8, concurrency=4, rounds=1, seed=0))
+                collector.join()
+            responses['json'] = httpx.get(url, params={'seconds': 0.2, 'format': 'json'}, headers=admin, timeout=30)
+    finally:
+        Config.ADMIN_TOKEN = saved
+
+    threads, tasks = responses['threads'], responses['tasks']
+    assert threads.status_code == 200 and tasks.status_code == 200
+    assert 'attachment' in threads.headers['content-disposition']
+    assert int(threads.headers['x-profile-samples']) > 0
+    combined = threads.text + tasks.text
+    assert "api_v3_complete.py:" in combined
+    assert "DynamicAIChatBotSystem._call_ai_api (chatbot_flow_v3.py:" in tasks.text
+    assert "start_dynamic_debate.<locals>.generate_dynamic_conversation (api_v3_complete.py:" in tasks.text
+    report = responses['json'].json()
+    assert report['samples'] > 0 and report['threads']
+
+
+if __name__ == "__main__":
+    test_thread_samples()
+    test_task_chain_through_async_generator()
+    test_one_profile_at_a_time()
+    with standin_credentials():
+        test_chatbot_call_site_named()
+    test_admin_profile_endpoint()
+    print("✅ 샘플링 프로파일러 테스트 통과")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+로컬 추천 스코어러 테스트
+"""
+
+import asyncio
+
+from config import Config
+from recommender import fast_conclusion, get_recommender, parse_preferences, profile_from_history
+
+
+def test_parse_preferences():
+    """예산/사용 기간/케어/이사 추출 (부정 표현 우선)"""
+    profile = parse_preferences([
+        "월 5만원 이하면 좋겠어요",
+        "한 10년 정도 쓸 것 같아요",
+        "필터 관리가 귀찮아요",
+        "내년에 이사 갈 수도 있어요",
+    ])
+    assert profile.monthly_budget == 50000
+    assert profile.years == 10
+    assert profile.wants_care is True
+    assert profile.moving is True
+
+    profile = parse_preferences(["관리는 괜찮아요, 이사 계획 없어요", "36개월만 쓸 거예요"])
+    assert profile.wants_care is False
+    assert profile.moving is False
+    assert profile.years == 3
+    assert profile.horizon_months == 36
+
+    # 사용 동사가 없는 기간 / '뒤', '후' 뒤의 기간은 사용 기간이 아님
+    profile = parse_preferences(["2년 뒤에 이사 가요"])
+    assert profile.years is None and profile.moving is True
+    assert parse_preferences(["3년 후에 바꿀 거예요"]).years is None
+    assert parse_preferences(["5년 사용할 거예요"]).years == 5
+
+    history = [
+        {'speaker': '구매봇', 'content': '월 10만원이면 충분해요'},
+        {'speaker': '사용자', 'content': '일시불 150만원까지 가능해요'},
+    ]
+    profile = profile_from_history(history)
+    assert profile.upfront_budget == 1500000 and profile.monthly_budget is None
+
+
+def test_ranking_follows_usage_horizon():
+    """짧게 쓰면 구독, 오래 쓰면 구매가 유리 (TV, 케어 없음)"""
+    recommender = get_recommender()
+    short = recommender.rank(parse_preferences(["2년만 쓸 거예요"]), [0])
+    long = recommender.rank(parse_preferences(["10년 넘게 쓸 거예요"]), [0])
+    assert short[0]['plan'] == 'subscription'
+    assert long[0]['plan'] == 'purchase'
+    for ranking in (short, long):
+        assert [item['score'] for item in ranking] == sorted((item['score'] for item in ranking), reverse=True)
+    # 6년 구독만 제공하는 제품은 다른 구독 기간이 순위에 나오지 않음
+    only = recommender.rank(parse_preferences([]), [2], limit=10)
+    assert {item['period'] for item in only} <= {None, '6년'}
+
+
+def test_budget_penalizes_over_budget_plans():
+    """월 예산을 넘는 구독 플랜은 예산 없는 경우보다 점수가 낮음"""
+    recommender = get_recommender()
+    free = {item['label']: item['score'] for item in recommender.rank(parse_preferences([]), [0], limit=10)}
+    tight = {item['label']: item['score'] for item in recommender.rank(parse_preferences(["월 1만원 이하"]), [0], limit=10)}
+    assert all(tight[label] < free[label] for label in free if label != '일시불 구매')
+
+
+def test_fast_conclusion_skips_llm():
+    """빠른 모드 결론은 LLM 호출 없이 1위 플랜을 안내"""
+    from chatbot_flow_v3 import dynamic_ai_system
+
+    profile = parse_preferences(["3년만 쓸 거예요"])
+    ranking = get_recommender().rank(profile, [0])
+    text = fast_conclusion("TV", profile, ranking)
+    assert ranking[0]['label'] in text
+
+    calls = []
+
+    async def fake_call(*args, **kwargs):
+        calls.append(args)
+        return "LLM"
+
+    original_call, original_mode = dynamic_ai_system._call_ai_api, Config.CONCLUSION_FAST_MODE
+    dynamic_ai_system._call_ai_api = fake_call
+    try:
+        Config.CONCLUSION_FAST_MODE = True
+        history = [{'speaker': '사용자', 'content': '3년만 쓸 거예요'}]
+        result = asyncio.run(dynamic_ai_system.generate_conclusion(0, history))
+        assert not calls and ranking[0]['label'] in result
+
+        Config.CONCLUSION_FAST_MODE = False
+        assert asyncio.run(dynamic_ai_system.generate_conclusion(0, history)) == "LLM"
+        assert len(calls) == 1 and ranking[0]['label'] in calls[0][0][1]['content']
+    finally:
+        dynamic_ai_system._call_ai_api = original_call
+        Config.CONCLUSION_FAST_MODE = original_mode
+
+
+if __name__ == "__main__":
+    test_parse_preferences()
+    test_ranking_follows_usage_horizon()
+    test_budget_penalizes_over_budget_plans()
+    test_fast_conclusion_skips_llm()
+    print("✅ 추천 스코어러 테스트 통과")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+워커 간 공유 상태 테스트 (메모리 / SQLite / Redis 대역 서버 저장소, 여러 프로세스의 카운터·세션·속도 제한·TTS 색인,
+워커 간 LLM 응답 캐시, 다른 프로세스에서 이어지는 /respond)
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import httpx
+
+from config import Config
+from redis_standin import serve_in_thread as serve_redis_standin
+from shared_state import SharedRateLimiter, TTSCacheIndex, get_shared_state, open_state, session_store
+
+WORKERS = 4
+INCREMENTS = 50
+RATE_LIMIT = 15
+
+
+def _check_backend(state):
+    state.set('t', 'k', "값")
+    assert state.get('t', 'k') == "값" and state.get('t', 'missing') is None
+    state.set('t', 'short', "v", ttl=0.05)
+    assert state.get('t', 'short') == "v"
+    time.sleep(0.08)
+    assert state.get('t', 'short') is None
+    assert state.incr('t', 'n', ttl=0.1) == 1 and state.incr('t', 'n', 4) == 5
+    time.sleep(0.15)
+    assert state.incr('t', 'n') == 1  # 만료 후 처음부터
+    state.delete('t', 'k')
+    assert state.get('t', 'k') is None
+    state.set_json('t', 'j', {'history': [{'speaker': '구매봇', 'content': "사는 게 낫긴해"}]})
+    assert state.get_json('t', 'j')['history'][0]['speaker'] == '구매봇'
+
+    async def run_async():
+        await state.aset('a', 'k', "v")
+        assert await state.aget('a', 'k') == "v"
+        assert await state.aincr('a', 'n') == 1
+
+    asyncio.run(run_async())
+
+
+def test_backends():
+    url, standin, stop = serve_redis_standin()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for state in (open_state(""), open_state(f"sqlite:///{directory}/state.db"), open_state(url)):
+                _check_backend(state)
+                state.close()
+        assert standin.commands > 0 and b"aimystery:t:j" in standin.data  # 키 접두사
+    finally:
+        stop()
+    assert not open_state("").shared
+    try:
+        open_state("memcached://localhost")
+        assert False, "지원하지 않는 URL은 ValueError"
+    except ValueError:
+        pass
+
+
+def _worker(url: str, worker_id: int, tts_dir: str) -> int:
+    """다른 프로세스: 카운터 증가, 세션 저장, 속도 제한 사용, TTS 색인 등록 → 허용된 횟수"""
+    Config.SHARED_STATE_URL = url
+    state = get_shared_state()
+    for _ in range(INCREMENTS):
+        state.incr('test', 'counter')
+
+    async def run() -> int:
+        await session_store.save(f"session-{worker_id}", worker_id, [{'speaker': '사용자', 'content': f"워커 {worker_id}"}])
+        await TTSCacheIndex(tts_dir).store(f"안녕하세요 {worker_id}", "echo", 1.7, f"audio-{worker_id}".encode())
+        limiter = SharedRateLimiter("test", RATE_LIMIT, window=3600)
+        return sum([await limiter.hit("upstream") == 0 for _ in range(10)])
+
+    return asyncio.run(run())
+
+
+def _run_workers(url: str):
+    saved = Config.SHARED_STATE_URL
+    with tempfile.TemporaryDirectory() as tts_dir:
+        with multiprocessing.get_context('spawn').Pool(WORKERS) as pool:
+            allowed = pool.starmap(_worker, [(url, i, tts_dir) for i in range(WORKERS)])
+        Config.SHARED_STATE_URL = url
+        try:
+            state = get_shared_state()
+            counter = int(state.get('test', 'counter'))
+
+            async def read():
+                sessions = [await session_store.load(f"session-{i}") for i in range(WORKERS)]
+                index = TTSCacheIndex(tts_dir)
+                audio = await index.lookup("안녕하세요 2", "echo", 1.7)
+                other_box = TTSCacheIndex(os.path.join(tts_dir, "다른 서버"))  # 색인은 있지만 파일이 없음
+                return sessions, audio, await other_box.lookup("안녕하세요 2", "echo", 1.7)
+
+            sessions, audio, missing = asyncio.run(read())
+        finally:
+            Config.SHARED_STATE_URL = saved
+
+    assert counter == WORKERS * INCREMENTS  # 원자적 incr
+    assert sum(allowed) == RATE_LIMIT  # 모든 프로세스 합계로 제한
+    assert [s['history'][0]['content'] for s in sessions] == [f"워커 {i}" for i in range(WORKERS)]
+    assert all(s['product_id'] == i for i, s in enumerate(sessions))
+    assert audio == b"audio-2" and missing is None
+
+
+def test_multiprocess_sqlite():
+    with tempfile.TemporaryDirectory() as directory:
+        _run_workers(f"sqlite:///{directory}/state.db")
+
+
+def test_multiprocess_redis_standin():
+    url, standin, stop = serve_redis_standin()
+    try:
+        _run_workers(url)
+        assert standin.connections >= WORKERS
+    finally:
+        stop()
+
+
+def test_shared_llm_cache_between_workers():
+    """프로세스 캐시가 따로인 두 시스템(워커)이 공유 캐시로 같은 응답 재사용"""
+    from benchmarks.load_sse import _serve_in_thread
+    from chatbot_flow_v3 import DynamicAIChatBotSystem
+    from llm_standin import LATENCY_PROFILES, create_app
+
+    standin, thread, standin_url = _serve_in_thread(create_app(LATENCY_PROFILES['instant'], seed=0))
+    saved = Config.SHARED_STATE_URL, Config.LLM_CACHE_ENABLED
+    messages = [{'role': 'user', 'content': "구독이 좋은 이유를 말해줘"}]
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            Config.SHARED_STATE_URL = f"sqlite:///{directory}/state.db"
+            Config.LLM_CACHE_ENABLED = True
+            first, second = DynamicAIChatBotSystem(), DynamicAIChatBotSystem()
+            for system in (first, second):
+                system.base_url = f"{standin_url}/v1/chat/completions"
+
+            async def run():
+                try:
+                    a = await first._call_ai_api(messages, call_site="subscription")
+                    calls = standin.config.app.state.stats.requests
+                    b = await second._call_ai_api(messages, call_site="subscription")
+                    return a, b, calls, standin.config.app.state.stats.requests
+                finally:
+                    await first.aclose()
+                    await second.aclose()
+
+            a, b, before, after = asyncio.run(run())
+    finally:
+        Config.SHARED_STATE_URL, Config.LLM_CACHE_ENABLED = saved
+        standin.should_exit = True
+        thread.join(timeout=10)
+
+    assert a == b and before == after == 1
+
+
+def _respond(url: str, session_id: str, history=None, product_id: int = 1) -> httpx.Response:
+    body = {'product_id': product_id, 'user_input': "오래 쓸 거라 사는 게 나아요", 'session_id': session_id}
+    if history is not None:
+        body['conversation_history'] = history
+    return httpx.post(f"{url}/product/debate/dynamic/respond", json=body, timeout=60)
+
+
+def _guide_question(response: httpx.Response) -> dict:
+    assert response.status_code == 200, response.text
+    events = [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: ")]
+    return next(e for e in events if e['type'] == 'guide_question')
+
+
+def _respond_on_other_process(state_url: str):
+    """워커 A(이 프로세스)에서 시작한 세션을 워커 B(serve.py 프로세스)가 history 없이 이어받음"""
+    from benchmarks.load_sse import _free_port, spawn_backend
+    from test_lifecycle import _start_server
+
+    saved = Config.SHARED_STATE_URL
+    Config.SHARED_STATE_URL = state_url
+    try:
+        with spawn_backend('instant', seed=0) as backend, tempfile.TemporaryDirectory() as rollup_dir:
+            import api_v3_complete
+            standin_url = api_v3_complete.dynamic_ai_system.base_url.rsplit('/v1/', 1)[0]
+            opening = httpx.post(f"{backend['url']}/product/debate/dynamic", json={'product_id': 1}, timeout=60)
+            session_id = opening.headers['x-session-id']
+            started = _guide_question(opening)['history']
+
+            port = _free_port()
+            other = _start_server(standin_url, port, rollup_dir, SHARED_STATE_URL=state_url)
+            try:
+                continued = _guide_question(_respond(f"http://127.0.0.1:{port}", session_id))['history']
+                missing = _respond(f"http://127.0.0.1:{port}", "없는-세션")
+                other_product = _respond(f"http://127.0.0.1:{port}", session_id, product_id=2)
+            finally:
+                other.terminate()
+                other.wait(30)
+            # 다시 워커 A로 돌아와도 B가 저장한 기록에서 이어짐
+            again = _guide_question(_respond(backend['url'], session_id))['history']
+    finally:
+        Config.SHARED_STATE_URL = saved
+
+    assert continued[:len(started)] == started and len(continued) > len(started)
+    assert {'speaker': '사용자', 'content': "오래 쓸 거라 사는 게 나아요"} in continued[len(started):]
+    assert again[:len(continued)] == continued and len(again) > len(continued)
+    assert missing.status_code == 404
+    assert other_product.status_code == 400  # 세션과 다른 제품으로 이어가기는 거부
+
+
+def test_respond_on_other_process_sqlite():
+    with tempfile.TemporaryDirectory() as directory:
+        _respond_on_other_process(f"sqlite:///{directory}/state.db")
+
+
+def test_respond_on_other_process_redis_standin():
+    url, standin, stop = serve_redis_standin()
+    try:
+        _respond_on_other_process(url)
+        assert any(key.startswith(b"aimystery:session:") for key in standin.data)
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    test_backends()
+    test_multiprocess_sqlite()
+    test_multiprocess_redis_standin()
+    test_shared_llm_cache_between_workers()
+    test_respond_on_other_process_sqlite()
+    test_respond_on_other_process_redis_standin()
+    print("✅ 워커 간 공유 상태 테스트 통과")
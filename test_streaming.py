@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+스트리밍 페이싱 테스트 (API 호출 없이)
+"""
+
+import asyncio
+import json
+import time
+
+from streaming import StreamPacer, sse_event
+
+
+def collect(pacer, text, **kwargs):
+    """stream_text 결과를 (이벤트 목록, 소요 시간)으로 반환"""
+    async def run():
+        started = time.perf_counter()
+        events = [event async for event in pacer.stream_text('구매봇', text, **kwargs)]
+        return events, time.perf_counter() - started
+    return asyncio.run(run())
+
+
+def contents(events):
+    return [json.loads(event[len('data: '):])['content'] for event in events]
+
+
+def test_sse_event_format():
+    """SSE 이벤트 인코딩 형식 확인"""
+    assert sse_event({'type': 'typing', 'speaker': '구매봇'}) == 'data: {"type": "typing", "speaker": "\\uad6c\\ub9e4\\ubd07"}\n\n'
+
+
+def test_none_mode_flushes_once():
+    """none 모드는 대기 없이 한 번에 전송"""
+    text = "구매가 확실히 이득이긴해! " * 10
+    events, elapsed = collect(StreamPacer(mode="none"), text)
+    assert contents(events) == [text]
+    assert elapsed < 0.05
+
+
+def test_fixed_mode_coalesces_chunks():
+    """fixed 모드는 같은 출력 속도로 청크를 합쳐서 전송"""
+    text = "가" * 300
+    pacer = StreamPacer(mode="fixed", turn_delay=0.0, chunk_size=30, chunk_delay=0.02, min_write_interval=0.05)
+    chunk_size, delay = pacer.plan(len(text))
+    assert chunk_size == 75 and abs(delay - 0.05) < 1e-9
+
+    events, _ = collect(pacer, text)
+    assert ''.join(contents(events)) == text
+    assert len(events) == 4  # 기존 방식은 10번 쓰기 + 10번 sleep
+
+
+def test_adaptive_mode_skips_elapsed_turn_delay():
+    """adaptive 모드는 업스트림 대기 시간만큼 턴 지연을 생략"""
+    pacer = StreamPacer(mode="adaptive", turn_delay=0.5)
+
+    async def slow_call():
+        await asyncio.sleep(0.1)
+        return "가" * 100
+
+    text = asyncio.run(pacer.timed(slow_call()))
+    assert pacer.upstream_rate is not None and pacer.upstream_rate < 1000
+    assert pacer._turn_pause(0.6) == 0.0
+    assert abs(pacer._turn_pause(0.2) - 0.3) < 1e-9
+
+    events, _ = collect(pacer, text, waited=1.0)
+    assert ''.join(contents(events)) == text
+
+
+def test_invalid_mode():
+    """지원하지 않는 모드는 ValueError"""
+    try:
+        StreamPacer(mode="turbo")
+    except ValueError:
+        return
+    raise AssertionError("ValueError가 발생해야 합니다")
+
+
+if __name__ == "__main__":
+    test_sse_event_format()
+    test_none_mode_flushes_once()
+    test_fixed_mode_coalesces_chunks()
+    test_adaptive_mode_skips_elapsed_turn_delay()
+    test_invalid_mode()
+    print("✅ 스트리밍 페이싱 테스트 통과")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+세션 추적 테스트 (세션 단위 샘플링 / jsonl·otlp 내보내기 왕복 / 워터폴 / 실제 앱 세션의 span 구조)
+"""
+
+import asyncio
+import os
+import time
+
+import tracing
+from config import Config
+
+
+def collect(events):
+    async def consume():
+        return [event async for event in events]
+    return asyncio.run(consume())
+
+
+def fake_request(session_id: str, name: str):
+    async def events():
+        with tracing.span("turn:purchase", speaker="구매봇"):
+            with tracing.span("llm:purchase", provider="unit") as llm:
+                await asyncio.sleep(0.001)
+                llm.set('completion_tokens', 12)
+        yield "data: a\n\n"
+        span = tracing.start_span("stream:purchase", pacing="none")
+        yield "data: b\n\n"
+        span.end()
+    return tracing.trace_stream(session_id, name, events(), product_id=1)
+
+
+def with_config(path: str, fmt: str = "jsonl", rate: float = 1.0):
+    saved = (Config.TRACE_SAMPLE_RATE, Config.TRACE_EXPORT_PATH, Config.TRACE_EXPORT_FORMAT)
+    Config.TRACE_SAMPLE_RATE, Config.TRACE_EXPORT_PATH, Config.TRACE_EXPORT_FORMAT = rate, path, fmt
+    if os.path.exists(path):
+        os.remove(path)
+    return saved
+
+
+def restore_config(saved):
+    Config.TRACE_SAMPLE_RATE, Config.TRACE_EXPORT_PATH, Config.TRACE_EXPORT_FORMAT = saved
+
+
+def test_sampling_is_per_session():
+    assert not tracing.is_sampled("abc", 0)
+    assert tracing.is_sampled("abc", 1)
+    ids = [f"session-{i}" for i in range(2000)]
+    first = [tracing.is_sampled(s, 0.25) for s in ids]
+    assert first == [tracing.is_sampled(s, 0.25) for s in ids]  # 같은 세션은 항상 같은 결과
+    assert 0.2 < sum(first) / len(ids) < 0.3
+    assert tracing.trace_id_for("a" * 32) == "a" * 32
+    assert len(tracing.trace_id_for("session-1")) == 32
+
+
+def test_untraced_span_is_cheap():
+    assert tracing._trace.get() is None
+    with tracing.span("llm:x", provider="unit") as span:
+        assert span is tracing.NOOP_SPAN
+        span.set('a', 1)
+    assert tracing.start_span("stream:x") is tracing.NOOP_SPAN
+
+    n = 20000
+    started = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("turn:x", speaker="구매봇") as span:
+            span.set('chars', 1)
+    per_call_us = (time.perf_counter() - started) / n * 1e6
+    assert per_call_us < 50, per_call_us  # LLM 호출(수백 ms)에 비하면 무시할 수준
+
+
+def test_export_round_trip(path='/tmp/test_tracing.jsonl'):
+    for fmt in tracing.TRACE_FORMATS:
+        saved = with_config(path, fmt)
+        try:
+            events = collect(fake_request("session-a", "POST /product/debate/dynamic"))
+            collect(fake_request("session-a", "POST /product/debate/dynamic/respond"))
+            collect(fake_request("session-b", "POST /product/debate/dynamic"))
+        finally:
+            restore_config(saved)
+        assert events == ["data: a\n\n", "data: b\n\n"]
+        assert tracing._trace.get() is None
+
+        spans = tracing.read_spans(path)
+        session = [s for s in spans if s['session_id'] == "session-a"]
+        assert len(session) == 8, fmt
+        assert len({s['trace_id'] for s in session}) == 1
+        roots = [s for s in session if s['parent_id'] is None]
+        assert [r['name'] for r in roots] == ["POST /product/debate/dynamic", "POST /product/debate/dynamic/respond"]
+        assert roots[0]['attributes']['events'] == 2 and roots[0]['attributes']['product_id'] == 1
+
+        by_id = {s['span_id']: s for s in session}
+        llm = next(s for s in session if s['name'] == "llm:purchase")
+        assert llm['attributes']['completion_tokens'] == 12
+        assert by_id[llm['parent_id']]['name'] == "turn:purchase"
+        stream = next(s for s in session if s['name'] == "stream:purchase")
+        assert by_id[stream['parent_id']]['parent_id'] is None
+        assert all(s['end_unix_nano'] >= s['start_unix_nano'] for s in session)
+
+        text = tracing.waterfall(session)
+        assert text.splitlines()[0].startswith("session session-a")
+        assert "    llm:purchase" in text
+    os.remove(path)
+
+
+def test_unsampled_request_exports_nothing(path='/tmp/test_tracing_off.jsonl'):
+    saved = with_config(path, rate=0)
+    try:
+        assert collect(fake_request("session-a", "POST /x")) == ["data: a\n\n", "data: b\n\n"]
+    finally:
+        restore_config(saved)
+    assert not os.path.exists(path)
+
+
+def test_app_session_trace(path='/tmp/test_tracing_app.jsonl'):
+    from benchmarks.load_sse import run_load, spawn_backend
+
+    saved = with_config(path)
+    try:
+        with spawn_backend('instant', seed=0) as backend:
+            report = asyncio.run(run_load(backend['url'], sessions=2, concurrency=2, rounds=1, seed=0))
+    finally:
+        restore_config(saved)
+    assert report['sessions']['completed'] == 2
+
+    spans = tracing.read_spans(path)
+    sessions = {s['session_id'] for s in spans}
+    assert len(sessions) == 2
+    for session_id in sessions:
+        session = [s for s in spans if s['session_id'] == session_id]
+        roots = [s['name'] for s in session if s['parent_id'] is None]
+        # 첫 논쟁 → 응답 1회 → 결론이 같은 trace에 기록
+        assert roots == ["POST /product/debate/dynamic"] + ["POST /product/debate/dynamic/respond"] * 2, roots
+        names = {s['name'] for s in session}
+        for name in ('opening_pool', 'turn:purchase', 'turn:question', 'stream:purchase', 'llm:purchase', 'llm:conclusion'):
+            assert name in names, name
+        by_id = {s['span_id']: s for s in session}
+        llm = next(s for s in session if s['name'] == "llm:purchase")
+        assert llm['attributes']['provider'] == "friendli"
+        assert llm['attributes']['completion_tokens'] > 0
+        assert by_id[llm['parent_id']]['name'] == "turn:purchase"
+
+    assert tracing.main(['--file', path, 'waterfall', session_id]) == 0
+    assert tracing.main(['--file', path, 'list']) == 0
+    assert tracing.main(['--file', path, 'waterfall', 'missing']) == 1
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    test_sampling_is_per_session()
+    test_untraced_span_is_cheap()
+    test_export_round_trip()
+    test_unsampled_request_exports_nothing()
+    test_app_session_trace()
+    print("✅ 세션 추적 테스트 통과")
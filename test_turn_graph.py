@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+턴 그래프 엔진 테스트 (API 호출 없이)
+"""
+
+import asyncio
+import json
+import time
+
+from debate_flows import dynamic_opening_graph, graph_history
+from streaming import StreamPacer
+from turn_graph import TurnGraph, TurnNode, stream_turns
+
+
+def delayed(text, seconds=0.1, log=None):
+    """seconds 후 text를 반환하는 턴 실행 함수"""
+    async def run(inputs):
+        if log is not None:
+            log.append(('start', text, dict(inputs)))
+        await asyncio.sleep(seconds)
+        return text
+    return run
+
+
+class FakeDynamicSystem:
+    """DynamicAIChatBotSystem 대역 (각 호출 0.1초)"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def _reply(self, name, *args):
+        self.calls.append((name, args))
+        await asyncio.sleep(0.1)
+        return f"{name} 응답이긴해"
+
+    def generate_purchase_argument(self, product_id, context):
+        return self._reply('purchase', context)
+
+    def generate_subscription_argument(self, product_id, context):
+        return self._reply('subscription', context)
+
+    def generate_rebuttal(self, product_id, statement, bot, turn):
+        return self._reply(f'rebuttal-{bot}', statement)
+
+    def generate_dynamic_question(self, product_id, history):
+        return self._reply('question', len(history))
+
+
+def test_independent_nodes_run_in_parallel():
+    """의존성 없는 노드는 동시에 실행되고 결과는 선언 순서를 유지"""
+    graph = TurnGraph([
+        TurnNode('a', '구매봇', delayed('A')),
+        TurnNode('b', '구독봇', delayed('B')),
+        TurnNode('c', '안내봇', delayed('C'), deps=('a', 'b')),
+    ])
+    started = time.perf_counter()
+    results = asyncio.run(graph.run())
+    elapsed = time.perf_counter() - started
+
+    assert [results[key].text for key in ('a', 'b', 'c')] == ['A', 'B', 'C']
+    assert elapsed < 0.28  # 순차 실행이면 0.3초
+
+
+def test_dependency_inputs_and_concurrency_limit():
+    """의존 노드 결과 전달 및 max_concurrency 적용"""
+    log = []
+    graph = TurnGraph([
+        TurnNode('a', '구매봇', delayed('A', 0.05, log)),
+        TurnNode('b', '구독봇', delayed('B', 0.05, log)),
+        TurnNode('c', '안내봇', delayed('C', 0.05, log), deps=('a',)),
+    ], max_concurrency=1)
+    started = time.perf_counter()
+    asyncio.run(graph.run())
+    assert time.perf_counter() - started >= 0.15
+    assert ('start', 'C', {'a': 'A'}) in log
+
+
+def test_invalid_graphs():
+    """없는 의존 노드와 순환 의존성 검증"""
+    for nodes in (
+        [TurnNode('a', '구매봇', delayed('A'), deps=('x',))],
+        [TurnNode('a', '구매봇', delayed('A'), deps=('b',)), TurnNode('b', '구독봇', delayed('B'), deps=('a',))],
+    ):
+        try:
+            TurnGraph(nodes)
+        except ValueError:
+            continue
+        raise AssertionError("ValueError가 발생해야 합니다")
+
+
+def test_dynamic_opening_flow_streams_in_display_order():
+    """첫 논쟁 플로우: 두 첫 주장을 동시에 생성하고 표시 순서대로 스트리밍"""
+    system = FakeDynamicSystem()
+
+    async def run():
+        turn_run = dynamic_opening_graph(system, 1, quote_opening=False).start()
+        events = [event async for event in stream_turns(turn_run, StreamPacer(mode="none"))]
+        return turn_run, events
+
+    started = time.perf_counter()
+    turn_run, events = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    payloads = [json.loads(event[len('data: '):]) for event in events]
+    speakers = [p['speaker'] for p in payloads if p['type'] == 'typing']
+    assert speakers == ['구매봇', '구독봇', '구매봇', '구독봇', '안내봇']
+    assert elapsed < 0.48  # 5턴 순차 실행이면 0.5초
+
+    subscription_call = [args for name, args in system.calls if name == 'subscription'][0]
+    assert subscription_call[0]['previous_statements'] == []
+
+    history = graph_history(turn_run)
+    assert len(history) == 5 and history[-1]['content'].endswith('question 응답이긴해')
+
+
+if __name__ == "__main__":
+    test_independent_nodes_run_in_parallel()
+    test_dependency_inputs_and_concurrency_limit()
+    test_invalid_graphs()
+    test_dynamic_opening_flow_streams_in_display_order()
+    print("✅ 턴 그래프 테스트 통과")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+토큰 / 비용 집계 테스트 (토큰 추정 / 차원별 집계와 비용 / 세션 바인딩 / 날짜별 롤업 파일 병합 / 실제 앱 세션 집계)
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import httpx
+
+from config import Config
+from usage import UsageLedger, estimate_messages, estimate_tokens, parse_prices, session_stream
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("구독이 더 유리하긴해") == 9  # 한글 음절당 1
+    assert estimate_tokens("abcdefgh") == 2  # 나머지는 4자당 1
+    assert estimate_tokens("월 39,900원") == 2 + 2
+    messages = [{'role': 'system', 'content': "안녕"}, {'role': 'user', 'content': "구매"}]
+    assert estimate_messages(messages) == (2 + 4) * 2 + 2
+
+
+def test_parse_prices():
+    assert parse_prices("friendli=0.6/0.8, azure=2.5/10") == {'friendli': (0.6, 0.8), 'azure': (2.5, 10.0)}
+    assert parse_prices("cheap=1") == {'cheap': (1.0, 1.0)}
+    assert parse_prices("") == {}
+    assert parse_prices("broken=abc") == {}
+
+
+def test_ledger_dimensions_and_cost():
+    ledger = UsageLedger(prices={'friendli': (1.0, 2.0)}, max_sessions=2)
+    spent = ledger.record('purchase', 'friendli', '구매봇', 1, 1000, 500, session_id='s1')
+    assert spent == {'prompt_tokens': 1000, 'completion_tokens': 500, 'estimated': False, 'cost_usd': 0.002}
+    ledger.record('question', 'friendli', '안내봇', 1, 200, 50, session_id='s1')
+    estimated = ledger.record('conclusion', 'friendli', '안내봇', 2, messages=[{'role': 'user', 'content': "결론"}],
+                              content="구독 추천", session_id='s2')
+    assert estimated['estimated'] and estimated['prompt_tokens'] == 2 + 4 + 2 and estimated['completion_tokens'] == 4
+    ledger.record('purchase', 'friendli', '구매봇', 1, cached=True, session_id='s3')
+
+    report = ledger.report()
+    totals = report['totals']
+    assert totals['calls'] == 4 and totals['cached_calls'] == 1 and totals['estimated_calls'] == 1
+    assert totals['prompt_tokens'] == 1000 + 200 + 8
+    by_bot = {row['key']: row for row in report['by']['bot']}
+    assert report['by']['bot'][0]['key'] == '구매봇'  # 비용 순
+    assert by_bot['안내봇']['calls'] == 2
+    assert {row['key'] for row in report['by']['product']} == {'1', '2'}
+    assert report['by']['call_site'][0]['key'] == 'purchase'
+
+    # 세션은 최근 max_sessions개만 유지
+    assert {row['key'] for row in report['by']['session']} == {'s2', 's3'}
+    assert ledger.session('s1') is None and ledger.session('s2')['calls'] == 1
+    assert report['per_session']['sessions'] == 2
+
+
+def test_session_stream_binds_calls():
+    ledger = UsageLedger(prices={})
+
+    async def events():
+        await asyncio.sleep(0)
+        ledger.record('purchase', 'unit', '구매봇', 1, 10, 5)
+        yield "data: a\n\n"
+
+    async def scenario():
+        return [event async for event in session_stream("session-x", events())]
+
+    assert asyncio.run(scenario()) == ["data: a\n\n"]
+    assert ledger.session("session-x")['total_tokens'] == 15
+    ledger.record('purchase', 'unit', '구매봇', 1, 1, 1)  # 스트림 밖은 세션 없음
+    assert ledger.report()['per_session']['sessions'] == 1
+
+
+def test_rollup_file_merges_workers():
+    """워커 두 개가 같은 날짜 파일에 각자 몫을 더함"""
+    with tempfile.TemporaryDirectory() as directory:
+        first = UsageLedger(prices={'friendli': (1.0, 1.0)})
+        second = UsageLedger(prices={'friendli': (1.0, 1.0)})
+        first.record('purchase', 'friendli', '구매봇', 1, 100, 10, session_id='a')
+        second.record('purchase', 'friendli', '구매봇', 1, 200, 20, session_id='b')
+        second.record('question', 'friendli', '안내봇', 1, 50, 5, session_id='b')
+
+        [path] = first.flush(directory)
+        assert second.flush(directory) == [path]
+        assert first.flush(directory) == []  # 더할 몫이 없으면 그대로
+
+        first.record('purchase', 'friendli', '구매봇', 2, 1, 1, session_id='a')  # 같은 세션은 다시 세지 않음
+        first.flush(directory)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    assert os.path.basename(path).startswith("usage-") and data['date'] in path
+    assert data['sessions'] == 2
+    assert data['totals']['calls'] == 4 and data['totals']['prompt_tokens'] == 351
+    assert data['by']['bot']['구매봇']['calls'] == 3 and data['by']['bot']['안내봇']['calls'] == 1
+    assert set(data['by']['product']) == {'1', '2'} and data['by']['product']['2']['calls'] == 1
+    assert list(data['by']['bot']) == ['구매봇', '안내봇']  # 비용 순
+    assert 'session' not in data['by']
+
+
+def test_app_usage_per_session():
+    from benchmarks.load_sse import run_load, spawn_backend
+
+    saved = Config.USAGE_ROLLUP_DIR, Config.ADMIN_TOKEN
+    admin = {'X-Admin-Token': 'test-admin'}
+    with tempfile.TemporaryDirectory() as directory:
+        Config.USAGE_ROLLUP_DIR, Config.ADMIN_TOKEN = directory, "test-admin"
+        try:
+            with spawn_backend('instant', seed=0) as backend:
+                report = asyncio.run(run_load(backend['url'], sessions=2, concurrency=2, rounds=1, seed=0))
+                url = f"{backend['url']}/stats/usage"
+                denied = httpx.get(url, params={'limit': 1000})
+                stats = httpx.get(url, params={'limit': 1000}, headers=admin).json()
+                sessions = [row['key'] for row in stats['by']['session']]
+                one = httpx.get(url, params={'session_id': sessions[0]}, headers=admin).json()
+                missing = httpx.get(url, params={'session_id': 'missing'}, headers=admin)
+            rollups = os.listdir(directory)
+            with open(os.path.join(directory, next(name for name in rollups if name.endswith('.json'))), 'r',
+                      encoding='utf-8') as f:
+                rollup = json.load(f)
+        finally:
+            Config.USAGE_ROLLUP_DIR, Config.ADMIN_TOKEN = saved
+
+    assert denied.status_code == 403  # 관리자 전용
+    assert report['sessions']['completed'] == 2
+    # 첫 논쟁 5회 + 응답 4회 + 결론 1회, 대역 서버 usage 사용
+    assert one['calls'] == 10 and one['estimated_calls'] == 0 and one['completion_tokens'] > 0
+    assert missing.status_code == 404
+    bots = {row['key'] for row in stats['by']['bot']}
+    assert {'구매봇', '구독봇', '안내봇'} <= bots
+    assert {'purchase', 'subscription', 'rebuttal', 'question', 'response', 'conclusion'} <= {
+        row['key'] for row in stats['by']['call_site']}
+    assert any(row['key'] == 'friendli' for row in stats['by']['provider'])
+    assert rollup['totals']['calls'] >= 20 and rollup['sessions'] >= 2  # 종료 시 롤업 저장
+
+
+if __name__ == "__main__":
+    test_estimate_tokens()
+    test_parse_prices()
+    test_ledger_dimensions_and_cost()
+    test_session_stream_binds_calls()
+    test_rollup_file_merges_workers()
+    test_app_usage_per_session()
+    print("✅ 토큰 / 비용 집계 테스트 통과")
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+상담 세션 추적 (trace / span)
+- 세션 하나 = trace 하나 (trace id는 session_id), 요청 / 턴 / 스트리밍(페이싱) / LLM 호출마다 span
+- 샘플링은 session_id 해시 기준이라 같은 세션의 모든 요청이 함께 기록되거나 함께 빠짐
+- 샘플링되지 않은 요청의 span()은 contextvar 조회 한 번 후 아무것도 하지 않음
+- 요청이 끝나면 그 요청의 span을 한 번에 파일로 내보냄 (jsonl: span당 한 줄, otlp: OTLP JSON 파일 형식 요청당 한 줄)
+
+TRACE_SAMPLE_RATE=1.0 TRACE_EXPORT_PATH=traces.jsonl python main.py
+python tracing.py list                 # 최근 세션
+python tracing.py waterfall <session_id>
+"""
+
+import argparse
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from config import Config
+
+TRACE_FORMATS = ("jsonl", "otlp")
+SERVICE_NAME = "aimystery-chatbot"
+
+
+class Span:
+    """시간 구간 하나 (attributes는 JSON으로 내보낼 수 있는 값만)"""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start_ns', 'end_ns', '_perf', 'status')
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self._perf = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+
+    def set(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = self.start_ns + (time.perf_counter_ns() - self._perf)
+            self.trace.spans.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace.trace_id,
+            'session_id': self.trace.session_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_unix_nano': self.start_ns,
+            'end_unix_nano': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class _NoopSpan:
+    """샘플링되지 않았거나 추적 중이 아닐 때"""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """요청 하나 동안 모은 span (세션의 다른 요청과 trace_id 공유)"""
+
+    __slots__ = ('session_id', 'trace_id', 'spans')
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.trace_id = trace_id_for(session_id)
+        self.spans: List[Span] = []
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('trace', default=None)
+_parent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('trace_parent', default=None)
+
+
+def trace_id_for(session_id: str) -> str:
+    """session_id가 32자리 16진수면 그대로, 아니면 해시"""
+    if len(session_id) == 32 and all(c in '0123456789abcdef' for c in session_id):
+        return session_id
+    return hashlib.md5(session_id.encode('utf-8')).hexdigest()
+
+
+def is_sampled(session_id: str, rate: Optional[float] = None) -> bool:
+    """세션 단위 샘플링 (같은 session_id면 항상 같은 결과)"""
+    rate = Config.TRACE_SAMPLE_RATE if rate is None else rate
+    if rate <= 0:
+        return False
+    if rate >= 1:
+        return True
+    return zlib.crc32(session_id.encode('utf-8')) / 0xFFFFFFFF < rate
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """현재 추적 중인 요청 아래에 span 생성 (추적 중이 아니면 NOOP_SPAN)"""
+    trace = _trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+    current = Span(trace, name, _parent.get(), {k: v for k, v in attributes.items() if v is not None})
+    token = _parent.set(current.span_id)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.set('error', type(e).__name__)
+        raise
+    finally:
+        _parent.reset(token)
+        current.end()
+
+
+def start_span(name: str, **attributes: Any) -> Any:
+    """현재 span 아래에 자식 span만 만들고 부모로 설정하지 않음 (async 생성기처럼 yield를 걸치는 구간용, 직접 end())"""
+    trace = _trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, _parent.get(), {k: v for k, v in attributes.items() if v is not None})
+
+
+async def trace_stream(session_id: str, name: str, events: AsyncIterator[str], **attributes: Any) -> AsyncIterator[str]:
+    """SSE 이벤트 생성기를 요청 span으로 감쌈 (생성기 안의 턴 / LLM 호출 span이 이 요청 아래에 기록됨)"""
+    if not is_sampled(session_id):
+        async for event in events:
+            yield event
+        return
+
+    trace = Trace(session_id)
+    _trace.set(trace)
+    root = Span(trace, name, None, {k: v for k, v in attributes.items() if v is not None})
+    _parent.set(root.span_id)
+    count = 0
+    try:
+        async for event in events:
+            if count == 0:
+                root.set('first_event_ms', round((time.perf_counter_ns() - root._perf) / 1e6, 3))
+            count += 1
+            yield event
+    except BaseException as e:
+        root.status = "error"
+        root.set('error', type(e).__name__)
+        raise
+    finally:
+        root.set('events', count)
+        # 연결이 끊겨 다른 컨텍스트에서 생성기가 닫힐 수 있어 reset 대신 set
+        _parent.set(None)
+        _trace.set(None)
+        root.end()
+        get_exporter().export(trace.spans)
+
+
+# ----------------------------------------------------------------------
+# 내보내기
+# ----------------------------------------------------------------------
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _from_otlp_value(value: Dict[str, Any]) -> Any:
+    kind, raw = next(iter(value.items()))
+    return int(raw) if kind == 'intValue' else raw
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """OTLP JSON (ExportTraceServiceRequest) 형식"""
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+        'scopeSpans': [{
+            'scope': {'name': 'tracing'},
+            'spans': [{
+                'traceId': s.trace.trace_id,
+                'spanId': s.span_id,
+                'parentSpanId': s.parent_id or '',
+                'name': s.name,
+                'kind': 1,
+                'startTimeUnixNano': str(s.start_ns),
+                'endTimeUnixNano': str(s.end_ns),
+                'attributes': [{'key': k, 'value': _otlp_value(v)}
+                               for k, v in {'session.id': s.trace.session_id, **s.attributes}.items()],
+                'status': {'code': 2 if s.status == "error" else 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class FileExporter:
+    """요청 단위로 span을 파일 끝에 추가"""
+
+    def __init__(self, path: str, fmt: str = "jsonl"):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"지원하지 않는 trace 형식입니다: {fmt}. {', '.join(TRACE_FORMATS)} 중 하나를 사용하세요.")
+        self.path = path
+        self.format = fmt
+        self.exported = 0
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        if not spans:
+            return
+        if self.format == "otlp":
+            text = json.dumps(to_otlp(spans), ensure_ascii=False) + "\n"
+        else:
+            text = "".join(json.dumps(s.to_dict(), ensure_ascii=False) + "\n" for s in spans)
+        try:
+            with self._lock:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(text)
+                self.exported += len(spans)
+        except OSError as e:
+            print(f"trace 내보내기 실패: {e}")
+
+
+_exporter: Optional[FileExporter] = None
+
+
+def get_exporter() -> FileExporter:
+    """TRACE_EXPORT_PATH / TRACE_EXPORT_FORMAT 설정 기반 공유 내보내기"""
+    global _exporter
+    if _exporter is None or _exporter.path != Config.TRACE_EXPORT_PATH or _exporter.format != Config.TRACE_EXPORT_FORMAT:
+        _exporter = FileExporter(Config.TRACE_EXPORT_PATH, Config.TRACE_EXPORT_FORMAT)
+    return _exporter
+
+
+# ----------------------------------------------------------------------
+# 읽기 / 워터폴
+# ----------------------------------------------------------------------
+
+def _from_otlp(record: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for resource in record.get('resourceSpans', []):
+        for scope in resource.get('scopeSpans', []):
+            for s in scope.get('spans', []):
+                attributes = {a['key']: _from_otlp_value(a['value']) for a in s.get('attributes', [])}
+                start, end = int(s['startTimeUnixNano']), int(s['endTimeUnixNano'])
+                yield {
+                    'trace_id': s['traceId'],
+                    'session_id': attributes.pop('session.id', s['traceId']),
+                    'span_id': s['spanId'],
+                    'parent_id': s.get('parentSpanId') or None,
+                    'name': s['name'],
+                    'start_unix_nano': start,
+                    'end_unix_nano': end,
+                    'duration_ms': round((end - start) / 1e6, 3),
+                    'status': "error" if s.get('status', {}).get('code') == 2 else "ok",
+                    'attributes': attributes,
+                }
+
+
+def read_spans(path: str) -> List[Dict[str, Any]]:
+    """jsonl / otlp 파일의 span 목록 (형식은 줄마다 자동 판별)"""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'resourceSpans' in record:
+                spans.extend(_from_otlp(record))
+            else:
+                spans.append(record)
+    return spans
+
+
+def waterfall(spans: List[Dict[str, Any]], width: int = 40) -> str:
+    """세션 span 워터폴 (부모 아래 들여쓰기, 시작 순서)"""
+    if not spans:
+        return "(span 없음)"
+    spans = sorted(spans, key=lambda s: s['start_unix_nano'])
+    origin = spans[0]['start_unix_nano']
+    total = max(s['end_unix_nano'] for s in spans) - origin or 1
+    ids = {s['span_id'] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for s in spans:
+        parent = s['parent_id'] if s['parent_id'] in ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = [f"session {spans[0]['session_id']}  ({total / 1e9:.3f}s, span {len(spans)}개)"]
+
+    def visit(s: Dict[str, Any], depth: int):
+        start = s['start_unix_nano'] - origin
+        begin = int(start / total * width)
+        length = max(1, int((s['end_unix_nano'] - s['start_unix_nano']) / total * width))
+        bar = ' ' * begin + '█' * min(length, width - begin)
+        attributes = ' '.join(f"{k}={v}" for k, v in s['attributes'].items())
+        mark = ' !' if s['status'] == "error" else ''
+        label = ('  ' * depth + s['name'])[:38]
+        lines.append(f"{label:<38} {start / 1e6:>9.1f}ms {s['duration_ms']:>9.1f}ms |{bar:<{width}}|{mark} {attributes}")
+        for child in children.get(s['span_id'], []):
+            visit(child, depth + 1)
+
+    for root in children.get(None, []):
+        visit(root, 0)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="상담 세션 trace 조회")
+    parser.add_argument('--file', default=Config.TRACE_EXPORT_PATH, help="trace 파일 (jsonl 또는 otlp)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="세션 목록 (최근 순)")
+    show = sub.add_parser('waterfall', help="세션 워터폴")
+    show.add_argument('session_id')
+    show.add_argument('--width', type=int, default=40)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.file):
+        print(f"trace 파일이 없습니다: {args.file}")
+        return 1
+    spans = read_spans(args.file)
+
+    if args.command == 'list':
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for s in spans:
+            info = sessions.setdefault(s['session_id'], {'start': s['start_unix_nano'], 'end': 0, 'requests': 0})
+            info['start'] = min(info['start'], s['start_unix_nano'])
+            info['end'] = max(info['end'], s['end_unix_nano'])
+            info['requests'] += s['parent_id'] is None
+        for session_id, info in sorted(sessions.items(), key=lambda item: item[1]['start'], reverse=True):
+            started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info['start'] / 1e9))
+            print(f"{session_id}  {started}  요청 {info['requests']}개  {(info['end'] - info['start']) / 1e9:.3f}s")
+        return 0
+
+    selected = [s for s in spans if s['session_id'] == args.session_id or s['trace_id'] == args.session_id]
+    if not selected:
+        print(f"세션을 찾을 수 없습니다: {args.session_id}")
+        return 1
+    print(waterfall(selected, args.width))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
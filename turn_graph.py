@@ -0,0 +1,210 @@
+"""
+선언적 논쟁 턴 그래프 엔진
+- 각 턴(노드)은 데이터 의존성(deps)과 함께 선언
+- 의존성이 없는 노드는 동시에 실행
+- 결과는 선언(표시) 순서대로, 또는 완료 순서대로(여러 제품 비교) 스트리밍
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import tracing
+from streaming import StreamPacer, sse_event
+
+
+class TurnNode:
+    """논쟁 턴 하나 (run은 의존 노드 결과 dict를 받아 발언 텍스트를 반환)"""
+
+    def __init__(
+        self,
+        key: str,
+        speaker: str,
+        run: Callable[[Dict[str, str]], Awaitable[str]],
+        deps: Iterable[str] = (),
+        render: Optional[Callable[[str], str]] = None,
+        complete: bool = True,
+        fields: Optional[Dict[str, Any]] = None,
+        tags: Optional[Dict[str, Any]] = None,
+    ):
+        self.key = key
+        self.speaker = speaker
+        self.run = run
+        self.deps = tuple(deps)
+        self.render = render  # 결과를 화면 표시용 텍스트로 변환 (예: 인트로 문구 추가)
+        self.complete = complete  # False면 complete 이벤트를 호출자가 직접 전송
+        self.fields = fields or {}  # complete 이벤트에 추가할 필드
+        self.tags = tags or {}  # 모든 이벤트(typing/streaming/complete)에 추가할 필드 (예: product_id)
+
+    def __repr__(self):
+        return f"TurnNode({self.key!r}, speaker={self.speaker!r}, deps={self.deps!r})"
+
+
+class TurnResult:
+    """완료된 턴의 결과"""
+
+    def __init__(self, node: TurnNode, text: str, started: float, finished: float, waited: float = 0.0):
+        self.node = node
+        self.text = text
+        self.started = started
+        self.finished = finished
+        self.waited = waited  # 표시 순서가 된 뒤 결과를 기다린 시간
+        self.completed_at = time.time()  # 완료 시각 (epoch)
+
+    @property
+    def elapsed(self) -> float:
+        return self.finished - self.started
+
+    @property
+    def display_text(self) -> str:
+        return self.node.render(self.text) if self.node.render else self.text
+
+
+class TurnGraph:
+    """턴 노드 DAG (노드 선언 순서 = 화면 표시 순서)"""
+
+    def __init__(
+        self,
+        nodes: List[TurnNode],
+        max_concurrency: Optional[int] = None,
+        extras: Optional[Dict[str, Any]] = None,
+    ):
+        self.nodes = list(nodes)
+        self.max_concurrency = max_concurrency
+        self.extras = extras if extras is not None else {}  # 노드가 남기는 부가 정보 (예: 선택지)
+        self._by_key = {node.key: node for node in self.nodes}
+        if len(self._by_key) != len(self.nodes):
+            raise ValueError("턴 노드 key가 중복되었습니다")
+        self._order = self._topological_order()
+
+    def _topological_order(self) -> List[TurnNode]:
+        """의존성 검증 및 위상 정렬"""
+        order: List[TurnNode] = []
+        state: Dict[str, int] = {}  # 1: 방문 중, 2: 완료
+
+        def visit(node: TurnNode):
+            if state.get(node.key) == 2:
+                return
+            if state.get(node.key) == 1:
+                raise ValueError(f"턴 그래프에 순환 의존성이 있습니다: {node.key}")
+            state[node.key] = 1
+            for dep in node.deps:
+                if dep not in self._by_key:
+                    raise ValueError(f"'{node.key}' 노드의 의존 노드 '{dep}'가 없습니다")
+                visit(self._by_key[dep])
+            state[node.key] = 2
+            order.append(node)
+
+        for node in self.nodes:
+            visit(node)
+        return order
+
+    def start(self) -> "TurnRun":
+        """모든 노드를 스케줄링하고 실행 핸들 반환"""
+        return TurnRun(self)
+
+    async def run(self) -> Dict[str, TurnResult]:
+        """전체 그래프 실행 후 결과 반환"""
+        turn_run = self.start()
+        try:
+            for node in self.nodes:
+                await turn_run.wait(node.key)
+            return turn_run.results
+        finally:
+            turn_run.cancel()
+
+
+class TurnRun:
+    """실행 중인 턴 그래프 (노드마다 하나의 태스크, 의존 태스크를 기다린 뒤 실행)"""
+
+    def __init__(self, graph: TurnGraph):
+        self.graph = graph
+        self.results: Dict[str, TurnResult] = {}
+        self._semaphore = asyncio.Semaphore(graph.max_concurrency) if graph.max_concurrency else None
+        self._created = time.perf_counter()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        for node in graph._order:
+            self._tasks[node.key] = asyncio.ensure_future(self._execute(node))
+
+    async def _execute(self, node: TurnNode) -> TurnResult:
+        if node.deps:
+            await asyncio.gather(*(self._tasks[dep] for dep in node.deps))
+        inputs = {dep: self.results[dep].text for dep in node.deps}
+
+        if self._semaphore:
+            async with self._semaphore:
+                started = time.perf_counter()
+                text = await self._run_node(node, inputs, started)
+        else:
+            started = time.perf_counter()
+            text = await self._run_node(node, inputs, started)
+
+        result = TurnResult(node, text, started, time.perf_counter())
+        self.results[node.key] = result
+        return result
+
+    async def _run_node(self, node: TurnNode, inputs: Dict[str, str], started: float) -> str:
+        # queued_ms: 그래프 시작부터 의존 턴 / 동시 실행 제한을 기다린 시간
+        with tracing.span(f"turn:{node.key}", speaker=node.speaker,
+                          queued_ms=round((started - self._created) * 1000, 3), **node.tags) as span:
+            text = await node.run(inputs)
+            span.set('chars', len(text or ""))
+            return text
+
+    async def wait(self, key: str) -> TurnResult:
+        """노드 결과를 기다림 (waited에 대기 시간 기록)"""
+        asked = time.perf_counter()
+        result = await self._tasks[key]
+        result.waited = max(result.waited, time.perf_counter() - asked)
+        return result
+
+    async def completed(self) -> AsyncIterator[TurnResult]:
+        """완료되는 순서대로 결과 반환 (waited에 대기 시간 기록)"""
+        for future in asyncio.as_completed(list(self._tasks.values())):
+            asked = time.perf_counter()
+            result = await future
+            result.waited = max(result.waited, time.perf_counter() - asked)
+            yield result
+
+    def cancel(self):
+        """완료되지 않은 노드 취소"""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
+
+async def _stream_turn(turn: TurnResult, pacer: StreamPacer) -> AsyncIterator[str]:
+    node = turn.node
+    pacer.record_upstream(len(turn.text or ""), turn.elapsed)
+    # 턴 결과를 기다린 시간(waited_ms) 이후 페이싱 대기 + 전송 구간
+    span = tracing.start_span(f"stream:{node.key}", pacing=pacer.mode, waited_ms=round(turn.waited * 1000, 3))
+    try:
+        async for event in pacer.stream_text(node.speaker, turn.display_text, waited=turn.waited, **node.tags):
+            yield event
+        if node.complete:
+            yield sse_event({'type': 'complete', 'speaker': node.speaker, **node.tags, **node.fields})
+    finally:
+        span.end()
+
+
+async def stream_turns(turn_run: TurnRun, pacer: StreamPacer, completion_order: bool = False) -> AsyncIterator[str]:
+    """턴 결과를 typing/streaming/complete SSE 이벤트로 변환
+
+    기본은 선언(표시) 순서, completion_order=True면 먼저 끝난 턴부터 전송합니다
+    (서로 독립적인 턴이 많을 때 전체 지연이 가장 느린 턴에 가까워짐).
+    """
+    try:
+        if completion_order:
+            async for turn in turn_run.completed():
+                yield sse_event({'type': 'typing', 'speaker': turn.node.speaker, **turn.node.tags})
+                async for event in _stream_turn(turn, pacer):
+                    yield event
+            return
+
+        for node in turn_run.graph.nodes:
+            yield sse_event({'type': 'typing', 'speaker': node.speaker, **node.tags})
+            turn = await turn_run.wait(node.key)
+            async for event in _stream_turn(turn, pacer):
+                yield event
+    finally:
+        turn_run.cancel()
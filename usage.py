@@ -0,0 +1,338 @@
+"""
+LLM 토큰 / 비용 집계
+- 모델 호출마다 prompt / completion 토큰 기록 (API usage가 없으면 로컬 추정: tiktoken이 있으면 사용, 없으면 문자 기반)
+- 세션 / 봇 / 호출 지점 / provider / 제품별 누적 → GET /stats/usage
+- 날짜별 롤업 파일 (USAGE_ROLLUP_DIR/usage-YYYY-MM-DD.json, 주기적으로 기존 파일에 더해서 저장)
+- 비용은 LLM_PRICES ("provider=입력/출력" 100만 토큰당 USD) 설정 시에만 계산
+
+ledger.record('purchase', 'friendli', bot='구매봇', product_id=1, prompt_tokens=230, completion_tokens=40)
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+
+try:
+    import fcntl  # 여러 워커가 같은 롤업 파일에 더할 때 잠금 (Windows에는 없음)
+except ImportError:
+    fcntl = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DIMENSIONS = ("session", "bot", "call_site", "provider", "product")
+MESSAGE_OVERHEAD_TOKENS = 4  # 채팅 형식의 메시지당 역할/구분 토큰
+
+_HANGUL = re.compile(r'[가-힣ㄱ-ㆎ]')
+_encoding = None
+
+_session: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('usage_session', default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    """텍스트 토큰 수 추정 (tiktoken o200k_base, 없으면 한글 음절당 1 + 나머지 4자당 1)"""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text))
+    hangul = len(_HANGUL.findall(text))
+    other = len(text) - hangul - text.count(' ')
+    return hangul + math.ceil(max(0, other) / 4)
+
+
+def estimate_messages(messages: List[Dict[str, Any]]) -> int:
+    """채팅 요청 prompt 토큰 수 추정"""
+    return sum(estimate_tokens(str(message.get('content', ''))) + MESSAGE_OVERHEAD_TOKENS for message in messages) + 2
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """'friendli=0.6/0.6,azure=2.5/10' → {provider: (입력, 출력)} (100만 토큰당 USD)"""
+    prices = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        provider, _, values = item.partition('=')
+        prompt, _, completion = values.partition('/')
+        try:
+            prices[provider.strip()] = (float(prompt), float(completion or prompt))
+        except ValueError:
+            print(f"LLM_PRICES 항목을 해석할 수 없습니다: {item}")
+    return prices
+
+
+class UsageTotals:
+    """호출 수 / 토큰 / 비용 누적"""
+
+    __slots__ = ('calls', 'prompt_tokens', 'completion_tokens', 'estimated_calls', 'cached_calls', 'cost_usd')
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_calls = 0
+        self.cached_calls = 0
+        self.cost_usd = 0.0
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost: float, estimated: bool, cached: bool):
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost_usd += cost
+        self.estimated_calls += estimated
+        self.cached_calls += cached
+
+    def merge(self, other: Dict[str, Any]):
+        for field in self.__slots__:
+            setattr(self, field, getattr(self, field) + other.get(field, 0))
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'total_tokens': self.total_tokens,
+            'estimated_calls': self.estimated_calls,
+            'cached_calls': self.cached_calls,
+            'cost_usd': round(self.cost_usd, 6),
+        }
+
+
+class _Rollup:
+    """차원별 누적 (session 차원은 최근 max_sessions개만 유지)"""
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self.totals = UsageTotals()
+        self.by: Dict[str, "OrderedDict[str, UsageTotals]"] = {dimension: OrderedDict() for dimension in DIMENSIONS}
+
+    def add(self, keys: Dict[str, Optional[str]], *values: Any):
+        self.totals.add(*values)
+        for dimension, key in keys.items():
+            if key is None:
+                continue
+            group = self.by[dimension]
+            totals = group.get(key)
+            if totals is None:
+                totals = group[key] = UsageTotals()
+                if dimension == "session" and len(group) > self.max_sessions:
+                    group.popitem(last=False)
+            elif dimension == "session":
+                group.move_to_end(key)
+            totals.add(*values)
+
+
+def _ranked(group: Dict[str, UsageTotals], limit: Optional[int]) -> List[Dict[str, Any]]:
+    """비용 → 토큰 순 (비용 설정이 없으면 토큰 순)"""
+    rows = sorted(group.items(), key=lambda item: (item[1].cost_usd, item[1].total_tokens), reverse=True)
+    return [{'key': key, **totals.to_dict()} for key, totals in rows[:limit]]
+
+
+class UsageLedger:
+    """프로세스 전체 토큰 / 비용 장부"""
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None, max_sessions: Optional[int] = None):
+        self.prices = parse_prices(Config.LLM_PRICES) if prices is None else prices
+        self.max_sessions = Config.USAGE_MAX_SESSIONS if max_sessions is None else max_sessions
+        self._lock = threading.Lock()
+        self._all = _Rollup(self.max_sessions)
+        self._pending: Dict[str, _Rollup] = {}  # 날짜별, 아직 롤업 파일에 더하지 않은 몫
+        self._pending_sessions: Dict[str, int] = {}  # 날짜별 새로 본 세션 수
+        self._seen_sessions: Dict[str, set] = {}
+        self.started = time.time()
+
+    def cost(self, provider: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = self.prices.get(provider, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record(self, call_site: str, provider: str, bot: Optional[str] = None, product_id: Any = None,
+               prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+               messages: Optional[List[Dict[str, Any]]] = None, content: Optional[str] = None,
+               cached: bool = False, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """호출 하나 기록 (usage가 없으면 messages / content로 추정, 캐시 응답은 토큰 0)"""
+        estimated = False
+        if cached:
+            prompt_tokens = completion_tokens = 0
+        else:
+            if prompt_tokens is None:
+                prompt_tokens = estimate_messages(messages or [])
+                estimated = True
+            if completion_tokens is None:
+                completion_tokens = estimate_tokens(content or "")
+                estimated = True
+        cost = self.cost(provider, prompt_tokens, completion_tokens)
+        session_id = session_id or _session.get()
+        keys = {
+            'session': session_id,
+            'bot': bot or "unknown",
+            'call_site': call_site,
+            'provider': provider,
+            'product': str(product_id) if product_id is not None else None,
+        }
+        values = (prompt_tokens, completion_tokens, cost, estimated, cached)
+        day = time.strftime('%Y-%m-%d')
+        with self._lock:
+            self._all.add(keys, *values)
+            pending = self._pending.get(day)
+            if pending is None:
+                pending = self._pending[day] = _Rollup(0)
+            pending.add({k: v for k, v in keys.items() if k != 'session'}, *values)
+            seen = self._seen_sessions.setdefault(day, set())
+            if session_id and session_id not in seen:
+                seen.add(session_id)
+                self._pending_sessions[day] = self._pending_sessions.get(day, 0) + 1
+        return {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                'estimated': estimated, 'cost_usd': cost}
+
+    def session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        totals = self._all.by['session'].get(session_id)
+        return totals.to_dict() if totals is not None else None
+
+    def report(self, limit: Optional[int] = 20) -> Dict[str, Any]:
+        """전체 합계 + 차원별 상위 항목 (비용 → 토큰 순), 세션당 평균"""
+        with self._lock:
+            sessions = self._all.by['session']
+            report = {
+                'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                'prices_configured': sorted(self.prices),
+                'totals': self._all.totals.to_dict(),
+                'by': {dimension: _ranked(self._all.by[dimension], limit) for dimension in DIMENSIONS},
+            }
+            if sessions:
+                report['per_session'] = {
+                    'sessions': len(sessions),
+                    'mean_tokens': round(sum(t.total_tokens for t in sessions.values()) / len(sessions), 1),
+                    'mean_cost_usd': round(sum(t.cost_usd for t in sessions.values()) / len(sessions), 6),
+                }
+        return report
+
+    def flush(self, directory: Optional[str] = None) -> List[str]:
+        """날짜별 롤업 파일에 기록되지 않은 몫을 더함 (스레드에서 호출, 쓴 파일 목록 반환)"""
+        directory = directory or Config.USAGE_ROLLUP_DIR
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            sessions, self._pending_sessions = self._pending_sessions, {}
+            today = time.strftime('%Y-%m-%d')
+            self._seen_sessions = {day: seen for day, seen in self._seen_sessions.items() if day == today}
+        if not pending:
+            return []
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        for day, rollup in sorted(pending.items()):
+            path = os.path.join(directory, f"usage-{day}.json")
+            try:
+                with _locked(path + '.lock'):
+                    _merge_rollup_file(path, day, rollup, sessions.get(day, 0))
+                written.append(path)
+            except OSError as e:
+                print(f"사용량 롤업 저장 실패: {e}")
+        return written
+
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """롤업 파일 읽기-더하기-쓰기 동안 다른 워커 대기 (fcntl이 없으면 잠금 없음)"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _merge_rollup_file(path: str, day: str, rollup: _Rollup, sessions: int):
+    data = {'date': day, 'sessions': 0, 'totals': {}, 'by': {}}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    totals = UsageTotals()
+    totals.merge(data.get('totals', {}))
+    totals.merge(rollup.totals.to_dict())
+    by = {}
+    for dimension in DIMENSIONS[1:]:
+        merged: Dict[str, UsageTotals] = {}
+        for key, values in data.get('by', {}).get(dimension, {}).items():
+            merged.setdefault(key, UsageTotals()).merge(values)
+        for key, values in rollup.by[dimension].items():
+            merged.setdefault(key, UsageTotals()).merge(values.to_dict())
+        by[dimension] = {key: values.to_dict() for key, values in
+                         sorted(merged.items(), key=lambda item: (item[1].cost_usd, item[1].total_tokens), reverse=True)}
+    data = {'date': day, 'sessions': data.get('sessions', 0) + sessions, 'totals': totals.to_dict(), 'by': by}
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+class RollupWriter:
+    """롤업 파일 주기 저장 (asyncio 태스크, 파일 쓰기는 스레드에서, USAGE_ROLLUP_DIR가 비어 있으면 저장 안 함)"""
+
+    def __init__(self, usage_ledger: UsageLedger, interval: Optional[float] = None):
+        self.ledger = usage_ledger
+        self.interval = Config.USAGE_FLUSH_INTERVAL if interval is None else interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def flush(self) -> List[str]:
+        if not Config.USAGE_ROLLUP_DIR:
+            return []
+        return await asyncio.to_thread(self.ledger.flush)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"사용량 롤업 저장 중 오류 발생: {e}")
+
+    def start(self) -> asyncio.Task:
+        """주기 저장 시작 (이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def stop(self):
+        """중지하고 남은 몫 저장"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+async def session_stream(session_id: str, events: AsyncIterator[str]) -> AsyncIterator[str]:
+    """SSE 이벤트 생성기 동안의 LLM 호출을 session_id로 집계"""
+    _session.set(session_id)
+    try:
+        async for event in events:
+            yield event
+    finally:
+        _session.set(None)
+
+
+ledger = UsageLedger()
+rollup_writer = RollupWriter(ledger)